@@ -13,6 +13,7 @@ from zoneinfo import ZoneInfo
 from flask import Flask, send_from_directory
 
 from app.extensions import cors, csrf, db, limiter, login_manager
+from app.json_provider import OrjsonProvider
 from app.logging_config import setup_logging
 from app.version import get_version
 from config import config_by_name
@@ -57,6 +58,10 @@ def create_app(config_name: str | None = None) -> Flask:
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
 
+    # jsonify/get_json via orjson (datetimes et scalaires NumPy geres nativement)
+    if app.config.get("JSON_FAST_PROVIDER"):
+        app.json = OrjsonProvider(app)
+
     # Garde-fous production : on refuse de demarrer sans secrets
     # pour eviter de se retrouver en prod avec la cle de dev
     if config_name == "production":
@@ -155,9 +160,15 @@ def create_app(config_name: str | None = None) -> Flask:
     # Bootstrap de la DB : creer les tables et l'admin au premier lancement
     with app.app_context():
         from app.admin.routes import ensure_admin_user
+        from app.services.engine_reliability_service import ensure_vehicle_reliability_map
+        from app.services.recall_index import load_recall_index
+        from app.services.transcript_index import ensure_transcript_index
 
         db.create_all()
+        ensure_transcript_index()
         ensure_admin_user()
+        ensure_vehicle_reliability_map()
+        load_recall_index()
 
     logger.info("OKazCar app created with config '%s'", config_name)
     return app
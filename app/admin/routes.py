@@ -5,12 +5,22 @@ import logging
 import re
 import threading
 import time
-import uuid
 from datetime import datetime, timedelta, timezone
 
-from flask import abort, current_app, flash, jsonify, redirect, render_template, request, url_for
+from flask import (
+    abort,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
 from flask_login import current_user, login_required, login_user, logout_user
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.admin import admin_bp
@@ -30,10 +40,10 @@ from app.models.youtube import YouTubeTranscript, YouTubeVideo
 
 logger = logging.getLogger(__name__)
 
-# ── Pipeline jobs (in-memory, thread-safe) ─────────────────────
-# Stocke les jobs de synthese YouTube en cours pour le suivi temps reel.
-_synthesis_jobs: dict[str, dict] = {}
-_jobs_lock = threading.Lock()
+# ── Pipeline jobs ───────────────────────────────────────────────
+# Les jobs de synthese YouTube sont suivis en base (app/services/job_store.py)
+# pour que le polling marche quel que soit le worker gunicorn.
+SYNTHESIS_PIPELINE = "llm_fiches"
 
 
 # ── Authentification ────────────────────────────────────────────
@@ -238,6 +248,14 @@ def dashboard():
         country_stats[cc]["market_refs"] = row.market_count
         country_stats[cc]["market_samples"] = row.sample_total or 0
 
+    # Volume des uploads de l'extension (compression gzip/br), 7 derniers jours
+    from app.services.analysis_cache import cache_hit_rate
+    from app.services.api_traffic_service import traffic_summary
+
+    api_traffic = traffic_summary(days=7)
+    # Taux de hit du cache des verdicts /api/analyze, 7 derniers jours
+    analysis_cache_stats = cache_hit_rate(days=7)
+
     return render_template(
         "admin/dashboard.html",
         total_scans=total_scans,
@@ -259,6 +277,8 @@ def dashboard():
         market_total_samples=market_total_samples,
         recent_market=recent_market,
         country_stats=sorted(country_stats.items(), key=lambda x: x[1]["scans"], reverse=True),
+        api_traffic=api_traffic,
+        analysis_cache_stats=analysis_cache_stats,
         now=now,
     )
 
@@ -625,6 +645,10 @@ def quick_add_vehicle():
         if years_to:
             vehicle.year_end = max(years_to)
         vehicle.enrichment_status = "partial"
+
+        from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
+
+        rebuild_vehicle_reliability_map(vehicle.id)
         db.session.commit()
         logger.info(
             "Auto-enriched %s %s: %d specs from CSV", brand_clean, model_clean, specs_created
@@ -654,6 +678,7 @@ def delete_vehicle():
     """Suppression d'un vehicule du referentiel (et ses specs associees)."""
     from app.models.vehicle import VehicleSpec
     from app.models.vehicle_observed_spec import VehicleObservedSpec
+    from app.models.vehicle_reliability_map import VehicleReliabilityMap
 
     vehicle_id = request.form.get("vehicle_id", type=int)
     if not vehicle_id:
@@ -670,6 +695,7 @@ def delete_vehicle():
 
     # Supprimer les dependances d'abord (pas de cascade en DB)
     VehicleObservedSpec.query.filter_by(vehicle_id=vehicle_id).delete()
+    VehicleReliabilityMap.query.filter_by(vehicle_id=vehicle_id).delete()
     specs_deleted = VehicleSpec.query.filter_by(vehicle_id=vehicle_id).delete()
     db.session.delete(vehicle)
     db.session.commit()
@@ -1151,6 +1177,7 @@ def pipelines():
     """Etat des pipelines d'enrichissement de donnees."""
     from app.models.argus import ArgusPrice
     from app.models.vehicle import VehicleSpec
+    from app.services.report_export_service import EXPORT_PIPELINE
 
     # Statistiques du referentiel
     vehicle_count = db.session.query(db.func.count(Vehicle.id)).scalar() or 0
@@ -1173,6 +1200,7 @@ def pipelines():
     last_argus = _last_run("argus_geolocalise")
     last_yt = _last_run("youtube_transcripts")
     last_llm = _last_run("llm_fiches")
+    last_export = _last_run(EXPORT_PIPELINE)
 
     # Stats YouTube
     yt_video_count = db.session.query(db.func.count(YouTubeVideo.id)).scalar() or 0
@@ -1228,6 +1256,14 @@ def pipelines():
             "last_run": last_llm.started_at if last_llm else None,
             "runs": _run_counts("llm_fiches"),
         },
+        {
+            "name": "Export rapports PDF",
+            "description": "Archives ZIP de rapports generees depuis l'admin",
+            "count": (last_export.count or 0) if last_export else 0,
+            "status": "non lance" if not last_export else last_export.status,
+            "last_run": last_export.started_at if last_export else None,
+            "runs": _run_counts(EXPORT_PIPELINE),
+        },
     ]
 
     # Dernier scan effectue
@@ -1248,6 +1284,147 @@ def pipelines():
     )
 
 
+# ── Export des rapports PDF ─────────────────────────────────────
+
+
+@admin_bp.route("/reports/export")
+@login_required
+def report_export():
+    """Formulaire d'export en masse des rapports PDF et derniers exports."""
+    from app.services.report_export_service import EXPORT_PIPELINE, export_max_scans
+
+    runs = (
+        PipelineRun.query.filter_by(name=EXPORT_PIPELINE)
+        .order_by(PipelineRun.started_at.desc())
+        .limit(10)
+        .all()
+    )
+    sources = [
+        source
+        for (source,) in db.session.query(ScanLog.source)
+        .filter(ScanLog.source.isnot(None))
+        .distinct()
+        .order_by(ScanLog.source)
+    ]
+    return render_template(
+        "admin/report_export.html",
+        runs=runs,
+        sources=sources,
+        max_scans=export_max_scans(),
+        form=request.args,
+        job_id=request.args.get("job_id", ""),
+    )
+
+
+@admin_bp.route("/reports/export", methods=["POST"])
+@login_required
+def report_export_run():
+    """Lance l'export ZIP des scans filtres en job de fond, puis suit le job."""
+    from app.services.job_store import create_job
+    from app.services.report_export_service import (
+        EXPORT_PIPELINE,
+        export_max_scans,
+        parse_export_filter,
+        purge_export_archives,
+        run_report_export,
+        select_export_scans,
+    )
+
+    form = {k: v for k, v in request.form.items() if k != "csrf_token"}
+    try:
+        flt = parse_export_filter(form)
+    except ValueError as exc:
+        flash(str(exc), "error")
+        return redirect(url_for("admin.report_export", **form))
+    if flt.is_empty():
+        flash("Indiquez au moins un critere de selection.", "error")
+        return redirect(url_for("admin.report_export"))
+
+    max_scans = export_max_scans()
+    scans = select_export_scans(flt, max_scans)
+    if not scans:
+        flash("Aucun scan ne correspond a ces criteres.", "warning")
+        return redirect(url_for("admin.report_export", **form))
+    if len(scans) > max_scans:
+        flash(
+            f"Plus de {max_scans} scans correspondent : affinez la selection.",
+            "warning",
+        )
+        return redirect(url_for("admin.report_export", **form))
+
+    purge_export_archives()
+    job = create_job(EXPORT_PIPELINE, {"form_data": form, "total": len(scans)})
+    app = current_app._get_current_object()
+    threading.Thread(
+        target=run_report_export,
+        args=(app, job, scans),
+        name=f"report-export-{job.key}",
+        daemon=True,
+    ).start()
+    return redirect(url_for("admin.report_export", job_id=job.key))
+
+
+@admin_bp.route("/reports/export/job-status/<job_id>")
+@login_required
+def report_export_status(job_id: str):
+    """API JSON pour le polling d'un export (une ligne PipelineJob)."""
+    from app.services.job_store import job_status
+
+    job = job_status(job_id)
+    if not job:
+        return jsonify({"error": "Job introuvable"}), 404
+    return jsonify(
+        {
+            "id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "progress_label": job["progress_label"],
+            "total": job.get("total", 0),
+            "download_url": (
+                url_for("admin.report_export_download", job_id=job_id)
+                if job["status"] == "done"
+                else None
+            ),
+        }
+    )
+
+
+@admin_bp.route("/reports/export/download/<job_id>")
+@login_required
+def report_export_download(job_id: str):
+    """Archive ZIP d'un export termine."""
+    from app.services.job_store import job_status
+    from app.services.report_export_service import export_archive_path
+
+    job = job_status(job_id)
+    if not job or not job_id.isalnum():
+        abort(404)
+    if job["status"] != "done":
+        return jsonify({"error": "Export en cours", "status": job["status"]}), 409
+    path = export_archive_path(job_id)
+    if not path.exists():
+        # Archive purgee, ou job termine sur un autre conteneur
+        abort(404)
+    return send_file(
+        path,
+        mimetype="application/zip",
+        as_attachment=True,
+        download_name=f"rapports_okazcar_{job_id}.zip",
+        max_age=0,
+    )
+
+
+@admin_bp.route("/reports/export/job-stop/<job_id>", methods=["POST"])
+@login_required
+def report_export_stop(job_id: str):
+    """Annule un export en cours (drapeau lu par le thread avant chaque rendu)."""
+    from app.services.job_store import request_cancel
+
+    if not request_cancel(job_id):
+        return jsonify({"error": "Job introuvable"}), 404
+    return jsonify({"ok": True, "message": "Annulation demandee"})
+
+
 # ── Matrice des filtres ───────────────────────────────────────────
 
 # Metadata statique : description, source, maturite de chaque filtre.
@@ -1952,6 +2129,10 @@ def engine_reliability_update():
     entry.weaknesses = request.form.get("weaknesses", "").strip() or None
     entry.match_patterns = request.form.get("match_patterns", "").strip() or None
 
+    # Score/patterns/carburant modifies : le matching precalcule doit suivre
+    from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
+
+    rebuild_vehicle_reliability_map()
     db.session.commit()
     flash(f"Moteur « {entry.engine_code} » mis a jour.", "success")
     return redirect(url_for("admin.engine_reliability"))
@@ -2015,7 +2196,13 @@ def youtube():
     total_results = query.count()
     total_pages = max(1, (total_results + per_page - 1) // per_page)
     page = min(page, total_pages)
-    videos = query.offset((page - 1) * per_page).limit(per_page).all()
+    # Transcripts charges avec la page (sans leur texte, differe)
+    videos = (
+        query.options(joinedload(YouTubeVideo.transcript))
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
 
     # Liste vehicules pour les dropdowns
     vehicle_list = Vehicle.query.order_by(Vehicle.brand, Vehicle.model).all()
@@ -2105,8 +2292,12 @@ def youtube_search():
 @login_required
 def youtube_archive(video_id: int):
     """Toggle l'archivage d'une video."""
+    from app.services.enrichment_bundle import invalidate_vehicle
+
     video = db.session.get(YouTubeVideo, video_id) or abort(404)
     video.is_archived = not video.is_archived
+    if video.is_featured:
+        invalidate_vehicle(video.vehicle_id)
     db.session.commit()
 
     action = "archivee" if video.is_archived else "restauree"
@@ -2122,7 +2313,11 @@ def youtube_featured(video_id: int):
     Une seule video featured par vehicule : si on marque celle-ci,
     les autres du meme vehicule perdent leur featured.
     """
+    from app.services.enrichment_bundle import invalidate_vehicle
+
     video = db.session.get(YouTubeVideo, video_id) or abort(404)
+    # Video featured servie dans /api/analyze (bundle d'enrichissement)
+    invalidate_vehicle(video.vehicle_id)
 
     if video.is_featured:
         # Retirer le featured
@@ -2245,8 +2440,9 @@ def youtube_fine_search():
     # Si job_id present sans params vehicule → restaurer form_data depuis le job
     job_id = request.args.get("job_id", "")
     if job_id and not form_data["make"]:
-        with _jobs_lock:
-            stored_job = _synthesis_jobs.get(job_id)
+        from app.services.job_store import job_status
+
+        stored_job = job_status(job_id)
         if stored_job:
             form_data = dict(stored_job.get("form_data", form_data))
 
@@ -2273,17 +2469,13 @@ def youtube_fine_search_run():
         flash("Marque et modele sont requis.", "error")
         return redirect(url_for("admin.youtube_fine_search"))
 
-    # Creer le job
-    job_id = str(uuid.uuid4())[:8]
-    job = {
-        "id": job_id,
-        "status": "running",
-        "progress": 0,
-        "progress_label": "Demarrage...",
+    from app.services.job_store import create_job
+
+    # Creer le job (PipelineRun + PipelineJob, visible de tous les workers)
+    state = {
         "pipeline_log": [],
         "videos_detail": [],
         "result": None,
-        "cancelled": False,
         "form_data": {
             "make": make,
             "model": model_name,
@@ -2298,8 +2490,7 @@ def youtube_fine_search_run():
             "prompt": request.form.get("prompt", "").strip() or _DEFAULT_SYNTHESIS_PROMPT,
         },
     }
-    with _jobs_lock:
-        _synthesis_jobs[job_id] = job
+    job = create_job(SYNTHESIS_PIPELINE, state)
 
     # Lancer le pipeline en background thread
     app = current_app._get_current_object()
@@ -2310,18 +2501,19 @@ def youtube_fine_search_run():
     )
     thread.start()
 
-    return redirect(url_for("admin.youtube_fine_search", job_id=job_id))
+    return redirect(url_for("admin.youtube_fine_search", job_id=job.key))
 
 
-def _run_synthesis_pipeline(app, job: dict) -> None:
+def _run_synthesis_pipeline(app, job) -> None:
     """Execute le pipeline YouTube+LLM dans un thread background.
 
     Etapes : vehicule → query YouTube → recherche + extraction → detail videos
     → synthese LLM → sauvegarde VehicleSynthesis. Chaque etape met a jour
-    le dict job pour le polling temps reel cote frontend.
-    Annulable a tout moment via job["cancelled"].
+    le job (job_store.JobHandle, ecrit en base) pour le polling temps reel
+    cote frontend. Annulable a tout moment via /youtube/job-stop, depuis
+    n'importe quel worker.
     """
-    from app.services.llm_service import generate_synthesis
+    from app.services.llm_service import synthesize_transcripts
     from app.services.youtube_service import build_search_query, search_and_extract_custom
 
     fd = job["form_data"]
@@ -2335,9 +2527,10 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                 "detail": detail,
             }
         )
+        job.save(force=True)
 
     def _is_cancelled() -> bool:
-        return job.get("cancelled", False)
+        return job.is_cancelled()
 
     with app.app_context():
         try:
@@ -2401,12 +2594,19 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                         ch.strip() for ch in fd["focus_channel"].split(",") if ch.strip()
                     ]
 
+                def _on_transcript(done: int, total: int) -> None:
+                    # Transcripts extraits au fil de l'eau : 15% -> 50%
+                    job["progress"] = 15 + int(35 * done / max(total, 1))
+                    job["progress_label"] = f"Extraction des transcripts : {done}/{total}"
+
                 stats = search_and_extract_custom(
                     query,
                     vehicle_id=vehicle_id,
                     max_results=fd["max_results"],
                     vehicle_year=year_int,
                     focus_channels=focus_channels,
+                    on_progress=_on_transcript,
+                    should_stop=_is_cancelled,
                 )
             except Exception as exc:
                 logger.exception("YouTube fine search failed: %s", exc)
@@ -2416,6 +2616,7 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                 job["progress_label"] = "Erreur recherche YouTube"
                 return
             search_duration = round(time.monotonic() - t0, 1)
+            job.record_stage("youtube", time.monotonic() - t0, stats["videos_found"], unit="videos")
             _log(
                 3,
                 f"Recherche YouTube ({search_duration}s)",
@@ -2452,17 +2653,36 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                 )
                 if has_transcript:
                     header = f"--- {yt_video.title} ({yt_video.channel_name}) ---"
-                    transcripts_parts.append(f"{header}\n{yt_video.transcript.full_text}")
+                    transcripts_parts.append((vid_id, header, yt_video.transcript.text))
 
             job["videos_detail"] = videos_detail
-            total_chars = sum(len(p) for p in transcripts_parts)
-            concatenated = "\n\n".join(transcripts_parts)
-            _log(
-                4,
-                "Videos et transcripts",
-                "ok" if transcripts_parts else "warning",
-                f"{len(videos_detail)} videos, {len(transcripts_parts)} avec transcript",
-            )
+            full_chars = sum(len(h) + len(t) + 1 for _, h, t in transcripts_parts)
+            detail = f"{len(videos_detail)} videos, {len(transcripts_parts)} avec transcript"
+            # Passages pertinents (index BM25) plutot que les transcripts entiers
+            passages = {}
+            if transcripts_parts and current_app.config.get("SYNTHESIS_RETRIEVAL_TOP_K", 6) > 0:
+                from app.services.transcript_index import retrieve_passages
+
+                try:
+                    passages = retrieve_passages([vid for vid, _, _ in transcripts_parts])
+                except Exception:  # noqa: BLE001
+                    db.session.rollback()
+                    logger.warning("Recherche de passages echouee", exc_info=True)
+            if passages:
+                transcripts_parts = [
+                    (header, "\n[...]\n".join(passages[vid]))
+                    for vid, header, _ in transcripts_parts
+                    if vid in passages
+                ]
+                total_chars = sum(len(h) + len(t) + 1 for h, t in transcripts_parts)
+                detail += (
+                    f", {sum(len(p) for p in passages.values())} passages retenus"
+                    f" ({total_chars}/{full_chars} caracteres)"
+                )
+            else:
+                transcripts_parts = [(header, full) for _, header, full in transcripts_parts]
+                total_chars = full_chars
+            _log(4, "Videos et transcripts", "ok" if transcripts_parts else "warning", detail)
             job["progress"] = 55
             if _is_cancelled():
                 job["status"] = "cancelled"
@@ -2490,7 +2710,7 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
             except (KeyError, IndexError):
                 prompt = fd["prompt"]
 
-            if concatenated and llm_model:
+            if transcripts_parts and llm_model:
                 job["progress_label"] = f"Generation LLM ({llm_model})..."
                 _log(
                     5,
@@ -2498,13 +2718,33 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                     "pending",
                     f"Prompt : {len(prompt)} chars, Input : {total_chars} chars",
                 )
+
+                def _on_progress(stage: str, done: int, total: int) -> None:
+                    # map : 55 -> 85 %, reduce puis generation finale en streaming
+                    if stage == "map":
+                        job["progress"] = 55 + int(30 * done / max(total, 1))
+                        job["progress_label"] = f"Resume des transcripts : {done}/{total}"
+                    elif stage == "reduce":
+                        job["progress_label"] = f"Fusion des resumes : {done}/{total}"
+                    else:
+                        job["progress_label"] = f"Generation LLM ({llm_model}) : {done} chars..."
+
                 t1 = time.monotonic()
+                synthesis = None
                 try:
-                    synthesis_text = generate_synthesis(llm_model, prompt, concatenated)
+                    synthesis = synthesize_transcripts(
+                        llm_model,
+                        prompt,
+                        transcripts_parts,
+                        on_progress=_on_progress,
+                        should_stop=_is_cancelled,
+                    )
+                    synthesis_text = synthesis.text
                 except ConnectionError as exc:
                     logger.error("Ollama synthesis failed: %s", exc)
                     synthesis_text = ""
                 llm_duration = round(time.monotonic() - t1, 1)
+                job.record_stage("llm", time.monotonic() - t1, total_chars, unit="caracteres")
 
                 if _is_cancelled():
                     job["status"] = "cancelled"
@@ -2519,11 +2759,17 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                     "status": "ok" if synthesis_text else "error",
                     "detail": (
                         f"{llm_model}, {len(synthesis_text)} chars en {llm_duration}s"
+                        + (
+                            f" ({synthesis.chunks} morceaux, {synthesis.cached_chunks} en cache)"
+                            if synthesis.chunks
+                            else ""
+                        )
                         if synthesis_text
                         else f"Echec generation avec {llm_model}"
                     ),
                 }
                 job["progress"] = 90
+                job.save(force=True)
 
                 # Store VehicleSynthesis
                 if synthesis_text:
@@ -2552,10 +2798,11 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
                         llm_model,
                         total_chars,
                     )
-            elif not concatenated:
+            elif not transcripts_parts:
                 _log(5, "Synthese LLM", "skip", "Aucun transcript, synthese impossible")
 
             # ── Termine ──
+            job.set_count(stats["transcripts_ok"])
             job["progress"] = 100
             job["progress_label"] = "Termine"
             job["status"] = "done"
@@ -2589,9 +2836,10 @@ def _run_synthesis_pipeline(app, job: dict) -> None:
 @admin_bp.route("/youtube/job-status/<job_id>")
 @login_required
 def youtube_job_status(job_id: str):
-    """API JSON pour le polling du statut d'un job pipeline."""
-    with _jobs_lock:
-        job = _synthesis_jobs.get(job_id)
+    """API JSON pour le polling du statut d'un job pipeline (une ligne indexee)."""
+    from app.services.job_store import job_status
+
+    job = job_status(job_id)
     if not job:
         return jsonify({"error": "Job introuvable"}), 404
     return jsonify(
@@ -2600,10 +2848,11 @@ def youtube_job_status(job_id: str):
             "status": job["status"],
             "progress": job["progress"],
             "progress_label": job["progress_label"],
-            "pipeline_log": job["pipeline_log"],
-            "videos_detail": job["videos_detail"],
-            "result": job["result"],
-            "form_data": job["form_data"],
+            "pipeline_log": job.get("pipeline_log", []),
+            "videos_detail": job.get("videos_detail", []),
+            "result": job.get("result"),
+            "form_data": job.get("form_data", {}),
+            "stages": job["stages"],
         }
     )
 
@@ -2611,12 +2860,11 @@ def youtube_job_status(job_id: str):
 @admin_bp.route("/youtube/job-stop/<job_id>", methods=["POST"])
 @login_required
 def youtube_job_stop(job_id: str):
-    """Annule un job pipeline en cours."""
-    with _jobs_lock:
-        job = _synthesis_jobs.get(job_id)
-    if not job:
+    """Annule un job pipeline en cours (drapeau lu par le thread du job)."""
+    from app.services.job_store import request_cancel
+
+    if not request_cancel(job_id):
         return jsonify({"error": "Job introuvable"}), 404
-    job["cancelled"] = True
     return jsonify({"ok": True, "message": "Annulation demandee"})
 
 
@@ -3203,6 +3451,12 @@ def llm_config():
     """
     from sqlalchemy import func
 
+    from app.services.llm_cache import cache_stats
+    from app.services.llm_usage_writer import flush_llm_usage
+
+    # Lignes LLMUsage encore en attente d'ecriture groupee
+    flush_llm_usage()
+
     today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
 
     # Stats du jour
@@ -3261,6 +3515,7 @@ def llm_config():
         gemini_config=gemini_cfg,
         prompts=prompts,
         daily_usage=daily_usage,
+        llm_cache=cache_stats(days=7),
         max_daily_requests=gemini_cfg.max_daily_requests if gemini_cfg else 500,
         max_daily_cost=gemini_cfg.max_daily_cost_eur if gemini_cfg else 1.0,
     )
@@ -3413,7 +3668,8 @@ def email_regenerate(draft_id):
     from app.services import email_service
 
     try:
-        new_draft = email_service.generate_email_draft(draft.scan_id)
+        # Regeneration : nouveau texte, pas la reponse en cache
+        new_draft = email_service.generate_email_draft(draft.scan_id, refresh=True)
         flash("Email regenere.", "success")
         return redirect(url_for("admin.email_detail", draft_id=new_draft.id))
     except (ValueError, ConnectionError) as exc:
@@ -2,10 +2,12 @@
 
 import logging
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, g, jsonify, request
 from werkzeug.exceptions import HTTPException
 
+from app.errors import RequestBodyError
 from app.extensions import db
+from app.services.api_traffic_service import record_request_bytes
 
 api_bp = Blueprint("api", __name__)
 
@@ -41,4 +43,37 @@ def _handle_unexpected_api_error(err):
     )
 
 
-from app.api import market_routes, routes  # noqa: E402, F401
+@api_bp.errorhandler(RequestBodyError)
+def _handle_request_body_error(err):
+    """Corps illisible (encodage, taille, flux corrompu) : code HTTP porte par l'exception."""
+    logger.warning("Request body rejected: %s", err)
+    return (
+        jsonify(
+            {
+                "success": False,
+                "error": err.code,
+                "message": str(err),
+                "data": None,
+            }
+        ),
+        err.status,
+    )
+
+
+@api_bp.after_request
+def _record_request_bytes(response):
+    """Comptabilise les octets recus par les endpoints qui lisent leur corps
+    via request_body.read_request_body() (best-effort, n'affecte jamais la reponse)."""
+    stats = g.pop("request_bytes", None)
+    if stats is None:
+        return response
+    try:
+        record_request_bytes(request.endpoint.rsplit(".", 1)[-1], *stats)
+        db.session.commit()
+    except Exception:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Request bytes stats not recorded", exc_info=True)
+    return response
+
+
+from app.api import market_routes, referential_routes, routes  # noqa: E402, F401
@@ -5,15 +5,19 @@ Ce module gere tout le cycle de collecte de l'argus maison :
 - /market-prices/next-job : indique a l'extension quel vehicule collecter ensuite
 - /market-prices/job-done : callback quand un job de collecte est termine
 - /market-prices/failed-search : rapport de recherche echouee (0 resultats)
+- /market-prices/lookup : lecture groupee des stats (prefetch de l'extension)
 
 Le systeme fonctionne en crowdsourcing : chaque extension Chrome active
 collecte des prix sur LBC/AS24/La Centrale et les remonte ici.
 """
 
+import hashlib
+import json
 import logging
 from datetime import datetime, timedelta, timezone
 
-from flask import jsonify, request
+import orjson
+from flask import current_app, jsonify, request
 from pydantic import BaseModel, Field
 from pydantic import ValidationError as PydanticValidationError
 from sqlalchemy import func
@@ -26,12 +30,15 @@ from app.models.vehicle import Vehicle
 from app.services.collection_job_service import expand_collection_jobs, pick_bonus_jobs
 from app.services.market_service import (
     MIN_SAMPLE_ABSOLUTE,
+    MarketStatsQuery,
     get_min_sample_count,
+    lookup_market_stats,
     market_text_key,
     market_text_key_expr,
     normalize_market_text,
     store_market_prices,
 )
+from app.services.request_body import read_request_body
 
 # Duree de fraicheur d'un prix marche avant qu'il soit considere "stale"
 FRESHNESS_DAYS = 7
@@ -80,14 +87,30 @@ def _lookup_site_tokens(make: str, model: str) -> dict:
     return result
 
 
+def _referential_version(with_tokens: bool) -> dict:
+    """Version courante du referentiel, pour l'extension qui en garde une copie."""
+    if with_tokens:
+        return {}
+    from app.services.referential_snapshot import current_referential_version
+
+    return {"referential_version": current_referential_version()}
+
+
 def _pick_and_serialize_bonus(
-    site: str = "lbc", country: str = "FR", tld: str = "", max_jobs: int = 3
+    site: str = "lbc",
+    country: str = "FR",
+    tld: str = "",
+    max_jobs: int = 3,
+    with_tokens: bool = True,
 ) -> list[dict]:
     """Pioche des jobs bonus dans la file d'attente et les serialise pour la reponse API.
 
     Les jobs bonus sont des collectes "piggyback" : pendant que l'extension
     est en train de collecter pour le vehicule courant, on lui donne 1-3
     vehicules supplementaires a collecter au passage.
+
+    ``with_tokens=False`` : l'extension a sa copie du referentiel
+    (/referential/snapshot), on ne resout pas les tokens LBC job par job.
     """
     if site == "as24":
         from app.services.collection_job_as24_service import pick_bonus_jobs_as24
@@ -151,8 +174,8 @@ def _pick_and_serialize_bonus(
         }
         # On ajoute les tokens LBC pour que l'extension puisse construire
         # les URLs de recherche avec les bons accents
-        tokens = _lookup_site_tokens(j.make, j.model)
-        entry.update(tokens)
+        if with_tokens:
+            entry.update(_lookup_site_tokens(j.make, j.model))
         result.append(entry)
     return result
 
@@ -243,8 +266,15 @@ def submit_market_prices():
 
     Retourne :
         { success: true, data: { sample_count: N, price_median: M } }
+
+    Le corps peut etre compresse (Content-Encoding gzip/br).
     """
-    json_data = request.get_json(silent=True)
+    json_data = None
+    if request.is_json:
+        try:
+            json_data = json.loads(read_request_body())
+        except ValueError:
+            json_data = None
     if not json_data:
         return jsonify(
             {
@@ -389,6 +419,149 @@ def submit_market_prices():
     )
 
 
+class MarketLookupItem(BaseModel):
+    """Une recherche de /market-prices/lookup (memes criteres que get_market_stats).
+
+    ``etag`` est celui recu pour cette recherche lors d'un appel precedent :
+    s'il n'a pas change, les stats ne sont pas renvoyees.
+    """
+
+    make: str = Field(min_length=1, max_length=80)
+    model: str = Field(min_length=1, max_length=80)
+    year: int = Field(ge=1990, le=2030)
+    region: str = Field(min_length=1, max_length=80)
+    fuel: str | None = Field(default=None, max_length=60)
+    hp_range: str | None = Field(default=None, max_length=20)
+    country: str | None = Field(default=None, max_length=5)
+    etag: str | None = Field(default=None, max_length=64)
+
+
+class MarketLookupRequest(BaseModel):
+    """Corps de /market-prices/lookup : la liste des recherches."""
+
+    items: list[MarketLookupItem] = Field(min_length=1)
+
+
+def _compact_market_stats(mp: MarketPrice | None) -> dict | None:
+    """Stats compactes d'un MarketPrice pour le cache de l'extension."""
+    if mp is None:
+        return None
+    return {
+        "year": mp.year,
+        "fuel": mp.fuel,
+        "hp_range": mp.hp_range,
+        "country": mp.country or "FR",
+        "median": mp.price_median,
+        "iqr_mean": mp.price_iqr_mean,
+        "p25": mp.price_p25,
+        "p75": mp.price_p75,
+        "min": mp.price_min,
+        "max": mp.price_max,
+        "n": mp.sample_count,
+        "precision": mp.precision,
+        "collected_at": mp.collected_at.isoformat() if mp.collected_at else None,
+        "refresh_after": mp.refresh_after.isoformat() if mp.refresh_after else None,
+    }
+
+
+def _market_etag(value) -> str:
+    """ETag court et stable d'une valeur JSON-serialisable."""
+    return hashlib.sha256(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+
+
+@api_bp.route("/market-prices/lookup", methods=["POST"])
+@limiter.limit("30/minute")
+def lookup_market_prices():
+    """Lecture groupee de l'argus maison pour le prefetch de l'extension.
+
+    Body JSON attendu :
+        { items: [{ make, model, year, region, fuel?, hp_range?, country?, etag? }, ...] }
+
+    Toutes les recherches sont resolues en une requete groupee, avec la meme
+    cascade que get_market_stats (annee, carburant, puissance).
+
+    Retourne :
+        { success: true, data: { items: [{ etag, unchanged, stats }, ...] } }
+    dans l'ordre des recherches. ``stats`` vaut null si aucun prix n'existe,
+    ou si ``unchanged`` (l'etag envoye est encore le bon). La reponse porte
+    un ETag global : If-None-Match identique -> 304 sans corps.
+    """
+    json_data = None
+    if request.is_json:
+        try:
+            json_data = json.loads(read_request_body())
+        except ValueError:
+            json_data = None
+    if not json_data:
+        return jsonify(
+            {
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": "Le corps de la requete doit etre du JSON valide.",
+                "data": None,
+            }
+        ), 400
+
+    try:
+        req = MarketLookupRequest.model_validate(json_data)
+    except PydanticValidationError as exc:
+        field_errors = [
+            f"{'.'.join(str(x) for x in e['loc'])}: {e['msg']}" for e in exc.errors()[:5]
+        ]
+        return jsonify(
+            {
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": "; ".join(field_errors) if field_errors else "Donnees invalides.",
+                "data": None,
+            }
+        ), 400
+
+    max_items = current_app.config.get("MARKET_LOOKUP_MAX_ITEMS", 200)
+    if len(req.items) > max_items:
+        return jsonify(
+            {
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": f"Trop de recherches : {max_items} maximum.",
+                "data": None,
+            }
+        ), 400
+
+    results = lookup_market_stats(
+        [
+            MarketStatsQuery(
+                item.make,
+                item.model,
+                item.year,
+                item.region,
+                item.fuel,
+                item.hp_range,
+                item.country,
+            )
+            for item in req.items
+        ]
+    )
+
+    items = []
+    for item, mp in zip(req.items, results):
+        stats = _compact_market_stats(mp)
+        etag = _market_etag(stats)
+        unchanged = item.etag == etag
+        items.append({"etag": etag, "unchanged": unchanged, "stats": None if unchanged else stats})
+
+    # ETag global = le corps exact (stats omises comprises)
+    response_etag = _market_etag([(entry["etag"], entry["unchanged"]) for entry in items])
+    if request.if_none_match.contains(response_etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = jsonify({"success": True, "error": None, "message": None, "data": {"items": items}})
+    resp.set_etag(response_etag)
+    # L'extension garde sa copie mais revalide a chaque fois
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
 def _persist_site_tokens(
     make: str, model: str, brand_token: str | None, model_token: str | None
 ) -> None:
@@ -714,6 +887,9 @@ def next_market_job():
 
     Query params :
         make, model, year (int), region, fuel, gearbox, hp_range, country, site, tld
+        ref_version : version du referentiel detenue par l'extension. Si present,
+            les tokens LBC/AS24 ne sont pas joints aux vehicules (l'extension les
+            lit dans sa copie) et la reponse porte ``referential_version``.
     """
     make = request.args.get("make")
     model = request.args.get("model")
@@ -725,6 +901,8 @@ def next_market_job():
     country = request.args.get("country") or "FR"
     site = request.args.get("site", "lbc")  # "lbc" | "as24"
     tld = request.args.get("tld", "")
+    # Extension avec copie locale du referentiel : pas de tokens job par job
+    with_tokens = not request.args.get("ref_version")
 
     if not all([make, model, year, region]):
         return jsonify({"success": True, "data": {"collect": False, "bonus_jobs": []}})
@@ -811,8 +989,10 @@ def next_market_job():
     current = MarketPrice.query.filter(*current_filters).first()
 
     if not current or current.collected_at < cutoff:
-        bonus = _pick_and_serialize_bonus(site=site, country=country_upper, tld=tld)
-        tokens = _lookup_site_tokens(make, model)
+        bonus = _pick_and_serialize_bonus(
+            site=site, country=country_upper, tld=tld, with_tokens=with_tokens
+        )
+        tokens = _lookup_site_tokens(make, model) if with_tokens else {}
         logger.info(
             "next-job: vehicule courant %s %s %s a collecter (+%d bonus)",
             make,
@@ -834,6 +1014,7 @@ def next_market_job():
                     "region": region,
                     "country": country_upper,
                     "bonus_jobs": bonus,
+                    **_referential_version(with_tokens),
                 },
             }
         )
@@ -900,8 +1081,10 @@ def next_market_job():
             best_candidate = (c.brand, c.model, mid_year)
 
     if best_candidate:
-        bonus = _pick_and_serialize_bonus(site=site, country=country_upper, tld=tld)
-        tokens = _lookup_site_tokens(best_candidate[0], best_candidate[1])
+        bonus = _pick_and_serialize_bonus(
+            site=site, country=country_upper, tld=tld, with_tokens=with_tokens
+        )
+        tokens = _lookup_site_tokens(*best_candidate[:2]) if with_tokens else {}
         logger.info(
             "next-job: redirection vers %s %s pour region %s (+%d bonus)",
             best_candidate[0],
@@ -924,14 +1107,26 @@ def next_market_job():
                     "region": region,
                     "country": country_upper,
                     "bonus_jobs": bonus,
+                    **_referential_version(with_tokens),
                 },
             }
         )
 
     # --- Etape 3 : Tout est a jour dans cette region ---
-    bonus = _pick_and_serialize_bonus(site=site, country=country_upper, tld=tld)
+    bonus = _pick_and_serialize_bonus(
+        site=site, country=country_upper, tld=tld, with_tokens=with_tokens
+    )
     logger.info("next-job: tout est a jour pour la region %s (+%d bonus)", region, len(bonus))
-    return jsonify({"success": True, "data": {"collect": False, "bonus_jobs": bonus}})
+    return jsonify(
+        {
+            "success": True,
+            "data": {
+                "collect": False,
+                "bonus_jobs": bonus,
+                **_referential_version(with_tokens),
+            },
+        }
+    )
 
 
 @api_bp.route("/market-prices/failed-search", methods=["POST"])
@@ -0,0 +1,55 @@
+"""Route API du snapshot versionne du referentiel vehicules.
+
+- /referential/snapshot : alias, formes d'affichage, tokens LBC, slugs AS24
+  et plages d'annees, complet ou en delta depuis une version connue
+  (voir app/services/referential_snapshot.py)
+"""
+
+import gzip
+import logging
+
+from flask import current_app, request
+
+from app.api import api_bp
+from app.extensions import limiter
+from app.services.referential_snapshot import build_referential_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sous ce seuil, gzip ne vaut pas l'aller-retour CPU (deltas vides ou minuscules)
+GZIP_MIN_BYTES = 512
+
+
+@api_bp.route("/referential/snapshot", methods=["GET"])
+@limiter.limit("30/minute")
+def referential_snapshot():
+    """Snapshot du referentiel pour la copie locale de l'extension.
+
+    Query params :
+        since : version deja detenue par l'extension (optionnel). Si elle
+                est encore exploitable, seul le delta est renvoye.
+
+    Retourne (JSON brut, sans enveloppe success/data pour rester compact) :
+        { version, since, full, vehicles: [...], removed: [ids],
+          brand_aliases, model_aliases, brand_display, model_display }
+    Les tables d'alias ne sont presentes que si ``full`` est vrai.
+
+    ETag faible = version + base du delta : If-None-Match identique -> 304.
+    Corps compresse en gzip si le client l'accepte.
+    """
+    since = request.args.get("since") or None
+    version, body = build_referential_snapshot(since)
+
+    etag = f"{version}:{since or 'full'}"
+    if request.if_none_match.contains_weak(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = current_app.response_class(body, mimetype="application/json")
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in request.accept_encodings:
+            resp.set_data(gzip.compress(body, compresslevel=6))
+            resp.headers["Content-Encoding"] = "gzip"
+        resp.vary.add("Accept-Encoding")
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.headers["X-Referential-Version"] = version
+    return resp
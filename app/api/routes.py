@@ -3,18 +3,30 @@
 Ce module contient les endpoints principaux consommes par l'extension Chrome :
 - /health : healthcheck pour monitoring
 - /analyze : coeur de l'app — analyse une annonce et retourne un score de confiance
+- /analyze/batch : analyse d'un lot d'annonces (page de resultats), en flux NDJSON
 - /email-draft : generation de brouillon email vendeur via Gemini
 - /scan-report : generation PDF du rapport d'analyse
+- /scan-report/jobs : rendu PDF asynchrone (demande, etat, telechargement)
 """
 
+import json
 import logging
 import re
 import traceback
+from collections.abc import Callable, Iterator
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
-from flask import current_app, jsonify, make_response, request
+from flask import (
+    current_app,
+    g,
+    jsonify,
+    make_response,
+    request,
+    stream_with_context,
+    url_for,
+)
 from pydantic import ValidationError as PydanticValidationError
 
 from app.api import api_bp
@@ -23,12 +35,28 @@ from app.extensions import db, limiter
 from app.filters.engine import FilterEngine
 from app.models.filter_result import FilterResultDB
 from app.models.scan import ScanLog
-from app.schemas.analyze import AnalyzeRequest, AnalyzeResponse
+from app.schemas.analyze import (
+    AnalyzeBatchItem,
+    AnalyzeBatchRequest,
+    AnalyzeRequest,
+    AnalyzeResponse,
+)
 from app.schemas.filter_result import FilterResultSchema
-from app.services import email_service
+from app.services import analysis_cache, email_service
 from app.services.currency_service import convert_to_eur
+from app.services.enrichment_bundle import get_enrichment
 from app.services.extraction import extract_ad_data
+from app.services.lbc_payload import parse_analyze_body
+from app.services.market_service import (
+    MarketSnapshot,
+    cached_market_snapshot,
+    prefetch_market_prices,
+    use_market_snapshot,
+)
+from app.services.metric_counter_service import increment_counter
+from app.services.request_body import read_request_body
 from app.services.scoring import calculate_score
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +99,25 @@ def analyze():
         ), 500
 
 
+def _read_analyze_json() -> dict | None:
+    """Lit le corps JSON de /api/analyze (None si absent ou invalide).
+
+    Le corps peut etre compresse (Content-Encoding gzip/br, voir
+    app/services/request_body.py). En mode rapide, seul props.pageProps.ad
+    est decode dans next_data (voir app/services/lbc_payload.py) ; sinon
+    parse JSON complet.
+    """
+    if not request.is_json:
+        return None
+    raw = read_request_body()
+    if current_app.config.get("ANALYZE_FAST_EXTRACTION"):
+        return parse_analyze_body(raw)
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
 def _do_analyze():
     """Logique interne de l'endpoint analyze, encapsulee pour le catch-all.
 
@@ -86,7 +133,7 @@ def _do_analyze():
     9. Construction de la reponse JSON
     """
     # --- 1. Validation de la requete ---
-    json_data = request.get_json(silent=True)
+    json_data = _read_analyze_json()
     if not json_data:
         return jsonify(
             {
@@ -143,6 +190,41 @@ def _do_analyze():
                 }
             ), 422
 
+    scan_source, rejection = _prepare_ad_data(req, ad_data)
+    if rejection is not None:
+        return jsonify(rejection), 422
+
+    # --- Mode rapide (listes, survols) : filtres locaux, rien n'est persiste ---
+    if req.quick:
+        return _quick_analysis(ad_data)
+
+    # --- Cache des verdicts : annonce deja analysee il y a peu ---
+    cache_key = _analysis_cache_key(ad_data, req.url, scan_source)
+    cached_entry = _lookup_cached_analysis(cache_key) if cache_key else None
+    if cached_entry is not None:
+        return _reused_verdict_response(
+            analysis_cache.entry_verdict(cached_entry),
+            req,
+            ad_data,
+            scan_source,
+            record=lambda: analysis_cache.record_lookup(cached_entry),
+        )
+
+    # --- Analyses identiques simultanees : un seul calcul (single-flight) ---
+    return _coalesced_analysis(req, json_data, ad_data, scan_source, cache_key)
+
+
+def _prepare_ad_data(req: AnalyzeRequest, ad_data: dict) -> tuple[str | None, dict | None]:
+    """Etapes 3 et 4 de l'analyse, communes a /analyze et /analyze/batch.
+
+    Canonicalise marque/modele, detecte le pays, convertit le prix en EUR
+    et calcule days_online (``ad_data`` est modifie en place), puis ecarte
+    les annonces hors voitures.
+
+    Returns:
+        (source du scan, None), ou (None, corps d'erreur 422) pour une
+        annonce refusee.
+    """
     # --- 3. Canonicalisation marque/modele ---
     # Aligne l'affichage (ex: "bmw" → "BMW"), le filtre L2 referentiel,
     # et les recherches de prix marche. Meme logique pour toutes les sources.
@@ -194,14 +276,12 @@ def _do_analyze():
     # Motos : categorie reconnue mais pas encore supportee
     if url_category == "motos":
         logger.info("NOT_SUPPORTED: category=motos, url=%s", url)
-        return jsonify(
-            {
-                "success": False,
-                "error": "NOT_SUPPORTED",
-                "message": "Les motos, c'est pas encore notre rayon... mais ca arrive tres vite !",
-                "data": {"category": "motos"},
-            }
-        ), 422
+        return None, {
+            "success": False,
+            "error": "NOT_SUPPORTED",
+            "message": "Les motos, c'est pas encore notre rayon... mais ca arrive tres vite !",
+            "data": {"category": "motos"},
+        }
 
     # Autres categories non-voiture sans attributs vehicule (LBC uniquement) :
     # equipement_auto, caravaning, etc. → on refuse poliment.
@@ -212,71 +292,103 @@ def _do_analyze():
             ad_data.get("make"),
             ad_data.get("model"),
         )
-        return jsonify(
-            {
-                "success": False,
-                "error": "NOT_A_VEHICLE",
-                "message": "C'est pas une bagnole... bien tente !",
-                "data": {"category": url_category or "inconnue"},
-            }
-        ), 422
+        return None, {
+            "success": False,
+            "error": "NOT_A_VEHICLE",
+            "message": "C'est pas une bagnole... bien tente !",
+            "data": {"category": url_category or "inconnue"},
+        }
+
+    return req.source or ("leboncoin" if is_lbc_source else "autoscout24"), None
+
+
+def _quick_analysis(ad_data: dict):
+    """Verdict rapide : filtres locaux uniquement (FilterEngine.run_quick).
+
+    L4/L5 lisent l'argus maison dans un instantane memoire du modele
+    (cached_market_snapshot) et le referentiel vehicule n'est pas consulte :
+    leurs replis sur l'argus seed sont ignores. Ni persistence, ni cache
+    d'analyse, ni enrichissements ; le score est toujours partiel.
+    """
+    from app.services.vehicle_lookup import build_vehicle_lookup_keys, use_resolved_vehicles
+
+    make, model = ad_data.get("make"), ad_data.get("model")
+    snapshot, vehicles = MarketSnapshot({}), {}
+    if make and model:
+        try:
+            snapshot = cached_market_snapshot(
+                make, model, current_app.config.get("QUICK_MARKET_CACHE_TTL", 300)
+            )
+        except Exception:  # noqa: BLE001 -- sans instantane, L4/L5 interrogent la base
+            db.session.rollback()
+            logger.warning("Quick market snapshot unavailable", exc_info=True)
+        # Referentiel non consulte : find_vehicle repond None sans requete
+        vehicles = {build_vehicle_lookup_keys(make, model): None}
+
+    engine = _build_engine()
+    with use_market_snapshot(snapshot), use_resolved_vehicles(vehicles):
+        filter_results = engine.run_quick(ad_data)
+    score, _ = calculate_score(filter_results)
+    # Aucune ecriture en mode rapide, pas meme le compteur de trafic
+    g.pop("request_bytes", None)
+    not_run = [r.filter_id for r in filter_results if (r.details or {}).get("quick_skipped")]
+
+    response = AnalyzeResponse(
+        score=score,
+        is_partial=True,
+        partial_reason=f"Mode rapide : {', '.join(not_run)} non évalués",
+        filters=_filter_schemas(filter_results),
+        vehicle=_vehicle_info(ad_data),
+        quick=True,
+    )
+    return jsonify({"success": True, "error": None, "message": None, "data": response.model_dump()})
+
 
+def _run_analysis(
+    req: AnalyzeRequest,
+    json_data: dict,
+    ad_data: dict,
+    scan_source: str,
+    cache_key: str | None,
+) -> tuple[Any, analysis_cache.Verdict | None]:
+    """Etapes 5 a 9 de l'analyse : filtres, score, persistence, enrichissements.
+
+    Returns:
+        (reponse Flask, verdict reutilisable par les requetes mutualisees ou
+        None si le scan n'a pas pu etre persiste).
+    """
     # --- 5. Execution des 11 filtres d'analyse ---
     engine = _build_engine()
     try:
         filter_results = engine.run_all(ad_data)
     except (KeyError, ValueError, AttributeError, TypeError, OSError) as exc:
         logger.error("Engine crash: %s: %s", type(exc).__name__, exc)
-        return jsonify(
+        error = jsonify(
             {
                 "success": False,
                 "error": "ENGINE_ERROR",
                 "message": "Erreur lors de l'analyse. Reessayez.",
                 "data": None,
             }
-        ), 500
+        )
+        return (error, 500), None
 
     # --- 6. Calcul du score ---
     score, is_partial = calculate_score(filter_results)
 
     # --- 7. Persistence (best-effort) ---
-    # On sauvegarde le scan et ses resultats en DB pour le dashboard admin
-    # et les stats. Si ca echoue, la reponse API part quand meme.
-    try:
-        scan = ScanLog(
-            url=req.url,
-            raw_data=json_data.get("next_data") or json_data.get("ad_data"),
-            score=score,
-            is_partial=is_partial,
-            vehicle_make=ad_data.get("make"),
-            vehicle_model=ad_data.get("model"),
-            price_eur=ad_data.get("price_eur"),
-            days_online=ad_data.get("days_online"),
-            republished=ad_data.get("republished", False),
-            source=req.source or ("leboncoin" if is_lbc_source else "autoscout24"),
-            country=(ad_data.get("country") or "FR").upper(),
-        )
-        db.session.add(scan)
-        db.session.flush()
-
-        for r in filter_results:
-            db.session.add(
-                FilterResultDB(
-                    scan_id=scan.id,
-                    filter_id=r.filter_id,
-                    status=r.status,
-                    score=r.score,
-                    message=r.message,
-                    details=r.details,
-                )
-            )
+    scan = _persist_scan(
+        req.url,
+        json_data.get("next_data") or json_data.get("ad_data"),
+        ad_data,
+        scan_source,
+        filter_results,
+        score,
+        is_partial,
+    )
 
-        db.session.commit()
-        logger.info("Persisted ScanLog id=%d score=%d", scan.id, score)
-    except Exception as exc:  # noqa: BLE001 -- best-effort, ne casse jamais la reponse
-        db.session.rollback()
-        scan = None
-        logger.warning("Failed to persist scan: %s: %s", type(exc).__name__, exc)
+    # Resume d'anciennete par modele (lu par L10 aux scans suivants)
+    _record_listing_age(scan)
 
     # --- 8a. Enrichissement motorisations observees (best-effort) ---
     # Alimente la table des motorisations crowdsourcees pour chaque scan.
@@ -303,39 +415,14 @@ def _do_analyze():
             logger.debug("Scan motorization enrichment skipped", exc_info=True)
 
     # --- 9. Construction de la reponse ---
-    filters_out = [
-        FilterResultSchema(
-            filter_id=r.filter_id,
-            status=r.status,
-            score=r.score,
-            message=r.message,
-            details=r.details,
-        )
-        for r in filter_results
-    ]
+    filters_out = _filter_schemas(filter_results)
 
-    # 8b. Video YouTube featured pour ce vehicule (best-effort)
-    featured_video = None
+    # 8b, 8c, 8e. Video YouTube featured, dimensions pneus et fiabilite moteur
+    # (best-effort) : precalcules par (vehicule, annee, carburant), une
+    # lecture de cache hors premier scan (voir enrichment_bundle)
     make = ad_data.get("make")
     model = ad_data.get("model")
-    if make and model:
-        try:
-            from app.services.youtube_service import get_featured_video
-
-            featured_video = get_featured_video(make, model)
-        except (OSError, ValueError, TypeError) as exc:
-            logger.debug("Featured video lookup failed: %s", exc)
-
-    # 8c. Dimensions pneus pour ce vehicule (best-effort)
-    tire_sizes_data = None
-    year = ad_data.get("year_model")
-    if make and model and year:
-        try:
-            from app.services.tire_service import get_tire_sizes
-
-            tire_sizes_data = get_tire_sizes(make, model, year)
-        except (OSError, ValueError, TypeError) as exc:
-            logger.debug("Tire sizes lookup failed: %s", exc)
+    enrichment = get_enrichment(make, model, ad_data.get("year_model"), ad_data.get("fuel"))
 
     # 8d. Remplissage background pneus pour un AUTRE vehicule ---
     # Strategie "piggyback" : a chaque scan, on profite du thread pour
@@ -364,50 +451,51 @@ def _do_analyze():
         except (OSError, ValueError, TypeError) as exc:
             logger.debug("Background tire fill failed: %s", exc)
 
-    # 8e. Fiabilite moteur (best-effort) ---
-    # On cherche la note de fiabilite du moteur correspondant a ce vehicule,
-    # en matchant sur le code moteur + type de carburant.
-    engine_reliability_data = None
-    if make and model:
-        try:
-            from app.models.vehicle import VehicleSpec
-            from app.services.engine_reliability_service import get_engine_reliability
-            from app.services.vehicle_lookup import find_vehicle
+    response = AnalyzeResponse(
+        scan_id=scan.id if scan else None,
+        score=score,
+        is_partial=is_partial,
+        filters=filters_out,
+        vehicle=_vehicle_info(ad_data),
+        featured_video=enrichment["featured_video"],
+        tire_sizes=enrichment["tire_sizes"],
+        engine_reliability=enrichment["engine_reliability"],
+    )
+
+    data = response.model_dump()
+    verdict = analysis_cache.Verdict(scan.id, score, is_partial, data) if scan else None
+    if cache_key and scan and current_app.config.get("ANALYSIS_CACHE_TTL", 0) > 0:
+        _store_cached_analysis(cache_key, ad_data, scan, data)
+
+    return jsonify(
+        {
+            "success": True,
+            "error": None,
+            "message": None,
+            "data": data,
+        }
+    ), verdict
 
-            veh = find_vehicle(make, model)
-            if veh:
-                fuel_raw = (ad_data.get("fuel") or "").lower()
-                specs = VehicleSpec.query.filter_by(vehicle_id=veh.id).all()
-                matched_spec = None
-                if specs:
-                    # On cherche la spec dont le fuel_type colle au carburant de l'annonce
-                    for s in specs:
-                        ft = (s.fuel_type or "").lower()
-                        if fuel_raw and (fuel_raw in ft or ft in fuel_raw):
-                            matched_spec = s
-                            break
-                    # Fallback : premiere spec si aucun match carburant
-                    if not matched_spec:
-                        matched_spec = specs[0]
-                if matched_spec and matched_spec.engine:
-                    rel = get_engine_reliability(matched_spec.engine, matched_spec.fuel_type)
-                    if rel:
-                        engine_reliability_data = {
-                            "score": rel.score,
-                            "stars": rel.stars,
-                            "engine_code": rel.engine_code,
-                            "brand": rel.brand,
-                            "note": rel.note,
-                            "matched": True,
-                        }
-                    else:
-                        engine_reliability_data = {"matched": False}
-        except (OSError, ValueError, TypeError, AttributeError) as exc:
-            logger.debug("Engine reliability lookup failed: %s", exc)
 
+def _filter_schemas(filter_results: list) -> list[FilterResultSchema]:
+    """Resultats des filtres au format de la reponse."""
+    return [
+        FilterResultSchema(
+            filter_id=r.filter_id,
+            status=r.status,
+            score=r.score,
+            message=r.message,
+            details=r.details,
+        )
+        for r in filter_results
+    ]
+
+
+def _vehicle_info(ad_data: dict) -> dict[str, Any]:
+    """Bloc ``vehicle`` de la reponse d'analyse."""
     vehicle_info: dict[str, Any] = {
-        "make": make,
-        "model": model,
+        "make": ad_data.get("make"),
+        "model": ad_data.get("model"),
         "year": ad_data.get("year_model"),
         "price": ad_data.get("price_eur"),
         "mileage": ad_data.get("mileage_km"),
@@ -416,28 +504,396 @@ def _do_analyze():
     if ad_data.get("price_original") is not None:
         vehicle_info["price_original"] = ad_data["price_original"]
         vehicle_info["currency"] = ad_data.get("currency_original", "EUR")
+    return vehicle_info
+
+
+def _persist_scan(
+    url: str | None,
+    raw_data: dict | None,
+    ad_data: dict,
+    scan_source: str,
+    filter_results: list,
+    score: int,
+    is_partial: bool,
+) -> ScanLog | None:
+    """Enregistre le scan et les resultats de ses filtres (commit), None en cas d'echec."""
+    # On sauvegarde le scan et ses resultats en DB pour le dashboard admin
+    # et les stats. Si ca echoue, la reponse API part quand meme.
+    try:
+        scan = ScanLog(
+            url=url,
+            raw_data=raw_data,
+            score=score,
+            is_partial=is_partial,
+            vehicle_make=ad_data.get("make"),
+            vehicle_model=ad_data.get("model"),
+            price_eur=ad_data.get("price_eur"),
+            days_online=ad_data.get("days_online"),
+            republished=ad_data.get("republished", False),
+            source=scan_source,
+            country=(ad_data.get("country") or "FR").upper(),
+        )
+        db.session.add(scan)
+        db.session.flush()
 
-    response = AnalyzeResponse(
-        scan_id=scan.id if scan else None,
-        score=score,
-        is_partial=is_partial,
-        filters=filters_out,
-        vehicle=vehicle_info,
-        featured_video=featured_video,
-        tire_sizes=tire_sizes_data,
-        engine_reliability=engine_reliability_data,
+        for r in filter_results:
+            db.session.add(
+                FilterResultDB(
+                    scan_id=scan.id,
+                    filter_id=r.filter_id,
+                    status=r.status,
+                    score=r.score,
+                    message=r.message,
+                    details=r.details,
+                )
+            )
+
+        db.session.commit()
+        logger.info("Persisted ScanLog id=%d score=%d", scan.id, score)
+    except Exception as exc:  # noqa: BLE001 -- best-effort, ne casse jamais la reponse
+        db.session.rollback()
+        scan = None
+        logger.warning("Failed to persist scan: %s: %s", type(exc).__name__, exc)
+    return scan
+
+
+def _record_listing_age(scan: ScanLog | None) -> None:
+    """Ajoute le scan au resume d'anciennete de son modele (best-effort)."""
+    if not scan or scan.days_online is None:
+        return
+    try:
+        from app.services.listing_age_service import record_scan_listing_age
+
+        record_scan_listing_age(scan)
+    except Exception as exc:  # noqa: BLE001 -- best-effort
+        db.session.rollback()
+        logger.warning("Failed to record listing age: %s: %s", type(exc).__name__, exc)
+
+
+def _analysis_cache_key(ad_data: dict, url: str | None, source: str) -> str | None:
+    """Empreinte de l'annonce (cache et single-flight), None si les deux sont coupes."""
+    if (
+        current_app.config.get("ANALYSIS_CACHE_TTL", 0) <= 0
+        and current_app.config.get("ANALYZE_SINGLE_FLIGHT", "off") == "off"
+    ):
+        return None
+    try:
+        return analysis_cache.analysis_fingerprint(ad_data, url, source)
+    except Exception:  # noqa: BLE001 -- le cache ne doit jamais bloquer l'analyse
+        logger.debug("Analysis fingerprint skipped", exc_info=True)
+        return None
+
+
+def _lookup_cached_analysis(cache_key: str):
+    """Entree de cache valide pour cette empreinte, ou None (best-effort)."""
+    if current_app.config.get("ANALYSIS_CACHE_TTL", 0) <= 0:
+        return None
+    try:
+        return analysis_cache.lookup_analysis(cache_key)
+    except Exception:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Analysis cache lookup failed", exc_info=True)
+        return None
+
+
+# Analyses en cours dans ce worker, par empreinte d'annonce
+_ANALYZE_FLIGHTS = SingleFlight()
+
+
+def _coalesced_analysis(
+    req: AnalyzeRequest,
+    json_data: dict,
+    ad_data: dict,
+    scan_source: str,
+    cache_key: str | None,
+):
+    """Lance l'analyse, ou reprend le verdict d'une analyse identique en cours.
+
+    ANALYZE_SINGLE_FLIGHT :
+    - "process" : les requetes identiques d'un meme worker attendent le
+      resultat du leader (SingleFlight),
+    - "db" : idem, plus un verrou en base (AnalysisLock) entre workers ; les
+      suiveurs relisent le verdict du leader dans le cache d'analyse (sans
+      cache, ANALYSIS_CACHE_TTL = 0, on revient a "process"),
+    - "off" : chaque requete calcule.
+    Avec des workers gunicorn sync, une seule requete tourne par worker :
+    seul "db" mutualise.
+    Un suiveur qui n'obtient pas de verdict (leader en echec, attente
+    depassee) calcule lui-meme.
+    """
+
+    def run():
+        return _run_analysis(req, json_data, ad_data, scan_source, cache_key)
+
+    mode = current_app.config.get("ANALYZE_SINGLE_FLIGHT", "off")
+    if not cache_key or mode == "off":
+        return run()[0]
+    if mode == "db" and current_app.config.get("ANALYSIS_CACHE_TTL", 0) <= 0:
+        # Pas de cache ou relire le verdict du leader
+        mode = "process"
+
+    wait = current_app.config.get("ANALYZE_SINGLE_FLIGHT_WAIT", 30)
+
+    def lead():
+        if mode != "db":
+            return run()
+        try:
+            acquired = analysis_cache.acquire_lock(cache_key, wait)
+        except Exception:  # noqa: BLE001 -- verrou best-effort
+            db.session.rollback()
+            logger.warning("Analysis lock unavailable", exc_info=True)
+            return run()
+        if not acquired:
+            # Un autre worker analyse la meme annonce : on attend son verdict
+            verdict = analysis_cache.wait_for_verdict(cache_key, wait)
+            return (None, verdict) if verdict is not None else run()
+        try:
+            return run()
+        finally:
+            try:
+                analysis_cache.release_lock(cache_key)
+            except Exception:  # noqa: BLE001 -- le verrou expirera de lui-meme
+                db.session.rollback()
+                logger.warning("Analysis lock release failed", exc_info=True)
+
+    (response, verdict), shared = _ANALYZE_FLIGHTS.do(cache_key, lead, timeout=wait)
+    if response is not None and not shared:
+        return response
+    if verdict is None:
+        return run()[0]
+    return _reused_verdict_response(
+        verdict,
+        req,
+        ad_data,
+        scan_source,
+        record=lambda: increment_counter(analysis_cache.COALESCED_COUNTER),
     )
 
-    return jsonify(
-        {
-            "success": True,
-            "error": None,
-            "message": None,
-            "data": response.model_dump(),
-        }
+
+def _reused_verdict_response(
+    verdict: analysis_cache.Verdict,
+    req: AnalyzeRequest,
+    ad_data: dict,
+    source: str,
+    record: Callable[[], None],
+):
+    """Repond avec un verdict deja calcule (cache ou leader), sans relancer les filtres.
+
+    La reponse garde le scan_id du scan complet d'origine : le rapport PDF
+    et l'email vendeur s'appuient sur ses filtres persistes.
+    """
+    _log_reused_scan(verdict, req.url, ad_data, source, record)
+    data = {**verdict.data, "scan_id": verdict.scan_id, "cached": True}
+    return jsonify({"success": True, "error": None, "message": None, "data": data})
+
+
+def _log_reused_scan(
+    verdict: analysis_cache.Verdict,
+    url: str | None,
+    ad_data: dict,
+    source: str,
+    record: Callable[[], None],
+) -> None:
+    """Journalise un scan servi par un verdict existant (best-effort).
+
+    ScanLog allege, sans resultats de filtres, raw_data pointant vers le
+    scan d'origine, pour les stats du dashboard ; ``record`` compte le hit
+    dans la meme transaction.
+    """
+    try:
+        scan = ScanLog(
+            url=url,
+            raw_data={"cached_scan_id": verdict.scan_id},
+            score=verdict.score,
+            is_partial=verdict.is_partial,
+            vehicle_make=ad_data.get("make"),
+            vehicle_model=ad_data.get("model"),
+            price_eur=ad_data.get("price_eur"),
+            days_online=ad_data.get("days_online"),
+            republished=ad_data.get("republished", False),
+            source=source,
+            country=(ad_data.get("country") or "FR").upper(),
+        )
+        db.session.add(scan)
+        record()
+        db.session.commit()
+        logger.info("Reused verdict: scan %d -> scan %d", scan.id, verdict.scan_id)
+    except Exception as exc:  # noqa: BLE001 -- best-effort, ne casse jamais la reponse
+        db.session.rollback()
+        scan = None
+        logger.warning("Failed to log reused scan: %s: %s", type(exc).__name__, exc)
+    _record_listing_age(scan)
+
+
+def _store_cached_analysis(cache_key: str, ad_data: dict, scan: ScanLog, data: dict) -> None:
+    """Met le verdict en cache et compte le miss (best-effort)."""
+    try:
+        analysis_cache.store_analysis(
+            cache_key,
+            ad_data,
+            scan_id=scan.id,
+            score=scan.score,
+            is_partial=bool(scan.is_partial),
+            data=data,
+            ttl_seconds=current_app.config["ANALYSIS_CACHE_TTL"],
+        )
+        analysis_cache.record_lookup(None)
+        db.session.commit()
+    except Exception as exc:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Failed to cache analysis: %s: %s", type(exc).__name__, exc)
+
+
+@api_bp.route("/analyze/batch", methods=["POST"])
+@limiter.limit("10/minute")
+def analyze_batch():
+    """Analyse un lot d'annonces pre-normalisees (page de resultats de recherche).
+
+    Attend ``{"items": [{url, ad_data, source}, ...]}`` et repond en flux
+    NDJSON : une ligne par annonce, au format de /analyze plus son ``index``
+    dans le lot, dans l'ordre ou les annonces se terminent.
+    """
+
+    def invalid(message: str):
+        return jsonify(
+            {
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": message,
+                "data": None,
+            }
+        ), 400
+
+    json_data = None
+    if request.is_json:
+        try:
+            json_data = json.loads(read_request_body())
+        except ValueError:
+            json_data = None
+    if not json_data:
+        return invalid("Le corps de la requete doit etre du JSON valide.")
+
+    try:
+        req = AnalyzeBatchRequest.model_validate(json_data)
+    except PydanticValidationError as exc:
+        logger.warning("Batch validation error: %s", exc)
+        return invalid("Donnees invalides. Verifiez le format du payload.")
+
+    max_items = current_app.config.get("ANALYZE_BATCH_MAX_ITEMS", 50)
+    if len(req.items) > max_items:
+        return invalid(f"Lot trop grand : {max_items} annonces maximum.")
+
+    return current_app.response_class(
+        stream_with_context(_analyze_batch_lines(req.items)),
+        mimetype="application/x-ndjson",
     )
 
 
+def _analyze_batch_lines(items: list[AnalyzeBatchItem]) -> Iterator[str]:
+    """Produit les lignes NDJSON de /analyze/batch.
+
+    1. Chaque annonce passe les etapes 3-4 de /analyze ; les annonces
+       refusees et celles deja dans le cache d'analyse partent tout de suite.
+    2. Les vehicules sont resolus une fois par modele et les MarketPrice du
+       lot charges en une requete groupee : find_vehicle, get_market_stats
+       et L5 relisent ces instantanes au lieu d'interroger la base.
+    3. Les filtres de toutes les annonces tournent dans un seul pool
+       (FilterEngine.run_many) ; chaque annonce terminee est scoree,
+       persistee et envoyee.
+
+    Pas d'enrichissements (video, pneus, fiabilite moteur) : l'extension les
+    obtient via /analyze a l'ouverture d'une annonce. Pour la meme raison,
+    les verdicts du lot ne sont pas mis en cache.
+    """
+    from app.services.vehicle_lookup import resolve_vehicles, use_resolved_vehicles
+
+    def line(index: int, payload: dict) -> str:
+        return current_app.json.dumps({"index": index, **payload}) + "\n"
+
+    def success(data: dict) -> dict:
+        return {"success": True, "error": None, "message": None, "data": data}
+
+    pending: list[tuple[int, AnalyzeBatchItem, dict, str]] = []
+    for index, item in enumerate(items):
+        ad_data = dict(item.ad_data)
+        if item.source:
+            ad_data["source"] = item.source
+        scan_source, rejection = _prepare_ad_data(
+            AnalyzeRequest(url=item.url, source=item.source), ad_data
+        )
+        if rejection is not None:
+            yield line(index, rejection)
+            continue
+
+        cache_key = _analysis_cache_key(ad_data, item.url, scan_source)
+        entry = _lookup_cached_analysis(cache_key) if cache_key else None
+        if entry is not None:
+            verdict = analysis_cache.entry_verdict(entry)
+            _log_reused_scan(
+                verdict,
+                item.url,
+                ad_data,
+                scan_source,
+                record=lambda entry=entry: analysis_cache.record_lookup(entry),
+            )
+            yield line(index, success({**verdict.data, "scan_id": verdict.scan_id, "cached": True}))
+            continue
+
+        pending.append((index, item, ad_data, scan_source))
+
+    if not pending:
+        return
+
+    models = [(ad_data.get("make"), ad_data.get("model")) for _, _, ad_data, _ in pending]
+    try:
+        snapshot = prefetch_market_prices(models)
+        vehicles = resolve_vehicles(models)
+    except Exception:  # noqa: BLE001 -- sans instantane, les filtres interrogent la base
+        db.session.rollback()
+        logger.warning("Batch prefetch failed", exc_info=True)
+        snapshot, vehicles = MarketSnapshot({}), {}
+
+    engine = _build_engine()
+    done: set[int] = set()
+    try:
+        with use_market_snapshot(snapshot), use_resolved_vehicles(vehicles):
+            for position, filter_results in engine.run_many([p[2] for p in pending]):
+                index, item, ad_data, scan_source = pending[position]
+                score, is_partial = calculate_score(filter_results)
+                scan = _persist_scan(
+                    item.url,
+                    item.ad_data,
+                    ad_data,
+                    scan_source,
+                    filter_results,
+                    score,
+                    is_partial,
+                )
+                _record_listing_age(scan)
+                response = AnalyzeResponse(
+                    scan_id=scan.id if scan else None,
+                    score=score,
+                    is_partial=is_partial,
+                    filters=_filter_schemas(filter_results),
+                    vehicle=_vehicle_info(ad_data),
+                )
+                yield line(index, success(response.model_dump()))
+                done.add(position)
+    except (KeyError, ValueError, AttributeError, TypeError, OSError) as exc:
+        logger.error("Batch engine crash: %s: %s", type(exc).__name__, exc)
+        for position, (index, *_rest) in enumerate(pending):
+            if position not in done:
+                yield line(
+                    index,
+                    {
+                        "success": False,
+                        "error": "ENGINE_ERROR",
+                        "message": "Erreur lors de l'analyse. Reessayez.",
+                        "data": None,
+                    },
+                )
+
+
 def _build_engine() -> FilterEngine:
     """Construit et retourne un FilterEngine avec les 11 filtres enregistres.
 
@@ -557,7 +1013,9 @@ def email_draft():
 def scan_report():
     """Genere et retourne le rapport PDF d'un scan existant.
 
-    Le PDF est genere a la volee via WeasyPrint et renvoye en attachment.
+    Le PDF est rendu via WeasyPrint au premier appel puis resservi depuis le
+    cache (ReportArtifact) tant que ses entrees ne changent pas. L'ETag est
+    l'empreinte de ces entrees : If-None-Match identique -> 304, sans rendu.
     L'extension le telecharge directement cote navigateur.
     """
     data = request.get_json(silent=True) or {}
@@ -586,9 +1044,15 @@ def scan_report():
         ), 400
 
     try:
-        from app.services.report_html_service import generate_scan_report_pdf
-
-        pdf_bytes = generate_scan_report_pdf(scan_id_int)
+        from app.services.report_artifact_service import get_or_render_scan_report
+        from app.services.report_html_service import scan_report_fingerprint
+
+        fingerprint = scan_report_fingerprint(scan_id_int)
+        if request.if_none_match.contains(fingerprint):
+            response = current_app.response_class(status=304)
+            response.set_etag(fingerprint)
+            return response
+        fingerprint, pdf_bytes = get_or_render_scan_report(scan_id_int, fingerprint)
     except ValueError as exc:
         return jsonify(
             {
@@ -609,9 +1073,131 @@ def scan_report():
             }
         ), 500
 
+    return _pdf_response(scan_id_int, fingerprint, pdf_bytes)
+
+
+def _pdf_response(scan_id: int, fingerprint: str, pdf_bytes: bytes):
+    """Reponse PDF en attachment, avec l'empreinte des entrees en ETag."""
     response = make_response(pdf_bytes)
     response.headers["Content-Type"] = "application/pdf"
     response.headers["Content-Disposition"] = (
-        f'attachment; filename="okazcar-rapport-{scan_id_int}.pdf"'
+        f'attachment; filename="okazcar-rapport-{scan_id}.pdf"'
     )
+    response.set_etag(fingerprint)
+    response.headers["Cache-Control"] = "private, no-cache"
     return response
+
+
+@api_bp.route("/scan-report/jobs", methods=["POST"])
+def scan_report_job():
+    """Demande le rapport PDF d'un scan sans attendre le rendu.
+
+    Body JSON : { scan_id }. Retourne 202 + job_id (200 si deja pret) ;
+    l'extension suit /scan-report/jobs/<job_id> puis telecharge
+    /scan-report/jobs/<job_id>/pdf.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        scan_id = int(data.get("scan_id"))
+    except (TypeError, ValueError):
+        return jsonify(
+            {
+                "success": False,
+                "error": "VALIDATION_ERROR",
+                "message": "scan_id requis",
+                "data": None,
+            }
+        ), 400
+
+    from app.services.report_artifact_service import submit_report_job
+
+    try:
+        job_id, status = submit_report_job(scan_id)
+    except ValueError as exc:
+        return jsonify(
+            {"success": False, "error": "NOT_FOUND", "message": str(exc), "data": None}
+        ), 404
+
+    return jsonify(
+        {
+            "success": True,
+            "error": None,
+            "message": None,
+            "data": {
+                "job_id": job_id,
+                "status": status,
+                "status_url": url_for("api.scan_report_job_status", job_id=job_id),
+                "download_url": url_for("api.scan_report_job_pdf", job_id=job_id),
+            },
+        }
+    ), (200 if status == "done" else 202)
+
+
+@api_bp.route("/scan-report/jobs/<job_id>", methods=["GET"])
+def scan_report_job_status(job_id: str):
+    """Etat d'un rendu demande via /scan-report/jobs : pending, done ou error."""
+    from app.services.report_artifact_service import report_job_status
+
+    state = report_job_status(job_id)
+    if state is None:
+        return jsonify(
+            {
+                "success": False,
+                "error": "NOT_FOUND",
+                "message": "Rapport inconnu ou expire.",
+                "data": None,
+            }
+        ), 404
+    status, error = state
+    return jsonify(
+        {
+            "success": True,
+            "error": None,
+            "message": None,
+            "data": {"job_id": job_id, "status": status, "error": error},
+        }
+    )
+
+
+@api_bp.route("/scan-report/jobs/<job_id>/pdf", methods=["GET"])
+def scan_report_job_pdf(job_id: str):
+    """Telecharge le PDF d'un rendu termine (409 tant qu'il est en cours)."""
+    from app.services.report_artifact_service import report_job_result, report_job_status
+
+    result = report_job_result(job_id)
+    if result is None:
+        state = report_job_status(job_id)
+        if state is None:
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "NOT_FOUND",
+                    "message": "Rapport inconnu ou expire.",
+                    "data": None,
+                }
+            ), 404
+        status, error = state
+        if status == "error":
+            return jsonify(
+                {
+                    "success": False,
+                    "error": "PDF_GENERATION_ERROR",
+                    "message": error,
+                    "data": None,
+                }
+            ), 500
+        return jsonify(
+            {
+                "success": False,
+                "error": "NOT_READY",
+                "message": "Rapport en cours de generation.",
+                "data": {"job_id": job_id, "status": status},
+            }
+        ), 409
+
+    fingerprint, pdf_bytes = result
+    if request.if_none_match.contains(fingerprint):
+        response = current_app.response_class(status=304)
+        response.set_etag(fingerprint)
+        return response
+    return _pdf_response(int(job_id.partition("-")[0]), fingerprint, pdf_bytes)
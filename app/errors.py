@@ -49,3 +49,17 @@ class ValidationError(OKazCarError):
     Levee par les schemas Pydantic ou les validations manuelles
     avant le traitement metier.
     """
+
+
+class RequestBodyError(ValidationError):
+    """Corps de requete illisible : encodage non supporte, flux corrompu ou trop gros.
+
+    Porte le code HTTP et le code d'erreur API a renvoyer a l'extension
+    (413 pour un corps qui depasse la limite, 415 pour un Content-Encoding
+    inconnu, 400 sinon).
+    """
+
+    def __init__(self, message: str, status: int = 400, code: str = "INVALID_BODY"):
+        super().__init__(message)
+        self.status = status
+        self.code = code
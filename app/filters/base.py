@@ -38,9 +38,13 @@ class BaseFilter(ABC):
     Les sous-classes doivent implementer :
         - filter_id: attribut de classe identifiant le filtre (ex. "L1")
         - run(data): execute la logique du filtre et retourne un FilterResult
+
+    ``quick_safe`` marque les filtres sans appel reseau ni lecture en base non
+    cachee : seuls ceux-la tournent en mode rapide (FilterEngine.run_quick).
     """
 
     filter_id: str = ""
+    quick_safe: bool = False
 
     @abstractmethod
     def run(self, data: dict[str, Any]) -> FilterResult:
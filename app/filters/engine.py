@@ -8,8 +8,10 @@ La parallelisation est importante car certains filtres font des appels reseau
 (L7 SIRET, L4 market stats) qui bloqueraient sinon l'ensemble de la chaine.
 """
 
+import contextvars
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import Any
 
 import httpx
@@ -24,6 +26,10 @@ logger = logging.getLogger(__name__)
 # Au-dela, on gaspille des threads pour rien.
 MAX_WORKERS = 11
 
+# Pool partage par toutes les annonces d'un lot (run_many) : les filtres
+# reseau (L7) attendent, les autres calculent pendant ce temps.
+BATCH_MAX_WORKERS = 16
+
 
 class FilterEngine:
     """Execute les filtres enregistres en parallele et collecte les resultats.
@@ -120,40 +126,112 @@ class FilterEngine:
 
         with ThreadPoolExecutor(max_workers=workers) as executor:
             future_to_filter = {
-                executor.submit(self._execute_filter, filt, data, app): filt
-                for filt in self._filters
+                executor.submit(*self._submit_args(filt, data, app)): filt for filt in self._filters
             }
             for future in as_completed(future_to_filter):
-                filt = future_to_filter[future]
-                try:
-                    results.append(future.result())
-                except (
-                    KeyError,
-                    ValueError,
-                    AttributeError,
-                    TypeError,
-                    OSError,
-                    httpx.HTTPError,
-                ) as exc:
-                    # Filet de securite : si le thread crash malgre le try/except
-                    # dans _execute_filter, on catch ici aussi
-                    logger.error(
-                        "Filter %s thread crashed: %s: %s",
-                        filt.filter_id,
-                        type(exc).__name__,
-                        exc,
-                    )
-                    results.append(
-                        FilterResult(
-                            filter_id=filt.filter_id,
-                            status="skip",
-                            score=0.0,
-                            message="Erreur inattendue — ce filtre a été ignoré",
-                            details={"error": type(exc).__name__},
-                        )
-                    )
+                results.append(self._collect(future, future_to_filter[future]))
 
         # Trier par filter_id pour un ordre constant dans le rapport
         results.sort(key=lambda r: r.filter_id)
         logger.info("Engine ran %d filters", len(results))
         return results
+
+    def run_quick(self, data: dict[str, Any]) -> list[FilterResult]:
+        """Mode rapide : seuls les filtres ``quick_safe`` tournent, dans le thread appelant.
+
+        Pas de pool de threads (son cout depasserait celui des filtres
+        locaux). Les autres filtres (reseau, referentiel) sont rendus
+        neutral, donc exclus du score, avec ``details["quick_skipped"]``.
+        """
+        results = [
+            self._execute_filter(filt, data)
+            if filt.quick_safe
+            else filt.neutral("Non évalué en mode rapide", {"quick_skipped": True})
+            for filt in self._filters
+        ]
+        results.sort(key=lambda r: r.filter_id)
+        return results
+
+    def run_many(
+        self, items: list[dict[str, Any]], max_workers: int = BATCH_MAX_WORKERS
+    ) -> Iterator[tuple[int, list[FilterResult]]]:
+        """Execute les filtres de plusieurs annonces dans un seul pool de threads.
+
+        Evite de creer un pool de 11 threads par annonce (/api/analyze/batch) :
+        toutes les paires (annonce, filtre) partagent ``max_workers`` threads.
+
+        Yields:
+            (index de l'annonce, resultats tries par filter_id), dans l'ordre
+            ou les annonces se terminent.
+        """
+        if not items:
+            return
+        if not self._filters:
+            logger.warning("No filters registered in engine")
+            for index in range(len(items)):
+                yield index, []
+            return
+
+        try:
+            app = current_app._get_current_object()
+        except RuntimeError:
+            app = None
+
+        pending = [len(self._filters)] * len(items)
+        results: list[list[FilterResult]] = [[] for _ in items]
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            future_to_item = {
+                executor.submit(*self._submit_args(filt, data, app)): (index, filt)
+                for index, data in enumerate(items)
+                for filt in self._filters
+            }
+            for future in as_completed(future_to_item):
+                index, filt = future_to_item[future]
+                results[index].append(self._collect(future, filt))
+                pending[index] -= 1
+                if pending[index] == 0:
+                    results[index].sort(key=lambda r: r.filter_id)
+                    yield index, results[index]
+        finally:
+            # Client deconnecte en cours de flux : on n'execute pas le reste
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _submit_args(self, filt: BaseFilter, data: dict[str, Any], app) -> tuple:
+        """Arguments d'executor.submit pour un filtre.
+
+        Le contexte (contextvars) de l'appelant suit le filtre dans son
+        thread : les instantanes prefetches d'un lot (market_service,
+        vehicle_lookup) y restent visibles.
+        """
+        ctx = contextvars.copy_context()
+        return ctx.run, self._execute_filter, filt, data, app
+
+    @staticmethod
+    def _collect(future: Future, filt: BaseFilter) -> FilterResult:
+        """Resultat d'un filtre termine, ou skip si son thread a crashe."""
+        try:
+            return future.result()
+        except (
+            KeyError,
+            ValueError,
+            AttributeError,
+            TypeError,
+            OSError,
+            httpx.HTTPError,
+        ) as exc:
+            # Filet de securite : si le thread crash malgre le try/except
+            # dans _execute_filter, on catch ici aussi
+            logger.error(
+                "Filter %s thread crashed: %s: %s",
+                filt.filter_id,
+                type(exc).__name__,
+                exc,
+            )
+            return FilterResult(
+                filter_id=filt.filter_id,
+                status="skip",
+                score=0.0,
+                message="Erreur inattendue — ce filtre a été ignoré",
+                details={"error": type(exc).__name__},
+            )
@@ -9,12 +9,11 @@ Le seuil varie selon le segment du vehicule :
 - Un vehicule premium a 60 000 EUR peut rester 2-3 mois sans que ce soit anormal
 
 Quand on a assez de data historique (scans precedents), on utilise la mediane
-reelle du marche au lieu des seuils statiques.
+reelle du marche au lieu des seuils statiques. Cette mediane est maintenue
+incrementalement par listing_age_service a chaque scan persiste.
 """
 
 import logging
-import statistics
-from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from app.filters.base import BaseFilter, FilterResult
@@ -35,10 +34,6 @@ PREMIUM_THRESHOLD_DAYS = 75  # >50k EUR : premium/niche, temps de vente plus lon
 # En dessous, les stats ne sont pas fiables
 MIN_MARKET_SAMPLES = 5
 
-# Fenetre de temps pour les scans historiques (jours)
-# On ne regarde que les 3 derniers mois pour rester representatif
-MARKET_LOOKBACK_DAYS = 90
-
 
 def _threshold_for_price(price_eur: int | None) -> int:
     """Retourne le seuil de jours en fonction du prix du vehicule.
@@ -55,32 +50,14 @@ def _threshold_for_price(price_eur: int | None) -> int:
 
 
 def _get_market_median_days(make: str, model: str) -> int | None:
-    """Calcule la mediane des days_online pour un make/model depuis ScanLog.
+    """Retourne la mediane des days_online pour un make/model (scans des 90 derniers jours).
 
-    Utilise les scans des 90 derniers jours pour ce modele.
+    Lecture O(1) du resume ListingAgeStat, sans requete sur ScanLog.
     Retourne None si pas assez de donnees (<MIN_MARKET_SAMPLES).
     """
-    from app.models.scan import ScanLog
-
-    cutoff = datetime.now(timezone.utc) - timedelta(days=MARKET_LOOKBACK_DAYS)
-
-    rows = (
-        ScanLog.query.filter(
-            ScanLog.vehicle_make.ilike(make),
-            ScanLog.vehicle_model.ilike(model),
-            ScanLog.days_online.isnot(None),
-            ScanLog.created_at >= cutoff,
-        )
-        .with_entities(ScanLog.days_online)
-        .all()
-    )
-
-    values = [r.days_online for r in rows if r.days_online is not None and r.days_online >= 0]
-
-    if len(values) < MIN_MARKET_SAMPLES:
-        return None
+    from app.services.listing_age_service import get_market_median_days
 
-    return round(statistics.median(values))
+    return get_market_median_days(make, model, MIN_MARKET_SAMPLES)
 
 
 class L10ListingAgeFilter(BaseFilter):
@@ -95,6 +72,8 @@ class L10ListingAgeFilter(BaseFilter):
     """
 
     filter_id = "L10"
+    # Mode rapide : une lecture du resume ListingAgeStat
+    quick_safe = True
 
     def run(self, data: dict[str, Any]) -> FilterResult:
         days_online = data.get("days_online")
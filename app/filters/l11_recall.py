@@ -4,15 +4,14 @@ Les rappels constructeur sont des defauts de fabrication identifies apres la mis
 circulation. C'est un signal fort : un rappel non traite peut impacter la securite
 (freinage, airbag, direction...) et la valeur de revente.
 
-Les donnees proviennent de la table manufacturer_recalls, alimentee par les seeds.
-Si la table n'existe pas encore (migration pas jouee), le filtre se desactive sans crasher.
+Les donnees proviennent de la table manufacturer_recalls, alimentee par les seeds,
+chargee en memoire par app/services/recall_index.py. Si la table n'existe pas
+encore (migration pas jouee), le filtre se desactive sans crasher.
 """
 
 import logging
 from typing import Any
 
-from sqlalchemy.exc import OperationalError
-
 from app.filters.base import BaseFilter, FilterResult
 
 logger = logging.getLogger(__name__)
@@ -25,6 +24,8 @@ MAX_YEAR = 2100
 def _find_recalls(make: str, model: str, year: int) -> list[dict[str, Any]]:
     """Recherche les rappels constructeur pour un vehicule donne.
 
+    Lit l'index memoire de recall_index (pas de requete par scan).
+
     Args:
         make: Marque du vehicule.
         model: Modele du vehicule.
@@ -33,35 +34,11 @@ def _find_recalls(make: str, model: str, year: int) -> list[dict[str, Any]]:
     Returns:
         Liste de dicts avec recall_type, description, gov_url, severity.
     """
-    from app.models.manufacturer_recall import ManufacturerRecall
-    from app.services.vehicle_lookup import find_vehicle
-
-    vehicle = find_vehicle(make, model)
-    if not vehicle:
-        return []
+    from app.services.recall_index import find_recalls
 
     # Filtre par plage d'annees de production : un rappel concerne les vehicules
     # fabriques entre year_start et year_end (pas l'annee de l'annonce)
-    try:
-        recalls = ManufacturerRecall.query.filter(
-            ManufacturerRecall.vehicle_id == vehicle.id,
-            ManufacturerRecall.year_start <= year,
-            ManufacturerRecall.year_end >= year,
-        ).all()
-    except OperationalError:
-        # Table pas encore creee (migration pas jouee) : on skip sans crasher
-        logger.warning("Table manufacturer_recalls absente — filtre L11 desactive")
-        return []
-
-    return [
-        {
-            "recall_type": r.recall_type,
-            "description": r.description,
-            "gov_url": r.gov_url,
-            "severity": r.severity,
-        }
-        for r in recalls
-    ]
+    return find_recalls(make, model, year)
 
 
 class L11RecallFilter(BaseFilter):
@@ -25,6 +25,7 @@ class L1ExtractionFilter(BaseFilter):
     """Verifie que les donnees extraites de l'annonce contiennent les champs critiques et valides."""
 
     filter_id = "L1"
+    quick_safe = True
 
     def run(self, data: dict[str, Any]) -> FilterResult:
         """Verifie la completude des donnees extraites par l'extension.
@@ -28,6 +28,7 @@ class L3CoherenceFilter(BaseFilter):
     """
 
     filter_id = "L3"
+    quick_safe = True
 
     @staticmethod
     def _parse_fiscal_power_cv(raw: Any) -> int | None:
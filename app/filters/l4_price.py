@@ -12,6 +12,8 @@ class L4PriceFilter(BaseFilter):
     """Compare le prix de l'annonce a la reference argus pour la region."""
 
     filter_id = "L4"
+    # Mode rapide : argus maison lu dans l'instantane memoire (market_service)
+    quick_safe = True
 
     # Seuil par defaut (fallback si pas de specs en base)
     MARKET_MIN_SAMPLES = 3
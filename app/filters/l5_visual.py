@@ -6,6 +6,7 @@ from typing import Any
 import numpy as np
 
 from app.filters.base import BaseFilter, FilterResult
+from app.services.price_sketch import PriceSketch
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,8 @@ class L5VisualFilter(BaseFilter):
     """Analyse statistique des prix par z-scores NumPy par rapport aux donnees de reference."""
 
     filter_id = "L5"
+    # Mode rapide : argus maison lu dans l'instantane memoire (market_service)
+    quick_safe = True
 
     # Seuil minimum de samples pour utiliser les donnees MarketPrice
     MARKET_MIN_SAMPLES = 3
@@ -40,16 +43,28 @@ class L5VisualFilter(BaseFilter):
         return cls.HP_RANGE_MAX
 
     @staticmethod
-    def _records_to_array(records: list, min_count: int = 3) -> np.ndarray | None:
-        """Extrait les prix (min/median/max) d'une liste de MarketPrice et retourne un ndarray."""
-        prices = []
+    def _records_to_sketch(records: list, min_count: int = 3) -> PriceSketch | None:
+        """Fusionne les sketches de prix d'une liste de MarketPrice.
+
+        Les cellules sans sketch (collectees avant leur introduction) ne
+        contribuent que leurs prix min/median/max, comme auparavant.
+        """
+        from app.services.market_service import get_price_sketches
+
+        sketches = get_price_sketches([r.id for r in records])
+        ref = PriceSketch()
+        legacy = []
         for r in records:
-            prices.extend([r.price_min, r.price_median, r.price_max])
-        ref = np.array([p for p in prices if p], dtype=float)
-        return ref if len(ref) >= min_count else None
+            sketch = sketches.get(r.id)
+            if sketch is not None:
+                ref.merge(sketch)
+            else:
+                legacy.extend(p for p in (r.price_min, r.price_median, r.price_max) if p)
+        ref.add(legacy)
+        return ref if ref.count >= min_count else None
 
     @classmethod
-    def _collect_market_prices(cls, data: dict[str, Any], min_samples: int) -> np.ndarray | None:
+    def _collect_market_prices(cls, data: dict[str, Any], min_samples: int) -> PriceSketch | None:
         """Collecte les prix de reference depuis MarketPrice avec filtrage hp_range.
 
         Cascade de precision :
@@ -63,7 +78,11 @@ class L5VisualFilter(BaseFilter):
         from sqlalchemy import func
 
         from app.models.market_price import MarketPrice
-        from app.services.market_service import market_text_key, market_text_key_expr
+        from app.services.market_service import (
+            current_market_snapshot,
+            market_text_key,
+            market_text_key_expr,
+        )
 
         make = data.get("make", "")
         model = data.get("model", "")
@@ -80,43 +99,72 @@ class L5VisualFilter(BaseFilter):
             return None
 
         country = (data.get("country") or "FR").upper()
-        base_filters = [
-            market_text_key_expr(MarketPrice.make) == market_text_key(make),
-            market_text_key_expr(MarketPrice.model) == market_text_key(model),
-            MarketPrice.sample_count >= min_samples,
-            func.coalesce(MarketPrice.country, "FR") == country,
-        ]
-
         fuel = (data.get("fuel") or "").strip().lower() or None
         hp = data.get("power_din_hp") or data.get("power_hp") or data.get("horse_power_din")
         hp_range = cls._get_hp_range(int(hp) if hp else None)
-
-        def _query(extra_filters: list) -> list:
-            return MarketPrice.query.filter(*base_filters, *extra_filters).all()
-
-        def _try_hp_cascade(extra_filters: list) -> np.ndarray | None:
+        hp_key = hp_range.lower() if hp_range else None
+
+        # Lot d'annonces : MarketPrice deja charges (market_service.MarketSnapshot)
+        make_key, model_key = market_text_key(make), market_text_key(model)
+        snapshot = current_market_snapshot()
+        snapshot_rows = None
+        if snapshot is not None and snapshot.covers(make_key, model_key):
+            snapshot_rows = [
+                r
+                for r in snapshot.rows(make_key, model_key)
+                if r.price.sample_count is not None
+                and r.price.sample_count >= min_samples
+                and r.country_key == country
+            ]
+
+        def _query(fuel_key: str | None, hp_mode: str) -> list:
+            """Prix du carburant ``fuel_key`` (None = tous), hp_mode exact/generic/any."""
+            if snapshot_rows is not None:
+                return [
+                    r.price
+                    for r in snapshot_rows
+                    if (fuel_key is None or r.fuel_key == fuel_key)
+                    and (
+                        hp_mode == "any"
+                        or (hp_mode == "exact" and r.hp_range_key == hp_key)
+                        or (hp_mode == "generic" and r.price.hp_range is None)
+                    )
+                ]
+            filters = [
+                market_text_key_expr(MarketPrice.make) == make_key,
+                market_text_key_expr(MarketPrice.model) == model_key,
+                MarketPrice.sample_count >= min_samples,
+                func.coalesce(MarketPrice.country, "FR") == country,
+            ]
+            if fuel_key is not None:
+                filters.append(func.lower(MarketPrice.fuel) == fuel_key)
+            if hp_mode == "exact":
+                filters.append(func.lower(MarketPrice.hp_range) == hp_key)
+            elif hp_mode == "generic":
+                filters.append(MarketPrice.hp_range.is_(None))
+            return MarketPrice.query.filter(*filters).all()
+
+        def _try_hp_cascade(fuel_key: str | None) -> PriceSketch | None:
             """Tente hp_range exact → hp_range=NULL → any hp_range."""
             if hp_range:
-                ref = cls._records_to_array(
-                    _query([*extra_filters, func.lower(MarketPrice.hp_range) == hp_range.lower()])
-                )
+                ref = cls._records_to_sketch(_query(fuel_key, "exact"))
                 if ref is not None:
                     return ref
             # Fallback hp_range=NULL (generique)
-            ref = cls._records_to_array(_query([*extra_filters, MarketPrice.hp_range.is_(None)]))
+            ref = cls._records_to_sketch(_query(fuel_key, "generic"))
             if ref is not None:
                 return ref
             # Dernier fallback : any hp_range
-            return cls._records_to_array(_query(extra_filters))
+            return cls._records_to_sketch(_query(fuel_key, "any"))
 
         # 1. Avec fuel (plus precis)
         if fuel:
-            ref = _try_hp_cascade([func.lower(MarketPrice.fuel) == fuel])
+            ref = _try_hp_cascade(fuel)
             if ref is not None:
                 return ref
 
         # 2. Sans fuel
-        return _try_hp_cascade([])
+        return _try_hp_cascade(None)
 
     @staticmethod
     def _collect_argus_prices(vehicle_id: int) -> np.ndarray:
@@ -158,10 +206,10 @@ class L5VisualFilter(BaseFilter):
                 return self.skip(
                     "Modèle non calibré pour l'analyse statistique (références insuffisantes)"
                 )
-            ref_prices = self._collect_argus_prices(vehicle.id)
+            ref_prices = PriceSketch.from_values(self._collect_argus_prices(vehicle.id))
             source = "argus_seed"
 
-        if len(ref_prices) < 3:
+        if ref_prices.count < 3:
             return self.skip("Pas assez de prix de référence")
 
         anomalies = []
@@ -192,12 +240,12 @@ class L5VisualFilter(BaseFilter):
             )
             anomalies.append(diesel_urban_warning)
 
-        # Z-score du prix
+        # Z-score du prix (moments lus directement dans le sketch)
+        price_mean = ref_prices.mean
+        price_std = ref_prices.std
         if price is not None:
-            price_mean = np.mean(ref_prices)
-            price_std = np.std(ref_prices)
             if price_std > 0:
-                z_price = float((price - price_mean) / price_std)
+                z_price = (price - price_mean) / price_std
                 z_scores["price"] = round(z_price, 2)
                 if abs(z_price) > 3:
                     anomalies.append(f"Prix outlier (z={z_price:.1f})")
@@ -208,10 +256,10 @@ class L5VisualFilter(BaseFilter):
         hp = data.get("power_din_hp") or data.get("power_hp") or data.get("horse_power_din")
         hp_range_used = self._get_hp_range(int(hp) if hp else None)
         stats = {
-            "ref_count": len(ref_prices),
-            "ref_mean": round(float(np.mean(ref_prices))),
-            "ref_std": round(float(np.std(ref_prices))),
-            "ref_median": round(float(np.median(ref_prices))),
+            "ref_count": round(ref_prices.count),
+            "ref_mean": round(price_mean),
+            "ref_std": round(price_std),
+            "ref_median": round(ref_prices.median),
             "z_scores": z_scores,
             "anomalies": anomalies,
             "source": source,
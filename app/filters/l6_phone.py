@@ -26,6 +26,7 @@ from app.filters.phone_prefixes import (
     get_country_prefixes,
     is_local_prefix,
 )
+from app.filters.text_signals import PrefixTrie
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +88,12 @@ VIRTUAL_PREFIXES = (
 )
 
 
+# Tries construits une fois a l'import : un seul parcours du numero,
+# qui renvoie aussi le prefixe exact matche
+_TELEMARKETING_TRIE = PrefixTrie((p, "telemarketing_arcep") for p in TELEMARKETING_PREFIXES)
+_VIRTUAL_TRIE = PrefixTrie((p, "virtual_onoff") for p in VIRTUAL_PREFIXES)
+
+
 def _is_local_prefix(cleaned: str, country: str) -> bool:
     """Verifie si le numero commence par un indicatif local du pays."""
     return is_local_prefix(cleaned, country)
@@ -102,6 +109,7 @@ class L6PhoneFilter(BaseFilter):
     """
 
     filter_id = "L6"
+    quick_safe = True
 
     def run(self, data: dict[str, Any]) -> FilterResult:
         phone = data.get("phone")
@@ -206,7 +214,7 @@ class L6PhoneFilter(BaseFilter):
             local = "0" + local[4:]
 
         # Prefixes ARCEP de demarchage = red flag fort
-        if any(local.startswith(p) for p in TELEMARKETING_PREFIXES):
+        if _TELEMARKETING_TRIE.has_prefix(local):
             logger.info("L6: telemarketing prefix detected: %s", local[:4])
             return FilterResult(
                 filter_id=self.filter_id,
@@ -217,7 +225,7 @@ class L6PhoneFilter(BaseFilter):
             )
 
         # Numeros virtuels OnOff = identite potentiellement masquee
-        if any(local.startswith(p) for p in VIRTUAL_PREFIXES):
+        if _VIRTUAL_TRIE.has_prefix(local):
             logger.info("L6: virtual number detected: %s", local[:6])
             return FilterResult(
                 filter_id=self.filter_id,
@@ -20,6 +20,7 @@ from typing import Any
 
 from app.filters.base import VERIFIED_PRO_PLATFORMS, BaseFilter, FilterResult
 from app.filters.phone_prefixes import detect_phone_prefix_country
+from app.filters.text_signals import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -204,6 +205,53 @@ REGISTRATION_WEAK = [
 ]
 
 
+# Tokens exiges en mot entier : "import" (evite "important", "importateur" --
+# les formes specifiques "importe", "importation" sont des entrees separees),
+# les tokens d'immatriculation courts et les mots-cles fiscaux de 3 lettres max.
+_WORD_KEYWORDS = {"import", *_SHORT_REGISTRATION_TOKENS} | {
+    kw for kw in TAX_KEYWORDS if len(kw) <= 3
+}
+
+
+def _build_matcher(country: str) -> KeywordMatcher:
+    """Automate des familles de mots-cles L8 pour un pays de site.
+
+    Les noms de pays et le vocabulaire normaux localement sont retires
+    des le build (ex: "suisse" ou "Fahrzeug" sur autoscout24.ch).
+    """
+    local_country_names = _COUNTRY_LOCAL_NAMES.get(country, set())
+    local_keywords = _COUNTRY_LOCAL_KEYWORDS.get(country, set())
+    return KeywordMatcher(
+        {
+            "import": IMPORT_KEYWORDS_FR,
+            "countries": [c for c in IMPORT_COUNTRIES if c not in local_country_names],
+            "foreign": [kw for kw in IMPORT_KEYWORDS_FOREIGN if kw not in local_keywords],
+            "tax": TAX_KEYWORDS,
+            "reg_strong": REGISTRATION_STRONG + _SHORT_REGISTRATION_TOKENS,
+            "reg_weak": REGISTRATION_WEAK,
+        },
+        word_keywords=_WORD_KEYWORDS,
+    )
+
+
+# Un automate par pays ayant des exclusions locales, construits une fois a l'import.
+# Les autres pays n'excluent rien et partagent l'automate par defaut.
+_MATCHERS: dict[str, KeywordMatcher] = {
+    c: _build_matcher(c) for c in sorted(set(_COUNTRY_LOCAL_NAMES) | set(_COUNTRY_LOCAL_KEYWORDS))
+}
+_DEFAULT_MATCHER = _build_matcher("")
+
+
+def scan_import_keywords(text: str, country: str) -> dict[str, list[str]]:
+    """Retourne les mots-cles d'import trouves dans text, par famille, en un passage.
+
+    Args:
+        text: titre + description, deja en minuscules.
+        country: code pays du site (ex: "FR", "CH").
+    """
+    return _MATCHERS.get(country, _DEFAULT_MATCHER).scan(text)
+
+
 class L8ImportDetectionFilter(BaseFilter):
     """Detecte les signaux indiquant qu'un vehicule pourrait etre importe.
 
@@ -220,6 +268,7 @@ class L8ImportDetectionFilter(BaseFilter):
     """
 
     filter_id = "L8"
+    quick_safe = True
 
     def run(self, data: dict[str, Any]) -> FilterResult:
         strong_signals: list[str] = []
@@ -239,20 +288,11 @@ class L8ImportDetectionFilter(BaseFilter):
         title = (data.get("title") or "").lower()
         text = f"{title} {description}"
 
-        # Word boundary sur "import" (evite "important", "importateur" --
-        # les formes specifiques "importe", "importation" sont des entrees separees)
-        found_import = []
-        for kw in IMPORT_KEYWORDS_FR:
-            if kw == "import":
-                if re.search(r"\bimport\b", text):
-                    found_import.append(kw)
-            else:
-                if kw in text:
-                    found_import.append(kw)
-        # Exclure le pays local de la liste d'import (ex: "suisse" sur .ch)
-        local_country_names = _COUNTRY_LOCAL_NAMES.get(country, set())
-        import_countries = [c for c in IMPORT_COUNTRIES if c not in local_country_names]
-        found_countries = [kw for kw in import_countries if kw in text]
+        # Signaux 2 a 5 : toutes les familles de mots-cles en un seul passage
+        # (automate du pays, qui exclut deja les noms/vocabulaire locaux)
+        hits = scan_import_keywords(text, country)
+        found_import = hits["import"]
+        found_countries = hits["countries"]
         if found_import:
             strong_signals.append(
                 f"Mention d'import dans l'annonce ({', '.join(found_import[:3])})"
@@ -261,34 +301,22 @@ class L8ImportDetectionFilter(BaseFilter):
             strong_signals.append(f"Pays d'origine mentionné ({', '.join(found_countries[:3])})")
 
         # Signal 3 : Texte en langue etrangere (copier-coller de site etranger)
-        # Exclure le vocabulaire normal pour le pays du site (ex: allemand sur .ch/.de/.at)
-        local_keywords = _COUNTRY_LOCAL_KEYWORDS.get(country, set())
-        foreign_keywords = [kw for kw in IMPORT_KEYWORDS_FOREIGN if kw not in local_keywords]
-        found_foreign = [kw for kw in foreign_keywords if kw in text]
+        found_foreign = hits["foreign"]
         if found_foreign:
             strong_signals.append(
                 f"Texte en langue étrangère détecté ({', '.join(found_foreign[:3])})"
             )
 
         # Signal 4 : Signaux fiscaux (malus, export, taxe CO2)
-        # Word boundary pour les tokens courts pour eviter les faux positifs
-        found_tax = [
-            kw
-            for kw in TAX_KEYWORDS
-            if (len(kw) <= 3 and re.search(rf"\b{re.escape(kw)}\b", text))
-            or (len(kw) > 3 and kw in text)
-        ]
+        found_tax = hits["tax"]
         if found_tax:
             strong_signals.append(f"Signal fiscal/TVA ({', '.join(found_tax[:3])})")
 
         # Signal 5 : Carte grise / immatriculation
         # Forts : specifiques a l'import (WW, COC, RTI)
-        found_reg_strong = [kw for kw in REGISTRATION_STRONG if kw in text]
-        found_reg_strong += [
-            kw for kw in _SHORT_REGISTRATION_TOKENS if re.search(rf"\b{re.escape(kw)}\b", text)
-        ]
         # Faibles : ambigus (carte grise en cours, plaque provisoire, homologation)
-        found_reg_weak = [kw for kw in REGISTRATION_WEAK if kw in text]
+        found_reg_strong = hits["reg_strong"]
+        found_reg_weak = hits["reg_weak"]
         if found_reg_strong:
             strong_signals.append(f"Immatriculation suspecte ({', '.join(found_reg_strong[:2])})")
         if found_reg_weak:
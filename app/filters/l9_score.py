@@ -30,6 +30,7 @@ class L9GlobalAssessmentFilter(BaseFilter):
     """
 
     filter_id = "L9"
+    quick_safe = True
 
     def run(self, data: dict[str, Any]) -> FilterResult:
         points_forts = []
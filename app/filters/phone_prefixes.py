@@ -14,6 +14,8 @@ from __future__ import annotations
 
 import re
 
+from app.filters.text_signals import PrefixTrie
+
 # Tableau indicatifs par pays/site (TLD principal AutoScout24/LBC).
 # Note: certains indicatifs officiels ont 3 chiffres (ex: +352 Luxembourg).
 # C'est pour ca qu'on ne peut pas juste faire startswith("+XX") :
@@ -88,6 +90,22 @@ PHONE_DIAL_TABLE: dict[str, dict[str, str | tuple[str, ...]]] = {
 }
 
 
+def _build_dial_trie() -> PrefixTrie:
+    """Trie indicatif -> (pays, indicatif canonique "+XX"), construit une fois a l'import."""
+    trie = PrefixTrie()
+    for ctry, row in PHONE_DIAL_TABLE.items():
+        prefixes = row.get("prefixes")
+        if not isinstance(prefixes, tuple):
+            continue
+        for p in prefixes:
+            plus = p if p.startswith("+") else "+" + p[2:]
+            trie.insert(p, (ctry, plus))
+    return trie
+
+
+_DIAL_TRIE = _build_dial_trie()
+
+
 def get_country_prefixes(country: str) -> tuple[str, ...]:
     """Retourne les indicatifs telephoniques connus pour un code pays."""
     row = PHONE_DIAL_TABLE.get((country or "").upper(), {})
@@ -136,22 +154,11 @@ def detect_phone_prefix_country(cleaned_phone: str) -> tuple[str | None, str | N
     if not normalized.startswith("+"):
         return None, None
 
-    # Collecter tous les candidats et prendre le plus long
-    candidates: list[tuple[int, str, str]] = []
-    for ctry, row in PHONE_DIAL_TABLE.items():
-        prefixes = row.get("prefixes")
-        if not isinstance(prefixes, tuple):
-            continue
-        for p in prefixes:
-            if normalized.startswith(p):
-                plus = p if p.startswith("+") else "+" + p[2:]
-                candidates.append((len(p), ctry, plus))
-
-    if not candidates:
+    # Longest-prefix match via le trie : evite les matches ambigus (+43 vs +437)
+    found = _DIAL_TRIE.longest_prefix(normalized)
+    if found is None:
         return None, None
-
-    # Longest-prefix wins to avoid ambiguous matches.
-    _, ctry, plus = max(candidates, key=lambda x: x[0])
+    _, (ctry, plus) = found
     return ctry, plus
 
 
@@ -0,0 +1,158 @@
+"""Moteur de signaux texte precompile, partage par L6 et L8.
+
+Deux structures, construites une seule fois a l'import des filtres :
+
+- KeywordMatcher : regroupe plusieurs familles de mots-cles (import, pays,
+  langue etrangere, fiscal...) dans une seule regex compilee. Un passage sur
+  le texte suffit a trouver tous les mots-cles presents, y compris ceux qui
+  se chevauchent ("etranger" / "etrangere"), au lieu d'un ``kw in text`` par
+  mot-cle et par famille.
+- PrefixTrie : longest-prefix match sur des indicatifs telephoniques, sans
+  parcourir les tuples de prefixes un par un.
+
+Le texte doit etre deja normalise en minuscules par l'appelant (c'est ce que
+font les filtres), les mots-cles sont stockes tels quels.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Mapping
+
+
+class KeywordMatcher:
+    """Automate de mots-cles multi-familles (une regex compilee par instance).
+
+    Chaque famille est une liste ordonnee de mots-cles ; ``scan()`` renvoie,
+    pour chaque famille, les mots-cles trouves dans l'ordre de la liste
+    d'origine (les messages des filtres restent donc identiques).
+
+    Args:
+        families: nom de famille -> mots-cles (ordre conserve dans le resultat).
+        word_keywords: mots-cles a n'accepter qu'en mot entier (``\\bkw\\b``),
+            pour les tokens courts qui matcheraient partout en sous-chaine
+            ("import" dans "important", "coc" dans "cocotte"...).
+    """
+
+    def __init__(
+        self,
+        families: Mapping[str, Iterable[str]],
+        word_keywords: Iterable[str] = (),
+    ) -> None:
+        self._families = {name: tuple(dict.fromkeys(kws)) for name, kws in families.items()}
+        all_keywords = {kw for kws in self._families.values() for kw in kws}
+        words = all_keywords & set(word_keywords)
+        substrings = all_keywords - words
+
+        self._substrings = frozenset(substrings)
+        # Longueurs distinctes pour retrouver les mots-cles prefixes d'un match
+        self._lengths = tuple(sorted({len(kw) for kw in substrings}, reverse=True))
+        # A une position donnee, la regex prend le mot-cle le plus long,
+        # les plus courts (ses prefixes) s'en deduisent.
+        self._substring_re = _compile_alternation(substrings)
+        self._word_re = _compile_alternation(words, word_boundary=True)
+
+    def find_all(self, text: str) -> set[str]:
+        """Retourne l'ensemble des mots-cles (toutes familles) presents dans text."""
+        hits: set[str] = set()
+        if not text:
+            return hits
+
+        pattern = self._substring_re
+        if pattern is not None:
+            search = pattern.search
+            substrings = self._substrings
+            lengths = self._lengths
+            m = search(text)
+            while m is not None:
+                matched = m.group()
+                hits.add(matched)
+                # Tous les mots-cles qui demarrent a cette position sont des
+                # prefixes du match le plus long
+                for n in lengths:
+                    if n < len(matched) and matched[:n] in substrings:
+                        hits.add(matched[:n])
+                # On repart a la position suivante (et non a la fin du match)
+                # pour ne pas rater les mots-cles qui se chevauchent
+                m = search(text, m.start() + 1)
+
+        if self._word_re is not None:
+            hits.update(self._word_re.findall(text))
+        return hits
+
+    def scan(self, text: str) -> dict[str, list[str]]:
+        """Retourne les mots-cles trouves, par famille, en un seul passage sur text."""
+        hits = self.find_all(text)
+        return {
+            name: [kw for kw in keywords if kw in hits] for name, keywords in self._families.items()
+        }
+
+
+def _compile_alternation(keywords: Iterable[str], word_boundary: bool = False) -> re.Pattern | None:
+    """Compile les mots-cles en une regex en forme de trie.
+
+    Une alternation plate ("kw1|kw2|...") fait tester chaque branche a chaque
+    position du texte. En factorisant les prefixes communs, chaque noeud n'a
+    qu'une branche par premier caractere : le moteur regex abandonne des le
+    premier caractere qui ne colle pas. Les suffixes optionnels etant
+    gloutons, c'est le mot-cle le plus long qui est retenu a une position donnee.
+    """
+    trie: dict = {}
+    for kw in set(keywords):
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    if not trie:
+        return None
+    body = _trie_to_regex(trie)
+    if word_boundary:
+        return re.compile(rf"\b(?:{body})\b")
+    return re.compile(body)
+
+
+def _trie_to_regex(node: dict) -> str:
+    """Serialise un noeud de trie en regex (le marqueur "" signale une fin de mot-cle)."""
+    branches = [re.escape(ch) + _trie_to_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # Fin de mot-cle possible ici : la suite est optionnelle (gloutonne)
+        return body + "?" if len(branches) == 1 and len(body) == 1 else f"(?:{body})?"
+    return body
+
+
+class PrefixTrie:
+    """Trie de prefixes (caractere par caractere) avec longest-prefix match."""
+
+    _END = object()
+
+    def __init__(self, items: Iterable[tuple[str, object]] = ()) -> None:
+        self._root: dict = {}
+        for prefix, value in items:
+            self.insert(prefix, value)
+
+    def insert(self, prefix: str, value: object) -> None:
+        """Ajoute un prefixe ; la derniere valeur inseree pour un meme prefixe gagne."""
+        node = self._root
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[self._END] = (prefix, value)
+
+    def longest_prefix(self, text: str) -> tuple[str, object] | None:
+        """Retourne (prefixe, valeur) du plus long prefixe de text, ou None."""
+        node = self._root
+        best = None
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                break
+            found = node.get(self._END)
+            if found is not None:
+                best = found
+        return best
+
+    def has_prefix(self, text: str) -> bool:
+        """True si text commence par l'un des prefixes du trie."""
+        return self.longest_prefix(text) is not None
@@ -0,0 +1,83 @@
+"""Provider JSON Flask adosse a orjson.
+
+Toutes les reponses passent par ``jsonify`` : /api/analyze serialise les
+details des 11 filtres, les endpoints JSON de l'admin (polling des jobs
+YouTube, etc.) des structures parfois volumineuses. orjson encode ces dicts
+plusieurs fois plus vite que le module json standard et gere nativement :
+
+- datetime/date/time (ISO 8601 ; les datetimes naifs sont des UTC, comme
+  tout ce qui sort de la base),
+- les scalaires et tableaux NumPy (plus besoin de ``float(np...)``),
+- les cles non-string (int, etc.), comme le module standard.
+
+Le provider est branche par create_app() quand JSON_FAST_PROVIDER est actif
+(voir config.py). Tout ce qu'orjson refuse (entiers > 64 bits, types
+inconnus) retombe sur le provider Flask par defaut : le resultat reste
+toujours serialisable.
+"""
+
+from __future__ import annotations
+
+import decimal
+from typing import Any
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+_BASE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+
+def _default(obj: Any) -> Any:
+    """Types hors orjson geres comme le provider Flask par defaut."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider dont l'encodage et le decodage passent par orjson.
+
+    Reprend ses reglages (``sort_keys``, ``compact``, mode debug) ; les
+    appels avec des options propres au module json (``cls``, ``indent``...)
+    lui sont delegues tels quels.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        options = _BASE_OPTIONS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj: Any, indent: bool = False) -> bytes | None:
+        try:
+            return orjson.dumps(obj, default=_default, option=self._options(indent))
+        except orjson.JSONEncodeError:
+            return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not kwargs:
+            encoded = self._encode(obj)
+            if encoded is not None:
+                return encoded.decode()
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity, entiers > 64 bits... : le module standard tranche
+                pass
+        return super().loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        encoded = self._encode(obj, indent=indent)
+        if encoded is None:
+            return super().response(obj)
+        return self._app.response_class(encoded + b"\n", mimetype=self.mimetype)
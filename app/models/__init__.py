@@ -1,24 +1,37 @@
 """Modeles ORM SQLAlchemy -- importe tous les modeles pour les enregistrer dans les metadonnees."""
 
+from app.models.analysis_cache import AnalysisCacheEntry, AnalysisLock  # noqa: F401
+from app.models.api_traffic_stat import ApiTrafficStat  # noqa: F401
 from app.models.argus import ArgusPrice  # noqa: F401
 from app.models.collection_job import CollectionJob, CollectionJobLBC  # noqa: F401
 from app.models.collection_job_as24 import CollectionJobAS24  # noqa: F401
 from app.models.collection_job_lacentrale import CollectionJobLacentrale  # noqa: F401
 from app.models.email_draft import EmailDraft  # noqa: F401
 from app.models.engine_reliability import EngineReliability  # noqa: F401
+from app.models.enrichment_bundle import EnrichmentBundle  # noqa: F401
 from app.models.failed_search import FailedSearch  # noqa: F401
 from app.models.filter_result import FilterResultDB  # noqa: F401
 from app.models.gemini_config import GeminiConfig, GeminiPromptConfig  # noqa: F401
+from app.models.listing_age_stat import ListingAgeStat  # noqa: F401
+from app.models.llm_cache import LLMCacheEntry  # noqa: F401
 from app.models.llm_usage import LLMUsage  # noqa: F401
 from app.models.log import AppLog  # noqa: F401
 from app.models.manufacturer_recall import ManufacturerRecall  # noqa: F401
 from app.models.market_price import MarketPrice  # noqa: F401
+from app.models.market_price_sketch import MarketPriceSketch  # noqa: F401
+from app.models.metric_counter import MetricCounter  # noqa: F401
 from app.models.observed_motorization import ObservedMotorization  # noqa: F401
+from app.models.pipeline_job import PipelineJob  # noqa: F401
 from app.models.pipeline_run import PipelineRun  # noqa: F401
+from app.models.referential_change import ReferentialChange  # noqa: F401
+from app.models.report_artifact import ReportArtifact  # noqa: F401
+from app.models.report_job import ReportJob  # noqa: F401
 from app.models.scan import ScanLog  # noqa: F401
 from app.models.tire_size import TireSize  # noqa: F401
+from app.models.transcript_blob import TranscriptBlob, TranscriptContent  # noqa: F401
 from app.models.user import User  # noqa: F401
 from app.models.vehicle import Vehicle, VehicleSpec  # noqa: F401
 from app.models.vehicle_observed_spec import VehicleObservedSpec  # noqa: F401
+from app.models.vehicle_reliability_map import VehicleReliabilityMap  # noqa: F401
 from app.models.vehicle_synthesis import VehicleSynthesis  # noqa: F401
-from app.models.youtube import YouTubeTranscript, YouTubeVideo  # noqa: F401
+from app.models.youtube import TranscriptChunk, YouTubeTranscript, YouTubeVideo  # noqa: F401
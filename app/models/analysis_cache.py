@@ -0,0 +1,67 @@
+"""Modele AnalysisCacheEntry : verdict /api/analyze mis en cache par annonce.
+
+Une annonce populaire est scannee plusieurs fois en quelques minutes par des
+utilisateurs differents. Le premier scan complet stocke ici sa reponse,
+indexee par l'empreinte de l'annonce (voir app/services/analysis_cache.py) ;
+les scans suivants la relisent tant qu'elle n'a pas expire et que l'argus
+maison du modele n'a pas bouge.
+"""
+
+import json
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class AnalysisCacheEntry(db.Model):
+    """Reponse d'analyse (champ ``data``) d'un scan complet, avec son expiration.
+
+    make_key / model_key (cles market_text_key) servent a l'invalidation :
+    toute collecte MarketPrice sur le modele supprime ses entrees.
+    """
+
+    __tablename__ = "analysis_cache"
+    __table_args__ = (db.Index("ix_analysis_cache_make_model", "make_key", "model_key"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False, unique=True)
+    make_key = db.Column(db.String(100), nullable=False, default="")
+    model_key = db.Column(db.String(100), nullable=False, default="")
+    # Scan complet d'origine (filtres persistes : rapport PDF, email vendeur)
+    scan_id = db.Column(db.Integer, db.ForeignKey("scan_logs.id"), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    is_partial = db.Column(db.Boolean, nullable=False, default=False)
+    response = db.Column(db.Text, nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def get_response(self) -> dict:
+        """Retourne la reponse d'analyse comme dict Python."""
+        try:
+            return json.loads(self.response)
+        except json.JSONDecodeError:
+            return {}
+
+    def __repr__(self) -> str:
+        return f"<AnalysisCacheEntry {self.fingerprint[:12]} scan={self.scan_id} hits={self.hit_count}>"
+
+
+class AnalysisLock(db.Model):
+    """Verrou inter-workers : une seule analyse complete a la fois par empreinte.
+
+    Le worker qui insere la ligne (cle unique) calcule ; les autres attendent
+    que le verdict apparaisse dans AnalysisCacheEntry. ``expires_at`` borne
+    l'attente si le leader meurt sans liberer le verrou.
+    """
+
+    __tablename__ = "analysis_locks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False, unique=True)
+    owner = db.Column(db.String(80), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<AnalysisLock {self.fingerprint[:12]} owner={self.owner}>"
@@ -0,0 +1,40 @@
+"""Modele ApiTrafficStat : volume des corps de requete recus par l'API, par jour.
+
+Une ligne par (jour, endpoint, Content-Encoding), incrementee a chaque
+requete : permet de mesurer sur le dashboard ce que la compression des
+uploads de l'extension fait gagner (octets sur le fil vs octets decodes).
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class ApiTrafficStat(db.Model):
+    """Compteurs journaliers d'octets recus pour un endpoint et un encodage."""
+
+    __tablename__ = "api_traffic_stats"
+    __table_args__ = (
+        db.UniqueConstraint("day", "endpoint", "content_encoding", name="uq_api_traffic_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    endpoint = db.Column(db.String(50), nullable=False)
+    content_encoding = db.Column(db.String(20), nullable=False)
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+    # Octets recus sur le fil (compresses le cas echeant)
+    bytes_in = db.Column(db.BigInteger, nullable=False, default=0)
+    # Octets apres decompression (egal a bytes_in sans compression)
+    bytes_decoded = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ApiTrafficStat {self.day} {self.endpoint} {self.content_encoding} "
+            f"n={self.request_count} in={self.bytes_in}>"
+        )
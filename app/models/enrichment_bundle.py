@@ -0,0 +1,45 @@
+"""Modele EnrichmentBundle : enrichissements /api/analyze precalcules par vehicule.
+
+La video featured, les dimensions pneus et la fiabilite moteur d'une reponse
+/api/analyze ne dependent que du vehicule, de l'annee modele et du carburant
+de l'annonce. Le resultat est stocke ici a la premiere analyse et relu tel
+quel ensuite ; il est supprime quand une de ses sources change (voir
+app/services/enrichment_bundle.py).
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class EnrichmentBundle(db.Model):
+    """Payload d'enrichissement d'un (vehicule, annee, carburant).
+
+    year_bucket vaut 0 quand l'annonce n'a pas d'annee (pas de pneus).
+    tire_make / tire_model sont les cles TireSize utilisees pour les pneus :
+    une collecte pneus sur ce modele supprime le bundle.
+    """
+
+    __tablename__ = "enrichment_bundles"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "vehicle_id", "year_bucket", "fuel_key", name="uq_enrichment_bundle_key"
+        ),
+        db.Index("ix_enrichment_bundle_tire", "tire_make", "tire_model"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, nullable=False, index=True)
+    year_bucket = db.Column(db.Integer, nullable=False, default=0)
+    fuel_key = db.Column(db.String(40), nullable=False, default="")
+    tire_make = db.Column(db.String(80), nullable=False, default="")
+    tire_model = db.Column(db.String(120), nullable=False, default="")
+    # {"featured_video", "tire_sizes", "engine_reliability"}
+    payload = db.Column(db.JSON, nullable=False)
+    built_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self) -> str:
+        return (
+            f"<EnrichmentBundle vehicle_id={self.vehicle_id} year={self.year_bucket} "
+            f"fuel={self.fuel_key!r}>"
+        )
@@ -0,0 +1,60 @@
+"""Modele ListingAgeStat : resume glissant des durees de mise en vente par modele.
+
+Alimente a chaque scan persiste (days_online) et lu par le filtre L10 pour
+obtenir la mediane marche sans re-scanner ScanLog. Les valeurs sont rangees
+dans des histogrammes journaliers : on peut ainsi faire sortir de la fenetre
+les jours trop anciens sans garder la liste brute des scans.
+"""
+
+import json
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class ListingAgeStat(db.Model):
+    """Histogrammes journaliers de days_online pour un couple marque/modele.
+
+    make_key / model_key sont en minuscules (matching insensible a la casse,
+    comme l'ancien ilike sur ScanLog). ``buckets`` est un JSON
+    ``{"YYYY-MM-DD": {"<days_online>": count}}``. ``median_days`` et
+    ``sample_count`` sont le resume precalcule de la fenetre, recalcule a
+    chaque ajout et au premier acces d'une nouvelle journee (``computed_on``).
+    """
+
+    __tablename__ = "listing_age_stats"
+    __table_args__ = (
+        db.UniqueConstraint("make_key", "model_key", name="uq_listing_age_make_model"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    make_key = db.Column(db.String(100), nullable=False)
+    model_key = db.Column(db.String(100), nullable=False)
+    buckets = db.Column(db.Text, nullable=False, default="{}")
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    median_days = db.Column(db.Float, nullable=True)
+    computed_on = db.Column(db.Date, nullable=True)
+    updated_at = db.Column(
+        db.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    def get_buckets(self) -> dict[str, dict[str, int]]:
+        """Retourne les histogrammes journaliers comme dict Python."""
+        if not self.buckets:
+            return {}
+        try:
+            return json.loads(self.buckets)
+        except json.JSONDecodeError:
+            return {}
+
+    def set_buckets(self, buckets: dict[str, dict[str, int]]) -> None:
+        """Serialise les histogrammes journaliers."""
+        self.buckets = json.dumps(buckets, separators=(",", ":"), sort_keys=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ListingAgeStat {self.make_key} {self.model_key} "
+            f"median={self.median_days} n={self.sample_count}>"
+        )
@@ -0,0 +1,31 @@
+"""Modele LLMCacheEntry : reponses LLM mises en cache par empreinte de prompt.
+
+Les prompts de generation (email vendeur, etc.) sont deterministes : memes
+donnees de scan -> meme prompt. La reponse du premier appel est gardee ici,
+indexee par l'empreinte prompt + modele + parametres de generation (voir
+app/services/llm_cache.py), et resservie sans nouvel appel payant tant
+qu'elle n'a pas expire.
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class LLMCacheEntry(db.Model):
+    """Texte genere pour une empreinte de prompt, avec son expiration."""
+
+    __tablename__ = "llm_response_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    prompt_hash = db.Column(db.String(64), nullable=False, unique=True)
+    feature = db.Column(db.String(50), nullable=False)
+    model = db.Column(db.String(80), nullable=False)
+    response_text = db.Column(db.Text, nullable=False)
+    total_tokens = db.Column(db.Integer, nullable=False, default=0)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<LLMCacheEntry {self.feature} {self.prompt_hash[:12]} hits={self.hit_count}>"
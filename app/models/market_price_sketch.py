@@ -0,0 +1,41 @@
+"""Modele MarketPriceSketch : distribution cumulee des prix d'une cellule MarketPrice.
+
+Une ligne MarketPrice decrit la derniere collecte (prix bruts, filtrage IQR,
+transparence dashboard). Le sketch associe garde, lui, toutes les collectes
+precedentes sous forme compacte, avec un vieillissement exponentiel : c'est
+de la que viennent les percentiles de reference et les z-scores L5
+(voir app/services/price_sketch.py).
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+from app.services.price_sketch import PriceSketch
+
+
+class MarketPriceSketch(db.Model):
+    """Sketch de quantiles serialise (BLOB de quelques centaines d'octets) d'une cellule argus."""
+
+    __tablename__ = "market_price_sketches"
+
+    id = db.Column(db.Integer, primary_key=True)
+    market_price_id = db.Column(
+        db.Integer, db.ForeignKey("market_prices.id"), nullable=False, unique=True
+    )
+    sketch = db.Column(db.LargeBinary, nullable=False)
+    # Poids effectif apres vieillissement (nombre d'annonces "equivalentes")
+    effective_count = db.Column(db.Float, nullable=False, default=0.0)
+    # Date du dernier merge : sert de point de depart au vieillissement suivant
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def get_sketch(self) -> PriceSketch | None:
+        """Deserialise le sketch (None si blob illisible)."""
+        return PriceSketch.from_bytes(self.sketch)
+
+    def set_sketch(self, sketch: PriceSketch) -> None:
+        """Serialise le sketch et met a jour le poids effectif."""
+        self.sketch = sketch.to_bytes()
+        self.effective_count = sketch.count
+
+    def __repr__(self) -> str:
+        return f"<MarketPriceSketch mp={self.market_price_id} n={self.effective_count:.1f}>"
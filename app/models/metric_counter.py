@@ -0,0 +1,22 @@
+"""Modele MetricCounter : compteurs journaliers nommes (hits de cache, etc.).
+
+Une ligne par (jour, nom), incrementee de facon atomique par
+app/services/metric_counter_service.py et lue par le dashboard admin.
+"""
+
+from app.extensions import db
+
+
+class MetricCounter(db.Model):
+    """Valeur cumulee d'un compteur pour une journee (UTC)."""
+
+    __tablename__ = "metric_counters"
+    __table_args__ = (db.UniqueConstraint("day", "name", name="uq_metric_counter_day_name"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    name = db.Column(db.String(80), nullable=False)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<MetricCounter {self.day} {self.name}={self.value}>"
@@ -0,0 +1,40 @@
+"""Modele PipelineJob -- etat temps reel d'un job admin long (pipeline en thread).
+
+Complete PipelineRun (historique) avec ce qu'il faut pour suivre un job en
+cours depuis n'importe quel worker gunicorn : progression, etat detaille
+(journal d'etapes, resultat), demande d'annulation et durees par etape.
+Le polling lit une ligne par job_key (index unique). Les jobs termines sont
+purges apres PIPELINE_JOB_RETENTION_HOURS ; le PipelineRun reste.
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class PipelineJob(db.Model):
+    """Job admin en cours ou recent, rattache a son PipelineRun."""
+
+    __tablename__ = "pipeline_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_key = db.Column(db.String(32), nullable=False, unique=True)
+    run_id = db.Column(db.Integer, db.ForeignKey("pipeline_runs.id"), nullable=False, index=True)
+    name = db.Column(db.String(80), nullable=False)
+    # running, done, error, cancelled (valeurs attendues par le front)
+    status = db.Column(db.String(20), nullable=False, default="running", index=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    progress_label = db.Column(db.String(200), nullable=False, default="")
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    # Etat libre du job : form_data, pipeline_log, videos_detail, result...
+    state = db.Column(db.JSON, nullable=False, default=dict)
+    # {etape: {"seconds", "items", "unit", "per_second"}}
+    stages = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime, index=True)
+
+    run = db.relationship("PipelineRun")
+
+    def __repr__(self) -> str:
+        return f"<PipelineJob {self.name} {self.job_key} {self.status}>"
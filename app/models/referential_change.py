@@ -0,0 +1,52 @@
+"""Modele ReferentialChange : journal des modifications du referentiel Vehicle.
+
+Chaque insert / update / delete d'un Vehicle ajoute une ligne (hooks
+SQLAlchemy ci-dessous). L'id auto-incremente sert de numero de version au
+snapshot du referentiel servi a l'extension (/api/referential/snapshot) :
+un client qui connait la version N ne recoit que les vehicules modifies
+depuis (id > N).
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.vehicle import Vehicle
+
+
+class ReferentialChange(db.Model):
+    """Une modification d'un Vehicle ("upsert" ou "delete")."""
+
+    __tablename__ = "referential_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, nullable=False, index=True)
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<ReferentialChange {self.id} {self.op} vehicle={self.vehicle_id}>"
+
+
+def _record_change(connection, vehicle_id: int, op: str) -> None:
+    # Insert direct sur la connexion du flush : pas de session a manipuler
+    # depuis un hook de mapper, et la ligne part dans la meme transaction.
+    connection.execute(
+        ReferentialChange.__table__.insert().values(
+            vehicle_id=vehicle_id, op=op, created_at=datetime.now(timezone.utc)
+        )
+    )
+
+
+@event.listens_for(Vehicle, "after_insert")
+@event.listens_for(Vehicle, "after_update")
+def _record_vehicle_upsert(_mapper, connection, target: Vehicle) -> None:
+    """Journalise la creation ou la modification d'un vehicule."""
+    _record_change(connection, target.id, "upsert")
+
+
+@event.listens_for(Vehicle, "after_delete")
+def _record_vehicle_delete(_mapper, connection, target: Vehicle) -> None:
+    """Journalise la suppression d'un vehicule."""
+    _record_change(connection, target.id, "delete")
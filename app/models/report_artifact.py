@@ -0,0 +1,32 @@
+"""Modele ReportArtifact : PDF de rapport deja rendus, par scan.
+
+Les resultats de filtres d'un scan ne changent plus apres persistance : le
+PDF de /api/scan-report est garde ici et resservi tel quel tant que
+l'empreinte de ses entrees (voir report_html_service.scan_report_fingerprint)
+ne bouge pas. Une seule ligne par scan : la derniere empreinte rendue.
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class ReportArtifact(db.Model):
+    """PDF rendu pour un scan, avec l'empreinte des entrees qui l'ont produit."""
+
+    __tablename__ = "report_artifacts"
+    __table_args__ = (
+        db.UniqueConstraint("scan_id", "fingerprint", name="uq_report_artifact_scan_fingerprint"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scan_id = db.Column(db.Integer, nullable=False, index=True)
+    # sha256 hex des entrees du rendu (sert aussi d'ETag HTTP)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    content = db.Column(db.LargeBinary, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    served_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f"<ReportArtifact scan={self.scan_id} {self.fingerprint[:8]} {self.size_bytes}B>"
@@ -0,0 +1,32 @@
+"""Modele ReportJob : etat des rendus PDF asynchrones (/api/scan-report/jobs).
+
+Le rendu tourne dans un thread du worker qui a recu la demande ; le polling
+de l'extension peut tomber sur un autre worker gunicorn. L'etat du job est
+donc ecrit ici et relu par job_id depuis n'importe quel worker. Le PDF
+lui-meme est dans ReportArtifact, sous l'empreinte finale du rendu.
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class ReportJob(db.Model):
+    """Rendu asynchrone d'un rapport : pending, done ou error."""
+
+    __tablename__ = "report_jobs"
+
+    # "<scan_id>-<debut de l'empreinte des entrees>" (report_job_id)
+    job_id = db.Column(db.String(40), primary_key=True)
+    scan_id = db.Column(db.Integer, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    # Empreinte du PDF rendu (peut differer de celle du job_id : le rendu
+    # peut creer le brouillon email, qui fait partie des entrees)
+    fingerprint = db.Column(db.String(64), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True
+    )
+
+    def __repr__(self):
+        return f"<ReportJob {self.job_id} {self.status}>"
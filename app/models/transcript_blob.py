@@ -0,0 +1,101 @@
+"""Modeles TranscriptBlob et TranscriptContent -- stockage compresse des transcripts.
+
+Le texte complet et les segments d'un transcript (plusieurs dizaines de Ko
+par video) sont stockes compresses (zlib) dans TranscriptBlob, une ligne par
+contenu distinct (empreinte sha256) : les re-uploads et les videos miroirs
+partagent le meme blob. TranscriptContent rattache un YouTubeTranscript a
+ses blobs ; les colonnes full_text / snippets_json historiques ne servent
+plus qu'aux lignes pas encore migrees (scripts/compress_transcripts.py).
+"""
+
+import hashlib
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+CODEC = "zlib"
+
+
+def blob_hash(raw: bytes) -> str:
+    """Empreinte sha256 hex d'un contenu non compresse."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+class TranscriptBlob(db.Model):
+    """Contenu compresse, partage par tous les transcripts identiques."""
+
+    __tablename__ = "transcript_blobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    # sha256 hex du contenu non compresse (cle de dedoublonnage)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)
+    codec = db.Column(db.String(10), nullable=False, default=CODEC)
+    data = db.Column(db.LargeBinary, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False, default=0)
+    stored_size = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "TranscriptBlob":
+        data = zlib.compress(raw, 6)
+        return cls(
+            content_hash=blob_hash(raw),
+            codec=CODEC,
+            data=data,
+            raw_size=len(raw),
+            stored_size=len(data),
+        )
+
+    def raw(self) -> bytes:
+        """Contenu decompresse."""
+        return zlib.decompress(self.data)
+
+    def __repr__(self):
+        return f"<TranscriptBlob {self.content_hash[:8]} {self.raw_size}->{self.stored_size}B>"
+
+
+class TranscriptContent(db.Model):
+    """Texte et segments (blobs) d'un transcript, une ligne par transcript."""
+
+    __tablename__ = "transcript_contents"
+
+    transcript_id = db.Column(
+        db.Integer,
+        db.ForeignKey("youtube_transcripts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    text_blob_id = db.Column(
+        db.Integer, db.ForeignKey("transcript_blobs.id"), nullable=False, index=True
+    )
+    snippets_blob_id = db.Column(db.Integer, db.ForeignKey("transcript_blobs.id"), index=True)
+
+    text_blob = db.relationship("TranscriptBlob", foreign_keys=[text_blob_id])
+    snippets_blob = db.relationship("TranscriptBlob", foreign_keys=[snippets_blob_id])
+
+    def __repr__(self):
+        return f"<TranscriptContent transcript={self.transcript_id} blob={self.text_blob_id}>"
+
+
+# SQLite n'applique pas les cles etrangeres (pas de PRAGMA foreign_keys) :
+# le lien part avec le transcript par trigger, sinon un transcript qui
+# reprendrait l'id lirait le contenu de l'ancien
+_CONTENT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS youtube_transcripts_content_ad "
+    "AFTER DELETE ON youtube_transcripts BEGIN "
+    "DELETE FROM transcript_contents WHERE transcript_id = old.id; END"
+)
+
+
+@event.listens_for(TranscriptContent.__table__, "after_create")
+def _create_content_trigger(_table, connection, **_kw) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(_CONTENT_TRIGGER)
+
+
+@event.listens_for(TranscriptContent.__table__, "after_drop")
+def _drop_content_trigger(_table, connection, **_kw) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TRIGGER IF EXISTS youtube_transcripts_content_ad")
@@ -0,0 +1,45 @@
+"""Modele VehicleReliabilityMap : correspondance materialisee vehicule+carburant -> fiabilite.
+
+Le choix de la VehicleSpec (selon le carburant de l'annonce) puis le matching
+de son moteur contre les patterns EngineReliability est deterministe pour un
+couple (vehicle_id, carburant). Plutot que de le recalculer a chaque scan,
+on le stocke ici et on le reconstruit quand les specs ou la fiabilite changent
+(voir engine_reliability_service.rebuild_vehicle_reliability_map).
+"""
+
+from datetime import datetime, timezone
+
+from app.extensions import db
+
+
+class VehicleReliabilityMap(db.Model):
+    """Resultat precalcule du matching spec -> fiabilite pour un vehicule et un carburant.
+
+    fuel_key est le carburant normalise en minuscules ("diesel", "essence"...).
+    La ligne avec fuel_key="" est le fallback (premiere spec du vehicule),
+    utilise quand le carburant de l'annonce ne correspond a aucune spec.
+    """
+
+    __tablename__ = "vehicle_reliability_maps"
+    __table_args__ = (
+        db.UniqueConstraint("vehicle_id", "fuel_key", name="uq_vehicle_reliability_map_fuel"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey("vehicles.id"), nullable=False, index=True)
+    fuel_key = db.Column(db.String(40), nullable=False, default="")
+    spec_id = db.Column(db.Integer, db.ForeignKey("vehicle_specs.id"), nullable=False)
+    # False si la spec retenue n'a pas de nom moteur : pas de matching possible
+    has_engine = db.Column(db.Boolean, nullable=False, default=False)
+    engine_reliability_id = db.Column(
+        db.Integer, db.ForeignKey("engine_reliabilities.id"), nullable=True
+    )
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    reliability = db.relationship("EngineReliability", lazy="joined")
+
+    def __repr__(self) -> str:
+        return (
+            f"<VehicleReliabilityMap vehicle_id={self.vehicle_id} fuel={self.fuel_key!r} "
+            f"rel={self.engine_reliability_id}>"
+        )
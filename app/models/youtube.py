@@ -1,4 +1,4 @@
-"""Modeles YouTubeVideo et YouTubeTranscript.
+"""Modeles YouTubeVideo, YouTubeTranscript et TranscriptChunk.
 
 On indexe des videos YouTube pertinentes pour chaque vehicule (essais,
 retours proprietaires, comparatifs) et on extrait leurs sous-titres.
@@ -7,10 +7,17 @@ Les transcripts sont ensuite envoyes a Gemini pour generer les syntheses
 du pipeline de synthese, les featured sont mises en avant dans le rapport.
 """
 
+import logging
 from datetime import datetime, timezone
 
+import orjson
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
 from app.extensions import db
 
+logger = logging.getLogger(__name__)
+
 
 class YouTubeVideo(db.Model):
     """Video YouTube indexee pour un vehicule.
@@ -48,9 +55,9 @@ class YouTubeVideo(db.Model):
 class YouTubeTranscript(db.Model):
     """Sous-titres extraits d'une video YouTube.
 
-    Le full_text contient le transcript complet concatene.
-    Les snippets_json contiennent les segments avec timestamps
-    pour pouvoir citer des passages precis dans la synthese.
+    text est le transcript complet concatene, snippets les segments
+    avec timestamps pour pouvoir citer des passages precis dans la
+    synthese (stockes compresses, voir TranscriptContent).
     Le status suit le cycle : pending -> done | error.
     is_generated indique si les sous-titres sont auto-generes par YouTube
     (moins fiables) ou fournis manuellement par le createur.
@@ -64,8 +71,11 @@ class YouTubeTranscript(db.Model):
     )
     language = db.Column(db.String(20), nullable=False)
     is_generated = db.Column(db.Boolean, default=True)
-    full_text = db.Column(db.Text, nullable=False)
-    snippets_json = db.Column(db.JSON)
+    # Lignes pas encore migrees seulement : le contenu est dans
+    # TranscriptContent (compresse, voir text / snippets). Differes pour que
+    # les listes ne chargent pas les textes.
+    full_text = db.deferred(db.Column(db.Text, nullable=False))
+    snippets_json = db.deferred(db.Column(db.JSON))
     snippet_count = db.Column(db.Integer, default=0)
     char_count = db.Column(db.Integer, default=0)
     status = db.Column(db.String(20), nullable=False, default="pending")
@@ -73,5 +83,97 @@ class YouTubeTranscript(db.Model):
     extracted_at = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    # Passages supprimes par trigger SQLite (voir TRANSCRIPT_FTS_DDL) : la
+    # suppression d'un transcript ne charge pas ses passages
+    chunks = db.relationship(
+        "TranscriptChunk",
+        backref="transcript",
+        passive_deletes="all",
+        order_by="TranscriptChunk.position",
+    )
+
+    # Lien supprime par trigger SQLite (voir app/models/transcript_blob.py)
+    content = db.relationship("TranscriptContent", uselist=False, passive_deletes="all")
+
+    @property
+    def text(self) -> str:
+        """Texte complet, decompresse (ou colonne full_text si non migre)."""
+        if self.content is not None:
+            return self.content.text_blob.raw().decode("utf-8")
+        return self.full_text or ""
+
+    @property
+    def snippets(self) -> list | None:
+        """Segments avec timestamps, decompresses (ou snippets_json si non migre)."""
+        if self.content is not None:
+            blob = self.content.snippets_blob
+            return orjson.loads(blob.raw()) if blob is not None else None
+        return self.snippets_json
+
     def __repr__(self):
         return f"<YouTubeTranscript video={self.video_db_id} status={self.status}>"
+
+
+class TranscriptChunk(db.Model):
+    """Passage d'un transcript (quelques centaines de caracteres).
+
+    Unite de recherche de l'index plein texte (table FTS5
+    TRANSCRIPT_FTS_TABLE, tenue a jour par triggers, voir
+    app/services/transcript_index.py) : la synthese n'envoie au LLM que les
+    passages pertinents au lieu des transcripts entiers.
+    """
+
+    __tablename__ = "transcript_chunks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    transcript_id = db.Column(
+        db.Integer, db.ForeignKey("youtube_transcripts.id"), nullable=False, index=True
+    )
+    video_db_id = db.Column(db.Integer, nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f"<TranscriptChunk transcript={self.transcript_id} #{self.position}>"
+
+
+# Index FTS5 a contenu externe sur transcript_chunks, tenu a jour par
+# triggers. Tokenizer unicode61 sans accents : "fiabilité" == "fiabilite".
+# Le dernier trigger supprime les passages d'un transcript supprime.
+TRANSCRIPT_FTS_TABLE = "transcript_chunks_fts"
+TRANSCRIPT_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TRANSCRIPT_FTS_TABLE} USING fts5("
+    "text, content='transcript_chunks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS transcript_chunks_ai AFTER INSERT ON transcript_chunks BEGIN "
+    f"INSERT INTO {TRANSCRIPT_FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS transcript_chunks_ad AFTER DELETE ON transcript_chunks BEGIN "
+    f"INSERT INTO {TRANSCRIPT_FTS_TABLE}({TRANSCRIPT_FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS transcript_chunks_au AFTER UPDATE ON transcript_chunks BEGIN "
+    f"INSERT INTO {TRANSCRIPT_FTS_TABLE}({TRANSCRIPT_FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {TRANSCRIPT_FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS youtube_transcripts_ad AFTER DELETE ON youtube_transcripts "
+    "BEGIN DELETE FROM transcript_chunks WHERE transcript_id = old.id; END",
+)
+
+
+@event.listens_for(TranscriptChunk.__table__, "after_create")
+def _create_transcript_fts(_table, connection, **_kw) -> None:
+    """Cree l'index FTS5 et ses triggers avec la table (SQLite uniquement)."""
+    if connection.dialect.name != "sqlite":
+        return
+    try:
+        for ddl in TRANSCRIPT_FTS_DDL:
+            connection.exec_driver_sql(ddl)
+    except OperationalError:
+        logger.warning("FTS5 indisponible : pas d'index des transcripts", exc_info=True)
+
+
+@event.listens_for(TranscriptChunk.__table__, "after_drop")
+def _drop_transcript_fts(_table, connection, **_kw) -> None:
+    """Supprime l'index FTS5 et les triggers avec la table."""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TRIGGER IF EXISTS youtube_transcripts_ad")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {TRANSCRIPT_FTS_TABLE}")
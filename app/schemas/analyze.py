@@ -17,6 +17,7 @@ class AnalyzeRequest(BaseModel):
     next_data: dict[str, Any] | None = Field(None, description="Leboncoin __NEXT_DATA__ JSON")
     ad_data: dict[str, Any] | None = Field(None, description="Pre-normalized vehicle data")
     source: str | None = Field(None, description="Site source (leboncoin, autoscout24)")
+    quick: bool = Field(False, description="Quick score: local filters only, nothing persisted")
 
 
 class AnalyzeResponse(BaseModel):
@@ -30,3 +31,23 @@ class AnalyzeResponse(BaseModel):
     featured_video: dict[str, Any] | None = None
     tire_sizes: dict[str, Any] | None = None
     engine_reliability: dict[str, Any] | None = None
+    # Verdict relu depuis le cache d'analyse (scan_id = scan complet d'origine)
+    cached: bool = False
+    # Mode rapide : filtres locaux seulement, pas de scan persiste
+    quick: bool = False
+    # Pourquoi le score est partiel, quand la raison n'est pas un filtre en skip
+    partial_reason: str | None = None
+
+
+class AnalyzeBatchItem(BaseModel):
+    """Une annonce pre-normalisee d'un lot /api/analyze/batch."""
+
+    url: str | None = None
+    ad_data: dict[str, Any] = Field(..., description="Pre-normalized vehicle data")
+    source: str | None = Field(None, description="Site source (leboncoin, autoscout24)")
+
+
+class AnalyzeBatchRequest(BaseModel):
+    """Corps de la requete pour POST /api/analyze/batch (page de resultats de recherche)."""
+
+    items: list[AnalyzeBatchItem] = Field(..., min_length=1)
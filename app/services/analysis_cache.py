@@ -0,0 +1,349 @@
+"""Cache des verdicts /api/analyze, indexe par empreinte d'annonce.
+
+Une meme annonce scannee plusieurs fois en quelques minutes (annonce
+populaire, lien partage) relancait a chaque fois les 11 filtres, les
+ecritures en base et les enrichissements. Le premier scan complet stocke sa
+reponse dans AnalysisCacheEntry ; les suivants la relisent :
+
+- l'empreinte couvre ce qui fait le verdict d'une annonce donnee : source,
+  identifiant d'annonce (URL canonique), prix, kilometrage, anciennete par
+  tranche de 7 jours, pays, version de l'application (un deploiement
+  invalide tout) et un hash des autres champs lus par les filtres
+  (description, telephone, type de vendeur, SIRET... : CONTENT_FIELDS).
+  ad_data vient du client : deux soumissions de la meme URL au contenu
+  different ne partagent pas leur verdict,
+- chaque entree expire apres ANALYSIS_CACHE_TTL secondes (0 = cache coupe),
+- toute collecte MarketPrice sur le modele supprime ses entrees
+  (invalidate_model, appele par market_service.store_market_prices) : L4 et
+  L5 lisent l'argus maison du modele avec des replis sur annee, carburant et
+  puissance, on invalide donc au niveau du modele.
+
+Les hits et les misses sont comptes dans MetricCounter pour le dashboard.
+
+La meme empreinte sert a mutualiser les analyses identiques simultanees
+(single-flight, voir app/api/routes.py) : en memoire dans un worker, et
+entre workers via le verrou AnalysisLock (acquire_lock / wait_for_verdict),
+le verdict du leader etant relu dans ce cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+
+import orjson
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.filters.l1_extraction import CRITICAL_FIELDS, SECONDARY_FIELDS
+from app.services.market_service import market_text_key
+from app.services.metric_counter_service import counter_totals, increment_counter
+
+# A incrementer si le contenu de l'empreinte change
+FINGERPRINT_VERSION = 3
+
+# Champs d'ad_data lus par les filtres L2-L11, hors ceux deja dans la cle
+# (prix, kilometrage, anciennete, pays) : a completer si un filtre en lit un
+# nouveau. Les champs controles par L1 sont repris de ses listes.
+_FILTER_FIELDS = (
+    "title",
+    "description",
+    "phone",
+    "has_phone",
+    "owner_type",
+    "siret",
+    "make",
+    "brand",
+    "model",
+    "year",
+    "year_model",
+    "fuel",
+    "power_hp",
+    "power_din_hp",
+    "horse_power_din",
+    "power_fiscal_cv",
+    "fiscal_hp",
+    "location",
+    "image_count",
+    "republished",
+    "has_urgent",
+    "has_highlight",
+    "has_boost",
+    "lc_trust_index",
+    "lc_quotation",
+    "lbc_estimation",
+    "dealer_rating",
+    "dealer_review_count",
+)
+CONTENT_FIELDS = tuple(dict.fromkeys((*CRITICAL_FIELDS, *SECONDARY_FIELDS, *_FILTER_FIELDS)))
+
+# Tranche d'anciennete (jours) : days_online avance chaque jour sans que le
+# verdict change, on ne distingue que des semaines
+DAYS_ONLINE_BUCKET = 7
+
+HIT_COUNTER = "analysis_cache.hit"
+MISS_COUNTER = "analysis_cache.miss"
+# Analyses servies par le verdict d'un leader (single-flight)
+COALESCED_COUNTER = "analyze.coalesced"
+
+# Intervalle de sondage d'un suiveur inter-workers (secondes)
+LOCK_POLL_INTERVAL = 0.2
+
+
+class Verdict(NamedTuple):
+    """Verdict reutilisable d'une analyse complete."""
+
+    scan_id: int
+    score: int
+    is_partial: bool
+    data: dict[str, Any]
+
+
+def _utcnow() -> datetime:
+    # SQLite rend des datetimes naifs : on compare en UTC naif
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _listing_id(ad_data: dict[str, Any], url: str | None) -> str | None:
+    """Identifiant stable de l'annonce : list_id si fourni, sinon URL canonique."""
+    for key in ("list_id", "listing_id"):
+        if ad_data.get(key):
+            return str(ad_data[key])
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    if not host or not path:
+        return None
+    return f"{host}{path}"
+
+
+def analysis_fingerprint(ad_data: dict[str, Any], url: str | None, source: str) -> str | None:
+    """Empreinte sha256 de l'annonce normalisee, ou None si elle n'est pas identifiable."""
+    listing_id = _listing_id(ad_data, url)
+    if listing_id is None:
+        return None
+    days_online = ad_data.get("days_online")
+    days_bucket = days_online // DAYS_ONLINE_BUCKET if isinstance(days_online, int) else None
+    # Prix tel qu'affiche par l'annonce : le taux de change ne doit pas casser la cle
+    price = ad_data.get("price_original", ad_data.get("price_eur"))
+    key = [
+        FINGERPRINT_VERSION,
+        current_app.config.get("APP_VERSION", ""),
+        source,
+        listing_id,
+        price,
+        ad_data.get("mileage_km"),
+        days_bucket,
+        ad_data.get("country"),
+        _content_hash(ad_data),
+    ]
+    return hashlib.sha256(orjson.dumps(key, default=str)).hexdigest()
+
+
+def _content_hash(ad_data: dict[str, Any]) -> str:
+    """Hash des champs de contenu lus par les filtres (CONTENT_FIELDS)."""
+    content = {field: ad_data.get(field) for field in CONTENT_FIELDS}
+    return hashlib.sha256(
+        orjson.dumps(content, default=str, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+
+
+def lookup_analysis(fingerprint: str):
+    """Retourne l'AnalysisCacheEntry encore valide pour cette empreinte, ou None.
+
+    Lecture seule : le hit ou le miss est compte par record_lookup(), au
+    moment ou l'appelant commit.
+    """
+    from app.models.analysis_cache import AnalysisCacheEntry
+
+    return AnalysisCacheEntry.query.filter(
+        AnalysisCacheEntry.fingerprint == fingerprint,
+        AnalysisCacheEntry.expires_at > _utcnow(),
+    ).first()
+
+
+def entry_verdict(entry) -> Verdict:
+    """Verdict porte par une AnalysisCacheEntry."""
+    return Verdict(entry.scan_id, entry.score, bool(entry.is_partial), entry.get_response())
+
+
+def record_lookup(entry) -> None:
+    """Compte un hit (``entry`` trouvee) ou un miss (None). Ne commit pas."""
+    if entry is None:
+        increment_counter(MISS_COUNTER)
+        return
+    entry.hit_count = (entry.hit_count or 0) + 1
+    increment_counter(HIT_COUNTER)
+
+
+def store_analysis(
+    fingerprint: str,
+    ad_data: dict[str, Any],
+    scan_id: int,
+    score: int,
+    is_partial: bool,
+    data: dict[str, Any],
+    ttl_seconds: int,
+) -> None:
+    """Met en cache la reponse d'un scan complet (remplace une entree existante).
+
+    Purge au passage les entrees expirees. Ne commit pas.
+    """
+    from app.models.analysis_cache import AnalysisCacheEntry
+
+    now = _utcnow()
+    fields = {
+        "make_key": market_text_key(ad_data.get("make") or ""),
+        "model_key": market_text_key(ad_data.get("model") or ""),
+        "scan_id": scan_id,
+        "score": score,
+        "is_partial": is_partial,
+        "response": current_app.json.dumps(data),
+        "hit_count": 0,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=ttl_seconds),
+    }
+
+    AnalysisCacheEntry.query.filter(AnalysisCacheEntry.expires_at <= now).delete()
+    updated = AnalysisCacheEntry.query.filter_by(fingerprint=fingerprint).update(
+        fields, synchronize_session=False
+    )
+    if updated:
+        return
+    # Deux workers qui ratent le cache en meme temps : le second met a jour
+    try:
+        with db.session.begin_nested():
+            db.session.add(AnalysisCacheEntry(fingerprint=fingerprint, **fields))
+    except IntegrityError:
+        AnalysisCacheEntry.query.filter_by(fingerprint=fingerprint).update(
+            fields, synchronize_session=False
+        )
+
+
+def invalidate_model(make: str | None, model: str | None) -> int:
+    """Supprime les entrees d'un modele (argus maison modifie). Ne commit pas.
+
+    Returns:
+        Nombre d'entrees supprimees.
+    """
+    from app.models.analysis_cache import AnalysisCacheEntry
+
+    if not make or not model:
+        return 0
+    return AnalysisCacheEntry.query.filter_by(
+        make_key=market_text_key(make), model_key=market_text_key(model)
+    ).delete()
+
+
+def acquire_lock(fingerprint: str, ttl_seconds: float) -> bool:
+    """Prend le verrou inter-workers de l'empreinte (commit immediat).
+
+    Un verrou expire (leader mort) est repris.
+
+    Returns:
+        True si l'appelant devient leader, False si un autre worker calcule deja.
+    """
+    from app.models.analysis_cache import AnalysisLock
+
+    now = _utcnow()
+    AnalysisLock.query.filter(
+        AnalysisLock.fingerprint == fingerprint, AnalysisLock.expires_at <= now
+    ).delete()
+    owner = f"{os.getpid()}:{threading.get_ident()}"
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                AnalysisLock(
+                    fingerprint=fingerprint,
+                    owner=owner,
+                    acquired_at=now,
+                    expires_at=now + timedelta(seconds=ttl_seconds),
+                )
+            )
+        acquired = True
+    except IntegrityError:
+        acquired = False
+    db.session.commit()
+    return acquired
+
+
+def release_lock(fingerprint: str) -> None:
+    """Libere le verrou de l'empreinte (commit immediat)."""
+    from app.models.analysis_cache import AnalysisLock
+
+    AnalysisLock.query.filter_by(fingerprint=fingerprint).delete()
+    db.session.commit()
+
+
+def _poll_verdict(fingerprint: str) -> tuple[Verdict | None, bool]:
+    """Relit le cache et le verrou sur une connexion dediee.
+
+    La session de la requete n'est pas touchee : chaque sondage ouvre sa
+    propre transaction de lecture et voit les derniers commits du leader.
+
+    Returns:
+        (verdict ou None, verrou encore tenu).
+    """
+    from app.models.analysis_cache import AnalysisCacheEntry, AnalysisLock
+
+    entry, lock = AnalysisCacheEntry.__table__.c, AnalysisLock.__table__.c
+    now = _utcnow()
+    with db.engine.connect() as conn:
+        row = conn.execute(
+            select(entry.scan_id, entry.score, entry.is_partial, entry.response).where(
+                entry.fingerprint == fingerprint, entry.expires_at > now
+            )
+        ).first()
+        if row is None:
+            held = conn.execute(
+                select(lock.id).where(lock.fingerprint == fingerprint, lock.expires_at > now)
+            ).first()
+            return None, held is not None
+    try:
+        data = orjson.loads(row.response)
+    except orjson.JSONDecodeError:
+        data = {}
+    return Verdict(row.scan_id, row.score, bool(row.is_partial), data), False
+
+
+def wait_for_verdict(fingerprint: str, timeout: float) -> Verdict | None:
+    """Attend le verdict du worker leader dans le cache.
+
+    S'arrete des que le verdict apparait, que le verrou disparait (leader
+    termine sans verdict cacheable) ou au bout de ``timeout`` secondes. Les
+    sondages passent par une connexion dediee : la session de l'appelant
+    (et ses ecritures en attente) est laissee intacte.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        verdict, held = _poll_verdict(fingerprint)
+        if verdict is not None:
+            return verdict
+        if not held:
+            # Le leader a pu stocker son verdict juste avant de liberer le verrou
+            return _poll_verdict(fingerprint)[0]
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(LOCK_POLL_INTERVAL)
+
+
+def cache_hit_rate(days: int = 7) -> dict[str, float | int]:
+    """Hits, misses, taux de hit (%) et analyses mutualisees sur ``days`` jours."""
+    totals = counter_totals([HIT_COUNTER, MISS_COUNTER, COALESCED_COUNTER], days=days)
+    hits, misses = totals[HIT_COUNTER], totals[MISS_COUNTER]
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "rate": round(hits / lookups * 100, 1) if lookups else 0,
+        "coalesced": totals[COALESCED_COUNTER],
+    }
@@ -0,0 +1,126 @@
+"""Service de suivi du volume des corps de requete API (compression des uploads).
+
+- record_request_bytes() incremente les compteurs du jour (ApiTrafficStat),
+- traffic_summary() agrege une fenetre de jours pour le dashboard admin.
+
+Les compteurs sont incrementes par un UPDATE atomique : deux workers qui
+comptent la meme requete au meme moment ne se marchent pas dessus.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
+
+def _increment(day: date, endpoint: str, encoding: str, bytes_in: int, bytes_decoded: int) -> int:
+    from app.models.api_traffic_stat import ApiTrafficStat
+
+    return ApiTrafficStat.query.filter_by(
+        day=day, endpoint=endpoint, content_encoding=encoding
+    ).update(
+        {
+            ApiTrafficStat.request_count: ApiTrafficStat.request_count + 1,
+            ApiTrafficStat.bytes_in: ApiTrafficStat.bytes_in + bytes_in,
+            ApiTrafficStat.bytes_decoded: ApiTrafficStat.bytes_decoded + bytes_decoded,
+            ApiTrafficStat.updated_at: datetime.now(timezone.utc),
+        },
+        synchronize_session=False,
+    )
+
+
+def record_request_bytes(
+    endpoint: str,
+    encoding: str,
+    bytes_in: int,
+    bytes_decoded: int,
+    day: date | None = None,
+) -> None:
+    """Ajoute une requete aux compteurs du jour. Ne commit pas.
+
+    Args:
+        endpoint: Nom court de l'endpoint (ex. "analyze").
+        encoding: Content-Encoding normalise ("identity", "gzip", "br").
+        bytes_in: Octets recus sur le fil.
+        bytes_decoded: Octets apres decompression.
+        day: Jour de rattachement (UTC), aujourd'hui par defaut.
+    """
+    from app.models.api_traffic_stat import ApiTrafficStat
+
+    day = day or datetime.now(timezone.utc).date()
+    if _increment(day, endpoint, encoding, bytes_in, bytes_decoded):
+        return
+
+    # Premiere requete du jour pour cette cle. Si un autre worker cree la
+    # ligne entre-temps, la contrainte unique leve et on retombe sur l'UPDATE.
+    try:
+        with db.session.begin_nested():
+            db.session.add(
+                ApiTrafficStat(
+                    day=day,
+                    endpoint=endpoint,
+                    content_encoding=encoding,
+                    request_count=1,
+                    bytes_in=bytes_in,
+                    bytes_decoded=bytes_decoded,
+                )
+            )
+    except IntegrityError:
+        _increment(day, endpoint, encoding, bytes_in, bytes_decoded)
+
+
+def traffic_summary(days: int = 7, today: date | None = None) -> dict:
+    """Agrege les compteurs des ``days`` derniers jours (aujourd'hui inclus).
+
+    Returns:
+        Dict avec les totaux (requests, compressed_requests, bytes_in,
+        bytes_decoded, saved_pct) et le detail ``by_endpoint``
+        [{endpoint, content_encoding, requests, bytes_in, bytes_decoded,
+        avg_bytes_in}], trie par volume recu decroissant.
+    """
+    from app.models.api_traffic_stat import ApiTrafficStat
+
+    today = today or datetime.now(timezone.utc).date()
+    rows = (
+        db.session.query(
+            ApiTrafficStat.endpoint,
+            ApiTrafficStat.content_encoding,
+            db.func.sum(ApiTrafficStat.request_count),
+            db.func.sum(ApiTrafficStat.bytes_in),
+            db.func.sum(ApiTrafficStat.bytes_decoded),
+        )
+        .filter(ApiTrafficStat.day > today - timedelta(days=days))
+        .group_by(ApiTrafficStat.endpoint, ApiTrafficStat.content_encoding)
+        .all()
+    )
+
+    by_endpoint = []
+    for endpoint, encoding, requests, bytes_in, bytes_decoded in rows:
+        requests, bytes_in, bytes_decoded = int(requests), int(bytes_in), int(bytes_decoded)
+        by_endpoint.append(
+            {
+                "endpoint": endpoint,
+                "content_encoding": encoding,
+                "requests": requests,
+                "bytes_in": bytes_in,
+                "bytes_decoded": bytes_decoded,
+                "avg_bytes_in": round(bytes_in / requests) if requests else 0,
+            }
+        )
+    by_endpoint.sort(key=lambda r: r["bytes_in"], reverse=True)
+
+    total_in = sum(r["bytes_in"] for r in by_endpoint)
+    total_decoded = sum(r["bytes_decoded"] for r in by_endpoint)
+    return {
+        "requests": sum(r["requests"] for r in by_endpoint),
+        "compressed_requests": sum(
+            r["requests"] for r in by_endpoint if r["content_encoding"] != "identity"
+        ),
+        "bytes_in": total_in,
+        "bytes_decoded": total_decoded,
+        "saved_pct": round((1 - total_in / total_decoded) * 100, 1) if total_decoded else 0,
+        "by_endpoint": by_endpoint,
+    }
@@ -1,16 +1,30 @@
-"""Service email -- generation d'emails vendeur via Gemini."""
+"""Service email -- generation d'emails vendeur via Gemini.
+
+Le prompt d'un scan est deterministe : la reponse Gemini est mise en cache
+(app/services/llm_cache.py) et les demandes simultanees pour un meme scan
+(extension, rapport PDF, admin) partagent un seul appel (single-flight).
+"""
 
 import logging
 
+from flask import current_app
+
 from app.extensions import db
 from app.models.email_draft import EmailDraft
 from app.models.filter_result import FilterResultDB
 from app.models.scan import ScanLog
 from app.services import gemini_service
 from app.services.extraction import extract_ad_data
+from app.services.llm_cache import cached_generate_text, record_shared
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+EMAIL_FEATURE = "email_draft"
+
+# Generations en cours dans ce process, par scan
+_EMAIL_FLIGHTS = SingleFlight()
+
 # Mapping filter_id -> nom lisible pour le prompt (par defaut FR)
 _FILTER_NAMES = {
     "L1": "Completude annonce",
@@ -321,13 +335,34 @@ pertinentes d'acheteur averti
     return prompt
 
 
-def generate_email_draft(scan_id: int) -> EmailDraft:
+def generate_email_draft(scan_id: int, refresh: bool = False) -> EmailDraft:
     """Genere un brouillon d'email vendeur a partir d'un scan.
 
+    Args:
+        scan_id: Scan concerne.
+        refresh: Ignore la reponse en cache et redemande un texte a Gemini
+            (regeneration depuis l'admin).
+
+    Un appel concurrent pour le meme scan (et le meme ``refresh``) renvoie
+    le brouillon cree par le premier, sans second appel Gemini.
+
     Raises:
         ValueError: Si le scan_id n'existe pas.
         ConnectionError: Si Gemini est injoignable.
     """
+    # Seul l'id circule entre threads : chacun relit le brouillon dans sa session
+    draft_id, shared = _EMAIL_FLIGHTS.do(
+        f"{scan_id}:{int(refresh)}",
+        lambda: _create_email_draft(scan_id, refresh).id,
+        timeout=float(current_app.config.get("GEMINI_TIMEOUT", 30)) * 2,
+    )
+    if shared:
+        record_shared(EMAIL_FEATURE)
+    return db.session.get(EmailDraft, draft_id)
+
+
+def _create_email_draft(scan_id: int, refresh: bool) -> EmailDraft:
+    """Construit le prompt, obtient le texte (cache ou Gemini) et cree le brouillon."""
     scan = db.session.get(ScanLog, scan_id)
     if not scan:
         raise ValueError(f"Scan introuvable: {scan_id}")
@@ -379,12 +414,13 @@ def generate_email_draft(scan_id: int) -> EmailDraft:
     # Appel Gemini avec system prompt adapte a la source
     site_name = _SOURCE_NAMES.get(source, source)
     system_prompt = _SYSTEM_PROMPT_TEMPLATE.format(site_name=site_name)
-    generated_text, total_tokens = gemini_service.generate_text(
+    generated_text, total_tokens, from_cache = cached_generate_text(
         prompt=prompt,
-        feature="email_draft",
+        feature=EMAIL_FEATURE,
         system_prompt=system_prompt,
         max_output_tokens=1024,
         temperature=0.4,
+        refresh=refresh,
     )
 
     # Creer le brouillon
@@ -408,9 +444,10 @@ def generate_email_draft(scan_id: int) -> EmailDraft:
     db.session.commit()
 
     logger.info(
-        "Email draft #%d cree pour scan #%d (%d tokens)",
+        "Email draft #%d cree pour scan #%d (%d tokens%s)",
         draft.id,
         scan_id,
         total_tokens,
+        ", cache" if from_cache else "",
     )
     return draft
@@ -3,6 +3,11 @@
 Expose get_engine_reliability() qui fait correspondre une string moteur
 (ex: "1.5 BlueHDi 130") avec un enregistrement EngineReliability via
 pattern matching substring (case-insensitive).
+
+Le choix spec + fiabilite pour un couple (vehicule, carburant) est materialise
+dans VehicleReliabilityMap : rebuild_vehicle_reliability_map() le recalcule
+quand les specs ou la fiabilite changent, lookup_vehicle_reliability() le lit
+en une requete indexee au moment du scan.
 """
 
 from __future__ import annotations
@@ -10,6 +15,10 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
 if TYPE_CHECKING:
     from app.models.engine_reliability import EngineReliability
 
@@ -65,20 +74,209 @@ def get_reliability_for_specs(
 
     result: dict[int, "EngineReliability | None"] = {}
     for spec in specs:
-        engine_str = (spec.engine or "").lower()
-        fuel = spec.fuel_type or ""
-        matched = None
-
-        for rel in all_reliabilities:
-            if fuel and rel.fuel_type != fuel:
-                continue
-            for pattern in rel.patterns_list():
-                if pattern.lower() in engine_str:
-                    matched = rel
-                    break
-            if matched:
-                break
-
-        result[spec.id] = matched
+        result[spec.id] = _match_reliability(spec.engine, spec.fuel_type, all_reliabilities)
 
     return result
+
+
+def _match_reliability(
+    engine_str: str | None,
+    fuel_type: str | None,
+    reliabilities: list,
+) -> EngineReliability | None:
+    """Meme algorithme que get_engine_reliability, sur une liste deja chargee (score DESC)."""
+    engine_lower = (engine_str or "").lower()
+    for rel in reliabilities:
+        if fuel_type and rel.fuel_type != fuel_type:
+            continue
+        for pattern in rel.patterns_list():
+            if pattern.lower() in engine_lower:
+                return rel
+    return None
+
+
+# --- Table materialisee vehicule + carburant -> fiabilite ---
+
+# Carburants tels qu'envoyes par l'extension (minuscules). On precalcule une
+# ligne par valeur connue pour que le scan fasse un simple lookup par cle
+# au lieu de rejouer le matching par sous-chaine sur toutes les specs.
+_AD_FUEL_KEYS = (
+    "essence",
+    "diesel",
+    "hybride",
+    "hybride rechargeable",
+    "electrique",
+    "électrique",
+    "gpl",
+    "gnv",
+)
+
+
+def _normalize_fuel_key(fuel: str | None) -> str:
+    """Cle de carburant utilisee dans VehicleReliabilityMap."""
+    return (fuel or "").strip().lower()
+
+
+def _pick_spec_for_fuel(specs: list, fuel_key: str):
+    """Premiere spec dont le carburant colle a fuel_key (sous-chaine dans un sens ou l'autre)."""
+    if not fuel_key:
+        return None
+    for spec in specs:
+        ft = (spec.fuel_type or "").lower()
+        if fuel_key in ft or ft in fuel_key:
+            return spec
+    return None
+
+
+def rebuild_vehicle_reliability_map(vehicle_id: int | None = None) -> int:
+    """Reconstruit la table VehicleReliabilityMap (un vehicule ou tout le referentiel).
+
+    A appeler apres la creation de specs (promotion motorisation, import CSV)
+    ou apres une modification des donnees de fiabilite (seed, edition admin).
+    Ne commit pas : l'appelant reste maitre de sa transaction.
+
+    Args:
+        vehicle_id: Vehicule a reconstruire, ou None pour tout reconstruire.
+
+    Returns:
+        Nombre de lignes ecrites.
+    """
+    from app.models.engine_reliability import EngineReliability
+    from app.models.vehicle import VehicleSpec
+    from app.models.vehicle_reliability_map import VehicleReliabilityMap
+    from app.services.enrichment_bundle import invalidate_all, invalidate_vehicle
+
+    reliabilities = EngineReliability.query.order_by(EngineReliability.score.desc()).all()
+
+    spec_query = VehicleSpec.query.order_by(VehicleSpec.vehicle_id, VehicleSpec.id)
+    delete_query = VehicleReliabilityMap.query
+    if vehicle_id is not None:
+        spec_query = spec_query.filter(VehicleSpec.vehicle_id == vehicle_id)
+        delete_query = delete_query.filter(VehicleReliabilityMap.vehicle_id == vehicle_id)
+    delete_query.delete(synchronize_session=False)
+
+    specs_by_vehicle: dict[int, list] = {}
+    for spec in spec_query.all():
+        specs_by_vehicle.setdefault(spec.vehicle_id, []).append(spec)
+
+    written = 0
+    for vid, specs in specs_by_vehicle.items():
+        # Fallback "" = premiere spec, comme le scan quand aucun carburant ne matche
+        picks = {"": specs[0]}
+        fuel_keys = set(_AD_FUEL_KEYS) | {_normalize_fuel_key(s.fuel_type) for s in specs}
+        for key in fuel_keys:
+            spec = _pick_spec_for_fuel(specs, key)
+            if spec is not None:
+                picks[key] = spec
+
+        # Un seul calcul de fiabilite par spec, meme si plusieurs cles la partagent
+        rel_by_spec: dict[int, EngineReliability | None] = {}
+        for key, spec in picks.items():
+            if spec.id not in rel_by_spec:
+                rel_by_spec[spec.id] = (
+                    _match_reliability(spec.engine, spec.fuel_type, reliabilities)
+                    if spec.engine
+                    else None
+                )
+            rel = rel_by_spec[spec.id]
+            db.session.add(
+                VehicleReliabilityMap(
+                    vehicle_id=vid,
+                    fuel_key=key,
+                    spec_id=spec.id,
+                    has_engine=bool(spec.engine),
+                    engine_reliability_id=rel.id if rel else None,
+                )
+            )
+            written += 1
+
+    # Fiabilite servie dans /api/analyze : bundles d'enrichissement a recalculer
+    if vehicle_id is not None:
+        invalidate_vehicle(vehicle_id)
+    else:
+        invalidate_all()
+
+    db.session.flush()
+    logger.info(
+        "VehicleReliabilityMap rebuilt (%s): %d rows",
+        f"vehicle_id={vehicle_id}" if vehicle_id is not None else "all",
+        written,
+    )
+    return written
+
+
+def ensure_vehicle_reliability_map() -> None:
+    """Construit la table au demarrage si elle est vide alors que des specs existent.
+
+    Couvre le premier deploiement apres l'ajout de la table. Plusieurs workers
+    peuvent tenter le build en meme temps : le perdant rollback sans bruit.
+    """
+    from app.models.vehicle import VehicleSpec
+    from app.models.vehicle_reliability_map import VehicleReliabilityMap
+
+    if VehicleReliabilityMap.query.first() is not None:
+        return
+    if VehicleSpec.query.first() is None:
+        return
+    try:
+        rebuild_vehicle_reliability_map()
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        logger.debug("VehicleReliabilityMap deja construite par un autre worker")
+
+
+def lookup_vehicle_reliability(vehicle_id: int, fuel: str | None) -> dict | None:
+    """Lit la fiabilite moteur precalculee pour un vehicule et le carburant de l'annonce.
+
+    Une seule requete indexee : la ligne du carburant exact si elle existe,
+    sinon la ligne fallback (fuel_key=""). Un carburant hors _AD_FUEL_KEYS et
+    hors specs (ex. "hybride essence") n'a pas de ligne : on rejoue alors le
+    matching par sous-chaine sur les specs du vehicule, comme avant la table.
+
+    Returns:
+        Le payload ``engine_reliability`` de /api/analyze : dict avec
+        ``matched=True`` et les infos moteur, ``{"matched": False}`` si la spec
+        retenue n'a pas de fiabilite connue, ou None si rien a afficher
+        (pas de spec ou spec sans nom moteur).
+    """
+    from app.models.vehicle import VehicleSpec
+    from app.models.vehicle_reliability_map import VehicleReliabilityMap
+
+    fuel_key = _normalize_fuel_key(fuel)
+    row = (
+        VehicleReliabilityMap.query.filter(
+            VehicleReliabilityMap.vehicle_id == vehicle_id,
+            VehicleReliabilityMap.fuel_key.in_({fuel_key, ""}),
+        )
+        # "" trie en premier : DESC fait passer la cle exacte devant le fallback
+        .order_by(VehicleReliabilityMap.fuel_key.desc())
+        .first()
+    )
+    if row is None:
+        return None
+
+    if fuel_key and row.fuel_key != fuel_key:
+        specs = VehicleSpec.query.filter_by(vehicle_id=vehicle_id).order_by(VehicleSpec.id).all()
+        spec = _pick_spec_for_fuel(specs, fuel_key)
+        if spec is not None:
+            if not spec.engine:
+                return None
+            return _reliability_payload(get_engine_reliability(spec.engine, spec.fuel_type))
+
+    if not row.has_engine:
+        return None
+    return _reliability_payload(row.reliability)
+
+
+def _reliability_payload(rel: EngineReliability | None) -> dict:
+    if rel is None:
+        return {"matched": False}
+    return {
+        "score": rel.score,
+        "stars": rel.stars,
+        "engine_code": rel.engine_code,
+        "brand": rel.brand,
+        "note": rel.note,
+        "matched": True,
+    }
@@ -0,0 +1,228 @@
+"""Enrichissements /api/analyze precalcules par (vehicule, annee, carburant).
+
+Les etapes 8b, 8c et 8e de l'analyse (video featured, dimensions pneus,
+fiabilite moteur) refaisaient leurs lectures a chaque scan, plus un commit
+du compteur de demandes pneus. Leur resultat ne depend que du vehicule, de
+l'annee modele et du carburant : get_enrichment() le calcule une fois, le
+stocke dans EnrichmentBundle et le garde en memoire (LRU par worker) :
+
+- lecture : memoire (ENRICHMENT_BUNDLE_MEMORY_TTL secondes), sinon table,
+  sinon calcul puis stockage ; un calcul dont une etape a echoue (reseau)
+  n'est pas stocke ;
+- invalidation : une collecte pneus (invalidate_tires), un changement de
+  video featured / archivee ou une reconstruction de la fiabilite
+  (invalidate_vehicle / invalidate_all) supprime les bundles concernes. Les
+  bundles de plus de ENRICHMENT_BUNDLE_MAX_AGE_HOURS sont recalcules (sources
+  non suivies, ex. renommage d'un vehicule) ; dans les autres workers, le TTL
+  memoire borne le retard ;
+- le compteur de demandes pneus est compte a chaque lecture, par lot
+  (tire_service.record_tire_request).
+
+Les annonces dont le vehicule n'est pas au referentiel et
+ENRICHMENT_BUNDLE_CACHE=False (tests) passent par le calcul direct.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.extensions import db
+from app.models.enrichment_bundle import EnrichmentBundle
+
+logger = logging.getLogger(__name__)
+
+EMPTY_BUNDLE = {"featured_video": None, "tire_sizes": None, "engine_reliability": None}
+
+# {(vehicle_id, annee, carburant): (expire_a, cle pneus, payload)}, du plus
+# ancien au plus recent
+_memory: dict[tuple[int, int, str], tuple[float, tuple[str, str], dict]] = {}
+_memory_lock = threading.Lock()
+MEMORY_MAX_BUNDLES = 2048
+
+
+def _utcnow() -> datetime:
+    # SQLite rend des datetimes naifs : on compare en UTC naif
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _fuel_key(fuel: str | None) -> str:
+    return (fuel or "").strip().lower()
+
+
+def compute_enrichment(make: str, model: str, year, fuel: str | None, vehicle) -> tuple[dict, bool]:
+    """Calcule les enrichissements d'une annonce, chacun en best-effort.
+
+    Returns:
+        (payload, complet) -- complet vaut False si une etape a echoue.
+    """
+    from app.services import tire_service
+    from app.services.engine_reliability_service import lookup_vehicle_reliability
+    from app.services.youtube_service import featured_video_for_vehicle, get_featured_video
+
+    payload = dict(EMPTY_BUNDLE)
+    complete = True
+    try:
+        payload["featured_video"] = (
+            featured_video_for_vehicle(vehicle.id) if vehicle else get_featured_video(make, model)
+        )
+    except (OSError, ValueError, TypeError) as exc:
+        complete = False
+        logger.debug("Featured video lookup failed: %s", exc)
+    if year:
+        try:
+            payload["tire_sizes"] = tire_service.get_tire_sizes(make, model, year)
+        except (OSError, ValueError, TypeError) as exc:
+            complete = False
+            logger.debug("Tire sizes lookup failed: %s", exc)
+    if vehicle:
+        try:
+            payload["engine_reliability"] = lookup_vehicle_reliability(vehicle.id, fuel)
+        except (OSError, ValueError, TypeError, AttributeError) as exc:
+            complete = False
+            logger.debug("Engine reliability lookup failed: %s", exc)
+    return payload, complete
+
+
+def get_enrichment(make: str | None, model: str | None, year, fuel: str | None) -> dict:
+    """Enrichissements de la reponse /api/analyze pour une annonce.
+
+    Returns:
+        {"featured_video", "tire_sizes", "engine_reliability"} (valeurs None
+        si indisponibles).
+    """
+    from app.services.tire_service import record_tire_request, tire_lookup_key
+    from app.services.vehicle_lookup import find_vehicle
+
+    if not make or not model:
+        return dict(EMPTY_BUNDLE)
+    try:
+        vehicle = find_vehicle(make, model)
+    except (OSError, ValueError, TypeError, AttributeError) as exc:
+        logger.debug("Vehicle lookup failed: %s", exc)
+        vehicle = None
+    try:
+        year_bucket = int(year or 0)
+    except (ValueError, TypeError):
+        year_bucket = None
+    cache_enabled = current_app.config.get("ENRICHMENT_BUNDLE_CACHE", True)
+    if vehicle is None or year_bucket is None or not cache_enabled:
+        return compute_enrichment(make, model, year, fuel, vehicle)[0]
+
+    key = (vehicle.id, year_bucket, _fuel_key(fuel))
+    tire_key = tire_lookup_key(make, model)
+    payload = _memory_get(key)
+    if payload is None:
+        payload = _load(key)
+        if payload is None:
+            # Calcul complet : get_tire_sizes a deja compte la demande pneus
+            payload, complete = compute_enrichment(make, model, year, fuel, vehicle)
+            if complete:
+                _store(key, tire_key, payload)
+                _memory_put(key, tire_key, payload)
+            return dict(payload)
+        _memory_put(key, tire_key, payload)
+    if year_bucket:
+        record_tire_request(*tire_key, year_bucket)
+    return dict(payload)
+
+
+def _memory_get(key: tuple[int, int, str]) -> dict | None:
+    with _memory_lock:
+        cached = _memory.get(key)
+    if cached is None or cached[0] <= time.monotonic():
+        return None
+    return cached[2]
+
+
+def _memory_put(key: tuple[int, int, str], tire_key: tuple[str, str], payload: dict) -> None:
+    ttl = float(current_app.config.get("ENRICHMENT_BUNDLE_MEMORY_TTL", 60))
+    if ttl <= 0:
+        return
+    with _memory_lock:
+        _memory.pop(key, None)
+        _memory[key] = (time.monotonic() + ttl, tire_key, payload)
+        while len(_memory) > MEMORY_MAX_BUNDLES:
+            _memory.pop(next(iter(_memory)))
+
+
+def _forget(predicate) -> None:
+    with _memory_lock:
+        for key in [k for k, (_, tire_key, _) in _memory.items() if predicate(k, tire_key)]:
+            del _memory[key]
+
+
+def _load(key: tuple[int, int, str]) -> dict | None:
+    """Payload stocke et encore frais, ou None."""
+    vehicle_id, year_bucket, fuel_key = key
+    max_age = float(current_app.config.get("ENRICHMENT_BUNDLE_MAX_AGE_HOURS", 24))
+    row = EnrichmentBundle.query.filter_by(
+        vehicle_id=vehicle_id, year_bucket=year_bucket, fuel_key=fuel_key
+    ).first()
+    if row is None or row.built_at < _utcnow() - timedelta(hours=max_age):
+        return None
+    return row.payload
+
+
+def _store(key: tuple[int, int, str], tire_key: tuple[str, str], payload: dict) -> None:
+    """Ecrit (ou remplace) le bundle et commit ; best-effort."""
+    vehicle_id, year_bucket, fuel_key = key
+    values = {
+        "tire_make": tire_key[0],
+        "tire_model": tire_key[1],
+        "payload": payload,
+        "built_at": _utcnow(),
+    }
+    try:
+        row = EnrichmentBundle.query.filter_by(
+            vehicle_id=vehicle_id, year_bucket=year_bucket, fuel_key=fuel_key
+        ).first()
+        if row is not None:
+            for name, value in values.items():
+                setattr(row, name, value)
+        else:
+            try:
+                # Savepoint : un autre worker a pu stocker le meme bundle
+                with db.session.begin_nested():
+                    db.session.add(
+                        EnrichmentBundle(
+                            vehicle_id=vehicle_id,
+                            year_bucket=year_bucket,
+                            fuel_key=fuel_key,
+                            **values,
+                        )
+                    )
+            except IntegrityError:
+                pass
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.warning("Enrichment bundle not stored", exc_info=True)
+
+
+def invalidate_vehicle(vehicle_id: int | None) -> int:
+    """Supprime les bundles d'un vehicule (featured, fiabilite). Ne commit pas."""
+    if vehicle_id is None:
+        return 0
+    _forget(lambda key, _tire_key: key[0] == vehicle_id)
+    return EnrichmentBundle.query.filter_by(vehicle_id=vehicle_id).delete(synchronize_session=False)
+
+
+def invalidate_tires(make: str, model: str) -> int:
+    """Supprime les bundles qui lisent les pneus d'un modele (cles TireSize). Ne commit pas."""
+    _forget(lambda _key, tire_key: tire_key == (make, model))
+    return EnrichmentBundle.query.filter_by(tire_make=make, tire_model=model).delete(
+        synchronize_session=False
+    )
+
+
+def invalidate_all() -> int:
+    """Supprime tous les bundles (reconstruction complete d'une source). Ne commit pas."""
+    with _memory_lock:
+        _memory.clear()
+    return EnrichmentBundle.query.delete(synchronize_session=False)
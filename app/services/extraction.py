@@ -44,25 +44,25 @@ def _find_ad_payload(next_data: dict) -> dict | None:
     if isinstance(ad, dict):
         return ad
 
-    # Fallback : recherche recursive d'un dict qui ressemble a une annonce.
+    # Fallback : parcours en profondeur d'un dict qui ressemble a une annonce.
     # On exige list_id (identifiant unique d'annonce Leboncoin) pour eviter
     # de matcher des annonces issues de listes / recommandations.
-    def _walk(node: Any) -> dict | None:
-        if isinstance(node, dict):
-            has_attributes = "attributes" in node
-            has_identity = "list_id" in node or "ad_id" in node
-            has_content = "price" in node or "subject" in node
-            if has_attributes and has_identity and has_content:
-                return node
-            for value in node.values():
-                hit = _walk(value)
-                if hit:
-                    return hit
-        elif isinstance(node, list):
-            for item in node:
-                hit = _walk(item)
-                if hit:
-                    return hit
+    # Pile explicite plutot que recursion : un etat de page tres imbrique ne
+    # peut pas faire sauter la limite de recursion, et l'ordre de visite
+    # (prefixe, cles puis elements dans l'ordre) reste celui d'origine.
+    def _walk(root: Any) -> dict | None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                has_attributes = "attributes" in node
+                has_identity = "list_id" in node or "ad_id" in node
+                has_content = "price" in node or "subject" in node
+                if has_attributes and has_identity and has_content:
+                    return node
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
         return None
 
     result = _walk(next_data)
@@ -0,0 +1,66 @@
+"""Timer daemon de vidage des tampons d'ecriture en memoire.
+
+Les compteurs et journaux ecrits par lots (LLMUsage, request_count des
+pneus) sont accumules dans le process puis inseres en une fois. Sans timer,
+un lot incomplet n'etait ecrit qu'au prochain enregistrement : il pouvait
+rester en memoire indefiniment. FlushTimer programme le vidage hors du
+chemin des requetes :
+
+- arm(delay) arme le timer s'il n'y en a pas, ou l'avance si le vidage
+  demande est plus proche (lot plein : delay = 0) ;
+- le vidage tourne dans un thread daemon, dans un contexte d'application ;
+- cancel() desarme le timer quand le tampon vient d'etre vide.
+
+Un vidage en echec doit remettre ses lignes en attente et rappeler arm().
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class FlushTimer:
+    """Un vidage programme a la fois pour un tampon donne."""
+
+    def __init__(self, name: str, flush: Callable[[], object]) -> None:
+        self.name = name
+        self._flush = flush
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._deadline = 0.0
+
+    def arm(self, app, delay: float) -> None:
+        """Programme un vidage dans ``delay`` secondes au plus tard."""
+        deadline = time.monotonic() + max(delay, 0.0)
+        with self._lock:
+            if self._timer is not None:
+                if self._deadline <= deadline:
+                    return
+                self._timer.cancel()
+            self._deadline = deadline
+            self._timer = threading.Timer(max(delay, 0.0), self._run, args=(app,))
+            self._timer.daemon = True
+            self._timer.name = self.name
+            self._timer.start()
+
+    def cancel(self) -> None:
+        """Desarme le timer (tampon vide)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _run(self, app) -> None:
+        with self._lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+        try:
+            with app.app_context():
+                self._flush()
+        except Exception:  # noqa: BLE001 -- thread de fond, ne doit jamais crasher
+            logger.warning("Vidage %s echoue", self.name, exc_info=True)
@@ -1,13 +1,21 @@
-"""Service Gemini -- wrapper pour le SDK Google Gen AI."""
+"""Service Gemini -- wrapper pour le SDK Google Gen AI.
+
+Le SDK (google.genai, ~1 s d'import) n'est charge qu'au premier appel :
+les workers qui ne parlent jamais a Gemini ne le paient pas au demarrage.
+"""
+
+from __future__ import annotations
 
 import logging
 import uuid
+from typing import TYPE_CHECKING
 
 from flask import current_app
-from google import genai
 
-from app.extensions import db
-from app.models.llm_usage import LLMUsage
+from app.services.llm_usage_writer import record_llm_usage
+
+if TYPE_CHECKING:
+    from google import genai
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +36,8 @@ def _get_model() -> str:
 
 def _get_client() -> genai.Client:
     """Cree un client Gemini avec la cle API."""
+    from google import genai
+
     api_key = _get_api_key()
     if not api_key:
         raise ValueError("Gemini API key non configuree")
@@ -68,7 +78,8 @@ def generate_text(
 ) -> tuple[str, int]:
     """Envoie un prompt a Gemini et retourne (texte, total_tokens).
 
-    Enregistre automatiquement un LLMUsage pour le suivi des couts.
+    Enregistre automatiquement un LLMUsage pour le suivi des couts (ecrit
+    par lots, voir llm_usage_writer).
 
     Raises:
         ValueError: Si la cle API n'est pas configuree.
@@ -120,8 +131,9 @@ def generate_text(
     completion_tokens = getattr(usage, "candidates_token_count", 0) or 0
     total_tokens = getattr(usage, "total_token_count", 0) or 0
 
-    # Persister le suivi des couts
-    llm_usage = LLMUsage(
+    # Suivi des couts, ecrit par lots (voir llm_usage_writer)
+    estimated_cost = _estimate_cost(prompt_tokens, completion_tokens)
+    record_llm_usage(
         request_id=request_id,
         provider="gemini",
         model=model,
@@ -129,10 +141,8 @@ def generate_text(
         prompt_tokens=prompt_tokens,
         completion_tokens=completion_tokens,
         total_tokens=total_tokens,
-        estimated_cost_eur=_estimate_cost(prompt_tokens, completion_tokens),
+        estimated_cost_eur=estimated_cost,
     )
-    db.session.add(llm_usage)
-    db.session.commit()
 
     logger.info(
         "Gemini %s: %d tok (in=%d, out=%d) cost=%.6f EUR [%s]",
@@ -140,7 +150,7 @@ def generate_text(
         total_tokens,
         prompt_tokens,
         completion_tokens,
-        llm_usage.estimated_cost_eur,
+        estimated_cost,
         request_id,
     )
 
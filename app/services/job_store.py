@@ -0,0 +1,257 @@
+"""Store persistant des jobs admin longs (pipelines lances en thread).
+
+Les jobs de la recherche YouTube fine vivaient dans un dict du module
+admin : avec plusieurs workers gunicorn, le polling tombait une fois sur
+deux sur un worker qui ne connaissait pas le job, et le dict n'etait
+jamais purge. L'etat est maintenant en base (PipelineJob, rattache a un
+PipelineRun) :
+
+- create_job() cree le PipelineRun "running" et la ligne PipelineJob ;
+- le thread du pipeline manipule un JobHandle (interface dict, comme
+  avant) qui ecrit la progression en base, au plus toutes les
+  SAVE_INTERVAL secondes sauf changement de statut ou d'etape ;
+- job_status() / request_cancel() servent le polling et l'annulation
+  depuis n'importe quel worker (lecture par job_key, index unique) ;
+- les jobs termines depuis PIPELINE_JOB_RETENTION_HOURS sont purges, et
+  un job "running" sans nouvelles depuis PIPELINE_JOB_STALE_SECONDS
+  (worker arrete) est passe en erreur.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models.pipeline_job import PipelineJob
+from app.models.pipeline_run import PipelineRun
+
+logger = logging.getLogger(__name__)
+
+# Ecritures de progression au plus toutes les SAVE_INTERVAL secondes
+SAVE_INTERVAL = 0.5
+# Relecture du drapeau d'annulation au plus toutes les CANCEL_POLL_INTERVAL s
+CANCEL_POLL_INTERVAL = 0.5
+
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+FINISHED = (DONE, ERROR, CANCELLED)
+# Statut PipelineRun correspondant a la fin du job
+_RUN_STATUS = {DONE: "success", ERROR: "failure", CANCELLED: "failure"}
+
+# Cles portees par des colonnes ; le reste va dans PipelineJob.state
+_COLUMNS = ("status", "progress", "progress_label")
+
+
+def _utcnow() -> datetime:
+    # SQLite rend des datetimes naifs : on compare en UTC naif
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobHandle:
+    """Etat d'un job vu du thread qui l'execute.
+
+    S'utilise comme l'ancien dict (``job["progress"] = 40``,
+    ``job["pipeline_log"].append(...)``) ; chaque affectation programme une
+    ecriture en base. Un changement de statut est ecrit immediatement et
+    cloture le job et son PipelineRun s'il est final ; save(force=True)
+    apres une mutation en place (journal d'etapes).
+    """
+
+    def __init__(self, job: PipelineJob) -> None:
+        self.id = job.id
+        self.key = job.job_key
+        self.run_id = job.run_id
+        self._data = {
+            "id": job.job_key,
+            "status": job.status,
+            "progress": job.progress,
+            "progress_label": job.progress_label,
+            **(job.state or {}),
+        }
+        self._stages = dict(job.stages or {})
+        self._saved_at = 0.0
+        self._cancelled = job.cancel_requested
+        self._cancel_checked_at = time.monotonic()
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._data[key] = value
+        # Job fini : les dernieres affectations (resultat, libelle) sont ecrites
+        self.save(force=key == "status" or self._data["status"] in FINISHED)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def save(self, force: bool = False) -> None:
+        """Ecrit l'etat en base (throttle a SAVE_INTERVAL sauf ``force``)."""
+        now = time.monotonic()
+        if not force and now - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        status = self._data["status"]
+        values = {
+            "status": status,
+            "progress": int(self._data.get("progress") or 0),
+            "progress_label": str(self._data.get("progress_label") or "")[:200],
+            "state": {k: v for k, v in self._data.items() if k not in _COLUMNS and k != "id"},
+            "stages": dict(self._stages),
+            "updated_at": _utcnow(),
+        }
+        if status in FINISHED:
+            values["finished_at"] = values["updated_at"]
+        db.session.execute(update(PipelineJob).where(PipelineJob.id == self.id).values(**values))
+        if status in FINISHED:
+            run = db.session.get(PipelineRun, self.run_id)
+            if run is not None:
+                if run.status == RUNNING:
+                    run.status = _RUN_STATUS[status]
+                    run.finished_at = datetime.now(timezone.utc)
+                if status == CANCELLED:
+                    run.error_message = "Annule par l'utilisateur"
+                elif status == ERROR:
+                    run.error_message = values["progress_label"] or status
+        db.session.commit()
+
+    def is_cancelled(self) -> bool:
+        """Annulation demandee (par n'importe quel worker) ?"""
+        if self._cancelled:
+            return True
+        now = time.monotonic()
+        if now - self._cancel_checked_at >= CANCEL_POLL_INTERVAL:
+            self._cancel_checked_at = now
+            self._cancelled = bool(
+                db.session.query(PipelineJob.cancel_requested)
+                .filter(PipelineJob.id == self.id)
+                .scalar()
+            )
+        return self._cancelled
+
+    def set_count(self, count: int) -> None:
+        """Nombre d'elements traites, reporte sur le PipelineRun."""
+        run = db.session.get(PipelineRun, self.run_id)
+        if run is not None:
+            run.count = count
+            db.session.commit()
+
+    def record_stage(self, name: str, seconds: float, items: int, unit: str) -> None:
+        """Duree et debit (``items`` ``unit`` par seconde) d'une etape. Commit."""
+        self._stages[name] = {
+            "seconds": round(seconds, 2),
+            "items": items,
+            "unit": unit,
+            "per_second": round(items / seconds, 2) if seconds > 0 else None,
+        }
+        self.save(force=True)
+
+
+def create_job(name: str, state: dict) -> JobHandle:
+    """Cree le PipelineRun et le PipelineJob d'un nouveau job ; commit.
+
+    Purge au passage les jobs termines trop anciens.
+    """
+    evict_jobs()
+    run = PipelineRun(name=name, status=RUNNING, started_at=datetime.now(timezone.utc))
+    db.session.add(run)
+    db.session.flush()
+    job = PipelineJob(
+        job_key=uuid.uuid4().hex[:12],
+        run_id=run.id,
+        name=name,
+        status=RUNNING,
+        progress=0,
+        progress_label="Demarrage...",
+        state=state,
+        stages={},
+    )
+    db.session.add(job)
+    db.session.commit()
+    return JobHandle(job)
+
+
+def open_job(job_key: str) -> JobHandle | None:
+    """JobHandle d'un job existant (thread du pipeline)."""
+    job = PipelineJob.query.filter_by(job_key=job_key).first()
+    return JobHandle(job) if job else None
+
+
+def job_status(job_key: str) -> dict | None:
+    """Etat d'un job pour le polling, ou None s'il est inconnu (ou purge)."""
+    # populate_existing : la ligne est ecrite par le thread du job
+    job = PipelineJob.query.filter_by(job_key=job_key).populate_existing().first()
+    if job is None:
+        return None
+    status = job.status
+    label = job.progress_label
+    if status == RUNNING and job.updated_at < _utcnow() - timedelta(seconds=_stale_seconds()):
+        status = ERROR
+        label = "Job interrompu (worker arrete)"
+    return {
+        **(job.state or {}),
+        "id": job.job_key,
+        "name": job.name,
+        "status": status,
+        "progress": job.progress,
+        "progress_label": label,
+        "cancel_requested": job.cancel_requested,
+        "stages": job.stages or {},
+    }
+
+
+def request_cancel(job_key: str) -> bool:
+    """Pose le drapeau d'annulation ; False si le job est inconnu. Commit."""
+    updated = (
+        PipelineJob.query.filter_by(job_key=job_key)
+        .filter(PipelineJob.status == RUNNING)
+        .update({"cancel_requested": True}, synchronize_session=False)
+    )
+    db.session.commit()
+    if updated:
+        return True
+    return PipelineJob.query.filter_by(job_key=job_key).count() > 0
+
+
+def _stale_seconds() -> int:
+    return int(current_app.config.get("PIPELINE_JOB_STALE_SECONDS", 900))
+
+
+def evict_jobs() -> int:
+    """Purge les jobs termines depuis la retention ; clot les jobs orphelins.
+
+    Un job "running" sans ecriture depuis PIPELINE_JOB_STALE_SECONDS a perdu
+    son thread (redemarrage du worker) : il passe en erreur avec son
+    PipelineRun. Commit.
+
+    Returns:
+        Nombre de jobs purges.
+    """
+    now = _utcnow()
+    retention = float(current_app.config.get("PIPELINE_JOB_RETENTION_HOURS", 24))
+    stale = PipelineJob.query.filter(
+        PipelineJob.status == RUNNING,
+        PipelineJob.updated_at < now - timedelta(seconds=_stale_seconds()),
+    ).all()
+    for job in stale:
+        job.status = ERROR
+        job.progress_label = "Job interrompu (worker arrete)"
+        job.finished_at = now
+        if job.run is not None and job.run.status == RUNNING:
+            job.run.status = "failure"
+            job.run.error_message = job.progress_label
+            job.run.finished_at = now
+    evicted = PipelineJob.query.filter(
+        PipelineJob.finished_at < now - timedelta(hours=retention)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if evicted or stale:
+        logger.info("Jobs admin : %d purges, %d orphelins clos", evicted, len(stale))
+    return evicted
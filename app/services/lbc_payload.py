@@ -0,0 +1,223 @@
+"""Lecture rapide du corps brut de /api/analyze (chemin LBC legacy).
+
+Le corps envoye par l'extension embarque tout le __NEXT_DATA__ de la page
+Leboncoin (etat de recherche, traductions, cache Apollo...), alors que
+l'extraction n'a besoin que de ``props.pageProps.ad``. Plutot que de parser
+l'ensemble en dicts Python, on parcourt les octets bruts :
+
+- les valeurs de premier niveau (url, source, ad_data...) sont localisees
+  puis decodees individuellement avec orjson,
+- dans next_data, on descend le chemin props > pageProps > ad en sautant les
+  sous-arbres voisins sans les decoder ; seul l'objet ``ad`` est materialise.
+
+Le parcours est iteratif (aucune recursion) et la memoire allouee suit la
+taille de l'annonce, et non plus celle de toute la page. Si le
+chemin standard est absent (A/B test LBC), next_data est decode en entier
+et extraction._find_ad_payload prend le relais avec son walker de secours.
+
+Les sous-arbres sautes ne sont pas valides octet par octet : un JSON
+malforme dans une partie ignoree de la page ne fait pas echouer l'analyse.
+"""
+
+from __future__ import annotations
+
+import re
+
+import orjson
+
+# Chemin standard Next.js de l'annonce dans __NEXT_DATA__
+AD_PATH = (b"props", b"pageProps", b"ad")
+
+# Chaine JSON complete (quantificateurs possessifs : pas de backtracking)
+_STR = rb'"(?:[^"\\]++|\\.)*+"'
+# Tout ce qui n'ouvre/ferme pas de conteneur : scalaires, separateurs, chaines
+_JUNK = rb'[^"{}\[\]]++|' + _STR
+# Conteneurs sans enfant, puis jusqu'a 3 niveaux d'imbrication, consommes d'un
+# seul match : l'essentiel d'un etat de page est fait de petits objets
+_LEAF = rb"[{\[](?:" + _JUNK + rb")*+[}\]]"
+for _ in range(2):
+    _LEAF = rb"[{\[](?:" + _JUNK + rb"|" + _LEAF + rb")*+[}\]]"
+
+# Mode saut : avance jusqu'a la prochaine accolade/crochet "structurel"
+_SKIP_RE = re.compile(rb"(?:" + _JUNK + rb"|" + _LEAF + rb")*+([{}\[\]])")
+# Mode chemin : prochaine cle d'objet ou prochain conteneur (valeurs chaines ignorees)
+_PATH_RE = re.compile(
+    rb"(?:[^\"{}\[\]]++|" + _STR + rb"(?!\s*:))*+(?:(" + _STR + rb")\s*:|([{}\[\]]))"
+)
+# Premier niveau : cle, puis debut de valeur
+_KEY_RE = re.compile(rb"\s*(" + _STR + rb")\s*:\s*")
+_STR_RE = re.compile(_STR)
+_SCALAR_RE = re.compile(rb"[^,}\]\s]++")
+_SEP_RE = re.compile(rb"\s*([,}])")
+_OPEN_RE = re.compile(rb"\s*\{")
+_EMPTY_RE = re.compile(rb"\s*\}\s*\Z")
+_TAIL_RE = re.compile(rb"\s*\Z")
+
+
+def _skip_container(buf: bytes, pos: int) -> int | None:
+    """Position juste apres la fermeture du conteneur ouvert en ``pos - 1``."""
+    depth = 1
+    while True:
+        m = _SKIP_RE.match(buf, pos)
+        if m is None:
+            return None
+        pos = m.end()
+        if m.group(1) in (b"{", b"["):
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+
+
+def _value_end(buf: bytes, pos: int) -> int | None:
+    """Fin de la valeur JSON qui commence en ``pos``."""
+    if pos >= len(buf):
+        return None
+    first = buf[pos : pos + 1]
+    if first in (b"{", b"["):
+        return _skip_container(buf, pos + 1)
+    m = (_STR_RE if first == b'"' else _SCALAR_RE).match(buf, pos)
+    return m.end() if m else None
+
+
+def _close_levels(buf: bytes, pos: int, levels: int) -> int | None:
+    """Position apres la fermeture des ``levels`` conteneurs ouverts autour de ``pos``."""
+    for _ in range(levels):
+        pos = _skip_container(buf, pos)
+        if pos is None:
+            return None
+    return pos
+
+
+def top_level_spans(
+    buf: bytes,
+    via: tuple[str, tuple[bytes, ...]] | None = None,
+    located: dict[str, tuple[int, int]] | None = None,
+) -> dict[str, tuple[int, int]] | None:
+    """Localise les valeurs de l'objet JSON racine sans les decoder.
+
+    Args:
+        buf: Corps JSON brut.
+        via: (cle, chemin) : pour cette cle, la valeur objet est parcourue en
+            descendant le chemin (locate_path) puis en refermant ses niveaux,
+            au lieu d'etre sautee puis reparcourue. Si le chemin est absent,
+            la valeur est sautee normalement.
+        located: Recoit {cle: (debut, fin)} de l'objet trouve au bout de ``via``.
+
+    Returns:
+        {cle: (debut, fin)} dans ``buf``, ou None si ``buf`` n'est pas un objet JSON.
+    """
+    m = _OPEN_RE.match(buf)
+    if m is None:
+        return None
+    pos = m.end()
+    spans: dict[str, tuple[int, int]] = {}
+    if _EMPTY_RE.match(buf, pos):
+        return spans
+
+    while True:
+        m = _KEY_RE.match(buf, pos)
+        if m is None:
+            return None
+        try:
+            key = orjson.loads(m.group(1))
+        except orjson.JSONDecodeError:
+            return None
+        start = m.end()
+        end = None
+        if via is not None and key == via[0] and buf[start : start + 1] == b"{":
+            target = locate_path(buf, start, via[1])
+            if target is not None:
+                end = _close_levels(buf, target[1], len(via[1]))
+                if end is not None and located is not None:
+                    located[key] = target
+        if end is None:
+            end = _value_end(buf, start)
+        if end is None:
+            return None
+        spans[key] = (start, end)
+
+        m = _SEP_RE.match(buf, end)
+        if m is None:
+            return None
+        pos = m.end()
+        if m.group(1) == b"}":
+            return spans if _TAIL_RE.match(buf, pos) else None
+
+
+def locate_path(buf: bytes, start: int, path: tuple[bytes, ...]) -> tuple[int, int] | None:
+    """Localise l'objet au bout de ``path`` dans l'objet qui commence en ``start``.
+
+    Descente iterative : a chaque niveau on lit les cles de l'objet courant,
+    on entre dans celle du chemin et on saute les conteneurs voisins.
+
+    Returns:
+        (debut, fin) de l'objet cible, ou None si le chemin n'existe pas ou
+        n'aboutit pas a un objet.
+    """
+    m = _OPEN_RE.match(buf, start)
+    if m is None:
+        return None
+    pos = m.end()
+    depth = 0
+    pending: bytes | None = None
+    while True:
+        m = _PATH_RE.match(buf, pos)
+        if m is None:
+            return None
+        pos = m.end()
+        if m.group(1) is not None:
+            pending = m.group(1)[1:-1]
+            continue
+        bracket = m.group(2)
+        if bracket in (b"}", b"]"):
+            # Fin de l'objet courant sans avoir trouve la cle du chemin
+            return None
+        if bracket == b"{" and pending == path[depth]:
+            depth += 1
+            pending = None
+            if depth == len(path):
+                end = _skip_container(buf, pos)
+                return (pos - 1, end) if end is not None else None
+            continue
+        pending = None
+        skipped = _skip_container(buf, pos)
+        if skipped is None:
+            return None
+        pos = skipped
+
+
+def _read_next_data(buf: bytes, start: int, end: int, ad: tuple[int, int] | None) -> object:
+    """Decode next_data en ne materialisant que l'annonce si elle a ete localisee."""
+    if ad is not None:
+        return {"props": {"pageProps": {"ad": orjson.loads(memoryview(buf)[ad[0] : ad[1]])}}}
+    return orjson.loads(memoryview(buf)[start:end])
+
+
+def parse_analyze_body(raw: bytes) -> dict | None:
+    """Equivalent rapide de ``request.get_json()`` pour /api/analyze.
+
+    next_data est reduit a ``{"props": {"pageProps": {"ad": ...}}}`` quand
+    l'annonce est au chemin standard : c'est aussi ce qui est persiste dans
+    ScanLog.raw_data (suffisant pour re-extraire l'annonce plus tard).
+
+    Returns:
+        Le corps decode, ou None si ce n'est pas un objet JSON valide.
+    """
+    # Un seul passage sur next_data : descente jusqu'a l'annonce, puis fin de
+    # l'objet (les cles placees apres next_data sont lues normalement)
+    located: dict[str, tuple[int, int]] = {}
+    spans = top_level_spans(raw, via=("next_data", AD_PATH), located=located)
+    if spans is None:
+        return None
+    body: dict = {}
+    try:
+        for key, (start, end) in spans.items():
+            if key == "next_data":
+                body[key] = _read_next_data(raw, start, end, located.get(key))
+            else:
+                body[key] = orjson.loads(memoryview(raw)[start:end])
+    except orjson.JSONDecodeError:
+        return None
+    return body
@@ -0,0 +1,216 @@
+"""Service de statistiques d'anciennete des annonces (alimente L10).
+
+L10 a besoin de la mediane des days_online observes sur les 90 derniers jours
+pour un modele. Plutot que de relire ScanLog a chaque scan (ilike non indexable
+sur une table qui ne fait que grossir), on maintient un resume par modele dans
+ListingAgeStat :
+
+- record_listing_age() ajoute un scan au resume au moment de la persistence,
+- get_market_median_days() lit la mediane precalculee (une ligne, par cle unique),
+- rebuild_listing_age_stats() reconstruit tout depuis l'historique ScanLog
+  (scripts/rebuild_listing_age_stats.py).
+
+Les ecritures concurrentes de deux workers sur le meme modele peuvent perdre
+un echantillon : sans consequence pour une mediane, et le rebuild remet tout
+d'equerre.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Fenetre de temps des scans pris en compte (jours)
+# On ne regarde que les 3 derniers mois pour rester representatif
+MARKET_LOOKBACK_DAYS = 90
+
+# Au-dela, les valeurs sont regroupees dans le dernier bucket : borne la taille
+# des histogrammes sans impact sur une mediane realiste
+MAX_TRACKED_DAYS = 730
+
+
+def _keys(make: str, model: str) -> tuple[str, str]:
+    """Cles de matching insensibles a la casse (equivalent de l'ancien ilike)."""
+    return (make or "").strip().lower(), (model or "").strip().lower()
+
+
+def _window_start(today: date) -> date:
+    return today - timedelta(days=MARKET_LOOKBACK_DAYS)
+
+
+def _median_from_histogram(hist: dict[int, int], total: int) -> float | None:
+    """Mediane d'un histogramme {valeur: count}, meme resultat que statistics.median."""
+    if total <= 0:
+        return None
+    # Rangs (0-based) des deux elements du milieu ; identiques si total impair
+    lo_rank = (total - 1) // 2
+    hi_rank = total // 2
+    lo = hi = None
+    seen = 0
+    for value in sorted(hist):
+        seen += hist[value]
+        if lo is None and seen > lo_rank:
+            lo = value
+        if seen > hi_rank:
+            hi = value
+            break
+    return (lo + hi) / 2
+
+
+def _summarize(
+    buckets: dict[str, dict[str, int]], today: date
+) -> tuple[dict[str, dict[str, int]], int, float | None]:
+    """Sort de la fenetre les jours trop anciens et calcule (buckets, count, mediane)."""
+    start = _window_start(today).isoformat()
+    kept = {day: hist for day, hist in buckets.items() if day >= start}
+
+    merged: dict[int, int] = {}
+    for hist in kept.values():
+        for value, count in hist.items():
+            merged[int(value)] = merged.get(int(value), 0) + count
+    total = sum(merged.values())
+    return kept, total, _median_from_histogram(merged, total)
+
+
+def _add_sample(buckets: dict[str, dict[str, int]], day: date, days_online: int) -> None:
+    value = str(min(days_online, MAX_TRACKED_DAYS))
+    hist = buckets.setdefault(day.isoformat(), {})
+    hist[value] = hist.get(value, 0) + 1
+
+
+def record_listing_age(
+    make: str | None,
+    model: str | None,
+    days_online: int | None,
+    seen_at: datetime | None = None,
+) -> None:
+    """Ajoute un scan au resume d'anciennete de son modele.
+
+    Appele apres la persistence du ScanLog. Ne commit pas : l'appelant
+    reste maitre de sa transaction.
+    """
+    from app.models.listing_age_stat import ListingAgeStat
+
+    if not make or not model or days_online is None or days_online < 0:
+        return
+
+    make_key, model_key = _keys(make, model)
+    day = (seen_at or datetime.now(timezone.utc)).date()
+    today = datetime.now(timezone.utc).date()
+
+    stat = ListingAgeStat.query.filter_by(make_key=make_key, model_key=model_key).first()
+    if stat is None:
+        stat = ListingAgeStat(make_key=make_key, model_key=model_key)
+        db.session.add(stat)
+
+    buckets = stat.get_buckets()
+    _add_sample(buckets, day, int(days_online))
+    buckets, stat.sample_count, stat.median_days = _summarize(buckets, today)
+    stat.set_buckets(buckets)
+    stat.computed_on = today
+    db.session.flush()
+
+
+def get_market_median_days(make: str, model: str, min_samples: int) -> int | None:
+    """Retourne la mediane des days_online d'un modele sur la fenetre, ou None.
+
+    Lecture d'une seule ligne par cle unique. Si le resume date d'un jour
+    precedent, la fenetre est recalculee en memoire (sans ecriture) a partir
+    des histogrammes journaliers.
+
+    Args:
+        make: Marque de l'annonce.
+        model: Modele de l'annonce.
+        min_samples: En dessous de ce nombre de scans, les stats ne sont pas fiables.
+    """
+    from app.models.listing_age_stat import ListingAgeStat
+
+    make_key, model_key = _keys(make, model)
+    stat = ListingAgeStat.query.filter_by(make_key=make_key, model_key=model_key).first()
+    if stat is None:
+        return None
+
+    count, median = stat.sample_count, stat.median_days
+    today = datetime.now(timezone.utc).date()
+    if stat.computed_on != today:
+        _, count, median = _summarize(stat.get_buckets(), today)
+
+    if count < min_samples or median is None:
+        return None
+    return round(median)
+
+
+def rebuild_listing_age_stats() -> int:
+    """Reconstruit tous les resumes d'anciennete depuis l'historique ScanLog.
+
+    Ne commit pas.
+
+    Returns:
+        Nombre de modeles (lignes ListingAgeStat) ecrits.
+    """
+    from app.models.listing_age_stat import ListingAgeStat
+    from app.models.scan import ScanLog
+
+    today = datetime.now(timezone.utc).date()
+    cutoff = datetime.combine(_window_start(today), datetime.min.time())
+
+    rows = (
+        db.session.query(
+            ScanLog.vehicle_make,
+            ScanLog.vehicle_model,
+            ScanLog.days_online,
+            ScanLog.created_at,
+        )
+        .filter(
+            ScanLog.vehicle_make.isnot(None),
+            ScanLog.vehicle_model.isnot(None),
+            ScanLog.days_online.isnot(None),
+            ScanLog.days_online >= 0,
+            ScanLog.created_at >= cutoff,
+        )
+        .yield_per(1000)
+    )
+
+    by_model: dict[tuple[str, str], dict[str, dict[str, int]]] = {}
+    for make, model, days_online, created_at in rows:
+        key = _keys(make, model)
+        if not key[0] or not key[1]:
+            continue
+        _add_sample(by_model.setdefault(key, {}), created_at.date(), days_online)
+
+    ListingAgeStat.query.delete(synchronize_session=False)
+    for (make_key, model_key), buckets in by_model.items():
+        buckets, count, median = _summarize(buckets, today)
+        stat = ListingAgeStat(
+            make_key=make_key,
+            model_key=model_key,
+            sample_count=count,
+            median_days=median,
+            computed_on=today,
+        )
+        stat.set_buckets(buckets)
+        db.session.add(stat)
+    db.session.flush()
+
+    logger.info("ListingAgeStat rebuilt: %d models", len(by_model))
+    return len(by_model)
+
+
+def record_scan_listing_age(scan) -> None:
+    """Best-effort : enregistre l'anciennete d'un ScanLog persiste et commit.
+
+    Une course a l'insertion entre deux workers (IntegrityError sur la cle
+    unique) est simplement ignoree.
+    """
+    try:
+        record_listing_age(scan.vehicle_make, scan.vehicle_model, scan.days_online, scan.created_at)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        logger.debug("ListingAgeStat insert race for %s %s", scan.vehicle_make, scan.vehicle_model)
@@ -0,0 +1,237 @@
+"""Cache des reponses LLM, indexe par empreinte de prompt.
+
+Les prompts de generation sont construits de facon deterministe depuis les
+donnees du scan : /api/email-draft, l'auto-generation du rapport PDF et la
+page admin pouvaient payer plusieurs fois le meme appel Gemini.
+cached_generate_text() enveloppe gemini_service.generate_text() :
+
+- l'empreinte couvre le prompt, le prompt systeme, le modele et les
+  parametres de generation (temperature, top_p, tokens max) ;
+- une reponse est resservie pendant LLM_CACHE_TTL secondes (0 = cache
+  coupe) ; ``refresh=True`` force un nouvel appel et remplace l'entree ;
+- hits, misses et appels mutualises (single-flight, voir email_service)
+  sont comptes par fonctionnalite dans MetricCounter pour la page admin.
+
+lookup_response() / store_response() servent aussi aux resumes de morceaux
+de transcripts de la synthese Ollama (llm_service.synthesize_transcripts).
+Ces appels locaux ne coutent rien : ils sont comptes sous LOCAL_COUNTER_PREFIX
+pour ne pas fausser le taux de hit et l'economie des appels payants.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models.llm_cache import LLMCacheEntry
+from app.models.llm_usage import LLMUsage
+from app.services import gemini_service
+from app.services.metric_counter_service import increment_counter
+
+COUNTER_PREFIX = "llm_cache."
+# Modeles locaux (Ollama) : hors cache_stats(), pas de cout evite
+LOCAL_COUNTER_PREFIX = "llm_local_cache."
+HIT = "hit"
+MISS = "miss"
+# Reponses partagees avec un appel concurrent (single-flight)
+SHARED = "shared"
+
+
+def _utcnow() -> datetime:
+    # SQLite rend des datetimes naifs : on compare en UTC naif
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _counter(kind: str, feature: str, prefix: str = COUNTER_PREFIX) -> str:
+    return f"{prefix}{kind}.{feature}"
+
+
+def cache_ttl() -> int:
+    """Duree de vie d'une reponse en cache (s), 0 si le cache est coupe."""
+    return int(current_app.config.get("LLM_CACHE_TTL", 0))
+
+
+def prompt_hash(
+    prompt: str,
+    system_prompt: str | None,
+    model: str,
+    temperature: float,
+    max_output_tokens: int,
+    top_p: float | None,
+) -> str:
+    """Empreinte sha256 de tout ce qui determine la reponse du modele."""
+    key = [model, temperature, top_p, max_output_tokens, system_prompt or "", prompt]
+    return hashlib.sha256(orjson.dumps(key)).hexdigest()
+
+
+def record_shared(feature: str) -> None:
+    """Compte une reponse obtenue via l'appel d'un leader. Commit."""
+    increment_counter(_counter(SHARED, feature))
+    db.session.commit()
+
+
+def lookup_response(key: str, feature: str, prefix: str = COUNTER_PREFIX) -> LLMCacheEntry | None:
+    """Entree encore valide pour ``key`` ; compte le hit sous ``prefix``.
+
+    Ne commit pas.
+    """
+    entry = LLMCacheEntry.query.filter(
+        LLMCacheEntry.prompt_hash == key,
+        LLMCacheEntry.expires_at > _utcnow(),
+    ).first()
+    if entry is not None:
+        entry.hit_count = (entry.hit_count or 0) + 1
+        increment_counter(_counter(HIT, feature, prefix))
+    return entry
+
+
+def store_response(
+    key: str,
+    feature: str,
+    model: str,
+    text: str,
+    tokens: int,
+    ttl: int,
+    prefix: str = COUNTER_PREFIX,
+) -> None:
+    """Ajoute ou remplace l'entree ``key``, purge les expirees ; compte le miss
+    sous ``prefix``.
+
+    Ne commit pas.
+    """
+    increment_counter(_counter(MISS, feature, prefix))
+    now = _utcnow()
+    fields = {
+        "feature": feature,
+        "model": model,
+        "response_text": text,
+        "total_tokens": tokens,
+        "hit_count": 0,
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=ttl),
+    }
+    LLMCacheEntry.query.filter(LLMCacheEntry.expires_at <= now).delete()
+    if LLMCacheEntry.query.filter_by(prompt_hash=key).update(fields, synchronize_session=False):
+        return
+    # Deux workers qui ratent le cache en meme temps : le second met a jour
+    try:
+        with db.session.begin_nested():
+            db.session.add(LLMCacheEntry(prompt_hash=key, **fields))
+    except IntegrityError:
+        LLMCacheEntry.query.filter_by(prompt_hash=key).update(fields, synchronize_session=False)
+
+
+def cached_generate_text(
+    prompt: str,
+    feature: str,
+    system_prompt: str | None = None,
+    temperature: float = 0.3,
+    max_output_tokens: int = 500,
+    top_p: float | None = None,
+    refresh: bool = False,
+) -> tuple[str, int, bool]:
+    """gemini_service.generate_text() avec cache des reponses.
+
+    Returns:
+        (texte, total_tokens, depuis_cache). Pour un hit, total_tokens est
+        celui de l'appel d'origine.
+
+    Raises:
+        Comme gemini_service.generate_text() (ValueError, ConnectionError).
+    """
+    ttl = cache_ttl()
+    if ttl <= 0:
+        text, tokens = gemini_service.generate_text(
+            prompt=prompt,
+            feature=feature,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            top_p=top_p,
+        )
+        return text, tokens, False
+
+    model = gemini_service._get_model()
+    key = prompt_hash(prompt, system_prompt, model, temperature, max_output_tokens, top_p)
+    if not refresh:
+        entry = lookup_response(key, feature)
+        if entry is not None:
+            db.session.commit()
+            return entry.response_text, entry.total_tokens, True
+
+    text, tokens = gemini_service.generate_text(
+        prompt=prompt,
+        feature=feature,
+        system_prompt=system_prompt,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+        top_p=top_p,
+    )
+    # Reponse vide (filtrage, quota de sortie) : pas mise en cache
+    if text:
+        store_response(key, feature, model, text, tokens, ttl)
+    else:
+        increment_counter(_counter(MISS, feature))
+    db.session.commit()
+    return text, tokens, False
+
+
+def cache_stats(days: int = 7) -> dict:
+    """Hits, misses, appels mutualises, taux de hit (%) et EUR economises.
+
+    L'economie d'une reponse servie sans appel est estimee au cout moyen
+    d'un appel de la meme fonctionnalite (LLMUsage) sur la periode. Seuls
+    les appels Gemini sont comptes : les resumes Ollama (LOCAL_COUNTER_PREFIX,
+    modeles ``ollama:``) sont exclus.
+    """
+    from app.models.metric_counter import MetricCounter
+
+    since_day = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = (
+        db.session.query(MetricCounter.name, db.func.sum(MetricCounter.value))
+        .filter(
+            MetricCounter.name.like(f"{COUNTER_PREFIX}%"),
+            MetricCounter.day >= since_day,
+        )
+        .group_by(MetricCounter.name)
+        .all()
+    )
+    totals = {HIT: 0, MISS: 0, SHARED: 0}
+    avoided: dict[str, int] = {}
+    for name, value in rows:
+        kind, _, feature = name[len(COUNTER_PREFIX) :].partition(".")
+        if kind not in totals:
+            continue
+        totals[kind] += int(value or 0)
+        if kind in (HIT, SHARED):
+            avoided[feature] = avoided.get(feature, 0) + int(value or 0)
+
+    saved_eur = 0.0
+    if avoided:
+        since = datetime.combine(since_day, datetime.min.time())
+        avg_costs = dict(
+            db.session.query(LLMUsage.feature, db.func.avg(LLMUsage.estimated_cost_eur))
+            .filter(LLMUsage.feature.in_(avoided), LLMUsage.created_at >= since)
+            .group_by(LLMUsage.feature)
+            .all()
+        )
+        saved_eur = sum(count * float(avg_costs.get(f) or 0) for f, count in avoided.items())
+
+    served = totals[HIT] + totals[SHARED]
+    requests = served + totals[MISS]
+    return {
+        "hits": totals[HIT],
+        "misses": totals[MISS],
+        "shared": totals[SHARED],
+        "rate": round(served / requests * 100, 1) if requests else 0,
+        "saved_eur": round(saved_eur, 4),
+        "entries": LLMCacheEntry.query.filter(
+            LLMCacheEntry.expires_at > _utcnow(),
+            ~LLMCacheEntry.model.like("ollama:%"),
+        ).count(),
+    }
@@ -1,13 +1,60 @@
-"""Service LLM -- wrapper pour l'API Ollama locale."""
+"""Service LLM -- wrapper pour l'API Ollama locale.
+
+La synthese YouTube (synthesize_transcripts) ne part plus en un seul prompt
+geant : au-dela de SYNTHESIS_CHUNK_TOKENS, les transcripts sont decoupes par
+video en morceaux de taille bornee (map), resumes en parallele
+(SYNTHESIS_MAP_CONCURRENCY requetes a la fois), puis les resumes sont
+fusionnes (reduce) jusqu'a tenir dans un prompt. Le prompt final est envoye
+en streaming pour suivre la generation. Les resumes de morceaux sont mis en
+cache par empreinte de contenu (llm_cache) : relancer une synthese ne
+resume que les videos nouvelles.
+"""
 
 import logging
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
 
 import httpx
+import orjson
 from flask import current_app
 
 logger = logging.getLogger(__name__)
 
 _TIMEOUT = httpx.Timeout(connect=5.0, read=300.0, write=5.0, pool=5.0)
+# En streaming, read borne l'attente entre deux fragments (chargement du
+# modele compris), plus la duree totale de la generation
+_STREAM_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=5.0, pool=5.0)
+
+# Sans tokenizer cote serveur : ~4 caracteres par token (texte francais)
+CHARS_PER_TOKEN = 4
+
+# A incrementer si les prompts de resume changent (invalide le cache)
+SUMMARY_PROMPT_VERSION = 1
+MAP_FEATURE = "synthesis_chunk"
+REDUCE_FEATURE = "synthesis_reduce"
+
+_MAP_PROMPT = (
+    "Voici un extrait de transcript d'une video de test automobile. "
+    "Resume en francais, sous forme de liste concise, toutes les informations "
+    "factuelles utiles pour evaluer le vehicule : points forts, points faibles, "
+    "fiabilite, problemes connus, consommation, confort, prix. "
+    "N'invente rien et ignore les digressions.\n\n--- EXTRAIT ---\n\n"
+)
+_REDUCE_PROMPT = (
+    "Voici des resumes partiels de transcripts de tests d'un meme vehicule. "
+    "Fusionne-les en un seul resume en liste, en francais, sans perdre "
+    "d'information factuelle et sans repetition.\n\n--- RESUMES ---\n\n"
+)
+
+
+class SynthesisResult(NamedTuple):
+    """Synthese produite et statistiques du map-reduce."""
+
+    text: str
+    chunks: int = 0
+    cached_chunks: int = 0
+    llm_calls: int = 0
 
 
 def _ollama_url() -> str:
@@ -33,8 +80,28 @@ def list_ollama_models() -> list[str]:
         return []
 
 
+def _generate(base_url: str, model: str, prompt: str) -> str:
+    """POST /api/generate sans streaming ; utilisable hors contexte Flask.
+
+    Raises ConnectionError si Ollama repond en erreur.
+    """
+    try:
+        resp = httpx.post(
+            f"{base_url}/api/generate",
+            json={"model": model, "prompt": prompt, "stream": False},
+            timeout=_TIMEOUT,
+        )
+    except httpx.HTTPError as exc:
+        raise ConnectionError(f"Ollama injoignable: {exc}") from exc
+
+    if resp.status_code != 200:
+        raise ConnectionError(f"Ollama erreur {resp.status_code}: {resp.text}")
+
+    return resp.json().get("response", "")
+
+
 def generate_synthesis(model: str, prompt: str, transcripts: str) -> str:
-    """Envoie les transcripts au LLM et retourne la synthese.
+    """Envoie les transcripts au LLM en un seul prompt et retourne la synthese.
 
     POST {OLLAMA_URL}/api/generate
     Body: {"model": ..., "prompt": ..., "stream": false}
@@ -42,17 +109,269 @@ def generate_synthesis(model: str, prompt: str, transcripts: str) -> str:
     Raises ConnectionError si Ollama repond en erreur.
     """
     full_prompt = f"{prompt}\n\n--- TRANSCRIPTS ---\n\n{transcripts}"
+    return _generate(_ollama_url(), model, full_prompt)
 
+
+def stream_generate(
+    model: str,
+    prompt: str,
+    on_text: Callable[[int], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> str:
+    """POST /api/generate en streaming ; retourne le texte complet.
+
+    Args:
+        on_text: Appele avec le nombre de caracteres recus apres chaque fragment.
+        should_stop: Si elle renvoie True, la generation est abandonnee et le
+            texte deja recu est retourne.
+
+    Raises ConnectionError si Ollama repond en erreur.
+    """
+    parts: list[str] = []
+    received = 0
     try:
-        resp = httpx.post(
+        with httpx.stream(
+            "POST",
             f"{_ollama_url()}/api/generate",
-            json={"model": model, "prompt": full_prompt, "stream": False},
-            timeout=_TIMEOUT,
-        )
+            json={"model": model, "prompt": prompt, "stream": True},
+            timeout=_STREAM_TIMEOUT,
+        ) as resp:
+            if resp.status_code != 200:
+                resp.read()
+                raise ConnectionError(f"Ollama erreur {resp.status_code}: {resp.text}")
+            # Une ligne JSON par fragment : {"response": "...", "done": false}
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                try:
+                    data = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                if data.get("error"):
+                    raise ConnectionError(f"Ollama erreur: {data['error']}")
+                piece = data.get("response") or ""
+                if piece:
+                    parts.append(piece)
+                    received += len(piece)
+                    if on_text:
+                        on_text(received)
+                if data.get("done") or (should_stop and should_stop()):
+                    break
     except httpx.HTTPError as exc:
         raise ConnectionError(f"Ollama injoignable: {exc}") from exc
+    return "".join(parts)
 
-    if resp.status_code != 200:
-        raise ConnectionError(f"Ollama erreur {resp.status_code}: {resp.text}")
 
-    return resp.json().get("response", "")
+# ---------------------------------------------------------------------------
+# Synthese map-reduce
+# ---------------------------------------------------------------------------
+
+
+def estimate_tokens(text: str) -> int:
+    """Nombre de tokens estime (CHARS_PER_TOKEN caracteres par token)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_text(text: str, max_chars: int) -> list[str]:
+    """Decoupe ``text`` en morceaux d'au plus ``max_chars`` caracteres.
+
+    Coupe de preference en fin de phrase ou de ligne, sinon sur un espace
+    (sous-titres auto-generes sans ponctuation), en dernier recours en dur.
+    """
+    pieces = []
+    text = text.strip()
+    while len(text) > max_chars:
+        cut = max(text.rfind(". ", 0, max_chars), text.rfind("\n", 0, max_chars))
+        if cut < max_chars // 2:
+            cut = text.rfind(" ", 0, max_chars)
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def chunk_transcripts(transcripts: list[tuple[str, str]], max_tokens: int) -> list[str]:
+    """Morceaux "en-tete + texte" d'au plus ``max_tokens`` tokens estimes.
+
+    Un morceau ne couvre jamais deux videos : ajouter une video ne change pas
+    les morceaux (ni leur empreinte en cache) des autres.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    for header, text in transcripts:
+        body_chars = max(max_chars - len(header) - 16, max_chars // 2)
+        pieces = split_text(text, body_chars)
+        for idx, piece in enumerate(pieces, 1):
+            label = header if len(pieces) == 1 else f"{header} [{idx}/{len(pieces)}]"
+            chunks.append(f"{label}\n{piece}")
+    return chunks
+
+
+def _group_by_budget(texts: list[str], max_tokens: int) -> list[str]:
+    """Regroupe des textes consecutifs en blocs d'au plus ``max_tokens``."""
+    groups: list[list[str]] = []
+    size = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if groups and size + tokens <= max_tokens:
+            groups[-1].append(text)
+            size += tokens
+        else:
+            groups.append([text])
+            size = tokens
+    return ["\n\n".join(group) for group in groups]
+
+
+def _summarize_all(
+    model: str,
+    prompts: list[str],
+    feature: str,
+    workers: int,
+    on_done: Callable[[int, int], None],
+    should_stop: Callable[[], bool] | None,
+) -> tuple[list[str] | None, int, int]:
+    """Resume chaque prompt (cache, sinon Ollama en parallele).
+
+    Les acces base restent dans le thread appelant ; les threads du pool ne
+    font que les requetes HTTP.
+
+    Returns:
+        (resumes dans l'ordre des prompts ou None si annule, hits cache,
+        appels Ollama).
+    """
+    from app.extensions import db
+    from app.services.llm_cache import (
+        LOCAL_COUNTER_PREFIX,
+        cache_ttl,
+        lookup_response,
+        prompt_hash,
+        store_response,
+    )
+
+    ttl = cache_ttl()
+    cache_model = f"ollama:{model}:v{SUMMARY_PROMPT_VERSION}"
+    keys = [prompt_hash(p, None, cache_model, 0.0, 0, None) for p in prompts]
+    results: list[str | None] = [None] * len(prompts)
+    hits = 0
+    if ttl > 0:
+        for idx, key in enumerate(keys):
+            entry = lookup_response(key, feature, LOCAL_COUNTER_PREFIX)
+            if entry is not None:
+                results[idx] = entry.response_text
+                hits += 1
+        db.session.commit()
+
+    total = len(prompts)
+    done = hits
+    on_done(done, total)
+    missing = [idx for idx, text in enumerate(results) if text is None]
+    if not missing:
+        return results, hits, 0
+
+    base_url = _ollama_url()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-map") as executor:
+        pending = {
+            executor.submit(_generate, base_url, model, prompts[idx]): idx for idx in missing
+        }
+        try:
+            while pending:
+                finished, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                if should_stop and should_stop():
+                    return None, hits, len(missing) - len(pending)
+                for future in finished:
+                    idx = pending.pop(future)
+                    text = future.result()
+                    results[idx] = text
+                    if ttl > 0 and text:
+                        store_response(
+                            keys[idx], feature, cache_model, text, 0, ttl, LOCAL_COUNTER_PREFIX
+                        )
+                        db.session.commit()
+                    done += 1
+                    on_done(done, total)
+        finally:
+            for future in pending:
+                future.cancel()
+    return results, hits, len(missing)
+
+
+def synthesize_transcripts(
+    model: str,
+    prompt: str,
+    transcripts: list[tuple[str, str]],
+    on_progress: Callable[[str, int, int], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> SynthesisResult:
+    """Synthese des transcripts ``[(en-tete, texte), ...]`` avec ``prompt``.
+
+    Si tout tient dans SYNTHESIS_CHUNK_TOKENS, un seul appel en streaming.
+    Sinon map (resume de chaque morceau) puis reduce (fusion des resumes
+    jusqu'a tenir dans un prompt) puis prompt final en streaming.
+
+    Args:
+        on_progress: ``(etape, fait, total)`` ; etapes "map" et "reduce"
+            (morceaux resumes / a resumer), "final" (caracteres generes, 0).
+        should_stop: Annulation : texte vide retourne des que possible.
+
+    Raises ConnectionError si Ollama repond en erreur.
+    """
+    max_tokens = max(256, int(current_app.config.get("SYNTHESIS_CHUNK_TOKENS", 3000)))
+    workers = max(1, int(current_app.config.get("SYNTHESIS_MAP_CONCURRENCY", 2)))
+
+    def progress(stage: str, done: int, total: int) -> None:
+        if on_progress:
+            on_progress(stage, done, total)
+
+    def final(text_prompt: str) -> str:
+        return stream_generate(
+            model,
+            text_prompt,
+            on_text=lambda received: progress("final", received, 0),
+            should_stop=should_stop,
+        )
+
+    direct = "\n\n".join(f"{header}\n{text}" for header, text in transcripts)
+    if estimate_tokens(prompt) + estimate_tokens(direct) <= max_tokens:
+        return SynthesisResult(final(f"{prompt}\n\n--- TRANSCRIPTS ---\n\n{direct}"), llm_calls=1)
+
+    chunks = chunk_transcripts(transcripts, max_tokens)
+    summaries, cached, calls = _summarize_all(
+        model,
+        [_MAP_PROMPT + chunk for chunk in chunks],
+        MAP_FEATURE,
+        workers,
+        lambda done, total: progress("map", done, total),
+        should_stop,
+    )
+    if summaries is None:
+        return SynthesisResult("", len(chunks), cached, calls)
+    logger.info(
+        "Synthese %s : %d morceaux (%d en cache, %d appels)", model, len(chunks), cached, calls
+    )
+
+    # Reduce : fusion par blocs tant que l'ensemble depasse le budget
+    summaries = [s for s in summaries if s]
+    budget = max_tokens - estimate_tokens(prompt)
+    while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > budget:
+        groups = _group_by_budget(summaries, max_tokens - estimate_tokens(_REDUCE_PROMPT))
+        if len(groups) == len(summaries):
+            # Aucun regroupement possible : resumes deja trop longs un par un
+            break
+        merged, _, reduce_calls = _summarize_all(
+            model,
+            [_REDUCE_PROMPT + group for group in groups],
+            REDUCE_FEATURE,
+            workers,
+            lambda done, total: progress("reduce", done, total),
+            should_stop,
+        )
+        if merged is None:
+            return SynthesisResult("", len(chunks), cached, calls + reduce_calls)
+        calls += reduce_calls
+        summaries = [s for s in merged if s]
+
+    joined = "\n\n".join(summaries)
+    text = final(f"{prompt}\n\n--- RESUMES DES TRANSCRIPTS ---\n\n{joined}")
+    return SynthesisResult(text, len(chunks), cached, calls + 1)
@@ -0,0 +1,128 @@
+"""Ecriture groupee des LLMUsage (suivi des couts LLM).
+
+Chaque appel Gemini commitait sa ligne LLMUsage dans la requete qui l'avait
+declenche. Les lignes sont maintenant accumulees en memoire et inserees par
+lots :
+
+- des que LLM_USAGE_BATCH_SIZE lignes sont en attente,
+- au plus tard LLM_USAGE_FLUSH_SECONDS apres la mise en attente de la plus
+  ancienne : un timer daemon (flush_timer) est arme tant que des lignes
+  attendent, meme si plus aucun appel Gemini n'arrive,
+- avant la lecture des stats (page admin /llm, worker courant seulement) et
+  a l'arret normal du process.
+
+Un arret brutal du worker (SIGKILL, OOM) perd au plus les lignes des
+LLM_USAGE_FLUSH_SECONDS dernieres secondes. LLM_USAGE_BATCH_SIZE = 1 revient
+a l'ecriture immediate (tests).
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.llm_usage import LLMUsage
+from app.services.flush_timer import FlushTimer
+
+logger = logging.getLogger(__name__)
+
+# Au-dela, les lignes les plus anciennes sont abandonnees (base indisponible)
+MAX_PENDING = 1000
+
+_pending: list[dict] = []
+_pending_since: float | None = None
+_lock = threading.Lock()
+# App du premier enregistrement : sert au flush du timer et de fin de process
+_app = None
+
+
+def record_llm_usage(**fields) -> None:
+    """Met une ligne LLMUsage en attente ; ecrit le lot s'il est plein ou ancien.
+
+    Sinon, le lot part au plus tard LLM_USAGE_FLUSH_SECONDS plus tard (timer).
+
+    ``fields`` : colonnes de LLMUsage (request_id, provider, model, feature,
+    tokens, estimated_cost_eur). created_at est fixe a l'appel.
+    """
+    global _app, _pending_since
+
+    fields.setdefault("created_at", datetime.now(timezone.utc))
+    batch_size = int(current_app.config.get("LLM_USAGE_BATCH_SIZE", 20))
+    max_age = float(current_app.config.get("LLM_USAGE_FLUSH_SECONDS", 10))
+    with _lock:
+        if _app is None:
+            _app = current_app._get_current_object()
+        _pending.append(fields)
+        if _pending_since is None:
+            _pending_since = time.monotonic()
+        due = len(_pending) >= batch_size or time.monotonic() - _pending_since >= max_age
+    if due:
+        flush_llm_usage()
+    else:
+        _timer.arm(_app, max_age)
+
+
+def pending_count() -> int:
+    """Nombre de lignes en attente d'ecriture."""
+    with _lock:
+        return len(_pending)
+
+
+def flush_llm_usage() -> int:
+    """Insere les lignes en attente en un seul INSERT et commit.
+
+    En cas d'echec, les lignes sont remises en attente (dans la limite de
+    MAX_PENDING) pour le prochain lot, et le timer est rearme.
+
+    Returns:
+        Nombre de lignes ecrites.
+    """
+    global _pending_since
+
+    with _lock:
+        rows = _pending[:]
+        _pending.clear()
+        _pending_since = None
+    # Plus rien en attente : le timer arme pour ces lignes est inutile
+    _timer.cancel()
+    if not rows:
+        return 0
+    try:
+        db.session.execute(insert(LLMUsage), rows)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.warning("Ecriture de %d LLMUsage reportee", len(rows), exc_info=True)
+        with _lock:
+            _pending[:0] = rows
+            del _pending[:-MAX_PENDING]
+            if _pending_since is None:
+                _pending_since = time.monotonic()
+        _timer.arm(
+            current_app._get_current_object(),
+            float(current_app.config.get("LLM_USAGE_FLUSH_SECONDS", 10)),
+        )
+        return 0
+    return len(rows)
+
+
+_timer = FlushTimer("llm-usage-flush", flush_llm_usage)
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if _app is None or not pending_count():
+        return
+    try:
+        with _app.app_context():
+            flush_llm_usage()
+    except Exception:  # noqa: BLE001 -- arret du process
+        logger.warning("LLMUsage en attente perdus a l'arret", exc_info=True)
@@ -3,16 +3,23 @@
 import json
 import logging
 import re
+import threading
+import time
 import unicodedata
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
 
-import numpy as np
 from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.extensions import db
 from app.models.market_price import MarketPrice
+from app.models.market_price_sketch import MarketPriceSketch
 from app.services.extraction import normalize_region
+from app.services.price_sketch import PriceSketch
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +30,9 @@ MIN_SAMPLE_ULTRA_NICHE = 5  # Supercars (420+ ch), hyper rares
 MIN_SAMPLE_ABSOLUTE = 5  # Minimum absolu accepte par l'API
 IQR_MIN_KEEP = 3  # Seuil de securite IQR : ne pas descendre en-dessous
 IQR_MULTIPLIER = 1.5
+# Demi-vie de l'historique dans le sketch argus : une collecte vieille de
+# 30 jours pese deux fois moins que celle du jour
+SKETCH_HALF_LIFE_DAYS = 30
 
 
 # Marches etrangers plus petits que la France — seuils divises par 2
@@ -180,6 +190,9 @@ def _filter_outliers_iqr(prices: list[int]) -> IQRResult:
     Returns:
         IQRResult avec kept/excluded prices, bornes IQR, Q1, Q3, et IQR Mean.
     """
+    # Import paresseux : numpy n'est utile qu'a l'ingestion des prix
+    import numpy as np
+
     arr = np.array(sorted(prices), dtype=float)
     q1 = float(np.percentile(arr, 25))
     q3 = float(np.percentile(arr, 75))
@@ -259,6 +272,98 @@ def _enrich_observed_specs(vehicle_id: int, price_details: list[dict]) -> None:
     db.session.commit()
 
 
+def _decay_factor(since: datetime | None, now: datetime) -> float:
+    """Facteur de vieillissement exponentiel entre deux merges du sketch."""
+    if since is None:
+        return 1.0
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    elapsed_days = max((now - since).total_seconds() / 86400, 0.0)
+    return 0.5 ** (elapsed_days / SKETCH_HALF_LIFE_DAYS)
+
+
+def _legacy_sketch(mp: MarketPrice) -> PriceSketch | None:
+    """Sketch initial d'une cellule collectee avant l'introduction des sketches.
+
+    Reprend les prix gardes de la derniere collecte (calculation_details).
+    """
+    details = mp.get_calculation_details() or {}
+    kept = details.get("kept_prices")
+    if not kept:
+        return None
+    return PriceSketch.from_values(kept)
+
+
+def _merge_price_sketch(
+    mp: MarketPrice, prices: list[int], now: datetime, seed_legacy: bool
+) -> PriceSketch:
+    """Vieillit le sketch de la cellule puis y fusionne une nouvelle collecte. Ne commit pas.
+
+    Args:
+        seed_legacy: Cellule deja existante, a appeler AVANT d'ecraser ses
+            calculation_details : sans sketch, on repart de sa derniere collecte.
+    """
+    row = MarketPriceSketch.query.filter_by(market_price_id=mp.id).first()
+    if row is not None:
+        sketch = row.get_sketch() or PriceSketch()
+        since = row.updated_at
+    else:
+        row = MarketPriceSketch(market_price_id=mp.id)
+        db.session.add(row)
+        sketch = (_legacy_sketch(mp) if seed_legacy else None) or PriceSketch()
+        since = mp.collected_at
+
+    sketch.decay(_decay_factor(since, now))
+    sketch.add(prices)
+    row.set_sketch(sketch)
+    row.updated_at = now
+    return sketch
+
+
+def get_price_sketches(market_price_ids: list[int]) -> dict[int, PriceSketch]:
+    """Charge les sketches d'un lot de cellules MarketPrice en une requete."""
+    if not market_price_ids:
+        return {}
+    snapshot = _market_snapshot.get()
+    if snapshot is not None and snapshot.has_sketches(market_price_ids):
+        return snapshot.sketches(market_price_ids)
+    rows = MarketPriceSketch.query.filter(
+        MarketPriceSketch.market_price_id.in_(market_price_ids)
+    ).all()
+    sketches = {}
+    for row in rows:
+        sketch = row.get_sketch()
+        if sketch is not None:
+            sketches[row.market_price_id] = sketch
+    return sketches
+
+
+def rebuild_market_sketches() -> int:
+    """Cree les sketches manquants depuis la derniere collecte de chaque cellule.
+
+    Ne touche pas aux sketches existants (l'historique deja accumule serait
+    perdu). Ne commit pas.
+
+    Returns:
+        Nombre de sketches crees.
+    """
+    existing = {mp_id for (mp_id,) in db.session.query(MarketPriceSketch.market_price_id)}
+    created = 0
+    for mp in MarketPrice.query.yield_per(500):
+        if mp.id in existing:
+            continue
+        sketch = _legacy_sketch(mp)
+        if sketch is None:
+            continue
+        row = MarketPriceSketch(market_price_id=mp.id, updated_at=mp.collected_at)
+        row.set_sketch(sketch)
+        db.session.add(row)
+        created += 1
+    db.session.flush()
+    logger.info("MarketPriceSketch rebuilt: %d cells", created)
+    return created
+
+
 def store_market_prices(
     make: str,
     model: str,
@@ -295,6 +400,8 @@ def store_market_prices(
     # Normalisation canonique via vehicle_lookup (meme aliases que l'extraction).
     # Sans ca, LBC envoie "Ds 7" que market_text_key normalise en "ds 7",
     # mais l'extraction Python normalise en "7" via MODEL_ALIASES → mismatch L4.
+    import numpy as np
+
     from app.services.vehicle_lookup import display_brand, display_model
 
     make = display_brand(make) if make else normalize_market_text(make)
@@ -353,16 +460,11 @@ def store_market_prices(
 
     stats = {
         "price_min": int(np.min(arr)),
-        "price_median": int(np.median(arr)),
         "price_mean": int(np.mean(arr)),
         "price_max": int(np.max(arr)),
         "price_std": round(float(np.std(arr)), 2),
-        "price_iqr_mean": int(round(iqr.iqr_mean)),
-        "price_p25": int(round(iqr.q1)),
-        "price_p75": int(round(iqr.q3)),
         "sample_count": len(iqr.kept),
         "precision": precision,
-        "calculation_details": json.dumps(details),
         "collected_at": now,
         "refresh_after": now + timedelta(hours=CACHE_DURATION_HOURS),
         "hp_range": hp_range,
@@ -390,6 +492,25 @@ def store_market_prices(
         filters.append(MarketPrice.hp_range.is_(None))
 
     existing = MarketPrice.query.filter(*filters).first()
+    if existing:
+        mp = existing
+    else:
+        mp = MarketPrice(
+            make=make, model=model, year=year, region=region, fuel=fuel, country=country, **stats
+        )
+        db.session.add(mp)
+        db.session.flush()
+
+    # Percentiles et IQR Mean de reference : issus du sketch cumule (historique
+    # vieilli + collecte du jour), pas de la seule derniere collecte
+    sketch = _merge_price_sketch(mp, iqr.kept, now, seed_legacy=existing is not None)
+    stats["price_median"] = int(round(sketch.median))
+    stats["price_iqr_mean"] = int(round(sketch.iqr_mean()))
+    stats["price_p25"] = int(round(sketch.quantile(0.25)))
+    stats["price_p75"] = int(round(sketch.quantile(0.75)))
+    details["sketch_count"] = round(sketch.count, 1)
+    details["sketch_half_life_days"] = SKETCH_HALF_LIFE_DAYS
+    stats["calculation_details"] = json.dumps(details)
 
     log_msg = "%s MarketPrice %s %s %d %s fuel=%s (n=%d/%d, iqr_mean=%d, median=%d, P25=%d, P75=%d)"
     log_args = (
@@ -406,6 +527,11 @@ def store_market_prices(
         stats["price_p75"],
     )
 
+    # Les verdicts /api/analyze en cache du modele reposaient sur l'ancien argus
+    from app.services.analysis_cache import invalidate_model
+
+    invalidate_model(make, model)
+
     if existing:
         existing.make = make
         existing.model = model
@@ -415,14 +541,14 @@ def store_market_prices(
         for key, value in stats.items():
             setattr(existing, key, value)
         db.session.commit()
+        forget_market_snapshot(make, model)
         logger.info(log_msg, "Updated", *log_args)
         return existing
 
-    mp = MarketPrice(
-        make=make, model=model, year=year, region=region, fuel=fuel, country=country, **stats
-    )
-    db.session.add(mp)
+    for key, value in stats.items():
+        setattr(mp, key, value)
     db.session.commit()
+    forget_market_snapshot(make, model)
     logger.info(log_msg, "Created", *log_args)
 
     # Auto-creation proactive : si le vehicule n'est pas dans le referentiel
@@ -480,6 +606,273 @@ def _hp_range_filters(hp_range_key: str | None, exact: bool) -> list:
     return [MarketPrice.hp_range.is_(None)]
 
 
+class SnapshotRow(NamedTuple):
+    """MarketPrice d'un instantane, avec ses cles de comparaison calculees en SQL."""
+
+    price: MarketPrice
+    region_key: str
+    country_key: str
+    fuel_key: str | None
+    hp_range_key: str | None
+
+
+class MarketSnapshot:
+    """MarketPrice de quelques modeles, charges en une requete groupee.
+
+    Sert aux lots d'annonces (/api/analyze/batch) : au lieu de la cascade de
+    requetes de get_market_stats (L4) et de L5 pour chaque annonce, les
+    filtres relisent cet instantane pour les modeles qu'il couvre. Les cles
+    (region, pays, carburant, puissance) viennent des memes expressions SQL
+    que les requetes : la cascade donne le meme resultat en memoire.
+    """
+
+    def __init__(
+        self,
+        rows: dict[tuple[str, str], list[SnapshotRow]],
+        sketches: dict[int, PriceSketch] | None = None,
+    ):
+        self._rows = rows
+        self._ids = {r.price.id for bucket in rows.values() for r in bucket}
+        self._sketches = sketches or {}
+
+    def covers(self, make_key: str, model_key: str) -> bool:
+        """True si l'instantane a ete charge pour ce modele (meme sans ligne)."""
+        return (make_key, model_key) in self._rows
+
+    def rows(self, make_key: str, model_key: str) -> list[SnapshotRow]:
+        """Lignes du modele, dans l'ordre des id."""
+        return self._rows.get((make_key, model_key), [])
+
+    def has_sketches(self, market_price_ids: list[int]) -> bool:
+        """True si les sketches de toutes ces cellules ont ete charges."""
+        return all(mp_id in self._ids for mp_id in market_price_ids)
+
+    def sketches(self, market_price_ids: list[int]) -> dict[int, PriceSketch]:
+        """Sketches des cellules (lecture seule : merge() ne modifie pas l'argument)."""
+        return {i: self._sketches[i] for i in market_price_ids if i in self._sketches}
+
+    def market_stats(
+        self,
+        make_key: str,
+        model_key: str,
+        year: int,
+        region_key: str,
+        fuel_key: str | None,
+        hp_range_key: str | None,
+        country_key: str,
+    ) -> MarketPrice | None:
+        """Meme cascade que get_market_stats, evaluee sur l'instantane."""
+        base = [
+            r
+            for r in self.rows(make_key, model_key)
+            if r.region_key == region_key and r.country_key == country_key
+        ]
+
+        def _hp_tier(candidates: list[SnapshotRow]) -> list[SnapshotRow]:
+            # hp_range exact, puis generique (NULL), puis n'importe lequel
+            if hp_range_key:
+                exact = [r for r in candidates if r.hp_range_key == hp_range_key]
+                if exact:
+                    return exact
+            generic = [r for r in candidates if r.price.hp_range is None]
+            return generic or candidates
+
+        def _fuel_ok(r: SnapshotRow, with_fuel: bool) -> bool:
+            if with_fuel:
+                return r.fuel_key == fuel_key
+            return r.price.fuel is None if fuel_key else True
+
+        steps = [True, False] if fuel_key else [False]
+        for with_fuel in steps:
+            tier = _hp_tier([r for r in base if r.price.year == year and _fuel_ok(r, with_fuel)])
+            if tier:
+                return tier[0].price
+        for with_fuel in steps:
+            tier = _hp_tier(
+                [r for r in base if abs(r.price.year - year) <= 3 and _fuel_ok(r, with_fuel)]
+            )
+            if tier:
+                return min(tier, key=lambda r: abs(r.price.year - year)).price
+        return None
+
+
+# Instantane actif pour le lot en cours (voir use_market_snapshot)
+_market_snapshot: ContextVar[MarketSnapshot | None] = ContextVar("market_snapshot", default=None)
+
+
+def prefetch_market_prices(
+    models: Iterable[tuple[str, str]], with_sketches: bool = True
+) -> MarketSnapshot:
+    """Charge en une requete groupee les MarketPrice des couples (marque, modele).
+
+    Leurs sketches de prix (L5) sont charges dans la foulee, en une requete,
+    sauf si ``with_sketches`` est False (seule la cascade de get_market_stats
+    est alors servie).
+
+    Les instances sont detachees de la session : un commit de l'appelant ne
+    les expire pas pendant que les threads des filtres les lisent.
+    """
+    from app.services.vehicle_lookup import display_brand, display_model
+
+    keys: set[tuple[str, str]] = set()
+    for make, model in models:
+        if not make or not model:
+            continue
+        # Cles de get_market_stats (alias canoniques) et de L5 (texte brut)
+        keys.add((market_text_key(display_brand(make)), market_text_key(display_model(model))))
+        keys.add((market_text_key(make), market_text_key(model)))
+
+    rows: dict[tuple[str, str], list[SnapshotRow]] = {key: [] for key in keys}
+    if not keys:
+        return MarketSnapshot(rows)
+
+    make_expr = market_text_key_expr(MarketPrice.make)
+    model_expr = market_text_key_expr(MarketPrice.model)
+    query = (
+        db.session.query(
+            MarketPrice,
+            make_expr,
+            model_expr,
+            market_text_key_expr(MarketPrice.region),
+            func.coalesce(MarketPrice.country, "FR"),
+            func.lower(MarketPrice.fuel),
+            func.lower(MarketPrice.hp_range),
+        )
+        .filter(
+            make_expr.in_(sorted({make for make, _ in keys})),
+            model_expr.in_(sorted({model for _, model in keys})),
+        )
+        .order_by(MarketPrice.id)
+    )
+    for mp, make_key, model_key, region_key, country_key, fuel_key, hp_key in query:
+        db.session.expunge(mp)
+        bucket = rows.get((make_key, model_key))
+        if bucket is not None:
+            bucket.append(SnapshotRow(mp, region_key, country_key, fuel_key, hp_key))
+    if not with_sketches:
+        return MarketSnapshot(rows)
+    ids = [r.price.id for bucket in rows.values() for r in bucket]
+    return MarketSnapshot(rows, get_price_sketches(ids))
+
+
+@contextmanager
+def use_market_snapshot(snapshot: MarketSnapshot) -> Iterator[MarketSnapshot]:
+    """Active l'instantane pour get_market_stats et L5 dans ce contexte."""
+    token = _market_snapshot.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _market_snapshot.reset(token)
+
+
+def current_market_snapshot() -> MarketSnapshot | None:
+    """Instantane actif, ou None hors d'un lot."""
+    return _market_snapshot.get()
+
+
+# Instantanes par modele gardes en memoire pour le mode rapide de /api/analyze :
+# {(make_key, model_key): (expire_a, instantane)}, du plus ancien au plus recent
+_memory_snapshots: dict[tuple[str, str], tuple[float, MarketSnapshot]] = {}
+_memory_snapshots_lock = threading.Lock()
+MEMORY_SNAPSHOT_MAX_MODELS = 512
+
+
+def _memory_snapshot_key(make: str, model: str) -> tuple[str, str]:
+    from app.services.vehicle_lookup import display_brand, display_model
+
+    return market_text_key(display_brand(make)), market_text_key(display_model(model))
+
+
+def cached_market_snapshot(make: str, model: str, ttl_seconds: float) -> MarketSnapshot:
+    """Instantane d'un modele, relu en memoire pendant ``ttl_seconds``.
+
+    Le premier appel (ou apres expiration) le charge via prefetch_market_prices.
+    Une collecte sur le modele dans ce worker l'oublie (store_market_prices) ;
+    dans les autres workers, l'expiration borne le retard.
+    """
+    key = _memory_snapshot_key(make, model)
+    now = time.monotonic()
+    with _memory_snapshots_lock:
+        cached = _memory_snapshots.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    snapshot = prefetch_market_prices([(make, model)])
+    with _memory_snapshots_lock:
+        _memory_snapshots.pop(key, None)
+        _memory_snapshots[key] = (now + ttl_seconds, snapshot)
+        while len(_memory_snapshots) > MEMORY_SNAPSHOT_MAX_MODELS:
+            _memory_snapshots.pop(next(iter(_memory_snapshots)))
+    return snapshot
+
+
+def forget_market_snapshot(make: str | None, model: str | None) -> None:
+    """Oublie l'instantane memoire d'un modele (argus maison modifie)."""
+    if not make or not model:
+        return
+    with _memory_snapshots_lock:
+        _memory_snapshots.pop(_memory_snapshot_key(make, model), None)
+
+
+def _market_stats_keys(
+    make: str,
+    model: str,
+    region: str,
+    fuel: str | None,
+    hp_range: str | None,
+    country: str | None,
+) -> tuple[str, str, str, str | None, str | None, str]:
+    """Cles de comparaison de get_market_stats : (make, model, region, fuel, hp_range, pays)."""
+    # Normalisation canonique via vehicle_lookup (meme aliases que l'extraction
+    # et que store_market_prices) pour eviter les mismatch "Ds 7" vs "7".
+    from app.services.vehicle_lookup import display_brand, display_model
+
+    make = display_brand(make) if make else make
+    model = display_model(model) if model else model
+    return (
+        market_text_key(make),
+        market_text_key(model),
+        market_text_key(normalize_region(region) or region),
+        normalize_market_text(fuel).lower() if fuel else None,
+        hp_range.strip().lower() if hp_range else None,
+        (country or "FR").upper().strip(),
+    )
+
+
+class MarketStatsQuery(NamedTuple):
+    """Une recherche de lookup_market_stats (memes arguments que get_market_stats)."""
+
+    make: str
+    model: str
+    year: int
+    region: str
+    fuel: str | None = None
+    hp_range: str | None = None
+    country: str | None = None
+
+
+def lookup_market_stats(queries: list[MarketStatsQuery]) -> list[MarketPrice | None]:
+    """Resout plusieurs recherches get_market_stats en une requete groupee.
+
+    Les MarketPrice des modeles demandes sont charges ensemble
+    (prefetch_market_prices, sans les sketches), puis chaque recherche suit
+    la cascade de get_market_stats en memoire. Resultats dans l'ordre de
+    ``queries`` (None si aucun prix).
+    """
+    snapshot = prefetch_market_prices(((q.make, q.model) for q in queries), with_sketches=False)
+    results = []
+    for q in queries:
+        make_key, model_key, region_key, fuel_key, hp_range_key, country_key = _market_stats_keys(
+            q.make, q.model, q.region, q.fuel, q.hp_range, q.country
+        )
+        results.append(
+            snapshot.market_stats(
+                make_key, model_key, q.year, region_key, fuel_key, hp_range_key, country_key
+            )
+        )
+    return results
+
+
 def get_market_stats(
     make: str,
     model: str,
@@ -513,19 +906,15 @@ def get_market_stats(
     Returns:
         L'instance MarketPrice si elle existe, None sinon.
     """
-    # Normalisation canonique via vehicle_lookup (meme aliases que l'extraction
-    # et que store_market_prices) pour eviter les mismatch "Ds 7" vs "7".
-    from app.services.vehicle_lookup import display_brand, display_model
-
-    make = display_brand(make) if make else make
-    model = display_model(model) if model else model
+    make_key, model_key, region_key, fuel_key, hp_range_key, country_key = _market_stats_keys(
+        make, model, region, fuel, hp_range, country
+    )
 
-    make_key = market_text_key(make)
-    model_key = market_text_key(model)
-    region_key = market_text_key(normalize_region(region) or region)
-    fuel_key = normalize_market_text(fuel).lower() if fuel else None
-    hp_range_key = hp_range.strip().lower() if hp_range else None
-    country_key = (country or "FR").upper().strip()
+    snapshot = _market_snapshot.get()
+    if snapshot is not None and snapshot.covers(make_key, model_key):
+        return snapshot.market_stats(
+            make_key, model_key, year, region_key, fuel_key, hp_range_key, country_key
+        )
 
     base_filters = [
         market_text_key_expr(MarketPrice.make) == make_key,
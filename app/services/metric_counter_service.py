@@ -0,0 +1,58 @@
+"""Compteurs journaliers nommes (MetricCounter).
+
+- increment_counter() ajoute une valeur au compteur du jour,
+- counter_totals() somme des compteurs sur une fenetre pour le dashboard.
+
+Meme principe que api_traffic_service : UPDATE atomique, puis INSERT si la
+ligne du jour n'existe pas encore (course entre workers rattrapee par la
+contrainte unique).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+
+
+def _add(day: date, name: str, by: int) -> int:
+    from app.models.metric_counter import MetricCounter
+
+    return MetricCounter.query.filter_by(day=day, name=name).update(
+        {MetricCounter.value: MetricCounter.value + by}, synchronize_session=False
+    )
+
+
+def increment_counter(name: str, by: int = 1, day: date | None = None) -> None:
+    """Ajoute ``by`` au compteur ``name`` du jour (UTC). Ne commit pas."""
+    from app.models.metric_counter import MetricCounter
+
+    day = day or datetime.now(timezone.utc).date()
+    if _add(day, name, by):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(MetricCounter(day=day, name=name, value=by))
+    except IntegrityError:
+        _add(day, name, by)
+
+
+def counter_totals(names: list[str], days: int = 7, today: date | None = None) -> dict[str, int]:
+    """Somme de chaque compteur sur les ``days`` derniers jours (0 si absent)."""
+    from app.models.metric_counter import MetricCounter
+
+    today = today or datetime.now(timezone.utc).date()
+    rows = (
+        db.session.query(MetricCounter.name, db.func.sum(MetricCounter.value))
+        .filter(
+            MetricCounter.name.in_(names),
+            MetricCounter.day > today - timedelta(days=days),
+        )
+        .group_by(MetricCounter.name)
+        .all()
+    )
+    totals = dict.fromkeys(names, 0)
+    totals.update({name: int(total) for name, total in rows})
+    return totals
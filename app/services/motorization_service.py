@@ -285,6 +285,11 @@ def _promote_to_vehicle_spec(moto) -> int | None:
     db.session.add(spec)
     db.session.flush()
 
+    # Nouvelle spec : le matching carburant -> fiabilite du vehicule peut changer
+    from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
+
+    rebuild_vehicle_reliability_map(moto.vehicle_id)
+
     logger.info(
         "Created VehicleSpec id=%d for vehicle_id=%d: %s",
         spec.id,
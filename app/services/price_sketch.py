@@ -0,0 +1,237 @@
+"""Sketch de quantiles fusionnable pour l'argus maison (variante de t-digest).
+
+Chaque cellule MarketPrice accumule ses collectes successives dans un
+PriceSketch : une liste compacte de centroides (moyenne, poids) tries par
+prix, plus les moments (count, moyenne, M2) et les bornes min/max.
+
+- add() / merge() integrent une nouvelle collecte ou un autre sketch,
+- decay() vieillit l'historique (poids multiplies par un facteur < 1),
+- quantile(), iqr_mean(), mean, std et median se lisent en O(taille du sketch),
+- to_bytes() / from_bytes() serialisent en quelques centaines d'octets.
+
+Tant que le nombre de valeurs reste sous ``compression``, chaque prix est son
+propre centroide : les quantiles sont alors exactement ceux de
+numpy.percentile (interpolation lineaire). Au-dela, les centroides du milieu
+de la distribution sont fusionnes, les queues restent fines.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from collections.abc import Iterable
+
+DEFAULT_COMPRESSION = 100
+
+_VERSION = 1
+# version, compression, count, mean, m2, min, max, nb centroides
+_HEADER = struct.Struct("<BHdddddI")
+_CENTROID = struct.Struct("<ff")
+
+
+class PriceSketch:
+    """Distribution de prix approchee, fusionnable et vieillissable."""
+
+    __slots__ = ("compression", "centroids", "count", "_mean", "_m2", "min", "max")
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        # Liste de [moyenne, poids] triee par moyenne
+        self.centroids: list[list[float]] = []
+        self.count = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_values(
+        cls, values: Iterable[float], compression: int = DEFAULT_COMPRESSION
+    ) -> PriceSketch:
+        sketch = cls(compression)
+        sketch.add(values)
+        return sketch
+
+    # ── Ecriture ──────────────────────────────────────────────────
+
+    def add(self, values: Iterable[float], weight: float = 1.0) -> None:
+        """Ajoute des prix (chacun avec le meme poids)."""
+        other = PriceSketch(self.compression)
+        for v in values:
+            v = float(v)
+            other.centroids.append([v, weight])
+            other._push_moments(v, weight)
+        if other.centroids:
+            self.merge(other)
+
+    def merge(self, other: PriceSketch) -> None:
+        """Fusionne un autre sketch dans celui-ci (associatif, a la compression pres)."""
+        if not other.centroids:
+            return
+        self.centroids = sorted(self.centroids + [list(c) for c in other.centroids])
+        self._merge_moments(other.count, other._mean, other._m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.centroids) > self.compression:
+            self._compress()
+
+    def decay(self, factor: float) -> None:
+        """Multiplie tous les poids par ``factor`` (0 < factor <= 1).
+
+        La forme de la distribution est conservee ; seul le poids de
+        l'historique face aux prochaines collectes diminue.
+        """
+        if factor >= 1.0 or not self.centroids:
+            return
+        for c in self.centroids:
+            c[1] *= factor
+        self.count *= factor
+        self._m2 *= factor
+
+    def _push_moments(self, value: float, weight: float) -> None:
+        # Welford pondere
+        self.count += weight
+        delta = value - self._mean
+        self._mean += delta * weight / self.count
+        self._m2 += weight * delta * (value - self._mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _merge_moments(self, count: float, mean: float, m2: float) -> None:
+        # Formule parallele de Chan : stable meme pour des prix tous egaux
+        total = self.count + count
+        if total <= 0:
+            return
+        delta = mean - self._mean
+        self._mean += delta * count / total
+        self._m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _scale(self, q: float) -> float:
+        # Fonction d'echelle k1 de t-digest : tres pentue aux extremites
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self) -> None:
+        """Fusionne les centroides voisins tant qu'ils couvrent moins d'une unite d'echelle.
+
+        Avec l'echelle k1, un centroide du milieu peut absorber beaucoup de
+        prix tandis que les queues restent quasi unitaires : on garde au plus
+        ``compression`` centroides, avec la precision la ou elle compte (P5, P95).
+        """
+        total = sum(c[1] for c in self.centroids)
+        if total <= 0:
+            return
+        merged: list[list[float]] = []
+        cur_mean, cur_w = self.centroids[0]
+        cumulative = 0.0
+        k_left = self._scale(0.0)
+        for mean, w in self.centroids[1:]:
+            proposed = cur_w + w
+            if self._scale(min((cumulative + proposed) / total, 1.0)) - k_left <= 1.0:
+                cur_mean += (mean - cur_mean) * w / proposed
+                cur_w = proposed
+            else:
+                merged.append([cur_mean, cur_w])
+                cumulative += cur_w
+                k_left = self._scale(min(cumulative / total, 1.0))
+                cur_mean, cur_w = mean, w
+        merged.append([cur_mean, cur_w])
+        self.centroids = merged
+
+    # ── Lecture ───────────────────────────────────────────────────
+
+    @property
+    def mean(self) -> float | None:
+        return self._mean if self.count > 0 else None
+
+    @property
+    def std(self) -> float | None:
+        """Ecart-type de population (meme convention que numpy.std)."""
+        if self.count <= 0:
+            return None
+        return math.sqrt(max(self._m2 / self.count, 0.0))
+
+    @property
+    def median(self) -> float | None:
+        return self.quantile(0.5)
+
+    def quantile(self, q: float) -> float | None:
+        """Quantile q (0..1) par interpolation lineaire entre centroides.
+
+        Chaque centroide est place au rang de son centre ; min et max servent
+        d'ancres aux extremites quand les queues ont ete fusionnees.
+        """
+        if not self.centroids:
+            return None
+        q = min(max(q, 0.0), 1.0)
+        total = sum(c[1] for c in self.centroids)
+        last_rank = max(total - 1.0, 0.0)
+
+        points: list[tuple[float, float]] = []
+        cumulative = 0.0
+        for mean, w in self.centroids:
+            rank = min(max(cumulative + (w - 1.0) / 2, 0.0), last_rank)
+            if points and rank < points[-1][0]:
+                rank = points[-1][0]
+            points.append((rank, mean))
+            cumulative += w
+        if points[0][0] > 0:
+            points.insert(0, (0.0, self.min))
+        if points[-1][0] < last_rank:
+            points.append((last_rank, self.max))
+
+        target = q * last_rank
+        for (r0, v0), (r1, v1) in zip(points, points[1:]):
+            if target <= r1:
+                if r1 == r0:
+                    return v1
+                return v0 + (v1 - v0) * (target - r0) / (r1 - r0)
+        return points[-1][1]
+
+    def iqr_mean(self) -> float | None:
+        """Moyenne interquartile : moyenne ponderee des centroides entre P25 et P75."""
+        if not self.centroids:
+            return None
+        p25, p75 = self.quantile(0.25), self.quantile(0.75)
+        weight = 0.0
+        acc = 0.0
+        for mean, w in self.centroids:
+            if p25 <= mean <= p75:
+                acc += mean * w
+                weight += w
+        return acc / weight if weight > 0 else self.mean
+
+    # ── Serialisation ─────────────────────────────────────────────
+
+    def to_bytes(self) -> bytes:
+        header = _HEADER.pack(
+            _VERSION,
+            self.compression,
+            self.count,
+            self._mean,
+            self._m2,
+            self.min if self.centroids else 0.0,
+            self.max if self.centroids else 0.0,
+            len(self.centroids),
+        )
+        return header + b"".join(_CENTROID.pack(m, w) for m, w in self.centroids)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes | None) -> PriceSketch | None:
+        """Deserialise un sketch ; None si le blob est vide ou d'une version inconnue."""
+        if not blob or len(blob) < _HEADER.size:
+            return None
+        version, compression, count, mean, m2, vmin, vmax, n = _HEADER.unpack_from(blob)
+        if version != _VERSION or len(blob) != _HEADER.size + n * _CENTROID.size:
+            return None
+        sketch = cls(compression)
+        sketch.count, sketch._mean, sketch._m2 = count, mean, m2
+        if n:
+            sketch.min, sketch.max = vmin, vmax
+        sketch.centroids = [
+            list(_CENTROID.unpack_from(blob, _HEADER.size + i * _CENTROID.size)) for i in range(n)
+        ]
+        return sketch
+
+    def __repr__(self) -> str:
+        return f"<PriceSketch n={self.count:.1f} centroids={len(self.centroids)}>"
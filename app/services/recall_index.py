@@ -0,0 +1,215 @@
+"""Index memoire des rappels constructeur pour le filtre L11.
+
+Les rappels sont une petite table de reference, rarement modifiee : au lieu
+de resoudre le vehicule puis d'interroger manufacturer_recalls a chaque scan,
+on charge tout une fois par worker dans un index par vehicule, cle par les
+lookup keys (marque, modele) de vehicle_lookup. Pour chaque vehicule, les
+rappels sont tries par year_start : un bisect sur ce tableau borne les
+candidats, puis year_end filtre.
+
+Rafraichissement :
+- au demarrage (create_app) ;
+- apres chaque commit qui touche un rappel, ou renomme / supprime un
+  vehicule (hooks de session ci-dessous : edition admin, seed lance
+  depuis l'app) ;
+- toutes les RECALL_INDEX_REFRESH_SECONDS, en thread de fond, pour voir les
+  seeds lances dans un autre process (data/seeds/seed_recalls.py). Le scan
+  continue de lire l'index courant pendant le rechargement.
+
+Le chemin chaud (find_recalls) ne touche jamais la base, sauf le tout premier
+appel d'un process ou l'index n'a pas ete charge.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.models.manufacturer_recall import ManufacturerRecall
+from app.models.vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+
+class VehicleRecalls:
+    """Rappels d'un vehicule, tries par year_start."""
+
+    __slots__ = ("starts", "ends", "recalls", "max_end")
+
+    def __init__(self, rows: list[tuple[int, int, dict[str, Any]]]):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.starts = [row[0] for row in rows]
+        self.ends = [row[1] for row in rows]
+        self.recalls = [row[2] for row in rows]
+        self.max_end = max(self.ends, default=0)
+
+    def covering(self, year: int) -> list[dict[str, Any]]:
+        """Rappels dont la plage [year_start, year_end] contient year."""
+        if year > self.max_end:
+            return []
+        # Seuls les rappels commences au plus tard en `year` sont candidats
+        stop = bisect_right(self.starts, year)
+        return [self.recalls[i] for i in range(stop) if self.ends[i] >= year]
+
+
+# {(brand_lookup_key, model_lookup_key): VehicleRecalls}
+_index: dict[tuple[str, str], VehicleRecalls] | None = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+_refreshing = False
+
+
+def _build_index(conn) -> dict[tuple[str, str], VehicleRecalls]:
+    from app.services.vehicle_lookup import build_vehicle_lookup_keys
+
+    # Meme choix que find_vehicle : a cles egales, le plus petit id gagne
+    vehicle_keys: dict[int, tuple[str, str]] = {}
+    owners: dict[tuple[str, str], int] = {}
+    for vehicle_id, brand, model in conn.execute(
+        select(Vehicle.id, Vehicle.brand, Vehicle.model).order_by(Vehicle.id)
+    ):
+        key = build_vehicle_lookup_keys(brand, model)
+        vehicle_keys[vehicle_id] = key
+        owners.setdefault(key, vehicle_id)
+
+    rows: dict[tuple[str, str], list[tuple[int, int, dict[str, Any]]]] = {}
+    recall = ManufacturerRecall.__table__.c
+    for r in conn.execute(
+        select(
+            recall.vehicle_id,
+            recall.recall_type,
+            recall.year_start,
+            recall.year_end,
+            recall.description,
+            recall.gov_url,
+            recall.severity,
+        ).order_by(recall.id)
+    ):
+        key = vehicle_keys.get(r.vehicle_id)
+        if key is None or owners[key] != r.vehicle_id:
+            continue
+        rows.setdefault(key, []).append(
+            (
+                r.year_start,
+                r.year_end,
+                {
+                    "recall_type": r.recall_type,
+                    "description": r.description,
+                    "gov_url": r.gov_url,
+                    "severity": r.severity,
+                },
+            )
+        )
+    return {key: VehicleRecalls(recalls) for key, recalls in rows.items()}
+
+
+def load_recall_index() -> int:
+    """(Re)charge l'index depuis la base.
+
+    Connexion dediee : appelable depuis un hook after_commit ou un thread.
+
+    Returns:
+        Nombre de vehicules ayant au moins un rappel.
+    """
+    global _index, _loaded_at
+    try:
+        with db.engine.connect() as conn:
+            index = _build_index(conn)
+    except OperationalError:
+        # Table pas encore creee (migration pas jouee) : L11 ne trouve rien
+        logger.warning("Table manufacturer_recalls absente — filtre L11 desactive")
+        index = {}
+    with _lock:
+        _index = index
+        _loaded_at = time.monotonic()
+    logger.debug("Recall index loaded: %d vehicles", len(index))
+    return len(index)
+
+
+def find_recalls(make: str, model: str, year: int) -> list[dict[str, Any]]:
+    """Rappels constructeur concernant un vehicule produit en `year`.
+
+    Returns:
+        Liste de dicts avec recall_type, description, gov_url, severity.
+    """
+    from app.services.vehicle_lookup import build_vehicle_lookup_keys
+
+    index = _index
+    if index is None:
+        load_recall_index()
+        index = _index
+    else:
+        _refresh_if_expired()
+    entry = index.get(build_vehicle_lookup_keys(make, model))
+    return entry.covering(year) if entry else []
+
+
+def _refresh_if_expired() -> None:
+    """Lance un rechargement en fond si l'index a depasse son age maximal."""
+    global _refreshing
+    interval = float(current_app.config.get("RECALL_INDEX_REFRESH_SECONDS", 900))
+    if interval <= 0 or time.monotonic() - _loaded_at < interval:
+        return
+    with _lock:
+        if _refreshing:
+            return
+        _refreshing = True
+    app_obj = current_app._get_current_object()
+
+    def _run() -> None:
+        global _refreshing
+        try:
+            with app_obj.app_context():
+                load_recall_index()
+        except Exception:  # noqa: BLE001 — background thread, ne doit jamais crasher
+            logger.warning("Recall index refresh failed", exc_info=True)
+        finally:
+            _refreshing = False
+
+    threading.Thread(target=_run, name="recall-index", daemon=True).start()
+
+
+# --- Invalidation sur commit ---------------------------------------------------
+# Un rappel ajoute / modifie / supprime, ou un vehicule renomme / supprime
+# (les cles de l'index en dependent), marque la session ; l'index est recharge
+# une fois le commit passe. Les Query.delete() en masse ne passent pas ici.
+
+
+def _mark_session(target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["recall_index_stale"] = True
+
+
+@event.listens_for(ManufacturerRecall, "after_insert")
+@event.listens_for(ManufacturerRecall, "after_update")
+@event.listens_for(ManufacturerRecall, "after_delete")
+@event.listens_for(Vehicle, "after_delete")
+def _recall_source_changed(_mapper, _connection, target) -> None:
+    _mark_session(target)
+
+
+@event.listens_for(Vehicle, "after_update")
+def _vehicle_renamed(_mapper, _connection, target: Vehicle) -> None:
+    state = inspect(target)
+    if state.attrs.brand.history.has_changes() or state.attrs.model.history.has_changes():
+        _mark_session(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _reload_after_commit(session: Session) -> None:
+    if not session.info.pop("recall_index_stale", False) or _index is None:
+        return
+    try:
+        load_recall_index()
+    except Exception:  # noqa: BLE001 — le commit est fait, l'index se rattrapera
+        logger.warning("Recall index reload failed", exc_info=True)
@@ -0,0 +1,148 @@
+"""Snapshot versionne du referentiel vehicules pour l'extension.
+
+L'extension garde une copie locale du referentiel (alias, formes
+d'affichage, tokens LBC, slugs AS24, plages d'annees) au lieu de recevoir
+les tokens job par job (/market-prices/next-job).
+
+Version = "<epoque>.<sequence>" :
+- l'epoque est une empreinte des tables d'alias et d'affichage de
+  vehicle_lookup (elles changent avec le code, pas en base) ;
+- la sequence est le dernier id de ReferentialChange (journal des
+  modifications de Vehicle).
+
+Un client qui envoie sa version recoit un delta (vehicules modifies ou
+supprimes depuis) tant que l'epoque n'a pas change ; sinon un snapshot
+complet.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from functools import lru_cache
+
+import orjson
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.referential_change import ReferentialChange
+from app.models.vehicle import Vehicle
+
+# A incrementer si le format des entrees change (force un snapshot complet)
+SNAPSHOT_FORMAT = 1
+
+# Snapshot complet de la derniere version servie : (version, corps JSON)
+_full_snapshot: tuple[str, bytes] | None = None
+_full_snapshot_lock = threading.Lock()
+
+
+def _alias_tables() -> dict[str, dict[str, str]]:
+    from app.services.vehicle_lookup import (
+        BRAND_ALIASES,
+        BRAND_DISPLAY,
+        MODEL_ALIASES,
+        MODEL_DISPLAY,
+    )
+
+    return {
+        "brand_aliases": BRAND_ALIASES,
+        "model_aliases": MODEL_ALIASES,
+        "brand_display": BRAND_DISPLAY,
+        "model_display": MODEL_DISPLAY,
+    }
+
+
+@lru_cache(maxsize=1)
+def referential_epoch() -> str:
+    """Empreinte courte des tables d'alias (stable tant que le code ne change pas)."""
+    payload = orjson.dumps(
+        {"format": SNAPSHOT_FORMAT, **_alias_tables()}, option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.sha256(payload).hexdigest()[:8]
+
+
+def current_referential_version() -> str:
+    """Version courante du referentiel ("<epoque>.<sequence>")."""
+    seq = db.session.query(func.max(ReferentialChange.id)).scalar() or 0
+    return f"{referential_epoch()}.{seq}"
+
+
+def _parse_version(version: str | None) -> tuple[str, int] | None:
+    if not version:
+        return None
+    epoch, _, seq = version.partition(".")
+    if not epoch or not seq.isdigit():
+        return None
+    return epoch, int(seq)
+
+
+def _serialize_vehicle(vehicle: Vehicle) -> dict:
+    return {
+        "id": vehicle.id,
+        "brand": vehicle.brand,
+        "model": vehicle.model,
+        "brand_key": vehicle.brand_lookup_key,
+        "model_key": vehicle.model_lookup_key,
+        "year_start": vehicle.year_start,
+        "year_end": vehicle.year_end,
+        "site_brand_token": vehicle.site_brand_token,
+        "site_model_token": vehicle.site_model_token,
+        "as24_slug_make": vehicle.as24_slug_make,
+        "as24_slug_model": vehicle.as24_slug_model,
+    }
+
+
+def build_referential_snapshot(since: str | None = None) -> tuple[str, bytes]:
+    """Snapshot (complet ou delta depuis ``since``) serialise en JSON.
+
+    Returns:
+        (version, corps JSON). Le corps contient ``version``, ``full``,
+        ``vehicles`` et ``removed`` (ids supprimes, delta seulement) ;
+        les tables d'alias ne sont presentes que dans un snapshot complet.
+    """
+    global _full_snapshot
+
+    version = current_referential_version()
+    epoch, seq = _parse_version(version)
+    base = _parse_version(since)
+
+    if base is not None and base[0] == epoch and base[1] <= seq:
+        since_seq = base[1]
+        changed = {
+            vehicle_id
+            for (vehicle_id,) in db.session.query(ReferentialChange.vehicle_id)
+            .filter(ReferentialChange.id > since_seq)
+            .distinct()
+        }
+        vehicles = (
+            Vehicle.query.filter(Vehicle.id.in_(changed)).order_by(Vehicle.id).all()
+            if changed
+            else []
+        )
+        present = {v.id for v in vehicles}
+        body = {
+            "version": version,
+            "since": since,
+            "full": False,
+            "vehicles": [_serialize_vehicle(v) for v in vehicles],
+            "removed": sorted(changed - present),
+        }
+        return version, orjson.dumps(body)
+
+    with _full_snapshot_lock:
+        cached = _full_snapshot
+    if cached is not None and cached[0] == version:
+        return cached
+
+    body = {
+        "version": version,
+        "since": None,
+        "full": True,
+        **_alias_tables(),
+        "vehicles": [_serialize_vehicle(v) for v in Vehicle.query.order_by(Vehicle.id).all()],
+        "removed": [],
+    }
+    encoded = orjson.dumps(body)
+    with _full_snapshot_lock:
+        _full_snapshot = (version, encoded)
+    return version, encoded
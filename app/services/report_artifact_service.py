@@ -0,0 +1,362 @@
+"""Cache des PDF de rapport (/api/scan-report) en base.
+
+Un rendu WeasyPrint coute plusieurs secondes de CPU et peut declencher un
+brouillon email Gemini. Les entrees d'un rapport ne bougent presque plus
+apres l'analyse : le PDF est stocke dans ReportArtifact sous l'empreinte de
+ses entrees (report_html_service.scan_report_fingerprint) et resservi tel
+quel tant qu'elle ne change pas. L'empreinte sert aussi d'ETag HTTP.
+
+Les rendus peuvent aussi etre demandes en asynchrone (/api/scan-report/jobs) :
+le rendu tourne dans un thread de fond (et le pool de rendu), l'extension
+interroge l'etat puis telecharge le PDF. Le polling peut tomber sur un autre
+worker gunicorn que celui qui rend : l'etat du job est ecrit dans ReportJob,
+et le PDF est relu dans ReportArtifact sous l'empreinte du job, jamais sous
+celle d'un autre rendu du meme scan.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models.report_artifact import ReportArtifact
+from app.models.report_job import ReportJob
+
+logger = logging.getLogger(__name__)
+
+
+def cache_enabled() -> bool:
+    """True si les PDF rendus sont gardes en base (REPORT_ARTIFACT_CACHE)."""
+    return bool(current_app.config.get("REPORT_ARTIFACT_CACHE", True))
+
+
+def get_report_artifact(scan_id: int, fingerprint: str) -> bytes | None:
+    """PDF deja rendu pour ce scan et cette empreinte, ou None.
+
+    Compte le service (served_count) en best-effort.
+    """
+    artifact = ReportArtifact.query.filter_by(scan_id=scan_id, fingerprint=fingerprint).first()
+    if artifact is None:
+        return None
+    content = artifact.content
+    try:
+        artifact.served_count = (artifact.served_count or 0) + 1
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.debug("served_count non mis a jour pour scan %s", scan_id, exc_info=True)
+    return content
+
+
+def store_report_artifact(scan_id: int, fingerprint: str, content: bytes) -> None:
+    """Garde le PDF rendu ; remplace les rendus plus anciens du meme scan.
+
+    Best-effort : un echec d'ecriture (course entre deux workers, base
+    verrouillee) ne fait que perdre le cache.
+    """
+    try:
+        ReportArtifact.query.filter(
+            ReportArtifact.scan_id == scan_id,
+            ReportArtifact.fingerprint != fingerprint,
+        ).delete(synchronize_session=False)
+        if not ReportArtifact.query.filter_by(scan_id=scan_id, fingerprint=fingerprint).first():
+            db.session.add(
+                ReportArtifact(
+                    scan_id=scan_id,
+                    fingerprint=fingerprint,
+                    content=content,
+                    size_bytes=len(content),
+                )
+            )
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.warning("Rapport PDF non mis en cache pour scan %s", scan_id, exc_info=True)
+
+
+def get_or_render_scan_report(scan_id: int, fingerprint: str | None = None) -> tuple[str, bytes]:
+    """PDF du rapport d'un scan, relu en cache ou rendu puis stocke.
+
+    Args:
+        scan_id: Scan concerne.
+        fingerprint: Empreinte deja calculee par l'appelant (evite de la
+            recalculer), ou None.
+
+    Returns:
+        (empreinte, PDF). Si le rendu a cree le brouillon email, l'empreinte
+        est celle d'apres le rendu : c'est sous elle que le PDF est stocke.
+
+    Raises:
+        ValueError: si le scan n'existe pas.
+    """
+    from app.services import report_html_service
+
+    if fingerprint is None:
+        fingerprint = report_html_service.scan_report_fingerprint(scan_id)
+    use_cache = cache_enabled()
+    if use_cache:
+        cached = get_report_artifact(scan_id, fingerprint)
+        if cached is not None:
+            return fingerprint, cached
+
+    pdf_bytes = report_html_service.generate_scan_report_pdf(scan_id)
+    # Le rendu a pu generer le brouillon email : il fait partie des entrees
+    fingerprint = report_html_service.scan_report_fingerprint(scan_id)
+    if use_cache:
+        store_report_artifact(scan_id, fingerprint, pdf_bytes)
+    return fingerprint, pdf_bytes
+
+
+class _LocalJob(NamedTuple):
+    """Rendu lance par ce process.
+
+    Le Future donne (empreinte, PDF) ; PDF vaut None une fois le rendu
+    stocke dans ReportArtifact (relu en base, pas garde en memoire).
+    """
+
+    future: Future
+    submitted_at: float
+
+
+# Rendus asynchrones de ce process, du plus ancien au plus recent
+_jobs: dict[str, _LocalJob] = {}
+_jobs_lock = threading.Lock()
+_job_executor: ThreadPoolExecutor | None = None
+REPORT_JOBS_MAX = 256
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+
+def _utcnow() -> datetime:
+    # SQLite rend des datetimes naifs : on compare en UTC naif
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def report_job_id(scan_id: int, fingerprint: str) -> str:
+    """Identifiant d'un rendu asynchrone : scan + debut de l'empreinte."""
+    return f"{scan_id}-{fingerprint[:16]}"
+
+
+def _parse_job_id(job_id: str) -> tuple[int, str] | None:
+    scan_id, _, prefix = job_id.partition("-")
+    if not scan_id.isdigit() or not prefix:
+        return None
+    return int(scan_id), prefix
+
+
+def _job_row(job_id: str) -> ReportJob | None:
+    # populate_existing : la ligne est ecrite par le thread du rendu
+    return ReportJob.query.filter_by(job_id=job_id).populate_existing().first()
+
+
+def _save_job(
+    job_id: str,
+    scan_id: int,
+    status: str,
+    fingerprint: str | None = None,
+    error: str | None = None,
+) -> None:
+    """Ecrit l'etat d'un job ; commit. Best-effort : le polling des autres
+    workers perd l'etat, pas le rendu."""
+    try:
+        row = db.session.get(ReportJob, job_id)
+        if row is None:
+            row = ReportJob(job_id=job_id, scan_id=scan_id)
+            db.session.add(row)
+        row.status = status
+        row.fingerprint = fingerprint
+        row.error = error
+        row.updated_at = _utcnow()
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.warning("Etat du rendu %s non enregistre", job_id, exc_info=True)
+
+
+def _is_stale(row: ReportJob) -> bool:
+    """Job "pending" sans nouvelles : le worker qui le rendait s'est arrete."""
+    stale = int(current_app.config.get("REPORT_JOB_STALE_SECONDS", 300))
+    return row.updated_at < _utcnow() - timedelta(seconds=stale)
+
+
+def _evict_jobs() -> None:
+    """Purge les jobs plus vieux que REPORT_JOB_RETENTION_HOURS. Commit."""
+    retention = float(current_app.config.get("REPORT_JOB_RETENTION_HOURS", 24))
+    try:
+        ReportJob.query.filter(
+            ReportJob.updated_at < _utcnow() - timedelta(hours=retention)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.debug("Purge des jobs de rendu echouee", exc_info=True)
+
+
+def _job_artifacts(job_id: str, row: ReportJob | None):
+    """Requete du PDF en cache d'un job, ou None si le job_id est mal forme.
+
+    Un job termine pointe l'empreinte finale de son rendu ; sinon seul un PDF
+    dont l'empreinte commence par celle du job lui correspond (un PDF plus
+    ancien du meme scan n'est pas le sien).
+    """
+    parsed = _parse_job_id(job_id)
+    if parsed is None:
+        return None
+    scan_id, prefix = parsed
+    query = ReportArtifact.query.filter(ReportArtifact.scan_id == scan_id)
+    if row is not None and row.status == DONE and row.fingerprint:
+        return query.filter(ReportArtifact.fingerprint == row.fingerprint)
+    return query.filter(ReportArtifact.fingerprint.startswith(prefix, autoescape=True))
+
+
+def _run_report_job(app, job_id: str, scan_id: int, fingerprint: str) -> tuple[str, bytes | None]:
+    with app.app_context():
+        try:
+            fingerprint, pdf_bytes = get_or_render_scan_report(scan_id, fingerprint)
+        except Exception as exc:
+            db.session.rollback()
+            _save_job(job_id, scan_id, ERROR, error=str(exc))
+            raise
+        _save_job(job_id, scan_id, DONE, fingerprint=fingerprint)
+        stored = (
+            cache_enabled()
+            and ReportArtifact.query.filter_by(scan_id=scan_id, fingerprint=fingerprint)
+            .with_entities(ReportArtifact.id)
+            .first()
+            is not None
+        )
+        # PDF en base : le Future ne garde que l'empreinte
+        return fingerprint, None if stored else pdf_bytes
+
+
+def _evict_local_jobs() -> None:
+    """Oublie les rendus termines depuis REPORT_JOB_STALE_SECONDS (sous _jobs_lock).
+
+    Leur etat reste dans ReportJob et leur PDF dans ReportArtifact.
+    """
+    horizon = time.monotonic() - int(current_app.config.get("REPORT_JOB_STALE_SECONDS", 300))
+    for job_id, local in list(_jobs.items()):
+        if local.submitted_at >= horizon:
+            break
+        if local.future.done():
+            del _jobs[job_id]
+    while len(_jobs) > REPORT_JOBS_MAX:
+        _jobs.pop(next(iter(_jobs)))
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _job_executor
+    if _job_executor is None:
+        # Les threads attendent surtout le pool de rendu : un par processus
+        workers = max(2, int(current_app.config.get("REPORT_RENDER_POOL_SIZE", 0)))
+        _job_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+    return _job_executor
+
+
+def submit_report_job(scan_id: int) -> tuple[str, str]:
+    """Demande le rendu du rapport d'un scan en arriere-plan.
+
+    Returns:
+        (job_id, etat) : "done" si le PDF est deja en cache ou rendu,
+        "pending" sinon. Un rendu deja en cours pour les memes entrees
+        (dans ce worker ou un autre) est reutilise ; un rendu en echec ou
+        interrompu est relance.
+
+    Raises:
+        ValueError: si le scan n'existe pas.
+    """
+    from app.services.report_html_service import scan_report_fingerprint
+
+    fingerprint = scan_report_fingerprint(scan_id)
+    job_id = report_job_id(scan_id, fingerprint)
+    if (
+        cache_enabled()
+        and ReportArtifact.query.filter_by(scan_id=scan_id, fingerprint=fingerprint).first()
+    ):
+        return job_id, DONE
+
+    with _jobs_lock:
+        _evict_local_jobs()
+        local = _jobs.get(job_id)
+        future = local.future if local is not None else None
+        if future is not None and not (future.done() and future.exception() is not None):
+            return job_id, DONE if future.done() else PENDING
+        if future is None:
+            row = _job_row(job_id)
+            if row is not None and row.status == PENDING and not _is_stale(row):
+                # Rendu en cours sur un autre worker
+                return job_id, PENDING
+        _evict_jobs()
+        _save_job(job_id, scan_id, PENDING)
+        app = current_app._get_current_object()
+        future = _executor().submit(_run_report_job, app, job_id, scan_id, fingerprint)
+        _jobs.pop(job_id, None)
+        _jobs[job_id] = _LocalJob(future, time.monotonic())
+        # Oublie les plus anciens (leur etat reste dans ReportJob)
+        while len(_jobs) > REPORT_JOBS_MAX:
+            _jobs.pop(next(iter(_jobs)))
+    return job_id, DONE if future.done() and future.exception() is None else PENDING
+
+
+def report_job_status(job_id: str) -> tuple[str, str | None] | None:
+    """Etat d'un rendu asynchrone : ("pending" | "done" | "error", message).
+
+    Un job rendu par un autre worker est lu dans ReportJob ; il n'est "done"
+    que si son PDF est en cache. Retourne None pour un job inconnu, purge,
+    ou dont le PDF a ete remplace.
+    """
+    with _jobs_lock:
+        local = _jobs.get(job_id)
+    future = local.future if local is not None else None
+    if future is not None:
+        if not future.done():
+            return PENDING, None
+        exc = future.exception()
+        if exc is not None:
+            return ERROR, str(exc)
+        return DONE, None
+    row = _job_row(job_id)
+    if row is not None and row.status == PENDING:
+        if _is_stale(row):
+            return ERROR, "Rendu interrompu (worker arrete)"
+        return PENDING, None
+    if row is not None and row.status == ERROR:
+        return ERROR, row.error
+    query = _job_artifacts(job_id, row)
+    if query is not None and query.with_entities(ReportArtifact.id).first() is not None:
+        return DONE, None
+    return None
+
+
+def report_job_result(job_id: str) -> tuple[str, bytes] | None:
+    """(empreinte, PDF) d'un rendu asynchrone termine, ou None."""
+    with _jobs_lock:
+        local = _jobs.get(job_id)
+    future = local.future if local is not None else None
+    if future is not None:
+        if not future.done() or future.exception() is not None:
+            return None
+        fingerprint, pdf_bytes = future.result()
+        if pdf_bytes is not None:
+            return fingerprint, pdf_bytes
+        scan_id = _parse_job_id(job_id)[0]
+        artifact = ReportArtifact.query.filter_by(scan_id=scan_id, fingerprint=fingerprint).first()
+        return (artifact.fingerprint, artifact.content) if artifact is not None else None
+    row = _job_row(job_id)
+    if row is not None and row.status != DONE:
+        return None
+    query = _job_artifacts(job_id, row)
+    artifact = query.first() if query is not None else None
+    if artifact is None:
+        return None
+    return artifact.fingerprint, artifact.content
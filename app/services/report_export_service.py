@@ -0,0 +1,346 @@
+"""Export en masse des rapports PDF d'un ensemble de scans (admin).
+
+Un export = un filtre de scans (periode, marque/modele, source, SIRET du
+vendeur ou liste d'ids) -> une archive ZIP d'un PDF par scan. Jusqu'a
+REPORT_EXPORT_MAX_SCANS rendus depassent largement le timeout des workers
+gunicorn (sync, 120 s) : l'export est un job de fond (job_store), pas une
+reponse en streaming.
+
+- la page admin cree le job (PipelineJob + PipelineRun EXPORT_PIPELINE) et
+  lance run_report_export dans un thread ; elle suit l'avancement par
+  polling depuis n'importe quel worker, puis telecharge l'archive ;
+- les PDF deja en cache (ReportArtifact) sont repris tels quels ;
+- les autres sont rendus en parallele dans le pool de rendu
+  (report_render_pool), avec une fenetre bornee de rendus en vol : la
+  memoire reste de l'ordre de quelques PDF quel que soit le nombre de scans ;
+- l'archive est ecrite dans REPORT_EXPORT_DIR (partage par les workers du
+  conteneur) et supprimee apres PIPELINE_JOB_RETENTION_HOURS.
+
+Pas de brouillon email Gemini pendant un export : un rapport sans brouillon
+est rendu sans la section email, et ce rendu n'est pas mis en cache.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import tempfile
+import zipfile
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import IO, NamedTuple
+
+from flask import current_app
+
+from app.extensions import db
+from app.models.filter_result import FilterResultDB
+from app.models.pipeline_run import PipelineRun
+from app.models.scan import ScanLog
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PIPELINE = "export_rapports_pdf"
+ERRORS_ENTRY = "erreurs.txt"
+
+
+def export_max_scans() -> int:
+    """Nombre maximal de scans par export (REPORT_EXPORT_MAX_SCANS)."""
+    return int(current_app.config.get("REPORT_EXPORT_MAX_SCANS", 500))
+
+
+class ExportCancelled(Exception):
+    """Annulation demandee pendant l'export."""
+
+
+def export_dir() -> Path:
+    """Repertoire des archives d'export (REPORT_EXPORT_DIR), cree au besoin."""
+    path = Path(
+        current_app.config.get("REPORT_EXPORT_DIR")
+        or Path(tempfile.gettempdir()) / "okazcar_exports"
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def export_archive_path(job_key: str) -> Path:
+    """Archive terminee d'un job d'export (job_key de job_store)."""
+    if not job_key.isalnum():
+        raise ValueError(f"Job d'export invalide : {job_key}")
+    return export_dir() / f"{job_key}.zip"
+
+
+def purge_export_archives() -> int:
+    """Supprime les archives plus vieilles que PIPELINE_JOB_RETENTION_HOURS.
+
+    Returns:
+        Nombre de fichiers supprimes.
+    """
+    retention = float(current_app.config.get("PIPELINE_JOB_RETENTION_HOURS", 24))
+    cutoff = (datetime.now() - timedelta(hours=retention)).timestamp()
+    removed = 0
+    for path in export_dir().glob("*.zip*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            logger.debug("Archive d'export non supprimee : %s", path, exc_info=True)
+    return removed
+
+
+class ReportExportFilter(NamedTuple):
+    """Selection des scans a exporter (criteres combines en ET)."""
+
+    date_from: date | None = None
+    date_to: date | None = None
+    make: str | None = None
+    model: str | None = None
+    source: str | None = None
+    siret: str | None = None
+    scan_ids: tuple[int, ...] = ()
+
+    def is_empty(self) -> bool:
+        return not any(self)
+
+
+def _parse_date(value: str | None, field: str) -> date | None:
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide pour {field} : {value}") from None
+
+
+def parse_export_filter(args) -> ReportExportFilter:
+    """Construit le filtre depuis des parametres de requete (MultiDict ou dict).
+
+    ``scan_ids`` accepte des ids separes par des virgules ou des espaces.
+
+    Raises:
+        ValueError: date ou id invalide.
+    """
+    raw_ids = re.split(r"[\s,;]+", (args.get("scan_ids") or "").strip())
+    try:
+        scan_ids = tuple(dict.fromkeys(int(v) for v in raw_ids if v))
+    except ValueError:
+        raise ValueError("Liste d'ids de scans invalide") from None
+
+    def _text(name: str) -> str | None:
+        return (args.get(name) or "").strip() or None
+
+    siret = _text("siret")
+    return ReportExportFilter(
+        date_from=_parse_date(args.get("date_from"), "date_from"),
+        date_to=_parse_date(args.get("date_to"), "date_to"),
+        make=_text("make"),
+        model=_text("model"),
+        source=_text("source"),
+        siret=siret.replace(" ", "") if siret else None,
+        scan_ids=scan_ids,
+    )
+
+
+def select_export_scans(flt: ReportExportFilter, limit: int) -> list[tuple[int, str, str]]:
+    """Scans correspondant au filtre, du plus ancien au plus recent.
+
+    Les scans "reutilises" (simple renvoi vers un scan deja analyse) sont
+    exclus. Retourne au plus ``limit + 1`` lignes (id, marque, modele) :
+    l'appelant detecte ainsi un depassement de la limite.
+    """
+    query = db.session.query(ScanLog.id, ScanLog.vehicle_make, ScanLog.vehicle_model).filter(
+        ScanLog.raw_data["cached_scan_id"].as_integer().is_(None)
+    )
+    if flt.scan_ids:
+        query = query.filter(ScanLog.id.in_(flt.scan_ids))
+    if flt.date_from:
+        query = query.filter(ScanLog.created_at >= datetime.combine(flt.date_from, time.min))
+    if flt.date_to:
+        # Borne incluse : toute la journee de date_to
+        end = datetime.combine(flt.date_to + timedelta(days=1), time.min)
+        query = query.filter(ScanLog.created_at < end)
+    if flt.make:
+        query = query.filter(db.func.lower(ScanLog.vehicle_make) == flt.make.lower())
+    if flt.model:
+        query = query.filter(db.func.lower(ScanLog.vehicle_model) == flt.model.lower())
+    if flt.source:
+        query = query.filter(ScanLog.source == flt.source)
+    if flt.siret:
+        # Le SIRET nettoye du vendeur est garde dans les details du filtre L7
+        dealer_scans = db.session.query(FilterResultDB.scan_id).filter(
+            FilterResultDB.filter_id == "L7",
+            FilterResultDB.details["siret"].as_string() == flt.siret,
+        )
+        query = query.filter(ScanLog.id.in_(dealer_scans))
+    return [tuple(row) for row in query.order_by(ScanLog.id).limit(limit + 1).all()]
+
+
+def _slug(value: str | None) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", value or "").strip("-")[:40]
+
+
+def export_entry_name(scan_id: int, make: str | None, model: str | None) -> str:
+    """Nom du PDF d'un scan dans l'archive (ordre des ids preserve)."""
+    label = "_".join(part for part in (_slug(make), _slug(model)) if part)
+    return f"rapport_{scan_id:07d}{'_' + label if label else ''}.pdf"
+
+
+def _render(pool, html: str, css_path: str) -> bytes:
+    from app.services.report_render_pool import render_local
+
+    payload = (html, css_path)
+    return pool.render("html", payload) if pool is not None else render_local("html", payload)
+
+
+class _PendingReport(NamedTuple):
+    scan_id: int
+    entry_name: str
+    fingerprint: str | None
+    future: Future
+    store: bool
+
+
+def write_report_export(
+    scans: Iterable[tuple[int, str, str]],
+    fileobj: IO[bytes],
+    on_report: Callable[[int], None] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
+) -> tuple[int, list[str]]:
+    """Ecrit dans ``fileobj`` l'archive ZIP des rapports de ``scans``.
+
+    A appeler dans un contexte d'application. Un rapport en echec
+    n'interrompt pas l'export : il est liste dans ``erreurs.txt`` en fin
+    d'archive. ``on_report(n)`` est appele apres chaque rapport ecrit ;
+    ``is_cancelled()`` est consulte avant chaque nouveau rendu.
+
+    Returns:
+        (nombre de rapports ecrits, erreurs).
+
+    Raises:
+        ExportCancelled: annulation demandee (archive incomplete).
+    """
+    from app.services.report_artifact_service import (
+        cache_enabled,
+        get_report_artifact,
+        store_report_artifact,
+    )
+    from app.services.report_html_service import (
+        _report_css_path,
+        build_scan_report_html,
+        scan_report_fingerprint,
+    )
+    from app.services.report_render_pool import get_render_pool
+
+    pool = get_render_pool()
+    workers = pool.size if pool is not None else 1
+    # Un rendu d'avance par processus : le pool ne reste jamais a vide
+    window = 2 * workers
+    use_cache = cache_enabled()
+    css_path = _report_css_path()
+    errors: list[str] = []
+    count = 0
+
+    def _start(executor, scan_id: int, make: str, model: str) -> _PendingReport:
+        name = export_entry_name(scan_id, make, model)
+        future: Future = Future()
+        try:
+            fingerprint = scan_report_fingerprint(scan_id)
+            cached = get_report_artifact(scan_id, fingerprint) if use_cache else None
+            if cached is not None:
+                future.set_result(cached)
+                return _PendingReport(scan_id, name, fingerprint, future, False)
+            html, complete = build_scan_report_html(scan_id, generate_email=False)
+        except Exception as exc:  # noqa: BLE001 -- rapport suivant
+            future.set_exception(exc)
+            return _PendingReport(scan_id, name, None, future, False)
+        future = executor.submit(_render, pool, html, css_path)
+        return _PendingReport(scan_id, name, fingerprint, future, use_cache and complete)
+
+    with (
+        ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-export") as ex,
+        zipfile.ZipFile(fileobj, mode="w", compression=zipfile.ZIP_STORED) as archive,
+    ):
+        pending: deque[_PendingReport] = deque()
+        scans_iter = iter(scans)
+        while True:
+            while len(pending) < window:
+                if is_cancelled is not None and is_cancelled():
+                    raise ExportCancelled(f"Export annule apres {count} rapports")
+                row = next(scans_iter, None)
+                if row is None:
+                    break
+                pending.append(_start(ex, *row))
+            if not pending:
+                break
+            item = pending.popleft()
+            try:
+                pdf_bytes = item.future.result()
+            except Exception as exc:  # noqa: BLE001 -- liste dans erreurs.txt
+                logger.warning("Export: rapport du scan %s en echec: %s", item.scan_id, exc)
+                errors.append(f"scan {item.scan_id}: {type(exc).__name__}: {exc}")
+                continue
+            # PDF deja compresses : stockes tels quels dans l'archive
+            archive.writestr(item.entry_name, pdf_bytes)
+            if item.store:
+                store_report_artifact(item.scan_id, item.fingerprint, pdf_bytes)
+            count += 1
+            if on_report is not None:
+                on_report(count)
+        if errors:
+            archive.writestr(ERRORS_ENTRY, "\n".join(errors) + "\n")
+    return count, errors
+
+
+def run_report_export(app, job, scans: list[tuple[int, str, str]]) -> None:
+    """Execute un job d'export dans un thread de fond.
+
+    ``job`` est le JobHandle (job_store) cree par la page admin : avancement,
+    annulation et fin du PipelineRun passent par lui. L'archive est ecrite
+    sous un nom temporaire puis renommee une fois complete.
+    """
+    total = len(scans)
+
+    def _progress(count: int) -> None:
+        job["progress"] = int(count * 100 / total) if total else 100
+        job["progress_label"] = f"{count}/{total} rapports"
+        job.set_count(count)
+
+    with app.app_context():
+        final = export_archive_path(job.key)
+        part = final.with_name(final.name + ".part")
+        try:
+            with part.open("wb") as fh:
+                count, errors = write_report_export(
+                    scans, fh, on_report=_progress, is_cancelled=job.is_cancelled
+                )
+            os.replace(part, final)
+        except ExportCancelled as exc:
+            db.session.rollback()
+            part.unlink(missing_ok=True)
+            job["progress_label"] = str(exc)
+            job["status"] = "cancelled"
+            return
+        except Exception as exc:  # noqa: BLE001 -- thread de fond, le job passe en erreur
+            logger.exception("Export des rapports echoue (job %s)", job.key)
+            db.session.rollback()
+            part.unlink(missing_ok=True)
+            job["progress_label"] = f"Erreur : {exc}"
+            job["status"] = "error"
+            return
+
+        job.set_count(count)
+        job["errors"] = len(errors)
+        label = f"{count} rapport(s) exporte(s)"
+        if errors:
+            label += f", {len(errors)} en echec (voir {ERRORS_ENTRY})"
+            run = db.session.get(PipelineRun, job.run_id)
+            if run is not None:
+                run.error_message = f"{len(errors)} rapport(s) en echec"
+        job["progress"] = 100
+        job["progress_label"] = label
+        job["status"] = "done"
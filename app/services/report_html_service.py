@@ -11,12 +11,15 @@ Architecture :
   4. Rendu PDF via WeasyPrint
 """
 
+import hashlib
 import logging
 import os
 import re
 from datetime import datetime, timezone
+from functools import lru_cache
 
 import markdown
+import orjson
 from flask import current_app
 
 from app.extensions import db
@@ -42,6 +45,10 @@ from app.services.report_service import (
 
 logger = logging.getLogger(__name__)
 
+# A incrementer quand le rendu change sans que report_base.html ni report.css
+# ne bougent (sections _build_*) : invalide les PDF en cache (ReportArtifact)
+REPORT_TEMPLATE_VERSION = 1
+
 
 # ---------------------------------------------------------------------------
 # Helpers HTML
@@ -481,6 +488,14 @@ def _build_email_section(email_draft: EmailDraft | None) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _report_year(raw: dict):
+    """Annee du vehicule telle que lue par les sections (int si numerique)."""
+    year = raw.get("year") or raw.get("annee")
+    if isinstance(year, str) and year.isdigit():
+        year = int(year)
+    return year
+
+
 def _build_report_sections(
     scan: ScanLog,
     filter_results: list[FilterResultDB],
@@ -519,9 +534,7 @@ def _build_report_sections(
         sections.append(filters_section)
 
     # 7. Fiabilite moteur
-    year = raw.get("year") or raw.get("annee")
-    if isinstance(year, str) and year.isdigit():
-        year = int(year)
+    year = _report_year(raw)
     reliability = _get_engine_reliability_safe(raw, scan.vehicle_make, scan.vehicle_model)
     rel_section = _build_reliability_section(reliability)
     if rel_section:
@@ -547,23 +560,31 @@ def _build_report_sections(
     return sections
 
 
-def _assemble_html(scan: ScanLog, sections: list[str]) -> str:
-    """Assemble les sections dans le template HTML avec CSS inline."""
+def _report_css_path() -> str:
+    return os.path.join(current_app.root_path, "static", "report.css")
+
+
+def _assemble_html(scan: ScanLog, sections: list[str], inline_css: bool = True) -> str:
+    """Assemble les sections dans le template HTML.
+
+    Avec ``inline_css=False``, le lien vers report.css est retire : le
+    moteur de rendu applique la feuille deja parsee (report_render_pool).
+    """
     # Lire le template
     template_dir = os.path.join(current_app.root_path, "templates")
     template_path = os.path.join(template_dir, "report_base.html")
     with open(template_path, encoding="utf-8") as fh:
         template = fh.read()
 
-    # Lire le CSS
-    css_path = os.path.join(current_app.root_path, "static", "report.css")
-    with open(css_path, encoding="utf-8") as fh:
-        css_content = fh.read()
+    css_content = ""
+    if inline_css:
+        with open(_report_css_path(), encoding="utf-8") as fh:
+            css_content = f"<style>\n{fh.read()}\n</style>"
 
     # Inliner le CSS (remplacer le link par un <style>)
     template = re.sub(
         r'<link\s+rel="stylesheet"\s+href="report\.css"\s*/?>',
-        f"<style>\n{css_content}\n</style>",
+        lambda _match: css_content,
         template,
     )
 
@@ -601,8 +622,10 @@ def _assemble_html(scan: ScanLog, sections: list[str]) -> str:
 # ---------------------------------------------------------------------------
 
 
-def generate_scan_report_pdf(scan_id: int) -> bytes:
-    """Genere le rapport PDF complet pour un scan et retourne les bytes.
+def _load_report_data(
+    scan_id: int,
+) -> tuple[ScanLog, list[FilterResultDB], EmailDraft | None]:
+    """Scan, resultats de filtres tries et brouillon email le plus recent.
 
     Raises:
         ValueError: si le scan n'existe pas.
@@ -618,9 +641,93 @@ def generate_scan_report_pdf(scan_id: int) -> bytes:
     email_draft = (
         EmailDraft.query.filter_by(scan_id=scan_id).order_by(EmailDraft.created_at.desc()).first()
     )
+    return scan, filter_results, email_draft
+
+
+@lru_cache(maxsize=4)
+def _template_digest(root_path: str) -> str:
+    """Empreinte de report_base.html et report.css (relus au redemarrage)."""
+    digest = hashlib.sha256(str(REPORT_TEMPLATE_VERSION).encode())
+    for parts in (("templates", "report_base.html"), ("static", "report.css")):
+        with open(os.path.join(root_path, *parts), "rb") as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()
+
+
+def scan_report_fingerprint(scan_id: int) -> str:
+    """Empreinte des entrees du rapport d'un scan (sha256 hex).
+
+    Couvre tout ce que lit le rendu : scan, resultats de filtres, brouillon
+    email, fiabilite moteur, pneus et version du template. Deux empreintes
+    egales donnent le meme PDF (hors date de generation imprimee).
+
+    Raises:
+        ValueError: si le scan n'existe pas.
+    """
+    scan, filter_results, email_draft = _load_report_data(scan_id)
+    raw = scan.raw_data or {}
+    reliability = _get_engine_reliability_safe(raw, scan.vehicle_make, scan.vehicle_model)
+    tire_data = _get_tire_sizes_safe(
+        scan.vehicle_make or "", scan.vehicle_model or "", _report_year(raw)
+    )
+    inputs = {
+        "template": _template_digest(current_app.root_path),
+        "scan": [
+            scan.id,
+            scan.url,
+            raw,
+            scan.score,
+            scan.is_partial,
+            scan.vehicle_make,
+            scan.vehicle_model,
+            scan.price_eur,
+            scan.source,
+            scan.country,
+        ],
+        "filters": [
+            [fr.filter_id, fr.status, fr.score, fr.message, fr.details] for fr in filter_results
+        ],
+        "email": (
+            [email_draft.id, email_draft.edited_text, email_draft.generated_text]
+            if email_draft
+            else None
+        ),
+        "reliability": (
+            [
+                getattr(reliability, attr, None)
+                for attr in ("engine_code", "engine", "rating", "score", "note", "notes")
+            ]
+            if reliability is not None
+            else None
+        ),
+        "tires": tire_data,
+    }
+    return hashlib.sha256(
+        orjson.dumps(inputs, default=str, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+
+
+def build_scan_report_html(scan_id: int, generate_email: bool = True) -> tuple[str, bool]:
+    """HTML du rapport d'un scan, sans le CSS (applique par le moteur de rendu).
+
+    Args:
+        scan_id: Scan concerne.
+        generate_email: Genere le brouillon email Gemini s'il manque (hors
+            mode test). Les exports en masse s'en passent.
+
+    Returns:
+        (HTML, complet). ``complet`` est faux si la section email manque
+        uniquement parce que sa generation a ete sautee : ce rendu ne doit
+        pas remplacer celui de /api/scan-report dans le cache.
+
+    Raises:
+        ValueError: si le scan n'existe pas.
+    """
+    scan, filter_results, email_draft = _load_report_data(scan_id)
 
     # Auto-generation si pas de draft et pas en mode test
-    if email_draft is None and not current_app.testing:
+    autogen = email_draft is None and not current_app.testing
+    if autogen and generate_email:
         try:
             from app.services.email_service import generate_email_draft
 
@@ -639,12 +746,20 @@ def generate_scan_report_pdf(scan_id: int) -> bytes:
     # Construction des sections
     sections = _build_report_sections(scan, filter_results, email_draft)
 
-    # Assemblage HTML
-    html_content = _assemble_html(scan, sections)
+    # Assemblage HTML (le CSS est applique deja parse par le moteur de rendu)
+    return _assemble_html(scan, sections, inline_css=False), generate_email or not autogen
+
 
-    # Rendu PDF (import lazy pour eviter une dependance native au chargement du module)
-    from weasyprint import HTML as WeasyprintHTML
+def generate_scan_report_pdf(scan_id: int) -> bytes:
+    """Genere le rapport PDF complet pour un scan et retourne les bytes.
+
+    Raises:
+        ValueError: si le scan n'existe pas.
+    """
+    html_content, _ = build_scan_report_html(scan_id)
 
-    pdf_bytes: bytes = WeasyprintHTML(string=html_content).write_pdf()
+    # Rendu PDF dans le pool de rendu, ou sur place s'il est coupe
+    # (WeasyPrint importe a la demande : dependance native)
+    from app.services.report_render_pool import render_in_pool
 
-    return pdf_bytes
+    return render_in_pool("html", (html_content, _report_css_path()))
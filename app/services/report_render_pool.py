@@ -0,0 +1,317 @@
+"""Pool de processus dedie au rendu des rapports PDF.
+
+WeasyPrint (et dans une moindre mesure fpdf2) mobilise le CPU et le GIL
+plusieurs secondes par rapport : rendu dans le worker gunicorn, il bloque
+les autres requetes de ce worker. Ici le rendu part dans des processus
+dedies, lances a la demande et reutilises d'un rapport a l'autre :
+
+- chaque processus garde une FontConfiguration WeasyPrint et le CSS du
+  rapport deja parse (instance "chaude") ;
+- un rendu qui depasse REPORT_RENDER_TIMEOUT secondes est abandonne et son
+  processus tue puis remplace ;
+- un processus dont la memoire residente depasse REPORT_RENDER_MAX_RSS_MB
+  se termine (pendant le rendu : echec du rapport ; apres : simple
+  recyclage) et est remplace au rendu suivant.
+
+Les donnees sont lues en base dans le process web ; le pool ne recoit que
+des entrees picklables ("html" : HTML + chemin du CSS ; "fpdf" :
+FpdfReportInputs). Avec REPORT_RENDER_POOL_SIZE = 0, le rendu se fait dans
+le process courant, avec le meme cache WeasyPrint.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Code de sortie d'un processus de rendu tue par son garde-fou memoire
+_EXIT_MEMORY = 87
+# Periode de surveillance de la memoire pendant un rendu (s)
+_RSS_POLL_SECONDS = 0.1
+
+
+class RenderError(RuntimeError):
+    """Echec d'un rendu dans le pool (exception du moteur, processus mort)."""
+
+
+class RenderTimeout(RenderError):
+    """Rendu abandonne : REPORT_RENDER_TIMEOUT depasse."""
+
+
+class RenderMemoryExceeded(RenderError):
+    """Rendu abandonne : REPORT_RENDER_MAX_RSS_MB depasse."""
+
+
+# ---------------------------------------------------------------------------
+# Rendu (dans un processus du pool ou dans le process courant)
+# ---------------------------------------------------------------------------
+
+# Etat WeasyPrint reutilise d'un rendu a l'autre : FontConfiguration et
+# feuilles de style deja parsees, par chemin de CSS
+_weasyprint_state: dict = {}
+_weasyprint_lock = threading.Lock()
+
+
+def _weasyprint_stylesheet(css_path: str):
+    """(FontConfiguration, CSS parse) pour ce fichier, crees une fois par processus."""
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    with _weasyprint_lock:
+        font_config = _weasyprint_state.get("font_config")
+        if font_config is None:
+            font_config = _weasyprint_state["font_config"] = FontConfiguration()
+        stylesheets = _weasyprint_state.setdefault("stylesheets", {})
+        if css_path not in stylesheets:
+            stylesheets[css_path] = CSS(filename=css_path, font_config=font_config)
+        return font_config, stylesheets[css_path]
+
+
+def _render_html(payload: tuple[str, str]) -> bytes:
+    from weasyprint import HTML
+
+    html, css_path = payload
+    font_config, stylesheet = _weasyprint_stylesheet(css_path)
+    return HTML(string=html).write_pdf(stylesheets=[stylesheet], font_config=font_config)
+
+
+def _render_fpdf(payload) -> bytes:
+    from app.services.report_service import render_fpdf_report
+
+    return render_fpdf_report(payload)
+
+
+_RENDERERS = {"html": _render_html, "fpdf": _render_fpdf}
+
+
+def render_local(kind: str, payload) -> bytes:
+    """Rend dans le process courant ("html" ou "fpdf")."""
+    return _RENDERERS[kind](payload)
+
+
+# ---------------------------------------------------------------------------
+# Processus de rendu
+# ---------------------------------------------------------------------------
+
+
+def _rss_mb() -> float:
+    """Memoire residente du processus courant (Mo)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            resident_pages = int(fh.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Hors Linux : pic de memoire residente (ko sous Linux/BSD)
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _memory_guard(max_rss_mb: float, busy: threading.Event) -> None:
+    """Tue le processus si sa memoire depasse la limite pendant un rendu."""
+    while True:
+        busy.wait()
+        if _rss_mb() > max_rss_mb:
+            os._exit(_EXIT_MEMORY)
+        time.sleep(_RSS_POLL_SECONDS)
+
+
+def _worker_main(conn, max_rss_mb: float) -> None:
+    """Boucle d'un processus de rendu : (kind, payload) -> ("ok", pdf) | ("error", msg)."""
+    busy = threading.Event()
+    if max_rss_mb:
+        threading.Thread(target=_memory_guard, args=(max_rss_mb, busy), daemon=True).start()
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        kind, payload = job
+        busy.set()
+        try:
+            reply = ("ok", render_local(kind, payload))
+        except Exception as exc:  # noqa: BLE001 -- renvoye au process web
+            reply = ("error", f"{type(exc).__name__}: {exc}")
+        finally:
+            busy.clear()
+        conn.send(reply)
+        # Recyclage : la memoire rendue par un gros rapport ne revient pas
+        if max_rss_mb and _rss_mb() > max_rss_mb:
+            return
+
+
+class _Worker:
+    """Un processus de rendu et l'extremite parent de son pipe."""
+
+    def __init__(self, ctx, max_rss_mb: float):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, max_rss_mb),
+            name="okazcar-report-render",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+
+
+class RenderPool:
+    """Pool de ``size`` processus de rendu, lances a la demande.
+
+    ``render`` est bloquant et thread-safe : le thread appelant emprunte un
+    processus libre (ou attend qu'il s'en libere un), lui envoie le rendu et
+    attend la reponse au plus ``timeout`` secondes.
+    """
+
+    def __init__(self, size: int, timeout: float, max_rss_mb: float = 0):
+        self.size = size
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        # spawn : pas de fork d'un worker gunicorn (threads, connexions SQLite)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._closed = False
+
+    def _acquire(self) -> _Worker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._closed:
+                        raise RenderError("Pool de rendu arrete") from None
+                    if self._workers < self.size:
+                        self._workers += 1
+                        break
+                try:
+                    worker = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise RenderTimeout("Aucun processus de rendu disponible") from None
+            if worker.alive():
+                return worker
+            # Recycle (memoire) ou mort entre deux rendus
+            self._discard(worker)
+        try:
+            return _Worker(self._ctx, self.max_rss_mb)
+        except Exception:
+            with self._lock:
+                self._workers -= 1
+            raise
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        with self._lock:
+            self._workers -= 1
+
+    def render(self, kind: str, payload) -> bytes:
+        """Rend ``payload`` dans un processus du pool et retourne le PDF.
+
+        Raises:
+            RenderTimeout, RenderMemoryExceeded, RenderError.
+        """
+        worker = self._acquire()
+        try:
+            worker.conn.send((kind, payload))
+            if not worker.conn.poll(self.timeout):
+                self._discard(worker)
+                worker = None
+                raise RenderTimeout(f"Rendu PDF abandonne apres {self.timeout:g} s")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            worker.process.join(timeout=5)
+            exitcode = worker.process.exitcode
+            self._discard(worker)
+            worker = None
+            if exitcode == _EXIT_MEMORY:
+                raise RenderMemoryExceeded(
+                    f"Rendu PDF abandonne : plus de {self.max_rss_mb:g} Mo"
+                ) from exc
+            raise RenderError(f"Processus de rendu arrete (code {exitcode})") from exc
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+        if status != "ok":
+            raise RenderError(value)
+        return value
+
+    def close(self) -> None:
+        """Arrete les processus inactifs ; les rendus en cours finissent seuls."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.stop()
+            with self._lock:
+                self._workers -= 1
+
+
+# Pool du process courant, cree au premier rendu : {cle de config: pool}
+_pools: dict[tuple[int, float, float], RenderPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool | None:
+    """Pool configure pour l'app courante, ou None (REPORT_RENDER_POOL_SIZE = 0)."""
+    from flask import current_app
+
+    size = int(current_app.config.get("REPORT_RENDER_POOL_SIZE", 0))
+    if size <= 0:
+        return None
+    key = (
+        size,
+        float(current_app.config.get("REPORT_RENDER_TIMEOUT", 60)),
+        float(current_app.config.get("REPORT_RENDER_MAX_RSS_MB", 0)),
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = RenderPool(*key)
+        return pool
+
+
+def render_in_pool(kind: str, payload) -> bytes:
+    """Rend via le pool de l'app courante, ou sur place si le pool est coupe."""
+    pool = get_render_pool()
+    if pool is None:
+        return render_local(kind, payload)
+    return pool.render(kind, payload)
+
+
+@atexit.register
+def _close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
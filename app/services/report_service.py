@@ -13,11 +13,14 @@ qui remplace les caracteres Unicode problematiques avant injection.
 import logging
 import re
 from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, NamedTuple
 from urllib.parse import urlparse
 
 from flask import current_app
 from fpdf import FPDF
 from fpdf.enums import RenderStyle
+from sqlalchemy import inspect
 
 from app.extensions import db
 from app.models.email_draft import EmailDraft
@@ -417,12 +420,16 @@ class OKazCarPDF(FPDF):
         brand_name: str | None = None,
         brand_website: str | None = None,
         brand_logo_url: str | None = None,
+        load_logo: bool | None = None,
     ):
         super().__init__()
         self.scan_id = scan_id
         self.brand_name = brand_name
         self.brand_website = brand_website
         self.brand_logo_url = brand_logo_url
+        # None : decide via l'app courante (pas de telechargement en tests).
+        # Explicite hors contexte Flask (pool de rendu).
+        self.load_logo = (not current_app.testing) if load_logo is None else load_logo
         self.set_auto_page_break(auto=True, margin=25)
 
     # --- Brand badge ---
@@ -455,7 +462,7 @@ class OKazCarPDF(FPDF):
 
         # Badge marque en haut à droite
         logo_drawn = False
-        if self.brand_logo_url and not current_app.testing:
+        if self.brand_logo_url and self.load_logo:
             try:
                 self.image(self.brand_logo_url, x=170, y=4, w=24, h=20, link=self.brand_website)
                 logo_drawn = True
@@ -559,14 +566,36 @@ class OKazCarPDF(FPDF):
 # ---------------------------------------------------------------------------
 
 
-def generate_scan_report_pdf(scan_id: int) -> bytes:
-    """Point d'entree principal : genere le PDF complet pour un scan.
+class FpdfReportInputs(NamedTuple):
+    """Donnees d'un rapport fpdf2, copiees hors session (picklables).
 
-    Architecture du rapport :
-    - Page 1 : score circulaire, grille resume 2x3, insight prix, insight km
-    - Page 2+ : fiche vehicule, cards filtres L1-L11, pneus, fiabilite, email
+    Chargees dans le process web (load_fpdf_report_inputs), rendues
+    n'importe ou (render_fpdf_report), y compris dans le pool de rendu.
+    """
 
-    Retourne le PDF sous forme de bytes (pret a servir en reponse HTTP).
+    scan: Any
+    filter_results: list[Any]
+    email_draft: Any | None
+    tire_data: dict | None
+    reliability: Any | None
+    load_logo: bool
+
+
+def _plain_copy(instance: Any) -> Any:
+    """Copie les colonnes d'une instance ORM dans un SimpleNamespace."""
+    if instance is None:
+        return None
+    mapper = inspect(instance).mapper
+    return SimpleNamespace(
+        **{attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+    )
+
+
+def load_fpdf_report_inputs(scan_id: int) -> FpdfReportInputs:
+    """Lit en base tout ce dont le rapport fpdf2 a besoin.
+
+    Raises:
+        ValueError: si le scan n'existe pas.
     """
     scan = db.session.get(ScanLog, scan_id)
     if not scan:
@@ -579,13 +608,40 @@ def generate_scan_report_pdf(scan_id: int) -> bytes:
         EmailDraft.query.filter_by(scan_id=scan_id).order_by(EmailDraft.created_at.desc()).first()
     )
 
+    raw = scan.raw_data or {}
+    year = raw.get("year") or raw.get("annee")
+    if isinstance(year, str) and year.isdigit():
+        year = int(year)
+    tire_data = _get_tire_sizes_safe(scan.vehicle_make or "", scan.vehicle_model or "", year)
+    reliability = _get_engine_reliability_safe(raw, scan.vehicle_make, scan.vehicle_model)
+
+    return FpdfReportInputs(
+        scan=_plain_copy(scan),
+        filter_results=[_plain_copy(fr) for fr in filter_results],
+        email_draft=_plain_copy(email_draft),
+        tire_data=tire_data,
+        reliability=_plain_copy(reliability),
+        load_logo=not current_app.testing,
+    )
+
+
+def render_fpdf_report(inputs: FpdfReportInputs) -> bytes:
+    """Rend le PDF fpdf2 a partir de donnees deja chargees (sans base ni app).
+
+    Architecture du rapport :
+    - Page 1 : score circulaire, grille resume 2x3, insight prix, insight km
+    - Page 2+ : fiche vehicule, cards filtres L1-L11, pneus, fiabilite, email
+    """
+    scan = inputs.scan
+    filter_results = inputs.filter_results
     raw = scan.raw_data or {}
 
     pdf = OKazCarPDF(
-        scan_id=scan_id,
+        scan_id=scan.id,
         brand_name=_brand_display(scan.vehicle_make),
         brand_website=_brand_website(scan.vehicle_make),
         brand_logo_url=_brand_logo_url(scan.vehicle_make),
+        load_logo=inputs.load_logo,
     )
 
     # -- Page 1 : vue d'ensemble rapide --
@@ -605,23 +661,31 @@ def generate_scan_report_pdf(scan_id: int) -> bytes:
     if filter_results:
         _render_filter_cards(pdf, filter_results)
 
-    year = raw.get("year") or raw.get("annee")
-    if isinstance(year, str) and year.isdigit():
-        year = int(year)
-    tire_data = _get_tire_sizes_safe(scan.vehicle_make or "", scan.vehicle_model or "", year)
-    if tire_data:
-        _render_tire_section(pdf, tire_data)
+    if inputs.tire_data:
+        _render_tire_section(pdf, inputs.tire_data)
 
-    reliability = _get_engine_reliability_safe(raw, scan.vehicle_make, scan.vehicle_model)
-    if reliability:
-        _render_reliability_section(pdf, reliability)
+    if inputs.reliability:
+        _render_reliability_section(pdf, inputs.reliability)
 
+    email_draft = inputs.email_draft
     if email_draft and email_draft.generated_text:
         _render_email_section(pdf, email_draft)
 
     return bytes(pdf.output())
 
 
+def generate_scan_report_pdf(scan_id: int) -> bytes:
+    """Point d'entree principal : genere le PDF complet pour un scan.
+
+    Retourne le PDF sous forme de bytes (pret a servir en reponse HTTP).
+    Avec REPORT_RENDER_POOL_SIZE > 0, le rendu part dans le pool de rendu
+    (voir report_render_pool) ; les donnees sont lues ici.
+    """
+    from app.services.report_render_pool import render_in_pool
+
+    return render_in_pool("fpdf", load_fpdf_report_inputs(scan_id))
+
+
 # ---------------------------------------------------------------------------
 # Task 4: Score circulaire
 # ---------------------------------------------------------------------------
@@ -0,0 +1,175 @@
+"""Lecture des corps de requete API, eventuellement compresses (gzip / brotli).
+
+L'extension envoie tout le __NEXT_DATA__ de la page a chaque scan et les
+tableaux de prix a chaque collecte : plusieurs centaines de Ko de JSON, qui
+se compressent tres bien. /api/analyze et /api/market-prices acceptent donc
+``Content-Encoding: gzip`` et ``br``.
+
+La decompression se fait en flux, par blocs : on ne lit jamais plus de
+``max_bytes`` octets sur le reseau et on n'en produit jamais plus de
+``max_bytes`` en sortie. Un corps qui depasse la limite (zip bomb comprise)
+est coupe des que la limite est franchie, sans avoir ete decompresse en
+entier.
+
+Les octets recus (sur le fil) et decodes sont notes dans ``g`` pour les
+statistiques de trafic (voir app/services/api_traffic_service.py).
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+from flask import current_app, g, request
+
+from app.errors import RequestBodyError
+
+# Encodages acceptes dans Content-Encoding ("identity" = pas de compression)
+SUPPORTED_ENCODINGS = ("identity", "gzip", "br")
+
+# Taille des blocs lus sur le flux et produits par le decompresseur
+CHUNK_SIZE = 64 * 1024
+
+DEFAULT_MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+def _too_large(max_bytes: int) -> RequestBodyError:
+    return RequestBodyError(
+        f"Le corps de la requete depasse la limite de {max_bytes // 1024} Ko.",
+        status=413,
+        code="PAYLOAD_TOO_LARGE",
+    )
+
+
+def _corrupt(encoding: str) -> RequestBodyError:
+    return RequestBodyError(f"Corps {encoding} illisible ou tronque.", code="INVALID_BODY")
+
+
+def _read_chunks(stream: BinaryIO, max_bytes: int, counter: list[int]) -> Iterator[bytes]:
+    """Lit le flux par blocs ; ``counter[0]`` cumule les octets recus."""
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        counter[0] += len(chunk)
+        if counter[0] > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+
+
+def _append(out: bytearray, piece: bytes, max_bytes: int) -> None:
+    out += piece
+    if len(out) > max_bytes:
+        raise _too_large(max_bytes)
+
+
+def _gunzip(chunks: Iterable[bytes], max_bytes: int) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = bytearray()
+    try:
+        for chunk in chunks:
+            data = chunk
+            # max_length borne chaque sortie ; le reste de l'entree attend
+            # dans unconsumed_tail
+            while data and not decompressor.eof:
+                _append(out, decompressor.decompress(data, CHUNK_SIZE), max_bytes)
+                data = decompressor.unconsumed_tail
+        if not decompressor.eof:
+            raise _corrupt("gzip")
+    except zlib.error as exc:
+        raise _corrupt("gzip") from exc
+    return bytes(out)
+
+
+def _unbrotli(chunks: Iterable[bytes], max_bytes: int) -> bytes:
+    try:
+        import brotli
+    except ImportError as exc:
+        raise RequestBodyError(
+            "Content-Encoding br non disponible sur ce serveur.",
+            status=415,
+            code="UNSUPPORTED_ENCODING",
+        ) from exc
+
+    decompressor = brotli.Decompressor()
+    out = bytearray()
+    try:
+        for chunk in chunks:
+            piece = decompressor.process(chunk, output_buffer_limit=CHUNK_SIZE)
+            # Sortie bornee : on vide le tampon interne bloc par bloc
+            while piece:
+                _append(out, piece, max_bytes)
+                if decompressor.is_finished():
+                    break
+                piece = decompressor.process(b"", output_buffer_limit=CHUNK_SIZE)
+        if not decompressor.is_finished():
+            raise _corrupt("br")
+    except brotli.error as exc:
+        raise _corrupt("br") from exc
+    return bytes(out)
+
+
+def parse_content_encoding(header: str | None) -> str:
+    """Normalise l'en-tete Content-Encoding (une seule couche acceptee).
+
+    Raises:
+        RequestBodyError: 415 si l'encodage n'est pas supporte.
+    """
+    encoding = (header or "identity").strip().lower() or "identity"
+    if encoding not in SUPPORTED_ENCODINGS:
+        raise RequestBodyError(
+            f"Content-Encoding non supporte : {encoding}.",
+            status=415,
+            code="UNSUPPORTED_ENCODING",
+        )
+    return encoding
+
+
+def decode_body(
+    stream: BinaryIO,
+    encoding: str,
+    max_bytes: int = DEFAULT_MAX_BODY_BYTES,
+) -> tuple[bytes, int]:
+    """Lit et decompresse un corps de requete en flux.
+
+    Args:
+        stream: Flux d'entree (request.stream).
+        encoding: Encodage normalise (voir parse_content_encoding).
+        max_bytes: Limite appliquee aux octets recus comme aux octets decodes.
+
+    Returns:
+        (corps decode, nombre d'octets recus sur le fil).
+
+    Raises:
+        RequestBodyError: 413 au-dela de la limite, 400 si le flux est corrompu.
+    """
+    received = [0]
+    chunks = _read_chunks(stream, max_bytes, received)
+    if encoding == "gzip":
+        body = _gunzip(chunks, max_bytes)
+    elif encoding == "br":
+        body = _unbrotli(chunks, max_bytes)
+    else:
+        body = b"".join(chunks)
+    return body, received[0]
+
+
+def read_request_body() -> bytes:
+    """Corps decode de la requete Flask courante.
+
+    Rejette d'emblee un Content-Length annonce au-dela de la limite, puis
+    note dans ``g.request_bytes`` (encodage, octets recus, octets decodes)
+    pour le suivi de trafic.
+
+    Raises:
+        RequestBodyError: encodage non supporte, corps trop gros ou corrompu.
+    """
+    max_bytes = current_app.config.get("API_MAX_BODY_BYTES", DEFAULT_MAX_BODY_BYTES)
+    encoding = parse_content_encoding(request.headers.get("Content-Encoding"))
+    if request.content_length is not None and request.content_length > max_bytes:
+        raise _too_large(max_bytes)
+
+    body, received = decode_body(request.stream, encoding, max_bytes)
+    g.request_bytes = (encoding, received, len(body))
+    return body
@@ -0,0 +1,68 @@
+"""Single-flight en memoire : un seul calcul a la fois par cle.
+
+Quand plusieurs threads demandent le meme calcul en meme temps (meme annonce
+ouverte par plusieurs utilisateurs), le premier arrive (le leader) execute
+la fonction et les suivants attendent son resultat au lieu de la relancer.
+Portee : un processus. Entre workers gunicorn, voir le verrou en base de
+app/services/analysis_cache.py.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplication des appels concurrents par cle.
+
+    Un suiveur dont le leader echoue (exception) ou depasse ``timeout``
+    execute la fonction lui-meme : le single-flight n'ajoute jamais d'erreur.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: float | None = None) -> tuple[Any, bool]:
+        """Execute ``fn`` ou attend le resultat du leader pour ``key``.
+
+        Returns:
+            (resultat, partage) : ``partage`` vaut True quand le resultat vient
+            du leader, False quand ``fn`` a ete executee par l'appelant.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            try:
+                return future.result(timeout), True
+            except Exception:  # noqa: BLE001 -- leader en echec ou trop lent
+                logger.debug("Single-flight follower falls back for %s", key, exc_info=True)
+                return fn(), False
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Nombre de cles en cours de calcul."""
+        with self._lock:
+            return len(self._calls)
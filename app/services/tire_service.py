@@ -18,9 +18,12 @@ progressivement le cache des vehicules populaires via Wheel-Size.
 
 from __future__ import annotations
 
+import atexit
 import json
 import logging
 import re
+import threading
+import time
 from datetime import date, datetime, timezone
 from typing import Any
 
@@ -34,10 +37,19 @@ from app.extensions import db
 from app.models.scan import ScanLog
 from app.models.tire_size import TireSize
 from app.models.vehicle import Vehicle
+from app.services.enrichment_bundle import invalidate_tires
+from app.services.flush_timer import FlushTimer
 from app.services.vehicle_lookup import normalize_brand, normalize_model
 
 logger = logging.getLogger(__name__)
 
+# Increments request_count en attente : {(make, model, annee): demandes}
+_pending_requests: dict[tuple[str, str, int], int] = {}
+_requests_since: float | None = None
+_requests_lock = threading.Lock()
+# App du premier enregistrement : sert au flush du timer et de fin de process
+_requests_app = None
+
 
 # ── Allopneus config ────────────────────────────────────────────
 
@@ -170,13 +182,12 @@ def get_tire_sizes(make: str, model: str, year: int) -> dict[str, Any] | None:
     if not make or not model or not year:
         return None
 
-    make_norm = normalize_brand(make).lower()
-    model_norm = normalize_model(model).lower()
+    make_norm, model_norm = tire_lookup_key(make, model)
 
     # 1) Cache DB
     tire = _find_tire_size_in_db(make_norm, model_norm, year)
     if tire:
-        _increment_request_count(tire)
+        record_tire_request(make_norm, model_norm, int(year))
         if tire.dimension_count == 0:
             # Cache negatif — vehicule deja cherche, pas de donnees
             return None
@@ -212,8 +223,7 @@ def get_cached_tire_sizes(make: str, model: str, year: int | None) -> dict[str,
     if not make or not model:
         return None
 
-    make_norm = normalize_brand(make).lower()
-    model_norm = normalize_model(model).lower()
+    make_norm, model_norm = tire_lookup_key(make, model)
 
     if year:
         tire = _find_tire_size_in_db(make_norm, model_norm, year)
@@ -334,6 +344,7 @@ def store_tire_sizes(
         generation=generation_norm,
     ).first()
 
+    invalidate_tires(make_norm, model_norm)
     if existing:
         existing.year_start = year_start
         existing.year_end = year_end
@@ -376,6 +387,100 @@ def _find_tire_size_in_db(make: str, model: str, year: int) -> TireSize | None:
     return q.order_by(TireSize.collected_at.desc()).first()
 
 
+def tire_lookup_key(make: str, model: str) -> tuple[str, str]:
+    """Cles (make, model) de TireSize pour une marque / un modele d'annonce."""
+    return normalize_brand(make).lower(), normalize_model(model).lower()
+
+
+def record_tire_request(make: str, model: str, year: int) -> None:
+    """Compte une demande de pneus (request_count), ecrite par lot.
+
+    Les increments sont accumules en memoire et ecrits par un timer daemon,
+    hors de la requete : des que TIRE_REQUEST_BATCH_SIZE demandes sont en
+    attente, sinon TIRE_REQUEST_FLUSH_SECONDS apres la plus ancienne (et a
+    l'arret du process). TIRE_REQUEST_BATCH_SIZE = 1 ecrit tout de suite,
+    dans la requete (tests). ``make`` / ``model`` : cles normalisees
+    (tire_lookup_key).
+    """
+    global _requests_app, _requests_since
+
+    batch_size = int(current_app.config.get("TIRE_REQUEST_BATCH_SIZE", 50))
+    max_age = float(current_app.config.get("TIRE_REQUEST_FLUSH_SECONDS", 30))
+    key = (make, model, int(year))
+    with _requests_lock:
+        if _requests_app is None:
+            _requests_app = current_app._get_current_object()
+        _pending_requests[key] = _pending_requests.get(key, 0) + 1
+        if _requests_since is None:
+            _requests_since = time.monotonic()
+        pending = sum(_pending_requests.values())
+        due = pending >= batch_size or time.monotonic() - _requests_since >= max_age
+    if batch_size <= 1:
+        flush_tire_requests()
+    else:
+        _requests_timer.arm(_requests_app, 0 if due else max_age)
+
+
+def flush_tire_requests() -> int:
+    """Ecrit les increments request_count en attente et commit.
+
+    En cas d'erreur base, les increments sont remis en attente et le timer
+    est rearme.
+
+    Returns:
+        Nombre de TireSize mis a jour.
+    """
+    global _requests_since
+
+    with _requests_lock:
+        pending = dict(_pending_requests)
+        _pending_requests.clear()
+        _requests_since = None
+    _requests_timer.cancel()
+    if not pending:
+        return 0
+    updated = 0
+    try:
+        for (make, model, year), count in pending.items():
+            tire = _find_tire_size_in_db(make, model, year)
+            if tire is None:
+                continue
+            TireSize.query.filter_by(id=tire.id).update(
+                {TireSize.request_count: func.coalesce(TireSize.request_count, 0) + count},
+                synchronize_session=False,
+            )
+            updated += 1
+        db.session.commit()
+    except (IntegrityError, OperationalError) as exc:
+        logger.debug("Failed to flush tire request counts: %s", exc)
+        db.session.rollback()
+        with _requests_lock:
+            for key, count in pending.items():
+                _pending_requests[key] = _pending_requests.get(key, 0) + count
+            if _requests_since is None:
+                _requests_since = time.monotonic()
+        _requests_timer.arm(
+            current_app._get_current_object(),
+            float(current_app.config.get("TIRE_REQUEST_FLUSH_SECONDS", 30)),
+        )
+        return 0
+    return updated
+
+
+_requests_timer = FlushTimer("tire-requests-flush", flush_tire_requests)
+
+
+@atexit.register
+def _flush_requests_at_exit() -> None:
+    if _requests_app is None or not _pending_requests:
+        return
+    try:
+        with _requests_app.app_context():
+            flush_tire_requests()
+    except Exception:  # noqa: BLE001 -- arret du process
+        logger.debug("Tire request counts lost at exit", exc_info=True)
+
+
 def _increment_request_count(tire: TireSize) -> None:
     """Incremente le compteur de requetes pour prioriser le cache des vehicules populaires."""
     try:
@@ -407,6 +512,7 @@ def _store_negative_cache(make: str, model: str, year: int) -> None:
             request_count=0,
         )
         db.session.add(tire)
+        invalidate_tires(make, model)
         db.session.commit()
     except (IntegrityError, OperationalError) as exc:
         logger.debug("Failed to store negative tire cache: %s", exc)
@@ -0,0 +1,186 @@
+"""Index plein texte (BM25) des passages de transcripts YouTube.
+
+La synthese vehicule envoyait les transcripts entiers au LLM. Chaque
+transcript extrait est maintenant decoupe en passages de
+TRANSCRIPT_CHUNK_CHARS caracteres (TranscriptChunk), indexes dans une table
+SQLite FTS5 (transcript_chunks_fts, contenu externe tenu a jour par
+triggers). Pour une synthese, retrieve_passages() ne garde que les
+SYNTHESIS_RETRIEVAL_TOP_K meilleurs passages (classement bm25) par question
+(fiabilite, defauts connus, consommation...), parmi les videos retenues.
+
+- L'index est alimente a l'enregistrement d'un transcript
+  (youtube_service._save_transcript) ; les transcripts extraits avant l'index
+  sont indexes a la premiere recherche qui les concerne.
+- La table FTS5 et ses triggers suivent transcript_chunks (create_all /
+  drop_all, voir app/models/youtube.py).
+- Sans FTS5 (autre base que SQLite, SQLite compile sans), la recherche
+  retourne {} et la synthese repart sur les transcripts entiers.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from flask import current_app
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.models.youtube import (
+    TRANSCRIPT_FTS_DDL,
+    TRANSCRIPT_FTS_TABLE,
+    TranscriptChunk,
+    YouTubeTranscript,
+)
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = TRANSCRIPT_FTS_TABLE
+
+# Questions de la synthese -> mots-cles (prefixes FTS5, sans accents)
+RETRIEVAL_QUESTIONS = {
+    "fiabilite": "fiab panne probleme souci casse rappel garantie entretien kilometr revision",
+    "defauts": (
+        "defaut bruit vibration usure embrayage boite moteur turbo injecteur distribution "
+        "courroie chaine electroni fuite"
+    ),
+    "consommation": "consommation conso litre autonomie carburant plein",
+    "points_forts": "qualite atout avantage agreable confort comportement performance equipe",
+    "points_faibles": "regret inconvenient dommage manque decevant critique finition prix coffre",
+}
+
+_SEARCH_SQL = text(
+    f"SELECT c.id, c.video_db_id, c.position, c.text, bm25({FTS_TABLE}) AS rank "
+    f"FROM {FTS_TABLE} "
+    f"JOIN transcript_chunks c ON c.id = {FTS_TABLE}.rowid "
+    "JOIN youtube_transcripts t ON t.id = c.transcript_id AND t.video_db_id = c.video_db_id "
+    f"WHERE {FTS_TABLE} MATCH :query AND c.video_db_id IN :video_ids "
+    "ORDER BY rank LIMIT :limit"
+).bindparams(bindparam("video_ids", expanding=True))
+
+# None tant que la disponibilite de FTS5 n'est pas connue (par process)
+_fts_available: bool | None = None
+
+
+def ensure_transcript_index() -> bool:
+    """Cree la table FTS5 et ses triggers si besoin ; False si FTS5 indisponible.
+
+    create_all() les cree avec transcript_chunks ; ceci couvre les bases dont
+    la table existait deja.
+    """
+    global _fts_available
+
+    if _fts_available is not None:
+        return _fts_available
+    if db.engine.dialect.name != "sqlite":
+        _fts_available = False
+        return False
+    try:
+        for ddl in TRANSCRIPT_FTS_DDL:
+            db.session.execute(text(ddl))
+        db.session.commit()
+        _fts_available = True
+    except OperationalError:
+        db.session.rollback()
+        logger.warning("FTS5 indisponible : synthese sur transcripts entiers", exc_info=True)
+        _fts_available = False
+    return _fts_available
+
+
+def chunk_size() -> int:
+    """Taille cible d'un passage indexe (caracteres)."""
+    return max(200, int(current_app.config.get("TRANSCRIPT_CHUNK_CHARS", 800)))
+
+
+def index_transcript(transcript: YouTubeTranscript) -> int:
+    """(Re)decoupe et indexe un transcript extrait. Commit.
+
+    Returns:
+        Nombre de passages indexes (0 sans FTS5 : rien n'est stocke).
+    """
+    from app.services.llm_service import split_text
+
+    if not ensure_transcript_index():
+        return 0
+
+    for chunk in list(transcript.chunks):
+        db.session.delete(chunk)
+    db.session.flush()
+    pieces = []
+    full_text = transcript.text if transcript.status == "extracted" else ""
+    if full_text:
+        pieces = split_text(full_text, chunk_size())
+    for position, piece in enumerate(pieces):
+        db.session.add(
+            TranscriptChunk(
+                transcript_id=transcript.id,
+                video_db_id=transcript.video_db_id,
+                position=position,
+                text=piece,
+            )
+        )
+    db.session.commit()
+    return len(pieces)
+
+
+def _index_missing(video_db_ids: list[int]) -> int:
+    """Indexe les transcripts extraits des videos qui n'ont aucun passage."""
+    indexed = (
+        db.session.query(TranscriptChunk.transcript_id)
+        .filter(TranscriptChunk.video_db_id.in_(video_db_ids))
+        .distinct()
+    )
+    missing = YouTubeTranscript.query.filter(
+        YouTubeTranscript.video_db_id.in_(video_db_ids),
+        YouTubeTranscript.status == "extracted",
+        YouTubeTranscript.id.not_in(indexed),
+    ).all()
+    for transcript in missing:
+        index_transcript(transcript)
+    return len(missing)
+
+
+def fts_query(keywords: str) -> str:
+    """Requete FTS5 "mot1* OR mot2* ..." a partir de mots-cles libres."""
+    terms = ["".join(ch for ch in word if ch.isalnum()) for word in keywords.lower().split()]
+    return " OR ".join(f'"{term}"*' for term in terms if term)
+
+
+def retrieve_passages(
+    video_db_ids: list[int],
+    questions: dict[str, str] | None = None,
+    top_k: int | None = None,
+) -> dict[int, list[str]]:
+    """Meilleurs passages des videos pour chaque question.
+
+    Args:
+        video_db_ids: Videos candidates (YouTubeVideo.id).
+        questions: {nom: mots-cles}, RETRIEVAL_QUESTIONS par defaut.
+        top_k: Passages par question (SYNTHESIS_RETRIEVAL_TOP_K par defaut).
+
+    Returns:
+        {video_db_id: [passages dans l'ordre du transcript]} ; {} si l'index
+        est indisponible ou si aucun passage ne correspond.
+    """
+    if top_k is None:
+        top_k = int(current_app.config.get("SYNTHESIS_RETRIEVAL_TOP_K", 6))
+    if not video_db_ids or top_k <= 0 or not ensure_transcript_index():
+        return {}
+    _index_missing(video_db_ids)
+
+    selected: dict[int, tuple[int, int, str]] = {}
+    for name, keywords in (questions or RETRIEVAL_QUESTIONS).items():
+        query = fts_query(keywords)
+        if not query:
+            continue
+        rows = db.session.execute(
+            _SEARCH_SQL, {"query": query, "video_ids": list(video_db_ids), "limit": top_k}
+        ).all()
+        logger.debug("Recherche transcripts '%s' : %d passages", name, len(rows))
+        for chunk_id, video_db_id, position, chunk_text, _rank in rows:
+            selected[chunk_id] = (video_db_id, position, chunk_text)
+
+    passages: dict[int, list[str]] = {}
+    for video_db_id, _position, chunk_text in sorted(selected.values()):
+        passages.setdefault(video_db_id, []).append(chunk_text)
+    return passages
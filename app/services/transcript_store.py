@@ -0,0 +1,165 @@
+"""Stockage compresse et dedoublonne des transcripts YouTube.
+
+store_transcript() ecrit le texte et les segments d'un transcript dans des
+TranscriptBlob compresses (un blob par contenu distinct, empreinte sha256)
+et vide les colonnes historiques full_text / snippets_json.
+compress_existing() migre les lignes ecrites avant (voir
+scripts/compress_transcripts.py) et purge_unreferenced_blobs() supprime les
+blobs qui ne sont plus references.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import orjson
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+
+from app.extensions import db
+from app.models.transcript_blob import TranscriptBlob, TranscriptContent, blob_hash
+from app.models.youtube import YouTubeTranscript
+
+logger = logging.getLogger(__name__)
+
+
+def _blob_for(raw: bytes) -> tuple[TranscriptBlob, bool]:
+    """Blob existant pour ce contenu, ou nouveau blob ajoute a la session.
+
+    Returns:
+        (blob, cree) -- cree vaut False si le contenu etait deja stocke.
+    """
+    content_hash = blob_hash(raw)
+    # autoflush : un blob ajoute plus tot dans la meme transaction est trouve
+    blob = TranscriptBlob.query.filter_by(content_hash=content_hash).first()
+    if blob is not None:
+        return blob, False
+    blob = TranscriptBlob.from_bytes(raw)
+    try:
+        # Savepoint : un autre worker a pu stocker le meme contenu entre-temps
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        return TranscriptBlob.query.filter_by(content_hash=content_hash).one(), False
+    return blob, True
+
+
+def store_transcript(
+    transcript: YouTubeTranscript, full_text: str, snippets: list | None
+) -> list[TranscriptBlob]:
+    """Ecrit le contenu d'un transcript en blobs compresses (sans commit).
+
+    Returns:
+        Blobs crees (vide si le contenu etait deja stocke).
+    """
+    text_blob, text_created = _blob_for(full_text.encode("utf-8"))
+    snippets_blob, snippets_created = None, False
+    if snippets is not None:
+        snippets_blob, snippets_created = _blob_for(orjson.dumps(snippets))
+
+    if transcript.id is None:
+        db.session.flush()
+    content = transcript.content
+    if content is None:
+        content = TranscriptContent(transcript_id=transcript.id)
+        transcript.content = content
+    content.text_blob = text_blob
+    content.snippets_blob = snippets_blob
+    transcript.full_text = ""
+    transcript.snippets_json = None
+    return [
+        blob
+        for blob, created in ((text_blob, text_created), (snippets_blob, snippets_created))
+        if created
+    ]
+
+
+def compress_existing(batch_size: int = 200) -> dict:
+    """Migre les transcripts dont le contenu est encore en colonnes. Commit par lot.
+
+    Returns:
+        {"transcripts", "blobs_created", "blobs_reused", "bytes_before",
+        "bytes_after"} -- bytes_* : taille des contenus avant migration et des
+        blobs crees pour eux.
+    """
+    stats = {
+        "transcripts": 0,
+        "blobs_created": 0,
+        "blobs_reused": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+    }
+    last_id = 0
+    while True:
+        batch = (
+            YouTubeTranscript.query.options(
+                undefer(YouTubeTranscript.full_text), undefer(YouTubeTranscript.snippets_json)
+            )
+            .filter(YouTubeTranscript.id > last_id, YouTubeTranscript.full_text != "")
+            .order_by(YouTubeTranscript.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for transcript in batch:
+            full_text, snippets = transcript.full_text, transcript.snippets_json
+            stats["bytes_before"] += len(full_text.encode("utf-8"))
+            if snippets is not None:
+                stats["bytes_before"] += len(orjson.dumps(snippets))
+            created = store_transcript(transcript, full_text, snippets)
+            stats["blobs_created"] += len(created)
+            stats["blobs_reused"] += (2 if snippets is not None else 1) - len(created)
+            stats["bytes_after"] += sum(blob.stored_size for blob in created)
+            stats["transcripts"] += 1
+        last_id = batch[-1].id
+        db.session.commit()
+    if stats["transcripts"]:
+        logger.info(
+            "Transcripts compresses : %d (%d -> %d octets, %d blobs reutilises)",
+            stats["transcripts"],
+            stats["bytes_before"],
+            stats["bytes_after"],
+            stats["blobs_reused"],
+        )
+    return stats
+
+
+def purge_unreferenced_blobs() -> int:
+    """Supprime les blobs qui ne sont plus references par aucun transcript. Commit.
+
+    Returns:
+        Nombre de blobs supprimes.
+    """
+    referenced = db.session.query(TranscriptContent.text_blob_id).union(
+        db.session.query(TranscriptContent.snippets_blob_id).filter(
+            TranscriptContent.snippets_blob_id.isnot(None)
+        )
+    )
+    deleted = TranscriptBlob.query.filter(TranscriptBlob.id.not_in(referenced)).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    return deleted
+
+
+def storage_stats() -> dict:
+    """Volumes stockes : {"blobs", "raw_bytes", "stored_bytes", "legacy_bytes"}."""
+    blobs, raw_bytes, stored_bytes = db.session.query(
+        db.func.count(TranscriptBlob.id),
+        db.func.coalesce(db.func.sum(TranscriptBlob.raw_size), 0),
+        db.func.coalesce(db.func.sum(TranscriptBlob.stored_size), 0),
+    ).one()
+    # length() d'un BLOB : octets et non caracteres
+    legacy_bytes = sum(
+        db.session.query(
+            db.func.coalesce(db.func.sum(db.func.length(db.cast(column, db.LargeBinary))), 0)
+        ).scalar()
+        for column in (YouTubeTranscript.full_text, YouTubeTranscript.snippets_json)
+    )
+    return {
+        "blobs": blobs,
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "legacy_bytes": legacy_bytes,
+    }
@@ -201,6 +201,10 @@ def auto_create_vehicle(make: str, model: str, *, commit: bool = True) -> Vehicl
         if years_to:
             vehicle.year_end = max(years_to)
 
+        from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
+
+        rebuild_vehicle_reliability_map(vehicle.id)
+
     if commit:
         db.session.commit()
     else:
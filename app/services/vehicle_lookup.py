@@ -13,8 +13,12 @@ abbreviations courantes sur LBC et AS24.
 
 import logging
 import re
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import lru_cache
 
+from app.extensions import db
 from app.models.vehicle import Vehicle
 from app.services.vehicle_lookup_keys import (
     lookup_compact_key,
@@ -709,6 +713,12 @@ def find_vehicle(make: str, model: str) -> Vehicle | None:
     model_norm = normalize_model(model)
     brand_key, model_key = build_vehicle_lookup_keys(make, model)
 
+    # Lot d'annonces : vehicule deja resolu (voir resolve_vehicles)
+    resolved = _resolved_vehicles.get()
+    if resolved is not None and (brand_key, model_key) in resolved:
+        vehicle_id = resolved[(brand_key, model_key)]
+        return db.session.get(Vehicle, vehicle_id) if vehicle_id is not None else None
+
     # Etape 1 : recherche rapide par lookup_key (index DB, O(1))
     vehicle = (
         Vehicle.query.filter(
@@ -746,3 +756,38 @@ def find_vehicle(make: str, model: str) -> Vehicle | None:
         )
 
     return vehicle
+
+
+# Vehicules resolus pour le lot en cours (voir use_resolved_vehicles)
+_resolved_vehicles: ContextVar[dict[tuple[str, str], int | None] | None] = ContextVar(
+    "resolved_vehicles", default=None
+)
+
+
+def resolve_vehicles(models: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int | None]:
+    """Resout une fois chaque couple (marque, modele) distinct d'un lot.
+
+    Returns:
+        {(brand_lookup_key, model_lookup_key): Vehicle.id ou None}. Un modele
+        inconnu n'est cherche qu'une fois (le repli de find_vehicle parcourt
+        toute la table).
+    """
+    resolved: dict[tuple[str, str], int | None] = {}
+    for make, model in models:
+        if not make or not model:
+            continue
+        key = build_vehicle_lookup_keys(make, model)
+        if key not in resolved:
+            vehicle = find_vehicle(make, model)
+            resolved[key] = vehicle.id if vehicle else None
+    return resolved
+
+
+@contextmanager
+def use_resolved_vehicles(resolved: dict[tuple[str, str], int | None]) -> Iterator[None]:
+    """find_vehicle relit ``resolved`` dans ce contexte (threads des filtres compris)."""
+    token = _resolved_vehicles.set(resolved)
+    try:
+        yield
+    finally:
+        _resolved_vehicles.reset(token)
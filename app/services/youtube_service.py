@@ -9,17 +9,27 @@ qui alimente le rapport PDF et l'extension.
 Deux strategies d'extraction des sous-titres :
 - youtube-transcript-api (rapide, mais peut etre bloque par IP)
 - yt-dlp fallback (telecharge les fichiers VTT, plus resilient)
+
+Les videos d'une recherche sont extraites en parallele (YOUTUBE_EXTRACT_WORKERS
+threads) : chaque extraction attend surtout le reseau. Un limiteur par hote
+garde l'espacement YOUTUBE_REQUEST_INTERVAL entre deux extractions lancees
+vers YouTube, tous pipelines du process confondus. Les threads ne font que
+les appels reseau ; les ecritures en base restent dans le thread appelant.
 """
 
 import logging
 import os
 import re
 import tempfile
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
 
 import yt_dlp
+from flask import current_app
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
     IpBlocked,
@@ -32,14 +42,18 @@ from youtube_transcript_api._errors import (
 
 from app.extensions import db
 from app.models.youtube import YouTubeTranscript, YouTubeVideo
+from app.services.transcript_store import store_transcript
 
 logger = logging.getLogger(__name__)
 
 # Delais entre requetes pour eviter le blocage IP par YouTube.
 # On espace les requetes pour ne pas declencher le rate-limiting.
-DELAY_BETWEEN_VIDEOS = 2.0  # secondes
+DELAY_BETWEEN_VIDEOS = 2.0  # secondes (defaut de YOUTUBE_REQUEST_INTERVAL)
 DELAY_BETWEEN_MODELS = 5.0  # secondes
 
+# Hote vise par youtube-transcript-api et par le fallback yt-dlp
+YOUTUBE_HOST = "www.youtube.com"
+
 # Chaines YouTube de confiance (bonus de score dans le ranking).
 # Ce sont les chaines auto francaises qui produisent du contenu fiable.
 TRUSTED_CHANNELS = {
@@ -65,6 +79,33 @@ EXCLUDED_TITLE_KEYWORDS = [
 ]
 
 
+class HostRateLimiter:
+    """Espacement minimal entre deux requetes vers un meme hote (thread-safe).
+
+    Chaque appel a wait() reserve le prochain creneau libre de l'hote puis
+    dort jusqu'a ce creneau : N threads concurrents partent a ``interval``
+    secondes d'ecart au lieu d'arriver en rafale.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next_slot: dict[str, float] = {}
+
+    def wait(self, host: str, interval: float) -> float:
+        """Attend le creneau de ``host`` ; retourne l'attente (s)."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_host_limiter = HostRateLimiter()
+
+
 def build_search_query(
     make: str,
     model: str,
@@ -524,17 +565,8 @@ def store_video(
     return video
 
 
-def extract_and_store_transcript(video: YouTubeVideo) -> YouTubeTranscript:
-    """Fetch et stocke le transcript pour une video.
-
-    Idempotent : si le transcript est deja extrait, on le retourne sans refaire
-    l'extraction. Met a jour le status du transcript (extracted / no_subtitles / error).
-    """
-    # Si un transcript existe deja avec status extracted, on le retourne
-    if video.transcript and video.transcript.status == "extracted":
-        return video.transcript
-
-    # Creer ou recuperer le transcript record
+def _pending_transcript(video: YouTubeVideo) -> YouTubeTranscript:
+    """Recupere ou ajoute (sans commit) le transcript record de la video."""
     transcript_record = video.transcript
     if transcript_record is None:
         transcript_record = YouTubeTranscript(
@@ -544,10 +576,13 @@ def extract_and_store_transcript(video: YouTubeVideo) -> YouTubeTranscript:
             status="pending",
         )
         db.session.add(transcript_record)
-        db.session.commit()
+    return transcript_record
 
-    result = fetch_transcript(video.video_id)
 
+def _save_transcript(
+    video: YouTubeVideo, transcript_record: YouTubeTranscript, result: dict | None
+) -> YouTubeTranscript:
+    """Ecrit le resultat de fetch_transcript() dans le record et commit."""
     if result is None:
         transcript_record.status = "no_subtitles"
         transcript_record.error_message = "Aucun sous-titre francais disponible"
@@ -556,8 +591,7 @@ def extract_and_store_transcript(video: YouTubeVideo) -> YouTubeTranscript:
 
     transcript_record.language = result["language"]
     transcript_record.is_generated = result["is_generated"]
-    transcript_record.full_text = result["full_text"]
-    transcript_record.snippets_json = result["snippets"]
+    store_transcript(transcript_record, result["full_text"], result["snippets"])
     transcript_record.snippet_count = result["snippet_count"]
     transcript_record.char_count = result["char_count"]
     transcript_record.status = "extracted"
@@ -571,15 +605,111 @@ def extract_and_store_transcript(video: YouTubeVideo) -> YouTubeTranscript:
         result["char_count"],
         result["language"],
     )
+    # Index BM25 des passages : best-effort, rattrape a la premiere recherche
+    try:
+        from app.services.transcript_index import index_transcript
+
+        index_transcript(transcript_record)
+    except Exception:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Indexation du transcript %s echouee", video.video_id, exc_info=True)
     return transcript_record
 
 
+def extract_and_store_transcript(video: YouTubeVideo) -> YouTubeTranscript:
+    """Fetch et stocke le transcript pour une video.
+
+    Idempotent : si le transcript est deja extrait, on le retourne sans refaire
+    l'extraction. Met a jour le status du transcript (extracted / no_subtitles / error).
+    """
+    # Si un transcript existe deja avec status extracted, on le retourne
+    if video.transcript and video.transcript.status == "extracted":
+        return video.transcript
+
+    transcript_record = _pending_transcript(video)
+    db.session.commit()
+    return _save_transcript(video, transcript_record, fetch_transcript(video.video_id))
+
+
+def _fetch_rate_limited(video_id: str, interval: float) -> dict | None:
+    """fetch_transcript() apres le creneau du limiteur YouTube (thread du pool)."""
+    _host_limiter.wait(YOUTUBE_HOST, interval)
+    return fetch_transcript(video_id)
+
+
+def extract_transcripts(
+    videos: list[YouTubeVideo],
+    stats: dict,
+    on_progress: Callable[[int, int], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
+) -> None:
+    """Extrait les transcripts manquants de ``videos`` en parallele.
+
+    Met a jour les compteurs transcripts_ok / failed / skipped de ``stats``.
+    ``on_progress(traitees, total)`` est appele a chaque video terminee, dans
+    l'ordre de fin. Si ``should_stop()`` devient vrai, les extractions pas
+    encore lancees sont abandonnees (leur record reste pending).
+    """
+    workers = max(1, int(current_app.config.get("YOUTUBE_EXTRACT_WORKERS", 4)))
+    interval = float(current_app.config.get("YOUTUBE_REQUEST_INTERVAL", DELAY_BETWEEN_VIDEOS))
+
+    todo = []
+    for video in videos:
+        if video.transcript and video.transcript.status == "extracted":
+            stats["transcripts_skipped"] += 1
+        else:
+            todo.append(video)
+    total = len(videos)
+    done = total - len(todo)
+    if on_progress:
+        on_progress(done, total)
+    if not todo:
+        return
+
+    records = {video.id: _pending_transcript(video) for video in todo}
+    db.session.commit()
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(todo)), thread_name_prefix="yt-transcript"
+    ) as executor:
+        pending = {
+            executor.submit(_fetch_rate_limited, video.video_id, interval): video for video in todo
+        }
+        try:
+            while pending:
+                finished, _ = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                if should_stop and should_stop():
+                    logger.info("Extraction YouTube annulee (%d en attente)", len(pending))
+                    return
+                for future in finished:
+                    video = pending.pop(future)
+                    record = records[video.id]
+                    try:
+                        record = _save_transcript(video, record, future.result())
+                    except Exception as exc:  # noqa: BLE001 -- une video n'arrete pas les autres
+                        logger.warning("Extraction transcript %s echouee: %s", video.video_id, exc)
+                        db.session.rollback()
+                        record.status = "error"
+                        record.error_message = str(exc)[:500]
+                        db.session.commit()
+                    if record.status == "extracted":
+                        stats["transcripts_ok"] += 1
+                    else:
+                        stats["transcripts_failed"] += 1
+                    done += 1
+                    if on_progress:
+                        on_progress(done, total)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
 def search_and_extract_for_vehicle(vehicle, max_videos: int = 5) -> dict:
     """Pipeline complet pour un vehicule : search -> store -> extract.
 
     C'est le point d'entree principal pour l'enrichissement YouTube automatique.
     On cherche 3x plus de videos que necessaire puis on filtre/score pour
-    garder les meilleures. Le sleep entre chaque video evite le ban YouTube.
+    garder les meilleures. Les extractions partent en parallele, espacees par
+    le limiteur YouTube pour eviter le ban.
 
     Retourne {videos_found, transcripts_ok, transcripts_failed, transcripts_skipped}.
     """
@@ -604,22 +734,10 @@ def search_and_extract_for_vehicle(vehicle, max_videos: int = 5) -> dict:
 
     stats["videos_found"] = len(videos_data)
 
-    for vdata in videos_data:
-        video = store_video(vdata, vehicle_id=vehicle.id, search_query=query)
-
-        # Skip si deja extrait
-        if video.transcript and video.transcript.status == "extracted":
-            stats["transcripts_skipped"] += 1
-            continue
-
-        transcript = extract_and_store_transcript(video)
-        if transcript.status == "extracted":
-            stats["transcripts_ok"] += 1
-        else:
-            stats["transcripts_failed"] += 1
-
-        time.sleep(DELAY_BETWEEN_VIDEOS)
-
+    videos = [
+        store_video(vdata, vehicle_id=vehicle.id, search_query=query) for vdata in videos_data
+    ]
+    extract_transcripts(videos, stats)
     return stats
 
 
@@ -629,6 +747,8 @@ def search_and_extract_custom(
     max_results: int = 10,
     vehicle_year: int | None = None,
     focus_channels: list[str] | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    should_stop: Callable[[], bool] | None = None,
 ) -> dict:
     """Pipeline de recherche avec query custom : search -> store -> extract.
 
@@ -638,6 +758,8 @@ def search_and_extract_custom(
         max_results: Nombre max de videos a extraire
         vehicle_year: Annee du modele (optionnel, pour scoring)
         focus_channels: Chaines YouTube a privilegier (bonus massif)
+        on_progress: ``(videos traitees, total)`` a chaque transcript termine
+        should_stop: Annulation, voir extract_transcripts()
 
     Retourne {videos_found, transcripts_ok, transcripts_failed, transcripts_skipped, video_ids}.
     """
@@ -664,22 +786,11 @@ def search_and_extract_custom(
 
     stats["videos_found"] = len(videos_data)
 
-    for vdata in videos_data:
-        video = store_video(vdata, vehicle_id=vehicle_id, search_query=query)
-        stats["video_ids"].append(video.id)
-
-        if video.transcript and video.transcript.status == "extracted":
-            stats["transcripts_skipped"] += 1
-            continue
-
-        transcript = extract_and_store_transcript(video)
-        if transcript.status == "extracted":
-            stats["transcripts_ok"] += 1
-        else:
-            stats["transcripts_failed"] += 1
-
-        time.sleep(DELAY_BETWEEN_VIDEOS)
-
+    videos = [
+        store_video(vdata, vehicle_id=vehicle_id, search_query=query) for vdata in videos_data
+    ]
+    stats["video_ids"] = [video.id for video in videos]
+    extract_transcripts(videos, stats, on_progress=on_progress, should_stop=should_stop)
     return stats
 
 
@@ -698,9 +809,13 @@ def get_featured_video(make: str, model: str) -> dict | None:
 
     if not vehicle:
         return None
+    return featured_video_for_vehicle(vehicle.id)
 
+
+def featured_video_for_vehicle(vehicle_id: int) -> dict | None:
+    """Video featured (non archivee) d'un vehicule deja resolu, ou None."""
     video = YouTubeVideo.query.filter_by(
-        vehicle_id=vehicle.id,
+        vehicle_id=vehicle_id,
         is_featured=True,
         is_archived=False,
     ).first()
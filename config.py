@@ -54,16 +54,111 @@ class Config:
     WHEEL_SIZE_BASE_URL = os.environ.get("WHEEL_SIZE_BASE_URL", "https://api.wheel-size.com/v2")
     WHEEL_SIZE_DAILY_BUDGET = int(os.environ.get("WHEEL_SIZE_DAILY_BUDGET", "50"))
 
+    # /api/analyze : lecture directe de props.pageProps.ad dans le corps brut
+    # (app/services/lbc_payload.py) au lieu de parser tout le __NEXT_DATA__
+    ANALYZE_FAST_EXTRACTION = os.environ.get("ANALYZE_FAST_EXTRACTION", "1") == "1"
+
+    # Cache des verdicts /api/analyze par empreinte d'annonce (secondes, 0 = coupe)
+    # Voir app/services/analysis_cache.py
+    ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", "600"))
+
+    # Mutualisation des /api/analyze identiques simultanes (single-flight) :
+    # "db" (entre workers, verrou AnalysisLock ; revient a "process" si
+    # ANALYSIS_CACHE_TTL = 0), "process" (dans un worker : ne sert qu'avec
+    # des workers threades, gunicorn tourne en workers sync) ou "off".
+    # Attente max d'un suiveur (s).
+    ANALYZE_SINGLE_FLIGHT = os.environ.get("ANALYZE_SINGLE_FLIGHT", "db")
+    ANALYZE_SINGLE_FLIGHT_WAIT = float(os.environ.get("ANALYZE_SINGLE_FLIGHT_WAIT", "30"))
+
+    # Mode rapide de /api/analyze ("quick": true) : duree de vie (s) des
+    # instantanes MarketPrice gardes en memoire pour L4/L5
+    QUICK_MARKET_CACHE_TTL = int(os.environ.get("QUICK_MARKET_CACHE_TTL", "300"))
+
+    # Enrichissements /api/analyze (video featured, pneus, fiabilite) precalcules
+    # par vehicule (app/services/enrichment_bundle.py) : cache active, duree
+    # en memoire par worker (s) et age max d'un bundle en base (h)
+    ENRICHMENT_BUNDLE_CACHE = os.environ.get("ENRICHMENT_BUNDLE_CACHE", "1") == "1"
+    ENRICHMENT_BUNDLE_MEMORY_TTL = int(os.environ.get("ENRICHMENT_BUNDLE_MEMORY_TTL", "60"))
+    ENRICHMENT_BUNDLE_MAX_AGE_HOURS = float(os.environ.get("ENRICHMENT_BUNDLE_MAX_AGE_HOURS", "24"))
+    # Compteur de demandes pneus (TireSize.request_count) ecrit par lot :
+    # taille du lot et attente max (s)
+    TIRE_REQUEST_BATCH_SIZE = int(os.environ.get("TIRE_REQUEST_BATCH_SIZE", "50"))
+    TIRE_REQUEST_FLUSH_SECONDS = float(os.environ.get("TIRE_REQUEST_FLUSH_SECONDS", "30"))
+    # Index memoire des rappels constructeur (filtre L11) : rechargement en fond
+    # tous les N secondes pour voir les seeds lances hors de l'app (0 = jamais)
+    RECALL_INDEX_REFRESH_SECONDS = int(os.environ.get("RECALL_INDEX_REFRESH_SECONDS", "900"))
+
+    # /api/analyze/batch : nombre max d'annonces par lot (une page de resultats)
+    ANALYZE_BATCH_MAX_ITEMS = int(os.environ.get("ANALYZE_BATCH_MAX_ITEMS", "50"))
+
+    # /api/market-prices/lookup : nombre max de recherches par appel
+    MARKET_LOOKUP_MAX_ITEMS = int(os.environ.get("MARKET_LOOKUP_MAX_ITEMS", "200"))
+
+    # /api/scan-report : PDF rendus gardes en base (ReportArtifact) et resservis
+    # tant que les entrees du rapport ne changent pas
+    REPORT_ARTIFACT_CACHE = os.environ.get("REPORT_ARTIFACT_CACHE", "1") == "1"
+    # Rendus asynchrones (/api/scan-report/jobs) : un job "pending" sans
+    # nouvelles depuis N secondes a perdu son worker ; retention des jobs (h)
+    REPORT_JOB_STALE_SECONDS = int(os.environ.get("REPORT_JOB_STALE_SECONDS", "300"))
+    REPORT_JOB_RETENTION_HOURS = float(os.environ.get("REPORT_JOB_RETENTION_HOURS", "24"))
+
+    # Pool de processus de rendu PDF (app/services/report_render_pool.py) :
+    # taille (0 = rendu dans le worker web), duree max d'un rendu (s) et
+    # memoire residente max d'un processus de rendu (Mo, 0 = sans limite).
+    # Le pool existe dans chaque worker gunicorn : garder workers x taille x
+    # plafond nettement sous la RAM du conteneur. Defauts pour le plan
+    # starter Render (512 Mo, 2 workers) ; plan a 2 Go : taille 2, 350 Mo.
+    REPORT_RENDER_POOL_SIZE = int(os.environ.get("REPORT_RENDER_POOL_SIZE", "1"))
+    REPORT_RENDER_TIMEOUT = float(os.environ.get("REPORT_RENDER_TIMEOUT", "60"))
+    REPORT_RENDER_MAX_RSS_MB = int(os.environ.get("REPORT_RENDER_MAX_RSS_MB", "280"))
+
+    # Export admin des rapports PDF en archive ZIP (job de fond) : nombre max
+    # de scans et repertoire des archives (vide = tmp du conteneur, partage
+    # par les workers)
+    REPORT_EXPORT_MAX_SCANS = int(os.environ.get("REPORT_EXPORT_MAX_SCANS", "500"))
+    REPORT_EXPORT_DIR = os.environ.get("REPORT_EXPORT_DIR", "")
+
+    # Serialisation JSON des reponses via orjson (app/json_provider.py)
+    JSON_FAST_PROVIDER = os.environ.get("JSON_FAST_PROVIDER", "1") == "1"
+
+    # Taille max d'un corps /api/analyze ou /api/market-prices, compresse ET
+    # decompresse (Content-Encoding gzip/br) : garde-fou contre les zip bombs
+    API_MAX_BODY_BYTES = int(os.environ.get("API_MAX_BODY_BYTES", str(8 * 1024 * 1024)))
+
     # Journalisation
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 
+    # Jobs admin longs suivis en base (app/services/job_store.py) : purge des
+    # jobs termines et delai sans nouvelles avant de declarer un job orphelin
+    PIPELINE_JOB_RETENTION_HOURS = float(os.environ.get("PIPELINE_JOB_RETENTION_HOURS", "24"))
+    PIPELINE_JOB_STALE_SECONDS = int(os.environ.get("PIPELINE_JOB_STALE_SECONDS", "900"))
+
+    # Extraction des transcripts YouTube (youtube_service) : videos traitees
+    # en parallele et espacement minimal (s) entre deux requetes vers YouTube
+    YOUTUBE_EXTRACT_WORKERS = int(os.environ.get("YOUTUBE_EXTRACT_WORKERS", "4"))
+    YOUTUBE_REQUEST_INTERVAL = float(os.environ.get("YOUTUBE_REQUEST_INTERVAL", "2.0"))
+
     # Ollama LLM local
     OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+    # Synthese YouTube en map-reduce (llm_service.synthesize_transcripts) :
+    # taille max d'un prompt (tokens estimes) et resumes de morceaux en parallele
+    SYNTHESIS_CHUNK_TOKENS = int(os.environ.get("SYNTHESIS_CHUNK_TOKENS", "3000"))
+    SYNTHESIS_MAP_CONCURRENCY = int(os.environ.get("SYNTHESIS_MAP_CONCURRENCY", "2"))
+    # Index BM25 des transcripts (transcript_index) : taille des passages
+    # indexes et passages gardes par question ; 0 = transcripts entiers
+    TRANSCRIPT_CHUNK_CHARS = int(os.environ.get("TRANSCRIPT_CHUNK_CHARS", "800"))
+    SYNTHESIS_RETRIEVAL_TOP_K = int(os.environ.get("SYNTHESIS_RETRIEVAL_TOP_K", "6"))
 
     # Google Gemini LLM (cloud) — utilise pour l'analyse email rappels constructeur
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
     GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
     GEMINI_TIMEOUT = int(os.environ.get("GEMINI_TIMEOUT", "30"))
+    # Reponses LLM en cache par empreinte de prompt (s, 0 = coupe), voir
+    # app/services/llm_cache.py
+    LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+    # Ecriture groupee des LLMUsage : taille d'un lot et attente max (s)
+    LLM_USAGE_BATCH_SIZE = int(os.environ.get("LLM_USAGE_BATCH_SIZE", "20"))
+    LLM_USAGE_FLUSH_SECONDS = float(os.environ.get("LLM_USAGE_FLUSH_SECONDS", "10"))
 
 
 class DevConfig(Config):
@@ -95,6 +190,16 @@ class TestConfig(Config):
     }
     WTF_CSRF_ENABLED = False
     RATELIMIT_ENABLED = False
+    # Chaque test reanalyse les memes annonces avec des mocks differents
+    ANALYSIS_CACHE_TTL = 0
+    REPORT_ARTIFACT_CACHE = False
+    ENRICHMENT_BUNDLE_CACHE = False
+    TIRE_REQUEST_BATCH_SIZE = 1
+    RECALL_INDEX_REFRESH_SECONDS = 0
+    REPORT_RENDER_POOL_SIZE = 0
+    LLM_CACHE_TTL = 0
+    LLM_USAGE_BATCH_SIZE = 1
+    YOUTUBE_REQUEST_INTERVAL = 0.0
     LOG_LEVEL = "DEBUG"
 
 
@@ -18,6 +18,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from app import create_app  # noqa: E402
 from app.extensions import db  # noqa: E402
 from app.models.vehicle import Vehicle, VehicleSpec  # noqa: E402
+from app.services.engine_reliability_service import rebuild_vehicle_reliability_map  # noqa: E402
 from app.services.pipeline_tracker import track_pipeline  # noqa: E402
 from app.services.vehicle_lookup import display_brand  # noqa: E402
 
@@ -266,6 +267,8 @@ def import_csv(dry_run: bool = False):
                 logger.info("=== DRY RUN — rollback ===")
                 db.session.rollback()
             else:
+                db.session.flush()
+                rebuild_vehicle_reliability_map()
                 db.session.commit()
             tracker.count = created_specs
 
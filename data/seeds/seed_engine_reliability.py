@@ -17,6 +17,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from app import create_app
 from app.extensions import db
 from app.models.engine_reliability import EngineReliability
+from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
 from app.services.pipeline_tracker import track_pipeline
 
 # fmt: off
@@ -363,6 +364,8 @@ def seed() -> None:
                     db.session.add(obj)
                     created += 1
 
+            db.session.flush()
+            rebuild_vehicle_reliability_map()
             db.session.commit()
             tracker.count = created + updated
 
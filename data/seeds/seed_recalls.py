@@ -9,6 +9,8 @@ On ne couvre ici que les vehicules deja presents dans le catalogue OKazCar.
 Les modeles hors catalogue sont ignores silencieusement.
 
 Script idempotent : ne cree pas de doublons si relance.
+Les workers de l'app rechargent leur index des rappels (app/services/recall_index.py)
+au plus tard RECALL_INDEX_REFRESH_SECONDS apres le seed.
 Usage : python data/seeds/seed_recalls.py
 """
 
@@ -20,6 +20,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from app import create_app  # noqa: E402
 from app.extensions import db  # noqa: E402
 from app.models.vehicle import Vehicle, VehicleSpec  # noqa: E402
+from app.services.engine_reliability_service import rebuild_vehicle_reliability_map  # noqa: E402
 from app.services.pipeline_tracker import track_pipeline  # noqa: E402
 
 # Top 144+ modeles les plus vendus en France (ventes 2024-2025 + parc occasion)
@@ -1316,6 +1317,9 @@ def seed():
                 db.session.add(spec)
                 created_specs += 1
 
+            # Nouvelles specs : badge fiabilite moteur servi par /api/analyze
+            if created_specs:
+                rebuild_vehicle_reliability_map()
             db.session.commit()
             tracker.count = created_vehicles + created_specs
 
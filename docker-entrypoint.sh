@@ -18,6 +18,10 @@ fi
 python -c "
 from app import create_app
 from app.extensions import db
+from app.models.listing_age_stat import ListingAgeStat
+from app.models.market_price import MarketPrice
+from app.models.market_price_sketch import MarketPriceSketch
+from app.models.scan import ScanLog
 from app.models.vehicle import Vehicle
 app = create_app()
 with app.app_context():
@@ -31,6 +35,14 @@ with app.app_context():
         print('Seed termine.')
     else:
         print(f'DB existante ({Vehicle.query.count()} vehicules)')
+    # Resumes d'anciennete L10 absents (premier deploy de la table) : rebuild depuis ScanLog
+    if ListingAgeStat.query.first() is None and ScanLog.query.first() is not None:
+        import subprocess
+        subprocess.run(['python', 'scripts/rebuild_listing_age_stats.py'], check=True)
+    # Sketches argus absents (premier deploy de la table) : initialisation depuis MarketPrice
+    if MarketPriceSketch.query.first() is None and MarketPrice.query.first() is not None:
+        import subprocess
+        subprocess.run(['python', 'scripts/rebuild_market_sketches.py'], check=True)
 "
 
 exec gunicorn --bind "0.0.0.0:$PORT" --workers 2 --timeout 120 wsgi:app
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Benchmark du debit d'analyse : /api/analyze annonce par annonce vs /api/analyze/batch.
+
+Cree une base SQLite temporaire (profil testing), y seme un argus maison
+(MarketPrice) pour quelques modeles, puis analyse la meme page de resultats
+synthetique de deux facons :
+
+- N appels /api/analyze (chemin d'une annonce, pool de 11 threads par appel),
+- un appel /api/analyze/batch de N annonces (pool partage, MarketPrice et
+  vehicules charges une fois pour le lot).
+
+Affiche le temps total, le debit (annonces/s) et le nombre de requetes SQL
+par annonce. Verifie que les deux chemins donnent les memes verdicts de
+filtres, hors L10 : ses seuils d'anciennete dependent des scans precedents
+du modele, qui ne sont pas les memes d'un chemin a l'autre.
+
+Usage : python scripts/bench_analyze_batch.py [--items 40] [--models 5] [--rounds 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("FLASK_ENV", "testing")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.market_service import store_market_prices  # noqa: E402
+
+MAKE = "Benchmake"
+REGIONS = ("Bretagne", "Ile-de-France", "Occitanie")
+
+
+def _seed(models: int) -> None:
+    for m in range(models):
+        for year in (2017, 2018, 2019, 2020):
+            for region in REGIONS:
+                store_market_prices(
+                    make=MAKE,
+                    model=f"Model{m}",
+                    year=year,
+                    region=region,
+                    prices=[9000 + year % 10 * 800 + i * 350 for i in range(25)],
+                    fuel="diesel",
+                )
+
+
+def _items(count: int, models: int, round_no: int) -> list[dict]:
+    return [
+        {
+            # URL unique par tour : pas de verdict relu depuis le cache
+            "url": f"https://www.autoscout24.fr/offres/bench-{round_no}-{i}",
+            "source": "autoscout24",
+            "ad_data": {
+                "title": f"{MAKE} Model{i % models}",
+                "price_eur": 11000 + (i * 613) % 6000,
+                "make": MAKE,
+                "model": f"Model{i % models}",
+                "year_model": str(2017 + i % 4),
+                "mileage_km": 40000 + i * 1500,
+                "fuel": "Diesel",
+                "gearbox": "Manuelle",
+                "power_din_hp": 110,
+                "location": {"city": "Rennes", "region": REGIONS[i % len(REGIONS)]},
+                "owner_type": "private",
+                "description": "Bon etat general, entretien suivi.",
+                "image_count": 6,
+                "has_phone": False,
+                "days_online": i % 30,
+            },
+        }
+        for i in range(count)
+    ]
+
+
+class _QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args):
+        self.count += 1
+
+
+def _verdict(data: dict) -> list[tuple]:
+    return [
+        (f["filter_id"], f["status"], f["score"])
+        for f in data["filters"]
+        if f["filter_id"] != "L10"
+    ]
+
+
+def _run_single(client, items: list[dict]) -> list[list[tuple]]:
+    return [_verdict(client.post("/api/analyze", json=item).get_json()["data"]) for item in items]
+
+
+def _run_batch(client, items: list[dict]) -> list[list[tuple]]:
+    resp = client.post("/api/analyze/batch", json={"items": items})
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    return [_verdict(line["data"]) for line in sorted(lines, key=lambda line: line["index"])]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_app("testing")
+    app.config["ANALYZE_BATCH_MAX_ITEMS"] = max(args.items, 50)
+    logging.disable(logging.INFO)
+    with app.app_context():
+        db.create_all()
+        _seed(args.models)
+        counter = _QueryCounter(db.engine)
+        client = app.test_client()
+
+        totals = {"unitaire": [0.0, 0], "lot": [0.0, 0]}
+        runners = {"unitaire": _run_single, "lot": _run_batch}
+        for round_no in range(args.rounds):
+            verdicts = {}
+            for name, run in runners.items():
+                items = _items(args.items, args.models, round_no * 2 + (name == "lot"))
+                counter.count = 0
+                start = time.perf_counter()
+                verdicts[name] = run(client, items)
+                totals[name][0] += time.perf_counter() - start
+                totals[name][1] += counter.count
+            assert verdicts["unitaire"] == verdicts["lot"], "verdicts differents entre les chemins"
+
+        ads = args.items * args.rounds
+        print(f"{args.items} annonces x {args.rounds} tours, {args.models} modeles")
+        print(f"{'chemin':>10}{'total s':>10}{'annonces/s':>12}{'SQL/annonce':>13}")
+        for name, (elapsed, queries) in totals.items():
+            print(f"{name:>10}{elapsed:>10.2f}{ads / elapsed:>12.1f}{queries / ads:>13.1f}")
+        print(f"gain de debit : {totals['unitaire'][0] / totals['lot'][0]:.1f}x")
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
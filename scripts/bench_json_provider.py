@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Benchmark de la serialisation des reponses : provider Flask par defaut vs orjson.
+
+Construit une reponse /api/analyze synthetique (AnalyzeResponse.model_dump()
+avec 11 filtres) dont les ``details`` grossissent (listes de prix detailles,
+etapes de recherche, dates), puis mesure ``jsonify`` avec chaque provider :
+temps moyen par reponse et taille du corps. Verifie aussi que les deux
+corps decodes sont identiques.
+
+Usage : python scripts/bench_json_provider.py [--runs 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.json_provider import OrjsonProvider  # noqa: E402
+from app.schemas.analyze import AnalyzeResponse  # noqa: E402
+from app.schemas.filter_result import FilterResultSchema  # noqa: E402
+
+
+def _details(size: int, now: datetime) -> dict:
+    return {
+        "kept_details": [
+            {"price": 10000 + i * 37, "year": 2015 + i % 8, "km": 40000 + i * 911, "fuel": "diesel"}
+            for i in range(size)
+        ],
+        "search_steps": [
+            {"step": i, "precision": 5 - i % 5, "found": i * 3, "label": f"Etape de recherche {i}"}
+            for i in range(size // 10)
+        ],
+        "z_scores": {"price": 1.23, "mileage": -0.4},
+        "anomalies": ["Prix en marge (z=2.1)"] * 3,
+        "collected_at": (now - timedelta(hours=size)).isoformat(),
+        "delta_pct": 12.5,
+    }
+
+
+def _payload(size: int) -> dict:
+    now = datetime.now(timezone.utc)
+    filters = [
+        FilterResultSchema(
+            filter_id=f"L{i}",
+            status="warning" if i % 3 else "pass",
+            score=0.75,
+            message="Message de filtre un peu long avec des accents : prix élevé, vérifiez.",
+            details=_details(size, now),
+        )
+        for i in range(1, 12)
+    ]
+    response = AnalyzeResponse(
+        scan_id=123,
+        score=72,
+        filters=filters,
+        vehicle={"make": "Peugeot", "model": "3008", "year": 2019, "price": 18500},
+    )
+    return {"success": True, "error": None, "message": None, "data": response.model_dump()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = {"defaut": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+
+    print(
+        f"{'details/filtre':>15}{'Ko defaut':>11}{'Ko orjson':>11}{'defaut ms':>11}{'orjson ms':>11}{'gain':>7}"
+    )
+    with app.app_context():
+        for size in (10, 100, 500, 2000):
+            payload = _payload(size)
+            bodies = {name: p.response(payload).get_data() for name, p in providers.items()}
+            assert json.loads(bodies["defaut"]) == json.loads(bodies["orjson"])
+            timings = {
+                name: timeit.timeit(lambda p=p: p.response(payload), number=args.runs) / args.runs
+                for name, p in providers.items()
+            }
+            print(
+                f"{size:>15}{len(bodies['defaut']) // 1024:>11}{len(bodies['orjson']) // 1024:>11}"
+                f"{timings['defaut'] * 1000:>11.2f}{timings['orjson'] * 1000:>11.2f}"
+                f"{timings['defaut'] / timings['orjson']:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
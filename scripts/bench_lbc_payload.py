@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark de la lecture du corps /api/analyze : parse complet vs chemin rapide.
+
+Chaque fixture de tests/mocks/mock_leboncoin.py est plongee dans un etat de
+page synthetique (resultats de recherche, traductions) de taille croissante,
+avant ou apres l'annonce, pour reproduire un vrai __NEXT_DATA__ LBC. On
+compare, jusqu'a la localisation de l'annonce :
+
+- legacy : json.loads du corps + AnalyzeRequest + _find_ad_payload,
+- rapide : lbc_payload.parse_analyze_body + AnalyzeRequest + _find_ad_payload,
+
+en temps moyen et en pic memoire (tracemalloc), et on verifie que l'annonce
+trouvee est identique.
+
+Usage : python scripts/bench_lbc_payload.py [--runs 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas.analyze import AnalyzeRequest  # noqa: E402
+from app.services.extraction import _find_ad_payload  # noqa: E402
+from app.services.lbc_payload import parse_analyze_body  # noqa: E402
+from tests.mocks import mock_leboncoin  # noqa: E402
+
+
+def _page_state(n: int) -> dict:
+    return {
+        "searchResults": [
+            {
+                "list_id": i,
+                "subject": f"Annonce similaire numero {i}",
+                "price": [5000 + i],
+                "attributes": [{"key": f"attr_{j}", "value": f"valeur {j}"} for j in range(10)],
+                "images": {"urls": [f"https://img.leboncoin.fr/{i}/{j}.jpg" for j in range(8)]},
+            }
+            for i in range(n)
+        ],
+        "i18n": {f"page.label.{i}": f"Libelle traduit numero {i}" for i in range(n * 10)},
+    }
+
+
+def _body(next_data: dict, n: int, ad_first: bool) -> bytes:
+    page_props = dict(next_data["props"]["pageProps"])
+    state = _page_state(n)
+    page_props = {**page_props, **state} if ad_first else {**state, **page_props}
+    return json.dumps(
+        {
+            "url": "https://www.leboncoin.fr/ad/voitures/1",
+            "next_data": {"props": {"pageProps": page_props}},
+        }
+    ).encode()
+
+
+def _legacy(raw: bytes) -> dict | None:
+    req = AnalyzeRequest.model_validate(json.loads(raw))
+    return _find_ad_payload(req.next_data)
+
+
+def _fast(raw: bytes) -> dict | None:
+    req = AnalyzeRequest.model_validate(parse_analyze_body(raw))
+    return _find_ad_payload(req.next_data)
+
+
+def _peak_kb(fn, raw: bytes) -> int:
+    tracemalloc.start()
+    fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak // 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = {
+        name: value
+        for name, value in vars(mock_leboncoin).items()
+        if name.endswith("NEXT_DATA") and "pageProps" in value.get("props", {})
+    }
+
+    print(
+        f"{'fixture':<38}{'etat':>6}{'ad':>7}{'Ko':>6}"
+        f"{'legacy ms':>11}{'rapide ms':>11}{'legacy Ko':>11}{'rapide Ko':>11}"
+    )
+    for name, next_data in fixtures.items():
+        for n in (50, 300):
+            for ad_first in (True, False):
+                raw = _body(next_data, n, ad_first)
+                assert _fast(raw) == _legacy(raw)
+                legacy = timeit.timeit(lambda: _legacy(raw), number=args.runs) / args.runs
+                fast = timeit.timeit(lambda: _fast(raw), number=args.runs) / args.runs
+                print(
+                    f"{name:<38}{n:>6}{'debut' if ad_first else 'fin':>7}{len(raw) // 1024:>6}"
+                    f"{legacy * 1000:>11.2f}{fast * 1000:>11.2f}"
+                    f"{_peak_kb(_legacy, raw):>11}{_peak_kb(_fast, raw):>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Micro-benchmark du moteur de signaux texte L8 sur des descriptions longues.
+
+Compare l'ancien scan (un ``kw in text`` par mot-cle et par famille) avec
+l'automate precompile de app/filters/text_signals.py, sur des descriptions
+synthetiques de 5 a 10 Ko, et verifie au passage que les resultats sont
+identiques.
+
+Usage : python scripts/bench_text_signals.py [--runs 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.filters import l8_reputation as l8  # noqa: E402
+
+# Vocabulaire "normal" d'annonce, pour diluer les signaux dans du texte realiste
+_FILLER = (
+    "vends tres belle voiture entretien a jour carnet complet controle technique ok "
+    "distribution faite pneus neufs climatisation automatique gps bluetooth radar de recul "
+    "jantes alliage premiere main non fumeur garage vidange freins plaquettes disques "
+    "importante revision faite aucun frais a prevoir visible sur rendez-vous "
+).split()
+
+_SIGNALS = ["importée", "allemagne", "fahrzeug", "malus payé", "coc", "homologation", "etrangere"]
+
+
+def _description(size: int, with_signals: bool, rng: random.Random) -> str:
+    words: list[str] = []
+    length = 0
+    while length < size:
+        w = rng.choice(_FILLER)
+        words.append(w)
+        length += len(w) + 1
+    if with_signals:
+        for sig in _SIGNALS:
+            words.insert(rng.randrange(len(words)), sig)
+    return " ".join(words)
+
+
+def _legacy_scan(text: str, country: str) -> dict[str, list[str]]:
+    """Reimplementation de l'ancien scan lineaire de L8 (reference)."""
+    found_import = []
+    for kw in l8.IMPORT_KEYWORDS_FR:
+        if kw == "import":
+            if re.search(r"\bimport\b", text):
+                found_import.append(kw)
+        elif kw in text:
+            found_import.append(kw)
+    local_names = l8._COUNTRY_LOCAL_NAMES.get(country, set())
+    local_kw = l8._COUNTRY_LOCAL_KEYWORDS.get(country, set())
+    return {
+        "import": found_import,
+        "countries": [c for c in l8.IMPORT_COUNTRIES if c not in local_names and c in text],
+        "foreign": [kw for kw in l8.IMPORT_KEYWORDS_FOREIGN if kw not in local_kw and kw in text],
+        "tax": [
+            kw
+            for kw in l8.TAX_KEYWORDS
+            if (len(kw) <= 3 and re.search(rf"\b{re.escape(kw)}\b", text))
+            or (len(kw) > 3 and kw in text)
+        ],
+        "reg_strong": [kw for kw in l8.REGISTRATION_STRONG if kw in text]
+        + [kw for kw in l8._SHORT_REGISTRATION_TOKENS if re.search(rf"\b{re.escape(kw)}\b", text)],
+        "reg_weak": [kw for kw in l8.REGISTRATION_WEAK if kw in text],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cases = [
+        (f"{size // 1024} Ko, {'avec' if sig else 'sans'} signaux", size, sig)
+        for size in (5 * 1024, 10 * 1024)
+        for sig in (False, True)
+    ]
+
+    print(f"{'cas':<28}{'legacy (us)':>14}{'automate (us)':>16}{'gain':>8}")
+    for label, size, with_signals in cases:
+        text = _description(size, with_signals, rng)
+        for country in ("FR", "CH"):
+            assert l8.scan_import_keywords(text, country) == _legacy_scan(text, country)
+
+        legacy = timeit.timeit(lambda: _legacy_scan(text, "FR"), number=args.runs)
+        compiled = timeit.timeit(lambda: l8.scan_import_keywords(text, "FR"), number=args.runs)
+        legacy_us = legacy / args.runs * 1e6
+        compiled_us = compiled / args.runs * 1e6
+        print(f"{label:<28}{legacy_us:>14.1f}{compiled_us:>16.1f}{legacy_us / compiled_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Compression des transcripts YouTube stockes en clair (full_text / snippets_json).
+
+Les transcripts extraits avant l'introduction de TranscriptBlob gardent leur
+texte en colonnes : ce script le deplace dans des blobs compresses et
+dedoublonnes, vide les colonnes, purge les blobs orphelins et affiche la
+place gagnee. Avec --vacuum, lance VACUUM (SQLite) pour rendre l'espace au
+systeme de fichiers et affiche la taille du fichier avant/apres.
+
+Idempotent : les transcripts deja migres ne sont pas relus.
+Usage : python scripts/compress_transcripts.py [--vacuum]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.pipeline_tracker import track_pipeline  # noqa: E402
+from app.services.transcript_store import (  # noqa: E402
+    compress_existing,
+    purge_unreferenced_blobs,
+    storage_stats,
+)
+
+
+def _db_file_size() -> int | None:
+    path = db.engine.url.database
+    if db.engine.dialect.name != "sqlite" or not path or not os.path.exists(path):
+        return None
+    return os.path.getsize(path)
+
+
+def _fmt(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} Mo"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM SQLite apres migration")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        before = storage_stats()
+        with track_pipeline("compress_transcripts") as tracker:
+            stats = compress_existing()
+            purged = purge_unreferenced_blobs()
+            tracker.count = stats["transcripts"]
+        after = storage_stats()
+
+        print(
+            f"Transcripts migres : {stats['transcripts']} "
+            f"({stats['blobs_created']} blobs crees, {stats['blobs_reused']} reutilises, "
+            f"{purged} orphelins supprimes)"
+        )
+        print(
+            f"Contenu en clair : {_fmt(stats['bytes_before'])} -> "
+            f"{_fmt(stats['bytes_after'])} compresses "
+            f"({_fmt(stats['bytes_before'] - stats['bytes_after'])} gagnes)"
+        )
+        print(
+            f"Stockage transcripts : {_fmt(before['legacy_bytes'] + before['stored_bytes'])} -> "
+            f"{_fmt(after['legacy_bytes'] + after['stored_bytes'])} "
+            f"({after['blobs']} blobs, {_fmt(after['raw_bytes'])} decompresses)"
+        )
+
+        if args.vacuum:
+            size_before = _db_file_size()
+            db.session.remove()
+            # VACUUM refuse de tourner dans une transaction
+            with db.engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+            size_after = _db_file_size()
+            if size_before is not None and size_after is not None:
+                print(
+                    f"Fichier SQLite : {_fmt(size_before)} -> {_fmt(size_after)} "
+                    f"({_fmt(size_before - size_after)} rendus)"
+                )
+
+
+if __name__ == "__main__":
+    main()
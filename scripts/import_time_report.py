@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Rapport du temps d'import au demarrage d'un worker (create_app a froid).
+
+Lance ``python -X importtime`` dans un process neuf qui appelle create_app(),
+puis affiche le temps d'import total, les paquets les plus couteux, les
+dependances lourdes chargees (HEAVY_MODULES) et le RSS max du process.
+
+Les dependances lourdes (SDK Gemini, numpy, pandas/plotly, yt_dlp, fpdf,
+bs4...) ne servent qu'a certaines routes admin ou a certains services : elles
+sont importees dans les fonctions qui les utilisent, jamais au chargement d'un
+module atteint par create_app(). tests/test_scripts/test_import_time_report.py
+fait echouer la suite si l'une d'elles revient au demarrage. Le budget de
+temps, qui depend de la machine, n'est verifie par la suite que si
+IMPORT_TIME_BUDGET_MS est defini dans l'environnement ; ce script, lui,
+le verifie toujours (2000 ms par defaut).
+
+Usage : python scripts/import_time_report.py [--config production] [--top 15]
+        [--budget-ms 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budget d'import de create_app() a froid (ms), surchargeable par l'env.
+# Les tests ne le verifient que s'il est defini explicitement (CI bruitee).
+IMPORT_TIME_BUDGET_ENV = "IMPORT_TIME_BUDGET_MS"
+IMPORT_TIME_BUDGET_MS = float(os.environ.get(IMPORT_TIME_BUDGET_ENV, "2000"))
+
+# Dependances lourdes qui ne doivent pas etre chargees par create_app()
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "plotly",
+    "yt_dlp",
+    "youtube_transcript_api",
+    "google.genai",
+    "fpdf",
+    "bs4",
+    "markdown",
+)
+
+# Execute dans le process mesure : cree l'app puis rend les modules lourds
+# charges et le RSS max (Ko sous Linux) sur la derniere ligne de stdout
+_PROBE = """
+import json, sys
+try:
+    import resource
+except ImportError:
+    resource = None
+from app import create_app
+create_app({config!r})
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"heavy": heavy, "rss_kb": rss_kb}}))
+"""
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+@dataclass
+class ImportEntry:
+    """Une ligne de -X importtime (temps en microsecondes)."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportReport:
+    """Resultat d'une mesure de demarrage."""
+
+    entries: list[ImportEntry]
+    heavy_loaded: list[str] = field(default_factory=list)
+    rss_kb: int | None = None
+
+    @property
+    def total_ms(self) -> float:
+        """Temps d'import total : somme des imports de premier niveau."""
+        return sum(e.cumulative_us for e in self.entries if e.depth == 0) / 1000
+
+    def cumulative_ms(self, name: str) -> float | None:
+        """Temps cumule (ms) du premier import de ``name``, ou None."""
+        for entry in self.entries:
+            if entry.name == name:
+                return entry.cumulative_us / 1000
+        return None
+
+    def top_packages(self, limit: int = 15) -> list[tuple[str, float]]:
+        """Paquets racine les plus couteux : somme du temps propre de leurs modules (ms)."""
+        totals: dict[str, float] = {}
+        for entry in self.entries:
+            root = entry.name.split(".")[0]
+            totals[root] = totals.get(root, 0.0) + entry.self_us / 1000
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def parse_importtime(stderr: str) -> list[ImportEntry]:
+    """Parse la sortie de ``python -X importtime`` (les autres lignes sont ignorees)."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line.rstrip())
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(
+                ImportEntry(
+                    name=name,
+                    self_us=int(self_us),
+                    cumulative_us=int(cumulative_us),
+                    depth=(len(indent) - 1) // 2,
+                )
+            )
+    return entries
+
+
+def measure(config_name: str = "testing") -> ImportReport:
+    """Mesure create_app(config_name) dans un interpreteur neuf."""
+    probe = _PROBE.format(config=config_name, heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stdout.strip().splitlines()
+    summary = json.loads(lines[-1]) if lines else {}
+    return ImportReport(
+        entries=parse_importtime(result.stderr),
+        heavy_loaded=summary.get("heavy", []),
+        rss_kb=summary.get("rss_kb"),
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="testing", help="profil create_app()")
+    parser.add_argument("--top", type=int, default=15, help="nombre de paquets affiches")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    args = parser.parse_args()
+
+    report = measure(args.config)
+
+    print(f"create_app({args.config!r}) : {report.total_ms:.0f} ms d'import")
+    if report.rss_kb is not None:
+        print(f"RSS max : {report.rss_kb / 1024:.1f} Mo")
+    print(f"\nPaquets les plus couteux (temps propre, top {args.top}) :")
+    for name, ms in report.top_packages(args.top):
+        print(f"  {ms:8.1f} ms  {name}")
+
+    ok = report.total_ms <= args.budget_ms
+    if report.heavy_loaded:
+        ok = False
+        print("\nDependances lourdes chargees au demarrage :")
+        for name in report.heavy_loaded:
+            ms = report.cumulative_ms(name)
+            print(f"  {name}" + (f" ({ms:.1f} ms)" if ms is not None else ""))
+    print(f"\nBudget : {args.budget_ms:.0f} ms -> {'OK' if ok else 'DEPASSE'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Reconstruction des resumes d'anciennete d'annonce (ListingAgeStat) depuis ScanLog.
+
+Le filtre L10 lit la mediane des days_online par modele dans ListingAgeStat,
+alimentee a chaque scan. Ce script recalcule tout depuis l'historique des
+scans (fenetre de 90 jours) : a lancer apres le premier deploy de la table,
+ou si les resumes ont derive (ecritures concurrentes, purge de ScanLog...).
+
+Idempotent : la table est videe puis reconstruite.
+Usage : python scripts/rebuild_listing_age_stats.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.listing_age_service import rebuild_listing_age_stats  # noqa: E402
+from app.services.pipeline_tracker import track_pipeline  # noqa: E402
+
+
+def main() -> None:
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with track_pipeline("rebuild_listing_age_stats") as tracker:
+            tracker.count = rebuild_listing_age_stats()
+            db.session.commit()
+        print(f"ListingAgeStat reconstruit : {tracker.count} modeles.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Creation des sketches de prix (MarketPriceSketch) manquants depuis MarketPrice.
+
+Les percentiles argus et les z-scores L5 se lisent dans un sketch cumule par
+cellule, alimente a chaque collecte. Les cellules collectees avant
+l'introduction des sketches en sont initialisees avec les prix gardes de leur
+derniere collecte (calculation_details). A lancer apres le premier deploy
+de la table.
+
+Idempotent : les sketches existants (et leur historique) ne sont pas touches.
+Usage : python scripts/rebuild_market_sketches.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.market_service import rebuild_market_sketches  # noqa: E402
+from app.services.pipeline_tracker import track_pipeline  # noqa: E402
+
+
+def main() -> None:
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        with track_pipeline("rebuild_market_sketches") as tracker:
+            tracker.count = rebuild_market_sketches()
+            db.session.commit()
+        print(f"MarketPriceSketch : {tracker.count} sketches crees.")
+
+
+if __name__ == "__main__":
+    main()
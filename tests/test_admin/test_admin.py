@@ -1140,3 +1140,33 @@ class TestArgusMap:
         )
         assert resp.status_code == 200
         assert "Aucune donnee" in resp.data.decode() or "Selectionnez" in resp.data.decode()
+
+
+# ── LLM Google ───────────────────────────────────────────────────
+
+
+class TestLLMPage:
+    def test_shows_cache_stats_and_flushes_usage(self, client, admin_user, app):
+        """La page /llm ecrit les LLMUsage en attente et affiche le cache."""
+        from app.models.llm_usage import LLMUsage
+        from app.services import llm_usage_writer
+
+        app.config["LLM_USAGE_BATCH_SIZE"] = 50
+        try:
+            with app.app_context():
+                llm_usage_writer.record_llm_usage(
+                    request_id="admin-llm-page",
+                    provider="gemini",
+                    model="gemini-2.5-flash",
+                    feature="admin_test",
+                    total_tokens=10,
+                )
+            _login(client)
+            resp = client.get("/admin/llm")
+        finally:
+            app.config["LLM_USAGE_BATCH_SIZE"] = 1
+
+        assert resp.status_code == 200
+        assert "Taux de hit cache" in resp.data.decode()
+        with app.app_context():
+            assert LLMUsage.query.filter_by(request_id="admin-llm-page").count() == 1
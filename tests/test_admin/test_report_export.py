@@ -0,0 +1,335 @@
+"""Tests de l'export en masse des rapports PDF (admin /reports/export)."""
+
+import io
+import time
+import zipfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db as _db
+from app.models.filter_result import FilterResultDB
+from app.models.pipeline_job import PipelineJob
+from app.models.pipeline_run import PipelineRun
+from app.models.report_artifact import ReportArtifact
+from app.models.scan import ScanLog
+from app.models.user import User
+from app.services.job_store import job_status, request_cancel
+from app.services.report_export_service import (
+    EXPORT_PIPELINE,
+    ReportExportFilter,
+    export_archive_path,
+    export_entry_name,
+    parse_export_filter,
+    select_export_scans,
+)
+
+
+@pytest.fixture()
+def admin_client(app, db):
+    """Client HTTP authentifie en tant qu'admin."""
+    user = User.query.filter_by(username="testadmin_export").first()
+    if not user:
+        user = User(
+            username="testadmin_export",
+            password_hash=generate_password_hash("testpass"),
+            is_admin=True,
+        )
+        _db.session.add(user)
+        _db.session.commit()
+
+    client = app.test_client()
+    client.post(
+        "/admin/login",
+        data={"username": "testadmin_export", "password": "testpass"},
+        follow_redirects=True,
+    )
+    return client
+
+
+@pytest.fixture()
+def dealer_scans(db):
+    """Trois scans d'un meme vendeur pro le 2026-03-10, un autre vendeur le 11."""
+    scans = []
+    for idx, (day, siret) in enumerate(
+        [(10, "12345678900011"), (10, "12345678900011"), (10, "12345678900011"), (11, "999")]
+    ):
+        scan = ScanLog(
+            url=f"https://www.leboncoin.fr/ad/voitures/export{idx}",
+            raw_data={"ad": idx},
+            score=70,
+            vehicle_make="Exportmake",
+            vehicle_model="Model X" if idx else "Model Y",
+            source="leboncoin",
+            created_at=datetime(2026, 3, day, 9, 0, tzinfo=timezone.utc),
+        )
+        db.session.add(scan)
+        db.session.flush()
+        db.session.add(
+            FilterResultDB(
+                scan_id=scan.id,
+                filter_id="L7",
+                status="pass",
+                score=0.9,
+                message="Entreprise active",
+                details={"siret": siret, "found": True},
+            )
+        )
+        scans.append(scan)
+    # Scan reutilise : simple renvoi, jamais exporte
+    db.session.add(
+        ScanLog(
+            url="https://www.leboncoin.fr/ad/voitures/export0",
+            raw_data={"cached_scan_id": scans[0].id},
+            vehicle_make="Exportmake",
+            vehicle_model="Model Y",
+            source="leboncoin",
+            created_at=datetime(2026, 3, 10, 10, 0, tzinfo=timezone.utc),
+        )
+    )
+    db.session.commit()
+    yield scans
+    ids = [s.id for s in scans]
+    FilterResultDB.query.filter(FilterResultDB.scan_id.in_(ids)).delete()
+    ReportArtifact.query.filter(ReportArtifact.scan_id.in_(ids)).delete()
+    ScanLog.query.filter(ScanLog.vehicle_make == "Exportmake").delete()
+    PipelineJob.query.filter_by(name=EXPORT_PIPELINE).delete()
+    PipelineRun.query.filter_by(name=EXPORT_PIPELINE).delete()
+    db.session.commit()
+
+
+@pytest.fixture(autouse=True)
+def export_dir(app, tmp_path):
+    app.config["REPORT_EXPORT_DIR"] = str(tmp_path)
+    yield tmp_path
+    app.config["REPORT_EXPORT_DIR"] = ""
+
+
+def _fake_render(pool, html, css_path):
+    return b"%PDF-1.7 " + html[:40].encode()
+
+
+def _start_export(admin_client, **form) -> str:
+    resp = admin_client.post("/admin/reports/export", data=form)
+    assert resp.status_code == 302
+    assert "job_id=" in resp.headers["Location"]
+    return resp.headers["Location"].split("job_id=")[1]
+
+
+def _wait_for_job(job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_status(job_id)
+        if job and job["status"] in ("done", "error", "cancelled"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("export jamais termine")
+
+
+def _export(admin_client, **form) -> tuple[dict, bytes]:
+    """Lance l'export, attend la fin du job et telecharge l'archive."""
+    job_id = _start_export(admin_client, **form)
+    job = _wait_for_job(job_id)
+    resp = admin_client.get(f"/admin/reports/export/download/{job_id}")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/zip"
+    return job, resp.get_data()
+
+
+class TestExportFilter:
+    def test_parse(self):
+        flt = parse_export_filter(
+            {"date_from": "2026-03-10", "siret": "123 456 789 00011", "scan_ids": "4, 2 4"}
+        )
+        assert flt.date_from.isoformat() == "2026-03-10"
+        assert flt.siret == "12345678900011"
+        assert flt.scan_ids == (4, 2)
+        assert not flt.is_empty()
+        assert parse_export_filter({}).is_empty()
+
+    def test_parse_invalid(self):
+        with pytest.raises(ValueError):
+            parse_export_filter({"date_to": "10/03/2026"})
+        with pytest.raises(ValueError):
+            parse_export_filter({"scan_ids": "1,abc"})
+
+    def test_select_by_dealer_and_day(self, app, dealer_scans):
+        ids = [s.id for s in dealer_scans]
+        rows = select_export_scans(ReportExportFilter(siret="12345678900011"), 50)
+        assert [r[0] for r in rows] == ids[:3]
+
+        day = datetime(2026, 3, 11).date()
+        rows = select_export_scans(ReportExportFilter(date_from=day, date_to=day), 50)
+        assert [r[0] for r in rows] == [ids[3]]
+
+        rows = select_export_scans(
+            ReportExportFilter(
+                make="exportmake", model="model y", date_to=datetime(2026, 3, 10).date()
+            ),
+            50,
+        )
+        # Le scan reutilise (cached_scan_id) est exclu
+        assert [r[0] for r in rows] == [ids[0]]
+
+    def test_select_limit_plus_one(self, app, dealer_scans):
+        rows = select_export_scans(ReportExportFilter(make="Exportmake"), 2)
+        assert len(rows) == 3
+
+    def test_entry_name(self):
+        assert (
+            export_entry_name(42, "Peugeot", "208 GTi/Line")
+            == "rapport_0000042_Peugeot_208-GTi-Line.pdf"
+        )
+        assert export_entry_name(7, None, "") == "rapport_0000007.pdf"
+
+
+class TestReportExportRoutes:
+    def test_requires_login(self, client):
+        client.get("/admin/logout")
+        resp = client.get("/admin/reports/export")
+        assert resp.status_code == 302
+        assert "/admin/login" in resp.headers["Location"]
+
+    def test_form_page(self, admin_client, dealer_scans):
+        resp = admin_client.get("/admin/reports/export")
+        assert resp.status_code == 200
+        assert b"Export des rapports PDF" in resp.data
+
+    def test_empty_filter_redirects(self, admin_client):
+        resp = admin_client.post("/admin/reports/export", data={})
+        assert resp.status_code == 302
+        assert "job_id" not in resp.headers["Location"]
+
+    def test_too_many_scans_redirects(self, app, admin_client, dealer_scans):
+        app.config["REPORT_EXPORT_MAX_SCANS"] = 2
+        try:
+            resp = admin_client.post("/admin/reports/export", data={"make": "Exportmake"})
+        finally:
+            app.config.pop("REPORT_EXPORT_MAX_SCANS")
+        assert resp.status_code == 302
+        assert "job_id" not in resp.headers["Location"]
+
+    def test_background_export_of_dealer_reports(self, admin_client, dealer_scans):
+        with patch("app.services.report_export_service._render", side_effect=_fake_render):
+            job, data = _export(admin_client, siret="12345678900011")
+
+        assert job["status"] == "done"
+        assert job["progress"] == 100
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = archive.namelist()
+            assert names == [
+                export_entry_name(s.id, s.vehicle_make, s.vehicle_model) for s in dealer_scans[:3]
+            ]
+            assert all(archive.read(n).startswith(b"%PDF") for n in names)
+
+        status = admin_client.get(f"/admin/reports/export/job-status/{job['id']}").get_json()
+        assert status["download_url"].endswith(f"/download/{job['id']}")
+        run = (
+            PipelineRun.query.filter_by(name=EXPORT_PIPELINE)
+            .order_by(PipelineRun.id.desc())
+            .first()
+        )
+        assert run.status == "success"
+        assert run.count == 3
+
+    def test_download_before_end_and_unknown_job(self, admin_client, dealer_scans):
+        assert admin_client.get("/admin/reports/export/download/inconnu").status_code == 404
+        assert admin_client.get("/admin/reports/export/job-status/inconnu").status_code == 404
+
+        with patch(
+            "app.services.report_export_service.write_report_export",
+            side_effect=lambda *a, **kw: time.sleep(0.3) or (0, []),
+        ):
+            job_id = _start_export(admin_client, siret="12345678900011")
+            resp = admin_client.get(f"/admin/reports/export/download/{job_id}")
+            _wait_for_job(job_id)
+        assert resp.status_code == 409
+
+    def test_cancelled_export_leaves_no_archive(self, admin_client, dealer_scans):
+        def render(pool, html, css_path):
+            time.sleep(0.1)
+            return _fake_render(pool, html, css_path)
+
+        with (
+            patch("app.services.report_export_service._render", side_effect=render),
+            patch("app.services.job_store.CANCEL_POLL_INTERVAL", 0),
+        ):
+            job_id = _start_export(admin_client, siret="12345678900011")
+            assert request_cancel(job_id)
+            job = _wait_for_job(job_id)
+
+        assert job["status"] == "cancelled"
+        assert not export_archive_path(job_id).exists()
+        assert admin_client.get(f"/admin/reports/export/download/{job_id}").status_code == 409
+        run = (
+            PipelineRun.query.filter_by(name=EXPORT_PIPELINE)
+            .order_by(PipelineRun.id.desc())
+            .first()
+        )
+        assert run.status == "failure"
+
+    def test_failed_report_listed_in_errors(self, admin_client, dealer_scans):
+        failing = dealer_scans[1].id
+
+        def render(pool, html, css_path):
+            if "export1" in html:
+                raise RuntimeError("boom")
+            return _fake_render(pool, html, css_path)
+
+        with (
+            patch("app.services.report_export_service._render", side_effect=render),
+            patch(
+                "app.services.report_html_service.build_scan_report_html",
+                side_effect=lambda scan_id, generate_email=True: (
+                    f"<html>export{scan_id - dealer_scans[0].id}</html>",
+                    True,
+                ),
+            ),
+        ):
+            _, data = _export(admin_client, siret="12345678900011")
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = archive.namelist()
+            assert len(names) == 3
+            assert names[-1] == "erreurs.txt"
+            assert f"scan {failing}: RuntimeError: boom" in archive.read("erreurs.txt").decode()
+
+        run = (
+            PipelineRun.query.filter_by(name=EXPORT_PIPELINE)
+            .order_by(PipelineRun.id.desc())
+            .first()
+        )
+        assert run.count == 2
+        assert "1 rapport" in run.error_message
+
+    def test_reuses_cached_artifacts(self, app, admin_client, dealer_scans):
+        from app.services.report_html_service import scan_report_fingerprint
+
+        first = dealer_scans[0].id
+        _db.session.add(
+            ReportArtifact(
+                scan_id=first,
+                fingerprint=scan_report_fingerprint(first),
+                content=b"%PDF-cached",
+                size_bytes=11,
+            )
+        )
+        _db.session.commit()
+
+        app.config["REPORT_ARTIFACT_CACHE"] = True
+        try:
+            with patch(
+                "app.services.report_export_service._render", side_effect=_fake_render
+            ) as render:
+                _, data = _export(admin_client, siret="12345678900011")
+        finally:
+            app.config["REPORT_ARTIFACT_CACHE"] = False
+
+        assert render.call_count == 2
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            first_name = archive.namelist()[0]
+            assert archive.read(first_name) == b"%PDF-cached"
+        # Les rendus faits pendant l'export alimentent le cache
+        assert ReportArtifact.query.filter_by(scan_id=dealer_scans[1].id).count() == 1
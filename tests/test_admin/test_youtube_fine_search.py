@@ -6,12 +6,13 @@ from unittest.mock import patch
 import pytest
 from werkzeug.security import generate_password_hash
 
-from app.admin.routes import _synthesis_jobs
 from app.extensions import db
 from app.models.user import User
 from app.models.vehicle import Vehicle
 from app.models.vehicle_synthesis import VehicleSynthesis
 from app.models.youtube import YouTubeTranscript, YouTubeVideo
+from app.services.job_store import create_job, job_status
+from app.services.llm_service import SynthesisResult
 
 
 @pytest.fixture()
@@ -82,11 +83,11 @@ def _wait_for_job(job_id: str, timeout: float = 5.0) -> dict:
     """Wait for a background job to complete."""
     deadline = time.monotonic() + timeout
     while time.monotonic() < deadline:
-        job = _synthesis_jobs.get(job_id)
+        job = job_status(job_id)
         if job and job["status"] in ("done", "error", "cancelled"):
             return job
         time.sleep(0.1)
-    return _synthesis_jobs.get(job_id, {})
+    return job_status(job_id) or {}
 
 
 class TestYouTubeFineSearchGet:
@@ -187,8 +188,8 @@ class TestYouTubeFineSearchPost:
                 return_value=mock_stats,
             ),
             patch(
-                "app.services.llm_service.generate_synthesis",
-                return_value="Points forts: confort. Points faibles: coffre.",
+                "app.services.llm_service.synthesize_transcripts",
+                return_value=SynthesisResult("Points forts: confort. Points faibles: coffre."),
             ),
             patch(
                 "app.services.youtube_service.build_search_query",
@@ -277,44 +278,31 @@ class TestYouTubeJobStatus:
         resp = client.get("/admin/youtube/job-status/nonexistent")
         assert resp.status_code == 404
 
-    def test_returns_job_data(self, client, admin_user):
-        """Inject a fake job and check status endpoint."""
-        from app.admin.routes import _jobs_lock
-
-        fake_job = {
-            "id": "test123",
-            "status": "done",
-            "progress": 100,
-            "progress_label": "Termine",
-            "pipeline_log": [{"step": 1, "label": "Test", "status": "ok", "detail": "ok"}],
-            "videos_detail": [],
-            "result": {
-                "synthesis_text": "test",
-                "videos_found": 0,
-                "transcripts_ok": 0,
-                "total_chars": 0,
-                "query": "q",
-                "synthesis_id": None,
-                "llm_model": "m",
-                "llm_duration": 0,
-                "search_duration": 0,
-                "prompt_used": "p",
+    def test_returns_job_data(self, app, client, admin_user):
+        """Create a job in the store and check status endpoint."""
+        job = create_job(
+            "test_pipeline",
+            {
+                "pipeline_log": [{"step": 1, "label": "Test", "status": "ok", "detail": "ok"}],
+                "videos_detail": [],
+                "result": None,
+                "form_data": {"make": "Test", "model": "T"},
             },
-            "form_data": {"make": "Test", "model": "T"},
-        }
-        with _jobs_lock:
-            _synthesis_jobs["test123"] = fake_job
+        )
+        job.record_stage("youtube", 2.0, 4, unit="videos")
+        job["result"] = {"synthesis_text": "test", "videos_found": 0}
+        job["progress"] = 100
+        job["status"] = "done"
 
         _login(client)
-        resp = client.get("/admin/youtube/job-status/test123")
+        resp = client.get(f"/admin/youtube/job-status/{job.key}")
         assert resp.status_code == 200
         data = resp.get_json()
         assert data["status"] == "done"
         assert data["progress"] == 100
-
-        # Cleanup
-        with _jobs_lock:
-            _synthesis_jobs.pop("test123", None)
+        assert data["result"]["synthesis_text"] == "test"
+        assert data["form_data"] == {"make": "Test", "model": "T"}
+        assert data["stages"]["youtube"]["per_second"] == 2.0
 
 
 class TestYouTubeJobStop:
@@ -325,31 +313,17 @@ class TestYouTubeJobStop:
         resp = client.post("/admin/youtube/job-stop/nonexistent")
         assert resp.status_code == 404
 
-    def test_stop_sets_cancelled_flag(self, client, admin_user):
-        from app.admin.routes import _jobs_lock
-
-        fake_job = {
-            "id": "stop1",
-            "status": "running",
-            "progress": 50,
-            "progress_label": "En cours",
-            "pipeline_log": [],
-            "videos_detail": [],
-            "result": None,
-            "cancelled": False,
-            "form_data": {},
-        }
-        with _jobs_lock:
-            _synthesis_jobs["stop1"] = fake_job
+    def test_stop_sets_cancelled_flag(self, app, client, admin_user):
+        job = create_job("test_pipeline", {"form_data": {}})
+        assert not job.is_cancelled()
 
         _login(client)
-        resp = client.post("/admin/youtube/job-stop/stop1")
+        resp = client.post(f"/admin/youtube/job-stop/{job.key}")
         assert resp.status_code == 200
-        assert fake_job["cancelled"] is True
-
-        # Cleanup
-        with _jobs_lock:
-            _synthesis_jobs.pop("stop1", None)
+        assert job_status(job.key)["cancel_requested"] is True
+        # Le thread du job relit le drapeau (throttle court)
+        time.sleep(0.6)
+        assert job.is_cancelled()
 
 
 class TestYouTubeSynthesisValidate:
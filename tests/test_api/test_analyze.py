@@ -1,7 +1,16 @@
 """Tests for POST /api/analyze endpoint."""
 
+import gzip
 import json
+import threading
+import time
+from unittest.mock import patch
 
+import brotli
+
+from app.extensions import db
+from app.models.api_traffic_stat import ApiTrafficStat
+from app.models.scan import ScanLog
 from tests.mocks.mock_leboncoin import (
     MALFORMED_NEXT_DATA,
     MOTO_AD_NEXT_DATA,
@@ -189,3 +198,186 @@ class TestMotoDetection:
         )
         body = resp.get_json()
         assert "vite" in body["message"].lower() or "arrive" in body["message"].lower()
+
+
+class TestAnalyzeFastExtraction:
+    def test_raw_data_keeps_only_the_ad(self, app, client):
+        next_data = {
+            "props": {
+                "pageProps": {
+                    "searchResults": [{"list_id": i, "attributes": []} for i in range(20)],
+                    **VALID_AD_NEXT_DATA["props"]["pageProps"],
+                }
+            }
+        }
+        resp = client.post(
+            "/api/analyze",
+            data=json.dumps({"next_data": next_data}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 200
+        scan_id = resp.get_json()["data"]["scan_id"]
+        with app.app_context():
+            scan = db.session.get(ScanLog, scan_id)
+            assert scan.raw_data == VALID_AD_NEXT_DATA
+
+    def test_legacy_mode_still_available(self, app, client):
+        app.config["ANALYZE_FAST_EXTRACTION"] = False
+        try:
+            resp = client.post(
+                "/api/analyze",
+                data=json.dumps({"next_data": VALID_AD_NEXT_DATA}),
+                content_type="application/json",
+            )
+        finally:
+            app.config["ANALYZE_FAST_EXTRACTION"] = True
+        assert resp.status_code == 200
+        assert resp.get_json()["data"]["vehicle"]["make"] == "Peugeot"
+
+
+class TestAnalyzeCompressedBody:
+    def _post(self, client, data, encoding):
+        return client.post(
+            "/api/analyze",
+            data=data,
+            content_type="application/json",
+            headers={"Content-Encoding": encoding},
+        )
+
+    def test_gzip_and_brotli_bodies(self, client):
+        raw = json.dumps({"next_data": VALID_AD_NEXT_DATA}).encode()
+        for encoding, compress in (("gzip", gzip.compress), ("br", brotli.compress)):
+            resp = self._post(client, compress(raw), encoding)
+            assert resp.status_code == 200, encoding
+            assert resp.get_json()["data"]["vehicle"]["make"] == "Peugeot"
+
+    def test_bytes_in_are_recorded(self, app, client):
+        raw = json.dumps({"next_data": VALID_AD_NEXT_DATA}).encode()
+        wire = gzip.compress(raw)
+
+        def _counters():
+            row = ApiTrafficStat.query.filter_by(
+                endpoint="analyze", content_encoding="gzip"
+            ).first()
+            return (row.request_count, row.bytes_in, row.bytes_decoded) if row else (0, 0, 0)
+
+        before = _counters()
+        assert self._post(client, wire, "gzip").status_code == 200
+        after = _counters()
+        assert (after[0] - before[0], after[1] - before[1], after[2] - before[2]) == (
+            1,
+            len(wire),
+            len(raw),
+        )
+
+    def test_zip_bomb_returns_413(self, app, client):
+        limit = app.config["API_MAX_BODY_BYTES"]
+        resp = self._post(client, gzip.compress(b" " * (limit + 1)), "gzip")
+        assert resp.status_code == 413
+        assert resp.get_json()["error"] == "PAYLOAD_TOO_LARGE"
+
+    def test_unknown_encoding_returns_415(self, client):
+        resp = self._post(client, b"{}", "compress")
+        assert resp.status_code == 415
+        assert resp.get_json()["error"] == "UNSUPPORTED_ENCODING"
+
+    def test_corrupt_gzip_returns_400(self, client):
+        resp = self._post(client, b"definitely not gzip", "gzip")
+        assert resp.status_code == 400
+        assert resp.get_json()["success"] is False
+
+
+class TestAnalysisCache:
+    URL = "https://www.leboncoin.fr/ad/voitures/555000111"
+
+    def _post(self, client, url=None):
+        return client.post(
+            "/api/analyze",
+            data=json.dumps({"url": url or self.URL, "next_data": VALID_AD_NEXT_DATA}),
+            content_type="application/json",
+        )
+
+    def test_second_scan_is_served_from_cache(self, app, client):
+        app.config["ANALYSIS_CACHE_TTL"] = 600
+        try:
+            first = self._post(client).get_json()["data"]
+            with patch("app.api.routes._build_engine") as build:
+                second = self._post(client).get_json()["data"]
+                build.assert_not_called()
+        finally:
+            app.config["ANALYSIS_CACHE_TTL"] = 0
+
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["scan_id"] == first["scan_id"]
+        assert second["score"] == first["score"]
+        assert second["filters"] == first["filters"]
+        with app.app_context():
+            ref = ScanLog.query.order_by(ScanLog.id.desc()).first()
+            assert ref.raw_data == {"cached_scan_id": first["scan_id"]}
+            assert ref.score == first["score"]
+
+    def test_market_price_update_invalidates(self, app, client):
+        app.config["ANALYSIS_CACHE_TTL"] = 600
+        url = self.URL + "2"
+        try:
+            assert self._post(client, url).get_json()["data"]["cached"] is False
+            resp = client.post(
+                "/api/market-prices",
+                data=json.dumps(
+                    {
+                        "make": "Peugeot",
+                        "model": "3008",
+                        "year": 2019,
+                        "region": "Ile-de-France",
+                        "prices": list(range(15000, 25000, 500)),
+                    }
+                ),
+                content_type="application/json",
+            )
+            assert resp.status_code == 200
+            assert self._post(client, url).get_json()["data"]["cached"] is False
+            assert self._post(client, url).get_json()["data"]["cached"] is True
+        finally:
+            app.config["ANALYSIS_CACHE_TTL"] = 0
+
+
+class TestAnalyzeSingleFlight:
+    def test_concurrent_identical_requests_run_once(self, app, client):
+        from app.api import routes
+        from app.services.analysis_cache import cache_hit_rate
+
+        original = routes._run_analysis
+        calls = []
+
+        def slow_run(*args, **kwargs):
+            calls.append(1)
+            time.sleep(0.3)
+            return original(*args, **kwargs)
+
+        body = json.dumps(
+            {
+                "url": "https://www.leboncoin.fr/ad/voitures/777000999",
+                "next_data": VALID_AD_NEXT_DATA,
+            }
+        )
+        results = []
+
+        def post():
+            resp = app.test_client().post(
+                "/api/analyze", data=body, content_type="application/json"
+            )
+            results.append(resp.get_json()["data"])
+
+        before = cache_hit_rate()["coalesced"]
+        with patch("app.api.routes._run_analysis", side_effect=slow_run):
+            threads = [threading.Thread(target=post) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(calls) == 1
+        assert len({r["scan_id"] for r in results}) == 1
+        assert sorted(r["cached"] for r in results) == [False, True, True]
+        assert cache_hit_rate()["coalesced"] - before == 2
@@ -0,0 +1,148 @@
+"""Tests for POST /api/analyze/batch (pages de resultats de recherche)."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db as _db
+from app.models.filter_result import FilterResultDB
+from app.models.scan import ScanLog
+from app.services.market_service import prefetch_market_prices
+
+
+@pytest.fixture(autouse=True)
+def _tables(db):
+    """Recree les tables : test_analyze_ad_data les supprime en fin de test."""
+    yield
+
+
+def _ad(model="Batchcar", price=15000, **extra):
+    ad = {
+        "title": f"Renault {model}",
+        "price_eur": price,
+        "make": "Renault",
+        "model": model,
+        "year_model": "2019",
+        "mileage_km": 60000,
+        "fuel": "Diesel",
+        "gearbox": "Manuelle",
+        "power_din_hp": 110,
+        "location": {"city": "Rennes", "region": "Bretagne"},
+        "owner_type": "private",
+        "description": "Voiture bien entretenue, carnet a jour.",
+        "image_count": 8,
+        "has_phone": False,
+        "days_online": 3,
+    }
+    ad.update(extra)
+    return ad
+
+
+def _item(n, **kwargs):
+    return {
+        "url": f"https://www.autoscout24.fr/offres/batch-{n}",
+        "ad_data": _ad(**kwargs),
+        "source": "autoscout24",
+    }
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+class TestAnalyzeBatch:
+    def test_streams_one_line_per_item(self, app, client):
+        items = [_item(i, price=12000 + i * 1000) for i in range(4)]
+        resp = client.post("/api/analyze/batch", json={"items": items})
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+
+        lines = _lines(resp)
+        assert sorted(line["index"] for line in lines) == [0, 1, 2, 3]
+        with app.app_context():
+            for line in lines:
+                assert line["success"] is True
+                data = line["data"]
+                assert 0 <= data["score"] <= 100
+                assert len(data["filters"]) == 11
+                assert data["vehicle"]["price"] == 12000 + line["index"] * 1000
+                # Pas d'enrichissements dans un lot
+                assert data["featured_video"] is None
+                scan = _db.session.get(ScanLog, data["scan_id"])
+                assert scan.url == items[line["index"]]["url"]
+                assert scan.source == "autoscout24"
+                assert FilterResultDB.query.filter_by(scan_id=scan.id).count() == 11
+
+    def test_same_verdict_as_single_analyze(self, client):
+        item = _item("single", model="Parity")
+        single = client.post("/api/analyze", json=item).get_json()["data"]
+        (line,) = _lines(client.post("/api/analyze/batch", json={"items": [item]}))
+        batch = line["data"]
+        assert batch["score"] == single["score"]
+        assert batch["is_partial"] == single["is_partial"]
+        assert [(f["filter_id"], f["status"], f["score"]) for f in batch["filters"]] == [
+            (f["filter_id"], f["status"], f["score"]) for f in single["filters"]
+        ]
+
+    def test_rejected_item_does_not_stop_the_batch(self, client):
+        moto = {
+            "url": "https://www.leboncoin.fr/ad/motos/123456",
+            "ad_data": _ad(model="Motobatch"),
+            "source": "leboncoin",
+        }
+        lines = {
+            line["index"]: line
+            for line in _lines(
+                client.post("/api/analyze/batch", json={"items": [_item("ok"), moto]})
+            )
+        }
+        assert lines[0]["success"] is True
+        assert lines[1]["success"] is False
+        assert lines[1]["error"] == "NOT_SUPPORTED"
+
+    def test_market_prices_loaded_once(self, client):
+        items = [_item(f"grouped-{i}", model=f"Grouped{i % 2}") for i in range(6)]
+        with patch(
+            "app.api.routes.prefetch_market_prices", wraps=prefetch_market_prices
+        ) as prefetch:
+            lines = _lines(client.post("/api/analyze/batch", json={"items": items}))
+        assert len(lines) == 6
+        prefetch.assert_called_once()
+
+    def test_cached_verdict_is_reused(self, app, client):
+        item = _item("cached", model="Cachedbatch")
+        app.config["ANALYSIS_CACHE_TTL"] = 600
+        try:
+            first = client.post("/api/analyze", json=item).get_json()["data"]
+            with patch("app.api.routes._build_engine") as build:
+                (line,) = _lines(client.post("/api/analyze/batch", json={"items": [item]}))
+            build.assert_not_called()
+        finally:
+            app.config["ANALYSIS_CACHE_TTL"] = 0
+        assert line["data"]["cached"] is True
+        assert line["data"]["scan_id"] == first["scan_id"]
+
+
+class TestAnalyzeBatchValidation:
+    def test_no_json_body_returns_400(self, client):
+        resp = client.post("/api/analyze/batch", data="nope")
+        assert resp.status_code == 400
+
+    def test_empty_batch_returns_400(self, client):
+        resp = client.post("/api/analyze/batch", json={"items": []})
+        assert resp.status_code == 400
+        assert resp.get_json()["error"] == "VALIDATION_ERROR"
+
+    def test_item_without_ad_data_returns_400(self, client):
+        resp = client.post("/api/analyze/batch", json={"items": [{"url": "https://x.fr/a"}]})
+        assert resp.status_code == 400
+
+    def test_too_many_items_returns_400(self, app, client):
+        app.config["ANALYZE_BATCH_MAX_ITEMS"] = 2
+        try:
+            resp = client.post("/api/analyze/batch", json={"items": [_item(i) for i in range(3)]})
+        finally:
+            app.config["ANALYZE_BATCH_MAX_ITEMS"] = 50
+        assert resp.status_code == 400
+        assert "2 annonces maximum" in resp.get_json()["message"]
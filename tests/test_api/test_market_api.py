@@ -1,5 +1,6 @@
 """Tests for POST /api/market-prices and GET /api/market-prices/next-job."""
 
+import gzip
 import json
 from datetime import datetime, timedelta, timezone
 
@@ -34,6 +35,25 @@ class TestMarketPricesAPI:
         assert data["success"] is True
         assert data["data"]["sample_count"] == 20
 
+    def test_submit_gzip_body(self, client):
+        """POST compresse (Content-Encoding: gzip) traite comme un POST JSON."""
+        body = {
+            "make": "Peugeot",
+            "model": "208",
+            "year": 2021,
+            "region": "Ile-de-France",
+            "prices": list(range(12000, 22000, 500)),
+            "precision": 4,
+        }
+        resp = client.post(
+            "/api/market-prices",
+            data=gzip.compress(json.dumps(body).encode()),
+            content_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+        assert resp.status_code == 200
+        assert resp.get_json()["data"]["sample_count"] == 20
+
     def test_submit_no_json_returns_400(self, client):
         """POST sans JSON retourne 400."""
         resp = client.post(
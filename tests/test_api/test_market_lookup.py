@@ -0,0 +1,114 @@
+"""Tests for POST /api/market-prices/lookup (prefetch de l'extension)."""
+
+import pytest
+
+from app.services.market_service import store_market_prices
+
+
+@pytest.fixture(autouse=True)
+def _tables(db):
+    """Recree les tables : test_analyze_ad_data les supprime en fin de test."""
+    yield
+
+
+def _seed(model="Lookupcar", year=2019, fuel="diesel", prices=None):
+    store_market_prices(
+        make="Renault",
+        model=model,
+        year=year,
+        region="Bretagne",
+        prices=prices or [13000 + i * 400 for i in range(10)],
+        fuel=fuel,
+    )
+
+
+def _query(model="Lookupcar", year=2019, **extra):
+    return {"make": "Renault", "model": model, "year": year, "region": "Bretagne", **extra}
+
+
+class TestMarketLookup:
+    def test_resolves_each_query_in_order(self, app, client):
+        with app.app_context():
+            _seed()
+        resp = client.post(
+            "/api/market-prices/lookup",
+            json={
+                "items": [
+                    _query(fuel="Diesel"),
+                    _query(model="Nolookup"),
+                    _query(year=2021, fuel="diesel"),
+                ]
+            },
+        )
+        assert resp.status_code == 200
+        items = resp.get_json()["data"]["items"]
+        assert len(items) == 3
+
+        exact, missing, approx = items
+        assert exact["stats"]["year"] == 2019
+        assert exact["stats"]["fuel"] == "diesel"
+        assert exact["stats"]["n"] == 10
+        assert exact["stats"]["median"] is not None
+        assert missing["stats"] is None
+        assert missing["etag"]
+        # Annee la plus proche (+-3 ans), comme get_market_stats
+        assert approx["stats"]["year"] == 2019
+        assert approx["etag"] == exact["etag"]
+
+    def test_unchanged_item_omits_stats(self, app, client):
+        with app.app_context():
+            _seed(model="Etagcar")
+        first = client.post("/api/market-prices/lookup", json={"items": [_query("Etagcar")]})
+        (item,) = first.get_json()["data"]["items"]
+
+        again = client.post(
+            "/api/market-prices/lookup", json={"items": [_query("Etagcar", etag=item["etag"])]}
+        )
+        (cached,) = again.get_json()["data"]["items"]
+        assert cached == {"etag": item["etag"], "unchanged": True, "stats": None}
+
+        with app.app_context():
+            _seed(model="Etagcar", prices=[20000 + i * 400 for i in range(10)])
+        refreshed = client.post(
+            "/api/market-prices/lookup", json={"items": [_query("Etagcar", etag=item["etag"])]}
+        )
+        (changed,) = refreshed.get_json()["data"]["items"]
+        assert changed["unchanged"] is False
+        assert changed["etag"] != item["etag"]
+        assert changed["stats"]["median"] > item["stats"]["median"]
+
+    def test_if_none_match_returns_304(self, app, client):
+        with app.app_context():
+            _seed(model="Condcar")
+        body = {"items": [_query("Condcar"), _query("Condmissing")]}
+        first = client.post("/api/market-prices/lookup", json=body)
+        etag = first.headers["ETag"]
+        assert etag
+        assert "no-cache" in first.headers["Cache-Control"]
+
+        second = client.post(
+            "/api/market-prices/lookup", json=body, headers={"If-None-Match": etag}
+        )
+        assert second.status_code == 304
+        assert second.get_data() == b""
+        assert second.headers["ETag"] == etag
+
+
+class TestMarketLookupValidation:
+    def test_no_json_body_returns_400(self, client):
+        resp = client.post("/api/market-prices/lookup", data="nope")
+        assert resp.status_code == 400
+
+    def test_invalid_year_returns_400(self, client):
+        resp = client.post("/api/market-prices/lookup", json={"items": [_query(year=1900)]})
+        assert resp.status_code == 400
+        assert "items.0.year" in resp.get_json()["message"]
+
+    def test_too_many_items_returns_400(self, app, client):
+        app.config["MARKET_LOOKUP_MAX_ITEMS"] = 2
+        try:
+            resp = client.post("/api/market-prices/lookup", json={"items": [_query()] * 3})
+        finally:
+            app.config["MARKET_LOOKUP_MAX_ITEMS"] = 200
+        assert resp.status_code == 400
+        assert "2 maximum" in resp.get_json()["message"]
@@ -0,0 +1,114 @@
+"""Tests for GET /api/referential/snapshot (copie locale du referentiel)."""
+
+import gzip
+
+import orjson
+import pytest
+
+from app.extensions import db as _db
+from app.models.vehicle import Vehicle
+from app.services import referential_snapshot
+
+
+@pytest.fixture(autouse=True)
+def _tables(db):
+    """Recree les tables : test_analyze_ad_data les supprime en fin de test."""
+    # Les ids du journal repartent de zero quand les tables sont recreees
+    referential_snapshot._full_snapshot = None
+    yield
+
+
+def _snapshot(client, since=None, **headers):
+    query = f"?since={since}" if since else ""
+    return client.get(f"/api/referential/snapshot{query}", headers=headers)
+
+
+def _body(resp):
+    data = resp.get_data()
+    if resp.headers.get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    return orjson.loads(data)
+
+
+def _add_vehicle(app, model, **fields):
+    with app.app_context():
+        vehicle = Vehicle(brand="Refmake", model=model, year_start=2015, year_end=2022, **fields)
+        _db.session.add(vehicle)
+        _db.session.commit()
+        return vehicle.id
+
+
+class TestReferentialSnapshot:
+    def test_full_snapshot(self, app, client):
+        vehicle_id = _add_vehicle(app, "Full", site_brand_token="REFMAKE")
+        resp = _snapshot(client, **{"Accept-Encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        body = _body(resp)
+
+        assert body["full"] is True
+        assert body["version"] == resp.headers["X-Referential-Version"]
+        assert body["brand_aliases"]["vw"] == "volkswagen"
+        assert body["brand_display"]["bmw"] == "BMW"
+        entry = next(v for v in body["vehicles"] if v["id"] == vehicle_id)
+        assert entry["site_brand_token"] == "REFMAKE"
+        assert (entry["year_start"], entry["year_end"]) == (2015, 2022)
+        assert entry["brand_key"] == "refmake"
+
+    def test_delta_since_known_version(self, app, client):
+        kept_id = _add_vehicle(app, "Kept")
+        removed_id = _add_vehicle(app, "Removed")
+        version = _body(_snapshot(client))["version"]
+
+        added_id = _add_vehicle(app, "Added")
+        with app.app_context():
+            _db.session.get(Vehicle, kept_id).as24_slug_model = "kept"
+            _db.session.delete(_db.session.get(Vehicle, removed_id))
+            _db.session.commit()
+
+        body = _body(_snapshot(client, since=version))
+        assert body["full"] is False
+        assert body["since"] == version
+        assert "brand_aliases" not in body
+        assert {v["id"] for v in body["vehicles"]} == {kept_id, added_id}
+        kept = next(v for v in body["vehicles"] if v["id"] == kept_id)
+        assert kept["as24_slug_model"] == "kept"
+        assert body["removed"] == [removed_id]
+
+        # Deja a jour : delta vide
+        up_to_date = _body(_snapshot(client, since=body["version"]))
+        assert up_to_date["vehicles"] == [] and up_to_date["removed"] == []
+
+    def test_unknown_or_foreign_version_gets_full_snapshot(self, client):
+        assert _body(_snapshot(client, since="deadbeef.1"))["full"] is True
+        assert _body(_snapshot(client, since="garbage"))["full"] is True
+
+    def test_if_none_match_returns_304(self, app, client):
+        _add_vehicle(app, "Cond")
+        first = _snapshot(client)
+        etag = first.headers["ETag"]
+        assert etag.startswith("W/")
+
+        second = _snapshot(client, **{"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.get_data() == b""
+
+        _add_vehicle(app, "Condnew")
+        assert _snapshot(client, **{"If-None-Match": etag}).status_code == 200
+
+
+class TestNextJobWithReferential:
+    def test_tokens_skipped_when_extension_has_referential(self, app, client):
+        _add_vehicle(app, "Tokens", site_brand_token="REFMAKE", site_model_token="Tokens")
+        params = "make=Refmake&model=Tokens&year=2019&region=Bretagne"
+
+        legacy = client.get(f"/api/market-prices/next-job?{params}").get_json()["data"]
+        assert legacy["vehicle"]["site_brand_token"] == "REFMAKE"
+        assert "referential_version" not in legacy
+
+        version = _body(_snapshot(client))["version"]
+        synced = client.get(f"/api/market-prices/next-job?{params}&ref_version={version}")
+        data = synced.get_json()["data"]
+        assert data["collect"] is True
+        assert "site_brand_token" not in data["vehicle"]
+        assert data["referential_version"] == version
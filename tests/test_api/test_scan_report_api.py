@@ -1,22 +1,68 @@
 """Tests pour /api/scan-report."""
 
+import time
+from datetime import datetime
 from unittest.mock import patch
 
+import pytest
+
+from app.extensions import db as _db
+from app.models.email_draft import EmailDraft
+from app.models.filter_result import FilterResultDB
+from app.models.report_artifact import ReportArtifact
+from app.models.report_job import ReportJob
+from app.models.scan import ScanLog
+from app.services import report_artifact_service
+from app.services.report_html_service import scan_report_fingerprint
+
+_RENDER = "app.services.report_html_service.generate_scan_report_pdf"
+
+
+@pytest.fixture(autouse=True)
+def _tables(db):
+    """Recree les tables : test_analyze_ad_data les supprime en fin de test."""
+    yield
+
+
+@pytest.fixture()
+def scan_id(app):
+    with app.app_context():
+        scan = ScanLog(
+            url="https://www.leboncoin.fr/voitures/report.htm",
+            score=64,
+            vehicle_make="Peugeot",
+            vehicle_model="308",
+            price_eur=13900,
+            raw_data={"year": 2018, "fuel": "Diesel"},
+        )
+        _db.session.add(scan)
+        _db.session.flush()
+        _db.session.add(
+            FilterResultDB(scan_id=scan.id, filter_id="L1", status="pass", score=1.0, message="ok")
+        )
+        _db.session.commit()
+        return scan.id
+
+
+@pytest.fixture()
+def artifact_cache(app):
+    app.config["REPORT_ARTIFACT_CACHE"] = True
+    yield
+    app.config["REPORT_ARTIFACT_CACHE"] = False
+
 
 class TestScanReportApi:
-    def test_returns_pdf_when_generation_succeeds(self, app, client):
+    def test_returns_pdf_when_generation_succeeds(self, app, client, scan_id):
         """POST /api/scan-report retourne un PDF telechargeable."""
         with app.app_context():
-            with patch(
-                "app.services.report_html_service.generate_scan_report_pdf",
-                return_value=b"%PDF-1.4\nmock\n",
-            ):
-                resp = client.post("/api/scan-report", json={"scan_id": 42})
+            with patch(_RENDER, return_value=b"%PDF-1.4\nmock\n"):
+                resp = client.post("/api/scan-report", json={"scan_id": scan_id})
 
         assert resp.status_code == 200
         assert resp.headers["Content-Type"].startswith("application/pdf")
-        assert "okazcar-rapport-42.pdf" in resp.headers["Content-Disposition"]
+        assert f"okazcar-rapport-{scan_id}.pdf" in resp.headers["Content-Disposition"]
         assert resp.data.startswith(b"%PDF-")
+        assert resp.headers["ETag"]
 
     def test_returns_400_without_scan_id(self, app, client):
         """POST /api/scan-report sans scan_id retourne 400."""
@@ -31,12 +77,156 @@ class TestScanReportApi:
     def test_returns_404_for_unknown_scan(self, app, client):
         """POST /api/scan-report retourne 404 si le scan n'existe pas."""
         with app.app_context():
-            with patch(
-                "app.services.report_html_service.generate_scan_report_pdf",
-                side_effect=ValueError("Scan introuvable: 99999"),
-            ):
-                resp = client.post("/api/scan-report", json={"scan_id": 99999})
+            resp = client.post("/api/scan-report", json={"scan_id": 99999})
 
         assert resp.status_code == 404
         data = resp.get_json()
         assert data["error"] == "NOT_FOUND"
+
+
+class TestScanReportCache:
+    def test_repeat_download_is_not_rendered_again(self, app, client, scan_id, artifact_cache):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nfirst\n") as render:
+            first = client.post("/api/scan-report", json={"scan_id": scan_id})
+            second = client.post("/api/scan-report", json={"scan_id": scan_id})
+        assert render.call_count == 1
+        assert second.data == first.data == b"%PDF-1.4\nfirst\n"
+        assert second.headers["ETag"] == first.headers["ETag"]
+        with app.app_context():
+            artifact = ReportArtifact.query.filter_by(scan_id=scan_id).one()
+            assert artifact.served_count == 1
+
+    def test_if_none_match_returns_304(self, client, scan_id):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nmock\n") as render:
+            etag = client.post("/api/scan-report", json={"scan_id": scan_id}).headers["ETag"]
+            resp = client.post(
+                "/api/scan-report", json={"scan_id": scan_id}, headers={"If-None-Match": etag}
+            )
+        assert resp.status_code == 304
+        assert resp.data == b""
+        assert render.call_count == 1
+
+    def test_new_email_draft_invalidates_the_report(self, app, client, scan_id, artifact_cache):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nv1\n"):
+            first = client.post("/api/scan-report", json={"scan_id": scan_id})
+        with app.app_context():
+            _db.session.add(
+                EmailDraft(
+                    scan_id=scan_id,
+                    listing_url="https://www.leboncoin.fr/voitures/report.htm",
+                    prompt_used="p",
+                    generated_text="Bonjour, le vehicule est-il disponible ?",
+                    llm_model="test",
+                )
+            )
+            _db.session.commit()
+        with patch(_RENDER, return_value=b"%PDF-1.4\nv2\n") as render:
+            second = client.post(
+                "/api/scan-report",
+                json={"scan_id": scan_id},
+                headers={"If-None-Match": first.headers["ETag"]},
+            )
+        assert second.status_code == 200
+        assert second.data == b"%PDF-1.4\nv2\n"
+        render.assert_called_once()
+        with app.app_context():
+            # Seul le dernier rendu est garde
+            assert ReportArtifact.query.filter_by(scan_id=scan_id).count() == 1
+
+
+class TestScanReportJobs:
+    def _wait_done(self, client, status_url):
+        for _ in range(100):
+            data = client.get(status_url).get_json()["data"]
+            if data["status"] != "pending":
+                return data
+            time.sleep(0.02)
+        raise AssertionError("rendu jamais termine")
+
+    def test_request_poll_then_download(self, client, scan_id):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nasync\n") as render:
+            resp = client.post("/api/scan-report/jobs", json={"scan_id": scan_id})
+            assert resp.status_code in (200, 202)
+            job = resp.get_json()["data"]
+            assert job["job_id"].startswith(f"{scan_id}-")
+
+            assert self._wait_done(client, job["status_url"])["status"] == "done"
+            pdf = client.get(job["download_url"])
+        assert pdf.status_code == 200
+        assert pdf.data == b"%PDF-1.4\nasync\n"
+        assert pdf.headers["ETag"]
+        render.assert_called_once()
+
+    def test_failed_render_is_reported(self, client, scan_id):
+        with patch(_RENDER, side_effect=RuntimeError("moteur indisponible")):
+            job = client.post("/api/scan-report/jobs", json={"scan_id": scan_id}).get_json()
+            data = self._wait_done(client, job["data"]["status_url"])
+            pdf = client.get(job["data"]["download_url"])
+        assert data["status"] == "error"
+        assert "moteur indisponible" in data["error"]
+        assert pdf.status_code == 500
+
+    def test_other_worker_reads_job_state_from_db(self, client, scan_id, artifact_cache):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nautre worker\n"):
+            job = client.post("/api/scan-report/jobs", json={"scan_id": scan_id}).get_json()
+            self._wait_done(client, job["data"]["status_url"])
+        # Polling sur un worker qui n'a pas lance le rendu
+        report_artifact_service._jobs.clear()
+        data = client.get(job["data"]["status_url"]).get_json()["data"]
+        pdf = client.get(job["data"]["download_url"])
+        assert data["status"] == "done"
+        assert pdf.status_code == 200
+        assert pdf.data == b"%PDF-1.4\nautre worker\n"
+
+    def test_stored_render_is_not_kept_in_memory(self, client, scan_id, artifact_cache):
+        with patch(_RENDER, return_value=b"%PDF-1.4\nen base\n"):
+            job = client.post("/api/scan-report/jobs", json={"scan_id": scan_id}).get_json()
+            self._wait_done(client, job["data"]["status_url"])
+        local = report_artifact_service._jobs[job["data"]["job_id"]]
+        fingerprint, pdf_bytes = local.future.result()
+        assert pdf_bytes is None
+        pdf = client.get(job["data"]["download_url"])
+        assert pdf.data == b"%PDF-1.4\nen base\n"
+        assert pdf.headers["ETag"] == f'"{fingerprint}"'
+
+    def test_pending_job_elsewhere_never_serves_older_pdf(self, app, client, scan_id):
+        _db.session.add(
+            ReportArtifact(scan_id=scan_id, fingerprint="0" * 64, content=b"%PDF ancien")
+        )
+        job_id = report_artifact_service.report_job_id(scan_id, scan_report_fingerprint(scan_id))
+        _db.session.add(ReportJob(job_id=job_id, scan_id=scan_id, status="pending"))
+        _db.session.commit()
+
+        status = client.get(f"/api/scan-report/jobs/{job_id}").get_json()["data"]
+        pdf = client.get(f"/api/scan-report/jobs/{job_id}/pdf")
+        with patch(_RENDER) as render:
+            resp = client.post("/api/scan-report/jobs", json={"scan_id": scan_id})
+        assert status["status"] == "pending"
+        assert pdf.status_code == 409
+        # Rendu deja en cours sur l'autre worker : pas de second rendu
+        assert resp.status_code == 202
+        render.assert_not_called()
+
+    def test_stale_pending_job_is_reported_as_error(self, app, client, scan_id):
+        job_id = f"{scan_id}-{'f' * 16}"
+        _db.session.add(
+            ReportJob(
+                job_id=job_id,
+                scan_id=scan_id,
+                status="pending",
+                updated_at=datetime(2020, 1, 1),
+            )
+        )
+        _db.session.commit()
+
+        data = client.get(f"/api/scan-report/jobs/{job_id}").get_json()["data"]
+        assert data["status"] == "error"
+        assert client.get(f"/api/scan-report/jobs/{job_id}/pdf").status_code == 500
+
+    def test_unknown_job_returns_404(self, client):
+        assert client.get("/api/scan-report/jobs/999999-deadbeef").status_code == 404
+        assert client.get("/api/scan-report/jobs/999999-deadbeef/pdf").status_code == 404
+
+    def test_unknown_scan_returns_404(self, client):
+        resp = client.post("/api/scan-report/jobs", json={"scan_id": 999999})
+        assert resp.status_code == 404
@@ -1,5 +1,7 @@
 """Tests for FilterEngine."""
 
+import contextvars
+
 from app.errors import FilterError
 from app.filters.base import BaseFilter, FilterResult
 from app.filters.engine import FilterEngine
@@ -78,3 +80,73 @@ class TestFilterEngine:
         results = engine.run_all({})
         ids = [r.filter_id for r in results]
         assert ids == ["T1", "T2", "T3"]
+
+
+_batch_tag: contextvars.ContextVar[str] = contextvars.ContextVar("batch_tag", default="none")
+
+
+class EchoFilter(BaseFilter):
+    """Renvoie l'id de l'annonce et la valeur du contextvar du thread appelant."""
+
+    filter_id = "T4"
+
+    def run(self, data):
+        return FilterResult(
+            filter_id=self.filter_id,
+            status="pass",
+            score=1.0,
+            message=f"{data['id']}:{_batch_tag.get()}",
+        )
+
+
+class TestRunMany:
+    def test_one_result_list_per_item(self):
+        engine = FilterEngine()
+        engine.register(ErrorFilter())
+        engine.register(EchoFilter())
+        engine.register(PassFilter())
+        items = [{"id": i} for i in range(5)]
+        out = dict(engine.run_many(items, max_workers=3))
+        assert sorted(out) == [0, 1, 2, 3, 4]
+        for index, results in out.items():
+            assert [r.filter_id for r in results] == ["T1", "T3", "T4"]
+            assert results[1].status == "skip"
+            assert results[2].message.startswith(f"{index}:")
+
+    def test_caller_context_reaches_filter_threads(self):
+        engine = FilterEngine()
+        engine.register(EchoFilter())
+        token = _batch_tag.set("lot-42")
+        try:
+            out = dict(engine.run_many([{"id": 0}, {"id": 1}]))
+            single = engine.run_all({"id": 2})
+        finally:
+            _batch_tag.reset(token)
+        assert out[0][0].message == "0:lot-42"
+        assert single[0].message == "2:lot-42"
+
+    def test_empty_batch(self):
+        engine = FilterEngine()
+        engine.register(PassFilter())
+        assert list(engine.run_many([])) == []
+
+
+class NetworkFilter(BaseFilter):
+    filter_id = "T5"
+
+    def run(self, data):
+        raise AssertionError("ne doit pas tourner en mode rapide")
+
+
+class LocalFilter(PassFilter):
+    quick_safe = True
+
+
+class TestRunQuick:
+    def test_only_quick_safe_filters_run(self):
+        engine = FilterEngine()
+        engine.register(NetworkFilter())
+        engine.register(LocalFilter())
+        results = engine.run_quick({})
+        assert [(r.filter_id, r.status) for r in results] == [("T1", "pass"), ("T5", "neutral")]
+        assert results[1].details == {"quick_skipped": True}
@@ -6,6 +6,7 @@ import numpy as np
 
 from app.filters.l5_visual import L5VisualFilter
 from app.models.vehicle import Vehicle
+from app.services.price_sketch import PriceSketch
 
 
 class TestL5VisualFilter:
@@ -93,7 +94,7 @@ class TestL5MarketPriceFallback:
 
     def test_uses_market_price_when_available(self):
         """L5 utilise MarketPrice quand disponible avec assez de samples."""
-        market_ref = np.array([15000, 18000, 21000], dtype=float)
+        market_ref = PriceSketch.from_values([15000, 18000, 21000])
 
         with patch.object(L5VisualFilter, "_collect_market_prices", return_value=market_ref):
             result = self.filt.run(
@@ -111,7 +112,7 @@ class TestL5MarketPriceFallback:
 
     def test_market_price_works_without_vehicle_referentiel(self):
         """L5 utilise MarketPrice meme si le vehicule n'est pas dans le referentiel."""
-        market_ref = np.array([55000, 60000, 65000, 58000, 62000], dtype=float)
+        market_ref = PriceSketch.from_values([55000, 60000, 65000, 58000, 62000])
 
         with (
             patch.object(L5VisualFilter, "_collect_market_prices", return_value=market_ref),
@@ -154,7 +155,7 @@ class TestL5HpRange:
 
     def test_hp_range_in_details(self):
         """Le hp_range utilise doit apparaitre dans les details du filtre."""
-        market_ref = np.array([30000, 35000, 40000], dtype=float)
+        market_ref = PriceSketch.from_values([30000, 35000, 40000])
         filt = L5VisualFilter()
         with patch.object(L5VisualFilter, "_collect_market_prices", return_value=market_ref):
             result = filt.run(
@@ -169,7 +170,7 @@ class TestL5HpRange:
 
     def test_hp_range_none_in_details_when_no_hp(self):
         """Sans puissance, hp_range doit etre None."""
-        market_ref = np.array([15000, 18000, 21000], dtype=float)
+        market_ref = PriceSketch.from_values([15000, 18000, 21000])
         filt = L5VisualFilter()
         with patch.object(L5VisualFilter, "_collect_market_prices", return_value=market_ref):
             result = filt.run(
@@ -180,3 +181,52 @@ class TestL5HpRange:
                 }
             )
         assert result.details["hp_range"] is None
+
+
+class TestL5MarketSnapshot:
+    """Lot d'annonces : memes references depuis l'instantane que depuis la base."""
+
+    def test_snapshot_matches_database(self, app):
+        from app.services.market_service import (
+            prefetch_market_prices,
+            store_market_prices,
+            use_market_snapshot,
+        )
+
+        with app.app_context():
+            for year, fuel, hp_range, base in (
+                (2019, "diesel", "100-150", 20000),
+                (2019, "diesel", None, 21000),
+                (2020, "essence", None, 18000),
+                (2018, None, "70-120", 15000),
+            ):
+                store_market_prices(
+                    make="L5snap",
+                    model="Refmodel",
+                    year=year,
+                    region="Bretagne",
+                    prices=[base + i * 500 for i in range(5)],
+                    fuel=fuel,
+                    hp_range=hp_range,
+                )
+            ads = [
+                {
+                    "make": "L5snap",
+                    "model": "Refmodel",
+                    "year_model": "2019",
+                    "location": {"region": "Bretagne"},
+                    "fuel": fuel,
+                    "power_din_hp": hp,
+                }
+                for fuel in (None, "Diesel", "essence", "electrique")
+                for hp in (None, 130, 90)
+            ]
+
+            def collect():
+                refs = [L5VisualFilter._collect_market_prices(ad, 3) for ad in ads]
+                return [(r.count, r.median) if r is not None else None for r in refs]
+
+            expected = collect()
+            with use_market_snapshot(prefetch_market_prices([("L5snap", "Refmodel")])):
+                assert collect() == expected
+            assert any(r is not None for r in expected)
@@ -0,0 +1,75 @@
+"""Tests du moteur de signaux texte partage (automate de mots-cles + trie de prefixes)."""
+
+from app.filters.l8_reputation import scan_import_keywords
+from app.filters.text_signals import KeywordMatcher, PrefixTrie
+
+
+class TestKeywordMatcher:
+    def test_finds_overlapping_keywords(self):
+        matcher = KeywordMatcher({"kw": ["etranger", "etrangere", "provenance", "en provenance"]})
+        hits = matcher.scan("vehicule etrangere en provenance d'ailleurs")
+        assert hits["kw"] == ["etranger", "etrangere", "provenance", "en provenance"]
+
+    def test_keyword_inside_longer_match_is_found(self):
+        matcher = KeywordMatcher({"kw": ["malus paye", "us pa"]})
+        assert matcher.scan("malus paye")["kw"] == ["malus paye", "us pa"]
+
+    def test_result_keeps_family_order(self):
+        matcher = KeywordMatcher({"kw": ["zeta", "alpha", "mid"]})
+        assert matcher.scan("alpha mid zeta")["kw"] == ["zeta", "alpha", "mid"]
+
+    def test_word_keywords_require_boundaries(self):
+        matcher = KeywordMatcher({"kw": ["import", "importation"]}, word_keywords={"import"})
+        assert matcher.scan("un point important")["kw"] == []
+        assert matcher.scan("vehicule d'import recent")["kw"] == ["import"]
+        assert matcher.scan("frais d'importation")["kw"] == ["importation"]
+
+    def test_keyword_shared_between_families(self):
+        matcher = KeywordMatcher({"a": ["coc"], "b": ["coc", "rti"]}, word_keywords={"coc", "rti"})
+        assert matcher.scan("certificat coc fourni") == {"a": ["coc"], "b": ["coc"]}
+
+    def test_empty_text_and_empty_families(self):
+        assert KeywordMatcher({"kw": ["x"]}).scan("") == {"kw": []}
+        assert KeywordMatcher({}).scan("anything") == {}
+
+    def test_regex_metacharacters_are_literal(self):
+        matcher = KeywordMatcher({"kw": ["c++", "a.b"]})
+        assert matcher.scan("langage c++ et axb")["kw"] == ["c++"]
+
+
+class TestL8Matchers:
+    def test_local_country_names_are_excluded(self):
+        text = "vehicule suisse en provenance d'allemagne"
+        assert scan_import_keywords(text, "FR")["countries"] == ["allemagne", "suisse"]
+        assert scan_import_keywords(text, "CH")["countries"] == ["allemagne"]
+
+    def test_local_vocabulary_is_excluded(self):
+        assert scan_import_keywords("fahrzeug unfallfrei", "DE")["foreign"] == []
+        assert scan_import_keywords("fahrzeug importiert", "DE")["foreign"] == ["importiert"]
+
+    def test_unknown_country_uses_default_matcher(self):
+        hits = scan_import_keywords("importée de france", "PL")
+        assert hits["import"] == ["importé"]
+
+    def test_long_description_single_pass(self):
+        filler = "entretien a jour carnet complet controle technique ok " * 200
+        text = f"{filler} importée d'allemagne plaque ww {filler} coc fourni"
+        assert len(text) > 5000
+        hits = scan_import_keywords(text, "FR")
+        assert hits["import"] == ["importé"]
+        assert hits["countries"] == ["allemagne"]
+        assert hits["reg_strong"] == ["plaque ww", "coc"]
+
+
+class TestPrefixTrie:
+    def test_longest_prefix_wins(self):
+        trie = PrefixTrie([("+3", "short"), ("+35", "mid"), ("+352", "long")])
+        assert trie.longest_prefix("+352621") == ("+352", "long")
+        assert trie.longest_prefix("+351") == ("+35", "mid")
+        assert trie.longest_prefix("+49") is None
+
+    def test_has_prefix(self):
+        trie = PrefixTrie((p, True) for p in ("0162", "09475"))
+        assert trie.has_prefix("0162123456")
+        assert not trie.has_prefix("0947")
+        assert not trie.has_prefix("")
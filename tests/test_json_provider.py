@@ -0,0 +1,53 @@
+"""Tests du provider JSON orjson (app/json_provider.py)."""
+
+import json
+import math
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+from flask import jsonify
+
+from app.json_provider import OrjsonProvider
+
+
+class TestOrjsonProvider:
+    def test_app_uses_orjson_provider(self, app):
+        assert isinstance(app.json, OrjsonProvider)
+
+    def test_numpy_and_dates_are_serialized(self, app):
+        with app.test_request_context():
+            resp = jsonify(
+                {
+                    "z": np.float64(1.5),
+                    "n": np.int64(3),
+                    "arr": np.array([1, 2]),
+                    "at": datetime(2024, 5, 1, 12, 30),
+                    "aware": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+                    "day": date(2024, 5, 1),
+                    "dec": Decimal("1.10"),
+                    1: "cle entiere",
+                }
+            )
+        assert resp.mimetype == "application/json"
+        assert json.loads(resp.get_data()) == {
+            "z": 1.5,
+            "n": 3,
+            "arr": [1, 2],
+            "at": "2024-05-01T12:30:00+00:00",
+            "aware": "2024-05-01T12:30:00+00:00",
+            "day": "2024-05-01",
+            "dec": "1.10",
+            "1": "cle entiere",
+        }
+
+    def test_same_output_as_default_provider_for_plain_data(self, app):
+        payload = {"b": [1, 2.5, None, True], "a": {"texte": "élevé", "nested": {"x": "y"}}}
+        assert app.json.dumps(payload) == json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+
+    def test_unsupported_values_fall_back_to_stdlib(self, app):
+        assert app.json.dumps({"big": 2**70}) == '{"big": 1180591620717411303424}'
+        assert app.json.dumps({"a": 1}, indent=2) == '{\n  "a": 1\n}'
+        assert math.isnan(app.json.loads(b'{"x": NaN}')["x"])
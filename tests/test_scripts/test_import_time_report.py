@@ -0,0 +1,60 @@
+"""Tests du rapport de temps d'import et budget de demarrage de create_app()."""
+
+import os
+
+import pytest
+
+from scripts.import_time_report import (
+    HEAVY_MODULES,
+    IMPORT_TIME_BUDGET_ENV,
+    IMPORT_TIME_BUDGET_MS,
+    measure,
+    parse_importtime,
+)
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:       300 |        420 |   encodings
+[2026-01-01 00:00:00] INFO in app: ligne de log ignoree
+import time:      2000 |       2000 |     numpy.core
+import time:      1500 |       3500 |   numpy
+import time:       500 |       4000 | app
+"""
+
+
+def test_parse_importtime_depths_and_totals() -> None:
+    entries = parse_importtime(SAMPLE)
+
+    assert [(e.name, e.depth) for e in entries] == [
+        ("_io", 2),
+        ("encodings", 1),
+        ("numpy.core", 2),
+        ("numpy", 1),
+        ("app", 0),
+    ]
+    assert entries[-1].cumulative_us == 4000
+
+
+def test_cold_create_app_skips_heavy_modules() -> None:
+    report = measure("testing")
+
+    assert report.entries, "sortie -X importtime vide"
+    assert report.heavy_loaded == [], (
+        f"dependances lourdes importees par create_app() : {report.heavy_loaded} "
+        f"(a importer dans les fonctions qui les utilisent ; voir {HEAVY_MODULES})"
+    )
+
+
+@pytest.mark.skipif(
+    IMPORT_TIME_BUDGET_ENV not in os.environ,
+    reason=f"budget de temps d'import verifie seulement si {IMPORT_TIME_BUDGET_ENV} est defini",
+)
+def test_cold_create_app_stays_within_import_budget() -> None:
+    report = measure("testing")
+
+    assert report.total_ms <= IMPORT_TIME_BUDGET_MS, (
+        f"create_app() importe en {report.total_ms:.0f} ms "
+        f"(budget {IMPORT_TIME_BUDGET_MS:.0f} ms) : "
+        f"{report.top_packages(5)}"
+    )
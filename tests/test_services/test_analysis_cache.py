@@ -0,0 +1,149 @@
+"""Tests du cache des verdicts /api/analyze (app/services/analysis_cache.py)."""
+
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.scan import ScanLog
+from app.services import analysis_cache
+
+AD = {
+    "make": "Cachemake",
+    "model": "Cachemodel",
+    "price_eur": 12000,
+    "mileage_km": 80000,
+    "days_online": 3,
+    "country": "FR",
+}
+URL = "https://www.leboncoin.fr/ad/voitures/987654321"
+
+
+def _scan() -> ScanLog:
+    scan = ScanLog(url=URL, score=70, vehicle_make=AD["make"], vehicle_model=AD["model"])
+    db.session.add(scan)
+    db.session.flush()
+    return scan
+
+
+class TestFingerprint:
+    def test_stable_across_url_variants_and_same_week(self, app):
+        fp = analysis_cache.analysis_fingerprint(AD, URL, "leboncoin")
+        assert fp == analysis_cache.analysis_fingerprint(
+            {**AD, "days_online": 5},
+            "https://leboncoin.fr/ad/voitures/987654321/?utm=x#photos",
+            "leboncoin",
+        )
+
+    def test_verdict_inputs_change_the_key(self, app):
+        fp = analysis_cache.analysis_fingerprint(AD, URL, "leboncoin")
+        for changed in ({"price_eur": 11500}, {"mileage_km": 81000}, {"days_online": 10}):
+            assert analysis_cache.analysis_fingerprint({**AD, **changed}, URL, "leboncoin") != fp
+        assert analysis_cache.analysis_fingerprint(AD, URL, "autoscout24") != fp
+
+    def test_content_fields_cover_l1_fields(self):
+        from app.filters.l1_extraction import CRITICAL_FIELDS, SECONDARY_FIELDS
+
+        assert set(CRITICAL_FIELDS + SECONDARY_FIELDS) <= set(analysis_cache.CONTENT_FIELDS)
+
+    def test_client_content_changes_the_key(self, app):
+        # Meme URL, contenu soumis different : pas de verdict partage
+        fp = analysis_cache.analysis_fingerprint(AD, URL, "leboncoin")
+        for changed in (
+            {"description": "Moteur HS, vendu en l'etat"},
+            {"phone": "0899123456"},
+            {"owner_type": "pro"},
+            {"siret": "12345678900011"},
+            {"gearbox": "Automatique"},
+            {"color": "Rouge"},
+            {"location": {"zipcode": "75001"}},
+        ):
+            assert analysis_cache.analysis_fingerprint({**AD, **changed}, URL, "leboncoin") != fp
+        assert analysis_cache.analysis_fingerprint(
+            {**AD, "location": {"zipcode": "75001", "city": "Paris"}}, URL, "leboncoin"
+        ) == analysis_cache.analysis_fingerprint(
+            {**AD, "location": {"city": "Paris", "zipcode": "75001"}}, URL, "leboncoin"
+        )
+
+    def test_unidentifiable_listing_is_not_cached(self, app):
+        assert analysis_cache.analysis_fingerprint(AD, None, "leboncoin") is None
+        assert analysis_cache.analysis_fingerprint(AD, "https://x.fr/", "leboncoin") is None
+        assert analysis_cache.analysis_fingerprint({**AD, "list_id": 42}, None, "leboncoin")
+
+
+class TestStoreAndLookup:
+    def test_roundtrip_expiry_and_model_invalidation(self, app):
+        scan = _scan()
+        fp = analysis_cache.analysis_fingerprint(AD, URL, "leboncoin")
+        analysis_cache.store_analysis(fp, AD, scan.id, 70, False, {"score": 70}, ttl_seconds=60)
+        db.session.commit()
+
+        entry = analysis_cache.lookup_analysis(fp)
+        assert entry.scan_id == scan.id
+        assert entry.get_response() == {"score": 70}
+
+        entry.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert analysis_cache.lookup_analysis(fp) is None
+        db.session.expunge(entry)
+
+        analysis_cache.store_analysis(fp, AD, scan.id, 70, False, {"score": 70}, ttl_seconds=60)
+        assert analysis_cache.invalidate_model("CACHEMAKE", "cachemodel") == 1
+        db.session.commit()
+        assert AnalysisCacheEntry.query.filter_by(fingerprint=fp).first() is None
+
+    def test_hit_rate_counts_lookups(self, app):
+        before = analysis_cache.cache_hit_rate()
+        scan = _scan()
+        fp = analysis_cache.analysis_fingerprint({**AD, "list_id": "hr"}, None, "leboncoin")
+        analysis_cache.store_analysis(fp, AD, scan.id, 70, False, {}, ttl_seconds=60)
+        analysis_cache.record_lookup(None)
+        analysis_cache.record_lookup(analysis_cache.lookup_analysis(fp))
+        analysis_cache.record_lookup(analysis_cache.lookup_analysis(fp))
+        db.session.commit()
+
+        after = analysis_cache.cache_hit_rate()
+        assert after["hits"] - before["hits"] == 2
+        assert after["misses"] - before["misses"] == 1
+        assert AnalysisCacheEntry.query.filter_by(fingerprint=fp).one().hit_count == 2
+
+
+class TestCrossWorkerLock:
+    def test_lock_is_exclusive_until_released_or_expired(self, app):
+        fp = "lock-" + "a" * 59
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=30) is True
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=30) is False
+        analysis_cache.release_lock(fp)
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=-1) is True
+        # Verrou expire (leader mort) : repris par le suivant
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=30) is True
+        analysis_cache.release_lock(fp)
+
+    def test_wait_for_verdict(self, app):
+        fp = "wait-" + "b" * 59
+        assert analysis_cache.wait_for_verdict(fp, timeout=1) is None
+
+        scan = _scan()
+        db.session.commit()
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=30)
+        analysis_cache.store_analysis(fp, AD, scan.id, 55, True, {"score": 55}, ttl_seconds=60)
+        db.session.commit()
+        verdict = analysis_cache.wait_for_verdict(fp, timeout=1)
+        assert verdict == analysis_cache.Verdict(scan.id, 55, True, {"score": 55})
+        analysis_cache.release_lock(fp)
+
+    def test_wait_for_verdict_keeps_caller_session(self, app):
+        fp = "keep-" + "c" * 59
+        scan = _scan()
+        db.session.commit()
+        assert analysis_cache.acquire_lock(fp, ttl_seconds=30)
+        analysis_cache.store_analysis(fp, AD, scan.id, 70, False, {"score": 70}, ttl_seconds=60)
+        db.session.commit()
+
+        pending = ScanLog(url=URL, score=1)
+        db.session.add(pending)
+        verdict = analysis_cache.wait_for_verdict(fp, timeout=1)
+        assert verdict.score == 70
+        # Ecriture en attente de l'appelant : ni annulee ni commitee
+        assert pending in db.session.new
+        db.session.rollback()
+        analysis_cache.release_lock(fp)
@@ -0,0 +1,212 @@
+"""Tests pour la table materialisee vehicule + carburant -> fiabilite moteur."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db
+from app.models.engine_reliability import EngineReliability
+from app.models.observed_motorization import ObservedMotorization
+from app.models.vehicle import Vehicle, VehicleSpec
+from app.models.vehicle_reliability_map import VehicleReliabilityMap
+from app.services.engine_reliability_service import (
+    get_engine_reliability,
+    lookup_vehicle_reliability,
+    rebuild_vehicle_reliability_map,
+)
+from app.services.motorization_service import enrich_observed_motorizations
+from app.services.vehicle_factory import auto_create_vehicle
+
+
+@pytest.fixture()
+def _rel_vehicle(app):
+    """Vehicule de test avec une spec diesel et une spec essence, plus deux moteurs connus."""
+    with app.app_context():
+        v = Vehicle.query.filter_by(brand="TestRel", model="Matcher").first()
+        if not v:
+            v = Vehicle(brand="TestRel", model="Matcher", year_start=2015)
+            db.session.add(v)
+            db.session.commit()
+
+        VehicleReliabilityMap.query.filter_by(vehicle_id=v.id).delete()
+        ObservedMotorization.query.filter_by(vehicle_id=v.id).delete()
+        VehicleSpec.query.filter_by(vehicle_id=v.id).delete()
+        EngineReliability.query.filter(EngineReliability.brand == "TestRel").delete()
+        db.session.commit()
+
+        db.session.add_all(
+            [
+                VehicleSpec(vehicle_id=v.id, fuel_type="Diesel", engine="2.0 ZZDiesel 150"),
+                VehicleSpec(vehicle_id=v.id, fuel_type="Essence", engine="1.2 ZZPetrol 110"),
+                EngineReliability(
+                    engine_code="ZZDiesel",
+                    brand="TestRel",
+                    fuel_type="Diesel",
+                    score=4.5,
+                    match_patterns="ZZDiesel",
+                ),
+                EngineReliability(
+                    engine_code="ZZPetrol",
+                    brand="TestRel",
+                    fuel_type="Essence",
+                    score=2.0,
+                    match_patterns="ZZPetrol",
+                ),
+            ]
+        )
+        db.session.commit()
+        return v.id
+
+
+class TestRebuildAndLookup:
+    def test_exact_fuel_uses_matching_spec(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            data = lookup_vehicle_reliability(_rel_vehicle, "essence")
+            assert data["matched"] is True
+            assert data["engine_code"] == "ZZPetrol"
+            assert data["score"] == 2.0
+
+    def test_fuel_is_case_insensitive(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert lookup_vehicle_reliability(_rel_vehicle, " Diesel ")["engine_code"] == "ZZDiesel"
+
+    def test_unknown_fuel_falls_back_to_first_spec(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert (
+                lookup_vehicle_reliability(_rel_vehicle, "hydrogene")["engine_code"] == "ZZDiesel"
+            )
+            assert lookup_vehicle_reliability(_rel_vehicle, None)["engine_code"] == "ZZDiesel"
+
+    def test_fuel_outside_map_uses_substring_match(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            # Pas de ligne "hybride essence" : la spec Essence colle par sous-chaine
+            data = lookup_vehicle_reliability(_rel_vehicle, "Hybride Essence")
+            assert data["engine_code"] == "ZZPetrol"
+
+    def test_matches_live_algorithm(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            live = get_engine_reliability("1.2 ZZPetrol 110", "Essence")
+            assert lookup_vehicle_reliability(_rel_vehicle, "essence")["engine_code"] == (
+                live.engine_code
+            )
+
+    def test_spec_without_known_engine_is_unmatched(self, app, _rel_vehicle):
+        with app.app_context():
+            db.session.add(
+                VehicleSpec(vehicle_id=_rel_vehicle, fuel_type="GPL", engine="1.6 Mystery")
+            )
+            db.session.commit()
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert lookup_vehicle_reliability(_rel_vehicle, "gpl") == {"matched": False}
+
+    def test_spec_without_engine_name_returns_none(self, app, _rel_vehicle):
+        with app.app_context():
+            db.session.add(VehicleSpec(vehicle_id=_rel_vehicle, fuel_type="GNV", engine=None))
+            db.session.commit()
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert lookup_vehicle_reliability(_rel_vehicle, "gnv") is None
+
+    def test_vehicle_without_specs_returns_none(self, app, _rel_vehicle):
+        with app.app_context():
+            VehicleSpec.query.filter_by(vehicle_id=_rel_vehicle).delete()
+            db.session.commit()
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert lookup_vehicle_reliability(_rel_vehicle, "diesel") is None
+
+    def test_rebuild_is_idempotent(self, app, _rel_vehicle):
+        with app.app_context():
+            first = rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+            second = rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            assert first == second
+            assert VehicleReliabilityMap.query.filter_by(vehicle_id=_rel_vehicle).count() == first
+
+    def test_reliability_edit_is_picked_up_after_rebuild(self, app, _rel_vehicle):
+        with app.app_context():
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+
+            rel = EngineReliability.query.filter_by(engine_code="ZZPetrol").first()
+            rel.match_patterns = "NoLongerMatches"
+            rebuild_vehicle_reliability_map()
+            db.session.commit()
+
+            assert lookup_vehicle_reliability(_rel_vehicle, "essence") == {"matched": False}
+
+
+class TestPromotionRebuild:
+    def test_promoted_spec_is_added_to_map(self, app, _rel_vehicle):
+        with app.app_context():
+            VehicleSpec.query.filter_by(vehicle_id=_rel_vehicle).delete()
+            db.session.commit()
+            rebuild_vehicle_reliability_map(_rel_vehicle)
+            db.session.commit()
+            assert lookup_vehicle_reliability(_rel_vehicle, "diesel") is None
+
+            details = [
+                {"fuel": "diesel", "gearbox": "manuelle", "horse_power": 150, "price": p}
+                for p in (10000, 11000, 12000)
+            ]
+            assert enrich_observed_motorizations(_rel_vehicle, details)
+
+            # Spec promue "Diesel 150ch Manuelle" : pas de pattern connu, mais bien presente
+            assert lookup_vehicle_reliability(_rel_vehicle, "diesel") == {"matched": False}
+
+
+class TestCreationRebuild:
+    def test_auto_created_vehicle_gets_reliability(self, app):
+        with app.app_context():
+            rel = EngineReliability(
+                engine_code="ZZAuto",
+                brand="TestAuto",
+                fuel_type="Diesel",
+                score=3.5,
+                match_patterns="ZZAuto",
+            )
+            db.session.add(rel)
+            db.session.commit()
+            csv_specs = [{"fuel_type": "Diesel", "engine": "2.0 ZZAuto 150", "year_from": 2016}]
+            vehicle = None
+            try:
+                with (
+                    patch(
+                        "app.services.vehicle_factory.can_auto_create",
+                        return_value={"eligible": True, "market_samples": 0},
+                    ),
+                    patch("app.services.vehicle_factory.lookup_specs", return_value=csv_specs),
+                ):
+                    vehicle = auto_create_vehicle("TestAuto", "Reliab")
+
+                data = lookup_vehicle_reliability(vehicle.id, "diesel")
+                assert data["matched"] is True
+                assert data["engine_code"] == "ZZAuto"
+            finally:
+                if vehicle is not None:
+                    VehicleReliabilityMap.query.filter_by(vehicle_id=vehicle.id).delete()
+                    VehicleSpec.query.filter_by(vehicle_id=vehicle.id).delete()
+                    db.session.delete(vehicle)
+                db.session.delete(rel)
+                db.session.commit()
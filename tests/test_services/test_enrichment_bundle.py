@@ -0,0 +1,197 @@
+"""Tests du bundle d'enrichissement /api/analyze (enrichment_bundle)."""
+
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db
+from app.models.engine_reliability import EngineReliability
+from app.models.enrichment_bundle import EnrichmentBundle
+from app.models.tire_size import TireSize
+from app.models.vehicle import Vehicle, VehicleSpec
+from app.models.vehicle_reliability_map import VehicleReliabilityMap
+from app.models.youtube import YouTubeVideo
+from app.services import enrichment_bundle, tire_service
+from app.services.engine_reliability_service import rebuild_vehicle_reliability_map
+from app.services.enrichment_bundle import get_enrichment, invalidate_vehicle
+from app.services.tire_service import flush_tire_requests, record_tire_request, store_tire_sizes
+
+MAKE, MODEL = "TestBundle", "Enrich"
+DIMS = [{"size": "205/55R16", "load_index": 91, "speed_index": "V", "is_stock": True}]
+
+
+@pytest.fixture()
+def bundle_vehicle(app):
+    """Vehicule avec spec diesel fiabilisee, video featured et pneus en cache."""
+    vehicle = Vehicle(brand=MAKE, model=MODEL, year_start=2015)
+    db.session.add(vehicle)
+    db.session.flush()
+    rel = EngineReliability(
+        engine_code="ZZBundle", brand=MAKE, fuel_type="Diesel", score=4.0, match_patterns="ZZBundle"
+    )
+    db.session.add_all(
+        [
+            VehicleSpec(vehicle_id=vehicle.id, fuel_type="Diesel", engine="2.0 ZZBundle 150"),
+            rel,
+            YouTubeVideo(
+                video_id="BUNDLEVID01", title="Essai", vehicle_id=vehicle.id, is_featured=True
+            ),
+        ]
+    )
+    db.session.commit()
+    rebuild_vehicle_reliability_map(vehicle.id)
+    store_tire_sizes(MAKE, MODEL, "I", 2014, 2022, DIMS, source="wheel-size")
+
+    app.config["ENRICHMENT_BUNDLE_CACHE"] = True
+    enrichment_bundle._memory.clear()
+    yield vehicle
+    app.config["ENRICHMENT_BUNDLE_CACHE"] = False
+    enrichment_bundle._memory.clear()
+    for model in (EnrichmentBundle, VehicleReliabilityMap, VehicleSpec, YouTubeVideo):
+        for row in model.query.filter_by(vehicle_id=vehicle.id).all():
+            db.session.delete(row)
+    for row in TireSize.query.filter_by(make=MAKE.lower()).all():
+        db.session.delete(row)
+    db.session.delete(db.session.get(EngineReliability, rel.id))
+    db.session.delete(db.session.get(Vehicle, vehicle.id))
+    db.session.commit()
+
+
+def _tire_requests():
+    db.session.expire_all()
+    return TireSize.query.filter_by(make=MAKE.lower()).one().request_count
+
+
+def test_first_call_builds_and_stores_bundle(app, bundle_vehicle):
+    bundle = get_enrichment(MAKE, MODEL, 2018, "Diesel")
+
+    assert bundle["featured_video"]["video_id"] == "BUNDLEVID01"
+    assert bundle["tire_sizes"]["dimensions"][0]["size"] == "205/55R16"
+    assert bundle["engine_reliability"]["engine_code"] == "ZZBundle"
+    row = EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id).one()
+    assert (row.year_bucket, row.fuel_key) == (2018, "diesel")
+    assert row.payload == bundle
+
+
+def test_cached_bundle_skips_lookups_but_counts_tire_requests(app, bundle_vehicle):
+    first = get_enrichment(MAKE, MODEL, 2018, "Diesel")
+    counted = _tire_requests()
+
+    with (
+        patch.object(tire_service, "get_tire_sizes") as tires,
+        patch("app.services.youtube_service.featured_video_for_vehicle") as featured,
+    ):
+        assert get_enrichment(MAKE, MODEL, 2018, "Diesel") == first
+        # Memoire vide : relu depuis la table
+        enrichment_bundle._memory.clear()
+        assert get_enrichment(MAKE, MODEL, 2018, "Diesel") == first
+    tires.assert_not_called()
+    featured.assert_not_called()
+    assert _tire_requests() == counted + 2
+
+
+def test_keys_split_by_year_and_fuel(app, bundle_vehicle):
+    get_enrichment(MAKE, MODEL, 2018, "Diesel")
+    get_enrichment(MAKE, MODEL, 2018, "Essence")
+    get_enrichment(MAKE, MODEL, None, "Diesel")
+
+    keys = {
+        (row.year_bucket, row.fuel_key)
+        for row in EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id)
+    }
+    assert keys == {(2018, "diesel"), (2018, "essence"), (0, "diesel")}
+
+
+def test_source_changes_invalidate_bundle(app, bundle_vehicle):
+    get_enrichment(MAKE, MODEL, 2018, "Diesel")
+
+    # Collecte pneus sur le modele
+    store_tire_sizes(MAKE, MODEL, "I", 2014, 2022, [{"size": "215/50R17"}], "allopneus")
+    assert EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id).count() == 0
+    assert get_enrichment(MAKE, MODEL, 2018, "Diesel")["tire_sizes"]["source"] == "allopneus"
+
+    # Video featured retiree (admin)
+    video = YouTubeVideo.query.filter_by(video_id="BUNDLEVID01").one()
+    video.is_featured = False
+    invalidate_vehicle(bundle_vehicle.id)
+    db.session.commit()
+    assert get_enrichment(MAKE, MODEL, 2018, "Diesel")["featured_video"] is None
+
+    # Fiabilite reconstruite
+    rebuild_vehicle_reliability_map(bundle_vehicle.id)
+    db.session.commit()
+    assert EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id).count() == 0
+
+
+def test_failed_lookup_is_not_stored(app, bundle_vehicle):
+    with patch.object(tire_service, "get_tire_sizes", side_effect=OSError("reseau")):
+        bundle = get_enrichment(MAKE, MODEL, 2018, "Diesel")
+
+    assert bundle["tire_sizes"] is None
+    assert bundle["featured_video"] is not None
+    assert EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id).count() == 0
+
+
+def test_stale_bundle_is_rebuilt(app, bundle_vehicle):
+    get_enrichment(MAKE, MODEL, 2018, "Diesel")
+    row = EnrichmentBundle.query.filter_by(vehicle_id=bundle_vehicle.id).one()
+    row.payload = {**row.payload, "featured_video": None}
+    row.built_at = datetime(2020, 1, 1)
+    db.session.commit()
+    enrichment_bundle._memory.clear()
+
+    assert get_enrichment(MAKE, MODEL, 2018, "Diesel")["featured_video"] is not None
+    db.session.refresh(row)
+    assert row.built_at > datetime.now() - timedelta(days=2)
+
+
+def test_unknown_vehicle_is_computed_without_bundle(app, bundle_vehicle):
+    with patch.object(tire_service, "get_tire_sizes", return_value=None) as tires:
+        bundle = get_enrichment("NoSuchMake", "NoSuchModel", 2018, "Diesel")
+    assert bundle == {"featured_video": None, "tire_sizes": None, "engine_reliability": None}
+    tires.assert_called_once()
+    assert EnrichmentBundle.query.filter_by(tire_make="nosuchmake").count() == 0
+
+
+def _wait_tire_requests(expected: int) -> int:
+    for _ in range(100):
+        if _tire_requests() == expected:
+            break
+        time.sleep(0.02)
+    return _tire_requests()
+
+
+def test_tire_requests_flushed_in_background(app, bundle_vehicle):
+    app.config["TIRE_REQUEST_BATCH_SIZE"] = 3
+    app.config["TIRE_REQUEST_FLUSH_SECONDS"] = 3600
+    try:
+        before = _tire_requests()
+        with patch.object(
+            tire_service, "flush_tire_requests", wraps=tire_service.flush_tire_requests
+        ) as flush:
+            record_tire_request(MAKE.lower(), MODEL.lower(), 2018)
+            record_tire_request(MAKE.lower(), MODEL.lower(), 2018)
+            assert _tire_requests() == before
+            record_tire_request(MAKE.lower(), MODEL.lower(), 2018)
+            # Lot plein : ecrit par le timer, pas dans la requete
+            flush.assert_not_called()
+        assert _wait_tire_requests(before + 3) == before + 3
+        assert flush_tire_requests() == 0
+    finally:
+        app.config["TIRE_REQUEST_BATCH_SIZE"] = 1
+        app.config.pop("TIRE_REQUEST_FLUSH_SECONDS")
+
+
+def test_partial_tire_batch_flushed_by_timer(app, bundle_vehicle):
+    app.config["TIRE_REQUEST_BATCH_SIZE"] = 100
+    app.config["TIRE_REQUEST_FLUSH_SECONDS"] = 0.05
+    try:
+        before = _tire_requests()
+        record_tire_request(MAKE.lower(), MODEL.lower(), 2018)
+        # Aucune autre demande : le timer ecrit le lot seul
+        assert _wait_tire_requests(before + 1) == before + 1
+    finally:
+        app.config["TIRE_REQUEST_BATCH_SIZE"] = 1
+        app.config.pop("TIRE_REQUEST_FLUSH_SECONDS")
@@ -0,0 +1,119 @@
+"""Tests du store persistant des jobs admin (PipelineJob / PipelineRun)."""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.pipeline_job import PipelineJob
+from app.models.pipeline_run import PipelineRun
+from app.services import job_store
+from app.services.job_store import create_job, evict_jobs, job_status, request_cancel
+
+NAME = "test_job_store"
+
+
+@pytest.fixture()
+def cleanup(db):
+    yield
+    PipelineJob.query.filter_by(name=NAME).delete()
+    PipelineRun.query.filter_by(name=NAME).delete()
+    db.session.commit()
+
+
+def _naive(dt):
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class TestJobStore:
+    def test_state_visible_from_another_session(self, app, cleanup):
+        job = create_job(NAME, {"pipeline_log": [], "form_data": {"make": "Clio"}})
+        job["progress"] = 40
+        job["pipeline_log"].append({"step": 1, "label": "Vehicule", "status": "ok"})
+        job.save(force=True)
+
+        seen = {}
+
+        def other_worker():
+            with app.app_context():
+                seen.update(job_status(job.key))
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        thread.join(5)
+        assert seen["status"] == "running"
+        assert seen["progress"] == 40
+        assert seen["form_data"] == {"make": "Clio"}
+        assert seen["pipeline_log"][0]["label"] == "Vehicule"
+
+    def test_progress_writes_are_throttled(self, app, cleanup):
+        job = create_job(NAME, {})
+        job["progress"] = 10
+        job["progress"] = 20
+        assert job_status(job.key)["progress"] == 10
+        job["status"] = "running"
+        assert job_status(job.key)["progress"] == 20
+
+    def test_finish_closes_pipeline_run(self, app, db, cleanup):
+        done = create_job(NAME, {})
+        done.set_count(7)
+        done["status"] = "done"
+        done["result"] = {"ok": True}
+        failed = create_job(NAME, {})
+        failed["status"] = "error"
+        failed["progress_label"] = "Erreur recherche YouTube"
+        cancelled = create_job(NAME, {})
+        cancelled["status"] = "cancelled"
+
+        assert job_status(done.key)["result"] == {"ok": True}
+        runs = {j.key: db.session.get(PipelineRun, j.run_id) for j in (done, failed, cancelled)}
+        assert (runs[done.key].status, runs[done.key].count) == ("success", 7)
+        assert runs[failed.key].status == "failure"
+        assert runs[failed.key].error_message == "Erreur recherche YouTube"
+        assert runs[cancelled.key].error_message == "Annule par l'utilisateur"
+        assert all(run.finished_at for run in runs.values())
+
+    def test_cancel_only_running_jobs(self, app, cleanup):
+        job = create_job(NAME, {})
+        assert request_cancel(job.key)
+        job_store_job = PipelineJob.query.filter_by(job_key=job.key).one()
+        assert job_store_job.cancel_requested
+        assert not request_cancel("unknown")
+
+        finished = create_job(NAME, {})
+        finished["status"] = "done"
+        assert request_cancel(finished.key)
+        assert job_status(finished.key)["cancel_requested"] is False
+
+    def test_evicts_finished_jobs_and_closes_orphans(self, app, db, cleanup):
+        old = create_job(NAME, {})
+        old["status"] = "done"
+        orphan = create_job(NAME, {})
+        recent = create_job(NAME, {})
+        recent["status"] = "done"
+
+        now = datetime.now(timezone.utc)
+        PipelineJob.query.filter_by(job_key=old.key).update(
+            {"finished_at": _naive(now - timedelta(hours=30))}
+        )
+        PipelineJob.query.filter_by(job_key=orphan.key).update(
+            {"updated_at": _naive(now - timedelta(hours=1))}
+        )
+        db.session.commit()
+
+        # Sans nouvelles depuis une heure : vu en erreur avant meme la purge
+        assert job_status(orphan.key)["status"] == "error"
+        assert evict_jobs() == 1
+        assert job_status(old.key) is None
+        assert job_status(recent.key)["status"] == "done"
+        assert db.session.get(PipelineRun, old.run_id) is not None
+        orphan_row = PipelineJob.query.filter_by(job_key=orphan.key).one()
+        assert orphan_row.status == "error"
+        assert db.session.get(PipelineRun, orphan.run_id).status == "failure"
+
+    def test_cancel_flag_read_is_throttled(self, app, cleanup, monkeypatch):
+        job = create_job(NAME, {})
+        request_cancel(job.key)
+        assert not job.is_cancelled()
+        monkeypatch.setattr(job_store, "CANCEL_POLL_INTERVAL", 0)
+        assert job.is_cancelled()
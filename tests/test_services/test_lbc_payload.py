@@ -0,0 +1,146 @@
+"""Tests de la lecture rapide du corps /api/analyze (app/services/lbc_payload.py)."""
+
+import json
+
+import pytest
+
+from app.services.extraction import _find_ad_payload, extract_ad_data
+from app.services.lbc_payload import locate_path, parse_analyze_body, top_level_spans
+from tests.mocks import mock_leboncoin
+
+FIXTURES = {
+    name: value
+    for name, value in vars(mock_leboncoin).items()
+    if name.isupper() and isinstance(value, dict) and value
+}
+
+
+def _page_state(n: int = 50) -> dict:
+    """Etat de page parasite, comme dans un vrai __NEXT_DATA__ LBC."""
+    return {
+        "searchResults": [
+            {
+                "list_id": i,
+                "subject": f"Annonce {i} avec des {{accolades}} et [crochets]",
+                "attributes": [{"key": "k", "value": 'v "quotee"'}],
+                "price": [1000 + i],
+            }
+            for i in range(n)
+        ],
+        "i18n": {f"key.{i}": "texte \\ echappe" for i in range(n)},
+    }
+
+
+def _with_page_state(next_data: dict) -> dict:
+    """Entoure l'annonce d'etat de page, avant et apres elle."""
+    page_props = next_data["props"]["pageProps"]
+    return {
+        "buildId": "abc",
+        "props": {
+            "before": _page_state(),
+            "pageProps": {"related": _page_state(), **page_props, "after": _page_state()},
+        },
+        "query": {"id": "1"},
+    }
+
+
+class TestParseAnalyzeBody:
+    @pytest.mark.parametrize("name", sorted(FIXTURES))
+    def test_extraction_matches_full_parse(self, name):
+        next_data = FIXTURES[name]
+        if "pageProps" in next_data.get("props", {}):
+            next_data = _with_page_state(next_data)
+        raw = json.dumps({"url": "https://www.leboncoin.fr/ad/voitures/1", "next_data": next_data})
+
+        body = parse_analyze_body(raw.encode())
+        assert body["url"] == "https://www.leboncoin.fr/ad/voitures/1"
+        assert _find_ad_payload(body["next_data"]) == _find_ad_payload(next_data)
+        if _find_ad_payload(next_data):
+            assert extract_ad_data(body["next_data"]) == extract_ad_data(next_data)
+
+    def test_only_the_ad_is_materialized(self):
+        next_data = _with_page_state(mock_leboncoin.VALID_AD_NEXT_DATA)
+        body = parse_analyze_body(json.dumps({"next_data": next_data}).encode())
+        assert body["next_data"] == mock_leboncoin.VALID_AD_NEXT_DATA
+
+    def test_pretty_printed_and_unicode_body(self):
+        raw = json.dumps(
+            {"source": "leboncoin", "next_data": mock_leboncoin.VALID_AD_NEXT_DATA},
+            indent=2,
+            ensure_ascii=False,
+        )
+        body = parse_analyze_body(raw.encode())
+        assert body["source"] == "leboncoin"
+        assert body["next_data"] == mock_leboncoin.VALID_AD_NEXT_DATA
+
+    def test_ad_data_and_scalars_are_decoded(self):
+        raw = json.dumps({"ad_data": {"make": "BMW", "price_eur": 12000}, "url": None, "n": 1.5})
+        assert parse_analyze_body(raw.encode()) == json.loads(raw)
+
+    def test_keys_after_next_data_are_kept(self):
+        nd = mock_leboncoin.VALID_AD_NEXT_DATA
+        raw = json.dumps({"next_data": nd, "source": "leboncoin"})
+        assert parse_analyze_body(raw.encode())["source"] == "leboncoin"
+        raw = json.dumps({"next_data": nd, "ad_data": {"make": "BMW"}})
+        assert parse_analyze_body(raw.encode())["ad_data"] == {"make": "BMW"}
+
+    def test_object_key_after_next_data_is_kept(self):
+        nd = _with_page_state(mock_leboncoin.VALID_AD_NEXT_DATA)
+        raw = json.dumps({"url": "u", "next_data": nd, "quick": {"enabled": True}})
+        body = parse_analyze_body(raw.encode())
+        assert body["next_data"] == mock_leboncoin.VALID_AD_NEXT_DATA
+        assert body["quick"] == {"enabled": True}
+
+    def test_object_key_after_next_data_without_ad_path(self):
+        nd = {"props": {"pageProps": {}}}
+        raw = json.dumps({"url": "u", "next_data": nd, "quick": {"enabled": True}})
+        assert parse_analyze_body(raw.encode()) == json.loads(raw)
+
+    def test_non_standard_path_keeps_full_next_data(self):
+        next_data = {"props": {"pageProps": {"adView": {"ad": {"list_id": 1}}}}}
+        body = parse_analyze_body(json.dumps({"next_data": next_data}).encode())
+        assert body["next_data"] == next_data
+
+    @pytest.mark.parametrize(
+        "raw",
+        [b"", b"not json", b"[1, 2]", b'{"next_data": {"props": ', b'{"a": 1} trailing'],
+    )
+    def test_invalid_bodies_return_none(self, raw):
+        assert parse_analyze_body(raw) is None
+
+    def test_empty_object(self):
+        assert parse_analyze_body(b" { } ") == {}
+
+
+class TestLocatePath:
+    def test_key_inside_string_is_ignored(self):
+        buf = b'{"x": "\\"props\\": {", "props": {"pageProps": {"ad": {"a": 1}}}}'
+        start, end = locate_path(buf, 0, (b"props", b"pageProps", b"ad"))
+        assert buf[start:end] == b'{"a": 1}'
+
+    def test_same_key_deeper_in_sibling_is_not_matched(self):
+        buf = b'{"other": {"props": {"pageProps": {"ad": {"bad": 1}}}}, "props": {"pageProps": {}}}'
+        assert locate_path(buf, 0, (b"props", b"pageProps", b"ad")) is None
+
+    def test_top_level_spans(self):
+        buf = b'{"a": [1, {"b": 2}], "c": "x,}", "d": null}'
+        spans = top_level_spans(buf)
+        assert {k: buf[s:e] for k, (s, e) in spans.items()} == {
+            "a": b'[1, {"b": 2}]',
+            "c": b'"x,}"',
+            "d": b"null",
+        }
+
+
+class TestFallbackWalker:
+    def test_deeply_nested_payload_does_not_recurse(self):
+        ad = {"list_id": 42, "subject": "Clio", "attributes": []}
+        node: dict = {"ad": ad}
+        for _ in range(5000):
+            node = {"child": node}
+        assert _find_ad_payload(node) is ad
+
+    def test_first_match_in_document_order(self):
+        first = {"list_id": 1, "price": [1], "attributes": []}
+        second = {"list_id": 2, "price": [2], "attributes": []}
+        assert _find_ad_payload({"a": [{"x": first}], "b": second}) is first
@@ -0,0 +1,224 @@
+"""Tests du cache des reponses LLM, du single-flight email et de l'ecriture groupee."""
+
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from app.models.email_draft import EmailDraft
+from app.models.llm_cache import LLMCacheEntry
+from app.models.llm_usage import LLMUsage
+from app.models.scan import ScanLog
+from app.services import llm_usage_writer
+from app.services.email_service import generate_email_draft
+from app.services.llm_cache import cache_stats, cached_generate_text, prompt_hash
+
+GENERATE = "app.services.gemini_service.generate_text"
+
+
+@pytest.fixture()
+def llm_cache_on(app, db):
+    app.config["LLM_CACHE_TTL"] = 3600
+    yield
+    app.config["LLM_CACHE_TTL"] = 0
+    LLMCacheEntry.query.delete()
+    db.session.commit()
+
+
+@pytest.fixture()
+def scan(db):
+    scan = ScanLog(
+        url="https://www.autoscout24.fr/offres/llm-cache-test",
+        raw_data={"make": "Skoda", "model": "Octavia", "source": "autoscout24"},
+        score=60,
+        vehicle_make="Skoda",
+        vehicle_model="Octavia",
+        price_eur=17000,
+    )
+    db.session.add(scan)
+    db.session.commit()
+    return scan
+
+
+class TestCachedGenerateText:
+    def test_second_call_is_served_from_cache(self, app, llm_cache_on):
+        with patch(GENERATE, return_value=("Bonjour", 120)) as generate:
+            first = cached_generate_text("prompt A", "test_feature", temperature=0.4)
+            second = cached_generate_text("prompt A", "test_feature", temperature=0.4)
+
+        assert first == ("Bonjour", 120, False)
+        assert second == ("Bonjour", 120, True)
+        assert generate.call_count == 1
+        entry = LLMCacheEntry.query.one()
+        assert entry.hit_count == 1
+        assert entry.feature == "test_feature"
+
+    def test_key_covers_model_and_generation_params(self, app, llm_cache_on):
+        with patch(GENERATE, return_value=("x", 10)) as generate:
+            cached_generate_text("prompt B", "f", temperature=0.4)
+            cached_generate_text("prompt B", "f", temperature=0.7)
+            cached_generate_text("prompt B", "f", temperature=0.4, system_prompt="sys")
+            with patch("app.services.gemini_service._get_model", return_value="other-model"):
+                cached_generate_text("prompt B", "f", temperature=0.4)
+        assert generate.call_count == 4
+        assert prompt_hash("p", None, "m", 0.4, 500, None) == prompt_hash(
+            "p", "", "m", 0.4, 500, None
+        )
+
+    def test_refresh_bypasses_and_replaces_entry(self, app, llm_cache_on):
+        with patch(GENERATE, side_effect=[("v1", 10), ("v2", 12)]):
+            cached_generate_text("prompt C", "f")
+            text, _, from_cache = cached_generate_text("prompt C", "f", refresh=True)
+        assert (text, from_cache) == ("v2", False)
+        with patch(GENERATE) as generate:
+            assert cached_generate_text("prompt C", "f")[0] == "v2"
+        generate.assert_not_called()
+
+    def test_empty_response_not_cached(self, app, llm_cache_on):
+        with patch(GENERATE, return_value=("", 5)) as generate:
+            cached_generate_text("prompt D", "f")
+            cached_generate_text("prompt D", "f")
+        assert generate.call_count == 2
+
+    def test_disabled_when_ttl_zero(self, app, db):
+        with patch(GENERATE, return_value=("x", 10)) as generate:
+            cached_generate_text("prompt E", "f")
+            cached_generate_text("prompt E", "f")
+        assert generate.call_count == 2
+        assert LLMCacheEntry.query.count() == 0
+
+    def test_stats_hit_rate_and_savings(self, app, db, llm_cache_on):
+        db.session.add(
+            LLMUsage(
+                request_id="stats-test",
+                provider="gemini",
+                model="gemini-2.5-flash",
+                feature="stats_feature",
+                total_tokens=1000,
+                estimated_cost_eur=0.002,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+        db.session.commit()
+        before = cache_stats()
+        with patch(GENERATE, return_value=("ok", 1000)):
+            for _ in range(4):
+                cached_generate_text("prompt F", "stats_feature")
+        after = cache_stats()
+
+        assert after["hits"] - before["hits"] == 3
+        assert after["misses"] - before["misses"] == 1
+        assert after["saved_eur"] - before["saved_eur"] == pytest.approx(0.006, abs=1e-4)
+        assert after["entries"] >= 1
+
+
+class TestEmailDraftSingleFlight:
+    def test_concurrent_requests_share_one_call(self, app, scan):
+        entered = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_generate(**kwargs):
+            calls.append(kwargs["feature"])
+            entered.set()
+            release.wait(5)
+            return "Objet : Skoda Octavia", 300
+
+        draft_ids = []
+
+        def request():
+            with app.app_context():
+                draft_ids.append(generate_email_draft(scan.id).id)
+
+        with patch(GENERATE, side_effect=slow_generate):
+            leader = threading.Thread(target=request)
+            leader.start()
+            assert entered.wait(5)
+            follower = threading.Thread(target=request)
+            follower.start()
+            time.sleep(0.1)
+            release.set()
+            leader.join(5)
+            follower.join(5)
+
+        assert calls == ["email_draft"]
+        assert len(draft_ids) == 2
+        assert draft_ids[0] == draft_ids[1]
+        assert EmailDraft.query.filter_by(scan_id=scan.id).count() == 1
+
+    def test_cached_prompt_creates_draft_without_call(self, app, scan, llm_cache_on):
+        with patch(GENERATE, return_value=("Objet : Octavia", 200)) as generate:
+            first = generate_email_draft(scan.id)
+            second = generate_email_draft(scan.id)
+            third = generate_email_draft(scan.id, refresh=True)
+        assert generate.call_count == 2
+        assert second.id != first.id
+        assert second.generated_text == first.generated_text
+        assert second.tokens_used == 200
+        assert third.id not in (first.id, second.id)
+
+
+class TestLLMUsageWriter:
+    def _record(self, n):
+        for i in range(n):
+            llm_usage_writer.record_llm_usage(
+                request_id=f"batch-{i}",
+                provider="gemini",
+                model="gemini-2.5-flash",
+                feature="batch_test",
+                prompt_tokens=10,
+                completion_tokens=5,
+                total_tokens=15,
+                estimated_cost_eur=0.00001,
+            )
+
+    def test_rows_written_by_batch(self, app, db):
+        app.config["LLM_USAGE_BATCH_SIZE"] = 3
+        app.config["LLM_USAGE_FLUSH_SECONDS"] = 3600
+        try:
+            self._record(2)
+            assert LLMUsage.query.filter_by(feature="batch_test").count() == 0
+            assert llm_usage_writer.pending_count() == 2
+            self._record(1)
+            assert LLMUsage.query.filter_by(feature="batch_test").count() == 3
+            assert llm_usage_writer.pending_count() == 0
+
+            self._record(1)
+            assert llm_usage_writer.flush_llm_usage() == 1
+        finally:
+            app.config["LLM_USAGE_BATCH_SIZE"] = 1
+            LLMUsage.query.filter_by(feature="batch_test").delete()
+            db.session.commit()
+
+    def test_pending_rows_flushed_by_timer(self, app, db):
+        app.config["LLM_USAGE_BATCH_SIZE"] = 100
+        app.config["LLM_USAGE_FLUSH_SECONDS"] = 0.05
+        try:
+            self._record(2)
+            assert llm_usage_writer.pending_count() == 2
+            # Aucun autre appel : le timer ecrit le lot seul
+            for _ in range(100):
+                if not llm_usage_writer.pending_count():
+                    break
+                time.sleep(0.02)
+            db.session.expire_all()
+            assert LLMUsage.query.filter_by(feature="batch_test").count() == 2
+        finally:
+            app.config["LLM_USAGE_BATCH_SIZE"] = 1
+            app.config.pop("LLM_USAGE_FLUSH_SECONDS")
+            LLMUsage.query.filter_by(feature="batch_test").delete()
+            db.session.commit()
+
+    def test_old_pending_rows_are_flushed(self, app, db):
+        app.config["LLM_USAGE_BATCH_SIZE"] = 100
+        app.config["LLM_USAGE_FLUSH_SECONDS"] = 0
+        try:
+            self._record(1)
+            assert LLMUsage.query.filter_by(feature="batch_test").count() == 1
+        finally:
+            app.config["LLM_USAGE_BATCH_SIZE"] = 1
+            app.config.pop("LLM_USAGE_FLUSH_SECONDS")
+            LLMUsage.query.filter_by(feature="batch_test").delete()
+            db.session.commit()
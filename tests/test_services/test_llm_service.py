@@ -1,11 +1,25 @@
 """Tests for llm_service (Ollama wrapper)."""
 
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 import httpx
+import orjson
 import pytest
 
-from app.services.llm_service import generate_synthesis, list_ollama_models
+from app.models.llm_cache import LLMCacheEntry
+from app.services.llm_cache import cache_stats
+from app.services.llm_service import (
+    SynthesisResult,
+    chunk_transcripts,
+    estimate_tokens,
+    generate_synthesis,
+    list_ollama_models,
+    split_text,
+    stream_generate,
+    synthesize_transcripts,
+)
 
 
 class TestListOllamaModels:
@@ -128,3 +142,192 @@ class TestGenerateSynthesis:
                     transcripts="text",
                 )
                 assert result == ""
+
+
+class _FakeStream:
+    """Reponse httpx.stream simulee : lignes JSON d'Ollama."""
+
+    def __init__(self, lines, status_code=200):
+        self.lines = lines
+        self.status_code = status_code
+        self.text = "erreur"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def read(self):
+        return b""
+
+    def iter_lines(self):
+        yield from self.lines
+
+
+def _stream_of(*pieces):
+    lines = [orjson.dumps({"response": p, "done": False}).decode() for p in pieces]
+    lines.append(orjson.dumps({"response": "", "done": True}).decode())
+    return _FakeStream(lines)
+
+
+class TestChunking:
+    def test_split_text_prefers_sentence_boundaries(self):
+        text = "Premiere phrase assez longue. Deuxieme phrase assez longue. Troisieme."
+        pieces = split_text(text, 36)
+        assert pieces == [
+            "Premiere phrase assez longue.",
+            "Deuxieme phrase assez longue.",
+            "Troisieme.",
+        ]
+        assert all(len(p) <= 50 for p in split_text("mot " * 200, 50))
+
+    def test_chunks_are_bounded_and_never_span_videos(self):
+        transcripts = [("--- A ---", "bla. " * 2000), ("--- B ---", "court")]
+        chunks = chunk_transcripts(transcripts, 500)
+        assert all(estimate_tokens(c) <= 500 for c in chunks)
+        assert chunks[0].startswith("--- A --- [1/")
+        assert chunks[-1] == "--- B ---\ncourt"
+        # Ajouter une video ne change pas les morceaux existants
+        assert chunk_transcripts(transcripts + [("--- C ---", "x")], 500)[:-1] == chunks
+
+
+class TestStreamGenerate:
+    def test_accumulates_fragments_and_reports_progress(self, app):
+        received = []
+        with app.app_context():
+            with patch(
+                "app.services.llm_service.httpx.stream", return_value=_stream_of("Bon", "jour")
+            ) as stream:
+                text = stream_generate("mistral", "p", on_text=received.append)
+        assert text == "Bonjour"
+        assert received == [3, 7]
+        assert stream.call_args.kwargs["json"]["stream"] is True
+
+    def test_stops_when_requested(self, app):
+        with app.app_context():
+            with patch(
+                "app.services.llm_service.httpx.stream", return_value=_stream_of("a", "b", "c")
+            ):
+                assert stream_generate("mistral", "p", should_stop=lambda: True) == "a"
+
+    def test_raises_on_error(self, app):
+        with app.app_context():
+            with patch("app.services.llm_service.httpx.stream", return_value=_FakeStream([], 500)):
+                with pytest.raises(ConnectionError, match="Ollama erreur 500"):
+                    stream_generate("mistral", "p")
+
+
+class TestSynthesizeTranscripts:
+    @pytest.fixture()
+    def small_chunks(self, app, db):
+        app.config["SYNTHESIS_CHUNK_TOKENS"] = 300
+        app.config["SYNTHESIS_MAP_CONCURRENCY"] = 2
+        app.config["LLM_CACHE_TTL"] = 3600
+        yield
+        app.config["SYNTHESIS_CHUNK_TOKENS"] = 3000
+        app.config["LLM_CACHE_TTL"] = 0
+        LLMCacheEntry.query.filter(LLMCacheEntry.feature.like("synthesis_%")).delete()
+        db.session.commit()
+
+    @staticmethod
+    def _transcripts(n):
+        return [
+            (f"--- Essai {i} ---", f"Video {i}. " + "Le moteur est fiable. " * 60) for i in range(n)
+        ]
+
+    def test_small_input_is_a_single_streamed_call(self, app):
+        with app.app_context():
+            with (
+                patch("app.services.llm_service.httpx.post") as post,
+                patch(
+                    "app.services.llm_service.httpx.stream", return_value=_stream_of("Synthese")
+                ) as stream,
+            ):
+                result = synthesize_transcripts("mistral", "Analyse", [("--- A ---", "court")])
+        post.assert_not_called()
+        assert result == SynthesisResult("Synthese", 0, 0, 1)
+        assert "--- TRANSCRIPTS ---" in stream.call_args.kwargs["json"]["prompt"]
+
+    def test_map_reduce_reuses_cached_chunk_summaries(self, app, small_chunks):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        prompts = []
+
+        def fake_post(url, json, timeout):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+                prompts.append(json["prompt"])
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            resp = MagicMock(status_code=200)
+            resp.json.return_value = {"response": f"resume {len(prompts)}"}
+            return resp
+
+        progress = []
+        with (
+            patch("app.services.llm_service.httpx.post", side_effect=fake_post),
+            patch(
+                "app.services.llm_service.httpx.stream",
+                side_effect=lambda *a, **kw: _stream_of("Synthese finale"),
+            ) as stream,
+        ):
+            first = synthesize_transcripts(
+                "mistral",
+                "Analyse",
+                self._transcripts(3),
+                on_progress=lambda *args: progress.append(args),
+            )
+            assert first.text == "Synthese finale"
+            assert first.chunks >= 6
+            assert first.cached_chunks == 0
+            assert len(prompts) == first.chunks
+            assert peak == 2
+            assert progress[-1] == ("final", len("Synthese finale"), 0)
+            assert ("map", first.chunks, first.chunks) in progress
+            final_prompt = stream.call_args.kwargs["json"]["prompt"]
+            assert "--- RESUMES DES TRANSCRIPTS ---" in final_prompt
+
+            # Une video de plus : seuls ses morceaux sont resumes
+            prompts.clear()
+            second = synthesize_transcripts("mistral", "Analyse", self._transcripts(4))
+        assert second.cached_chunks == first.chunks
+        map_prompts = [p for p in prompts if "--- EXTRAIT ---" in p]
+        assert len(map_prompts) == second.chunks - first.chunks
+        assert all("--- Essai 3 ---" in p for p in map_prompts)
+
+    def test_cached_summaries_stay_out_of_gemini_cache_stats(self, app, small_chunks):
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = {"response": "resume"}
+        before = cache_stats()
+        with (
+            patch("app.services.llm_service.httpx.post", return_value=resp),
+            patch(
+                "app.services.llm_service.httpx.stream",
+                side_effect=lambda *a, **kw: _stream_of("Synthese"),
+            ),
+        ):
+            synthesize_transcripts("mistral", "Analyse", self._transcripts(2))
+            second = synthesize_transcripts("mistral", "Analyse", self._transcripts(2))
+        assert second.cached_chunks > 0
+        after = cache_stats()
+        assert after["hits"] == before["hits"]
+        assert after["misses"] == before["misses"]
+        assert after["entries"] == before["entries"]
+
+    def test_cancel_stops_map_stage(self, app, small_chunks):
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = {"response": "resume"}
+        with (
+            patch("app.services.llm_service.httpx.post", return_value=resp),
+            patch("app.services.llm_service.httpx.stream") as stream,
+        ):
+            result = synthesize_transcripts(
+                "mistral", "Analyse", self._transcripts(3), should_stop=lambda: True
+            )
+        assert result.text == ""
+        stream.assert_not_called()
@@ -1,11 +1,18 @@
 """Tests for market_service -- stockage et recuperation des prix du marche."""
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 from app.services.market_service import (
+    MarketStatsQuery,
     _filter_outliers_iqr,
+    cached_market_snapshot,
+    current_market_snapshot,
     get_market_stats,
+    lookup_market_stats,
+    prefetch_market_prices,
     store_market_prices,
+    use_market_snapshot,
 )
 
 
@@ -857,3 +864,155 @@ class TestStoreWithIQR:
             )
             details = mp.get_calculation_details()
             assert details.get("search_steps") is None
+
+
+class TestMarketSnapshot:
+    """Instantane d'un lot (/api/analyze/batch) : meme cascade que les requetes."""
+
+    def _seed(self):
+        prices = [12000, 13000, 14000, 15000, 16000]
+        cells = [
+            (2019, "Ile-de-France", "diesel", "120-150"),
+            (2019, "Ile-de-France", "diesel", None),
+            (2019, "Ile-de-France", None, None),
+            (2020, "Ile-de-France", "essence", "70-100"),
+            (2017, "Bretagne", "diesel", None),
+            (2021, "Bretagne", None, "120-150"),
+        ]
+        for year, region, fuel, hp_range in cells:
+            store_market_prices(
+                make="Snapmake",
+                model="Snapmodel",
+                year=year,
+                region=region,
+                prices=prices,
+                fuel=fuel,
+                hp_range=hp_range,
+            )
+
+    def test_matches_database_cascade(self, app):
+        with app.app_context():
+            self._seed()
+            queries = [
+                (year, region, fuel, hp)
+                for year in (2016, 2018, 2019, 2020, 2023)
+                for region in ("Ile-de-France", "Bretagne", "Normandie")
+                for fuel in (None, "diesel", "Essence")
+                for hp in (None, "120-150", "70-100")
+            ]
+            expected = [
+                get_market_stats("Snapmake", "Snapmodel", *q[:2], fuel=q[2], hp_range=q[3])
+                for q in queries
+            ]
+
+            snapshot = prefetch_market_prices([("Snapmake", "Snapmodel")])
+            assert snapshot.covers("snapmake", "snapmodel")
+            with use_market_snapshot(snapshot):
+                got = [
+                    get_market_stats("Snapmake", "Snapmodel", *q[:2], fuel=q[2], hp_range=q[3])
+                    for q in queries
+                ]
+
+            assert [mp.id if mp else None for mp in got] == [
+                mp.id if mp else None for mp in expected
+            ]
+            assert any(mp is None for mp in expected)
+
+    def test_unknown_model_is_covered_without_rows(self, app):
+        with app.app_context():
+            snapshot = prefetch_market_prices([("Snapmake", "Nothere")])
+            assert snapshot.covers("snapmake", "nothere")
+            with use_market_snapshot(snapshot):
+                assert get_market_stats("Snapmake", "Nothere", 2019, "Bretagne") is None
+
+    def test_inactive_outside_context(self, app):
+        with app.app_context():
+            prefetch_market_prices([("Snapmake", "Snapmodel")])
+            assert current_market_snapshot() is None
+
+
+class TestLookupMarketStats:
+    """Lecture groupee de /api/market-prices/lookup."""
+
+    def test_matches_get_market_stats(self, app):
+        with app.app_context():
+            TestMarketSnapshot()._seed()
+            store_market_prices(
+                make="Lookupmake",
+                model="Other",
+                year=2019,
+                region="Bretagne",
+                prices=[9000, 9500, 10000, 10500, 11000],
+                country="CH",
+            )
+            queries = [
+                MarketStatsQuery("Snapmake", "Snapmodel", 2019, "Ile-de-France", "diesel"),
+                MarketStatsQuery(
+                    "Snapmake", "Snapmodel", 2019, "Ile-de-France", "Diesel", "120-150"
+                ),
+                MarketStatsQuery("Snapmake", "Snapmodel", 2018, "Bretagne", "essence"),
+                MarketStatsQuery("Snapmake", "Snapmodel", 2022, "Bretagne", hp_range="120-150"),
+                MarketStatsQuery("Lookupmake", "Other", 2019, "Bretagne", country="ch"),
+                MarketStatsQuery("Lookupmake", "Other", 2019, "Bretagne"),
+                MarketStatsQuery("Lookupmake", "Unknown", 2019, "Bretagne"),
+            ]
+            expected = [get_market_stats(*q) for q in queries]
+
+            got = lookup_market_stats(queries)
+
+            assert [mp.id if mp else None for mp in got] == [
+                mp.id if mp else None for mp in expected
+            ]
+            assert got[4] is not None and got[5] is None
+
+    def test_single_query_for_all_models(self, app):
+        from sqlalchemy import event
+
+        from app.extensions import db
+
+        with app.app_context():
+            statements = []
+
+            def _count(*_args):
+                statements.append(1)
+
+            queries = [
+                MarketStatsQuery(f"Lookupmake{i}", "Model", 2019, "Bretagne") for i in range(20)
+            ]
+            event.listen(db.engine, "before_cursor_execute", _count)
+            try:
+                lookup_market_stats(queries)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", _count)
+            assert len(statements) == 1
+
+
+class TestCachedMarketSnapshot:
+    """Instantanes memoire du mode rapide de /api/analyze."""
+
+    def test_reused_until_expiry(self, app):
+        with app.app_context():
+            with patch(
+                "app.services.market_service.prefetch_market_prices",
+                wraps=prefetch_market_prices,
+            ) as prefetch:
+                first = cached_market_snapshot("Memmake", "Memmodel", ttl_seconds=60)
+                assert cached_market_snapshot("Memmake", "Memmodel", ttl_seconds=60) is first
+                assert prefetch.call_count == 1
+                cached_market_snapshot("Memmake", "Expired", ttl_seconds=0)
+                cached_market_snapshot("Memmake", "Expired", ttl_seconds=0)
+                assert prefetch.call_count == 3
+
+    def test_forgotten_when_prices_are_stored(self, app):
+        with app.app_context():
+            before = cached_market_snapshot("Memmake", "Refreshed", ttl_seconds=60)
+            assert before.rows("memmake", "refreshed") == []
+            store_market_prices(
+                make="Memmake",
+                model="Refreshed",
+                year=2020,
+                region="Bretagne",
+                prices=[10000, 11000, 12000, 13000, 14000],
+            )
+            after = cached_market_snapshot("Memmake", "Refreshed", ttl_seconds=60)
+            assert len(after.rows("memmake", "refreshed")) == 1
@@ -0,0 +1,175 @@
+"""Tests du sketch de quantiles argus (PriceSketch) et de son stockage MarketPrice."""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.extensions import db
+from app.filters.l5_visual import L5VisualFilter
+from app.models.market_price import MarketPrice
+from app.models.market_price_sketch import MarketPriceSketch
+from app.services.market_service import (
+    SKETCH_HALF_LIFE_DAYS,
+    get_price_sketches,
+    rebuild_market_sketches,
+    store_market_prices,
+)
+from app.services.price_sketch import PriceSketch
+
+
+class TestPriceSketch:
+    @pytest.mark.parametrize("q", [0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0])
+    def test_small_sample_matches_numpy(self, q):
+        prices = [12000, 18000, 13500, 15000, 21000, 16000, 14000]
+        sketch = PriceSketch.from_values(prices)
+        assert sketch.quantile(q) == pytest.approx(np.percentile(prices, q * 100))
+        assert sketch.mean == pytest.approx(np.mean(prices))
+        assert sketch.std == pytest.approx(np.std(prices))
+
+    def test_constant_prices_have_zero_std(self):
+        sketch = PriceSketch.from_values([10000] * 50)
+        assert sketch.std == 0.0
+        assert sketch.median == 10000
+
+    def test_large_sample_stays_compact_and_accurate(self):
+        rng = random.Random(7)
+        prices = [rng.gauss(20000, 3000) for _ in range(5000)]
+        sketch = PriceSketch()
+        for i in range(0, len(prices), 100):
+            sketch.add(prices[i : i + 100])
+
+        assert len(sketch.centroids) <= sketch.compression
+        assert len(sketch.to_bytes()) < 1000
+        for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+            assert sketch.quantile(q) == pytest.approx(np.percentile(prices, q * 100), rel=0.01)
+        assert sketch.mean == pytest.approx(np.mean(prices))
+        assert sketch.std == pytest.approx(np.std(prices))
+
+    def test_merge_equals_single_sketch(self):
+        a = PriceSketch.from_values([10000, 11000, 12000])
+        b = PriceSketch.from_values([13000, 14000])
+        a.merge(b)
+        whole = PriceSketch.from_values([10000, 11000, 12000, 13000, 14000])
+        assert a.count == whole.count
+        assert a.median == whole.median
+        assert a.std == pytest.approx(whole.std)
+
+    def test_decay_shifts_weight_towards_new_prices(self):
+        sketch = PriceSketch.from_values([10000] * 20)
+        sketch.decay(0.25)
+        sketch.add([20000] * 10)
+        # 5 anciens equivalents contre 10 nouveaux : la mediane bascule
+        assert sketch.count == pytest.approx(15)
+        assert sketch.median == 20000
+
+    def test_iqr_mean_matches_exact_definition(self):
+        prices = [10000, 11000, 12000, 13000, 14000, 15000, 30000]
+        sketch = PriceSketch.from_values(prices)
+        p25, p75 = np.percentile(prices, [25, 75])
+        expected = np.mean([p for p in prices if p25 <= p <= p75])
+        assert sketch.iqr_mean() == pytest.approx(expected)
+
+    def test_roundtrip_bytes(self):
+        sketch = PriceSketch.from_values([9000, 9500, 12000, 15500])
+        restored = PriceSketch.from_bytes(sketch.to_bytes())
+        assert restored.count == sketch.count
+        assert restored.quantile(0.5) == sketch.quantile(0.5)
+        assert restored.min == 9000 and restored.max == 15500
+
+    def test_from_bytes_rejects_garbage(self):
+        assert PriceSketch.from_bytes(None) is None
+        assert PriceSketch.from_bytes(b"\x00\x01") is None
+        assert PriceSketch.from_bytes(PriceSketch().to_bytes()[:-1] + b"\x09") is None
+
+    def test_empty_sketch(self):
+        sketch = PriceSketch()
+        assert sketch.quantile(0.5) is None
+        assert sketch.mean is None
+        assert sketch.iqr_mean() is None
+
+
+class TestStoreMergesSketch:
+    def test_second_collection_merges_history(self, app):
+        with app.app_context():
+            mp = store_market_prices(
+                make="Sketch", model="Merge", year=2020, region="Bretagne", prices=[10000] * 5
+            )
+            assert mp.price_median == 10000
+            mp = store_market_prices(
+                make="Sketch",
+                model="Merge",
+                year=2020,
+                region="Bretagne",
+                prices=[20000] * 3,
+            )
+            # Derniere collecte pour les stats brutes, historique pour les percentiles
+            assert mp.sample_count == 3
+            assert mp.price_max == 20000
+            assert mp.price_median == 10000
+            assert mp.price_p75 == 20000
+
+            row = MarketPriceSketch.query.filter_by(market_price_id=mp.id).one()
+            assert row.effective_count == pytest.approx(8)
+
+    def test_old_history_is_decayed(self, app):
+        with app.app_context():
+            mp = store_market_prices(
+                make="Sketch", model="Decay", year=2020, region="Bretagne", prices=[10000] * 5
+            )
+            row = MarketPriceSketch.query.filter_by(market_price_id=mp.id).one()
+            row.updated_at = datetime.now(timezone.utc) - timedelta(days=2 * SKETCH_HALF_LIFE_DAYS)
+            db.session.commit()
+
+            mp = store_market_prices(
+                make="Sketch", model="Decay", year=2020, region="Bretagne", prices=[20000] * 3
+            )
+            assert row.effective_count == pytest.approx(5 * 0.25 + 3, rel=1e-3)
+            assert mp.price_median == 20000
+
+    def test_legacy_cell_is_seeded_from_last_collection(self, app):
+        with app.app_context():
+            mp = store_market_prices(
+                make="Sketch", model="Legacy", year=2020, region="Bretagne", prices=[10000] * 4
+            )
+            MarketPriceSketch.query.filter_by(market_price_id=mp.id).delete()
+            db.session.commit()
+
+            assert rebuild_market_sketches() >= 1
+            db.session.commit()
+            sketch = get_price_sketches([mp.id])[mp.id]
+            assert sketch.count == 4
+            assert sketch.median == 10000
+
+
+class TestL5UsesSketches:
+    def test_reference_comes_from_merged_sketches(self, app):
+        with app.app_context():
+            for prices in ([15000, 16000, 17000, 18000, 19000], [16000, 17000, 18000]):
+                store_market_prices(
+                    make="Sketch", model="L5", year=2019, region="Occitanie", prices=prices
+                )
+            records = MarketPrice.query.filter_by(make="Sketch", model="L5").all()
+            ref = L5VisualFilter._records_to_sketch(records)
+            assert ref.count == pytest.approx(8)
+            assert ref.mean == pytest.approx(17000)
+
+    def test_cells_without_sketch_use_min_median_max(self, app):
+        with app.app_context():
+            mp = MarketPrice(
+                make="Sketch",
+                model="NoSketch",
+                year=2019,
+                region="Occitanie",
+                price_min=10000,
+                price_median=12000,
+                price_max=14000,
+                sample_count=20,
+                refresh_after=datetime.now(timezone.utc),
+            )
+            db.session.add(mp)
+            db.session.commit()
+            ref = L5VisualFilter._records_to_sketch([mp])
+            assert ref.count == 3
+            assert ref.median == 12000
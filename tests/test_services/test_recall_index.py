@@ -0,0 +1,125 @@
+"""Tests de l'index memoire des rappels constructeur (recall_index)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db
+from app.filters.l11_recall import L11RecallFilter
+from app.models.manufacturer_recall import ManufacturerRecall
+from app.models.vehicle import Vehicle
+from app.services import recall_index
+from app.services.recall_index import VehicleRecalls, find_recalls, load_recall_index
+
+
+def _recall(vehicle_id, recall_type, year_start, year_end):
+    return ManufacturerRecall(
+        vehicle_id=vehicle_id,
+        recall_type=recall_type,
+        year_start=year_start,
+        year_end=year_end,
+        description=f"Rappel {recall_type}",
+        severity="critical",
+    )
+
+
+@pytest.fixture()
+def recall_vehicle(app):
+    vehicle = Vehicle(brand="TestRecall", model="Interval", year_start=2000)
+    db.session.add(vehicle)
+    db.session.flush()
+    db.session.add_all(
+        [
+            _recall(vehicle.id, "airbag", 2004, 2010),
+            _recall(vehicle.id, "frein", 2008, 2015),
+            _recall(vehicle.id, "direction", 2012, 2012),
+        ]
+    )
+    db.session.commit()
+    yield vehicle
+    ManufacturerRecall.query.filter_by(vehicle_id=vehicle.id).delete()
+    db.session.delete(db.session.get(Vehicle, vehicle.id))
+    db.session.commit()
+    load_recall_index()
+
+
+def _types(recalls):
+    return sorted(r["recall_type"] for r in recalls)
+
+
+def test_vehicle_recalls_interval_lookup():
+    entry = VehicleRecalls([(2008, 2015, {"recall_type": "b"}), (2004, 2010, {"recall_type": "a"})])
+    assert entry.starts == [2004, 2008]
+    assert _types(entry.covering(2003)) == []
+    assert _types(entry.covering(2004)) == ["a"]
+    assert _types(entry.covering(2009)) == ["a", "b"]
+    assert _types(entry.covering(2015)) == ["b"]
+    assert _types(entry.covering(2016)) == []
+
+
+def test_find_recalls_uses_lookup_aliases(app, recall_vehicle):
+    assert _types(find_recalls("TestRecall", "Interval", 2009)) == ["airbag", "frein"]
+    assert _types(find_recalls("TESTRECALL", "interval", 2012)) == ["direction", "frein"]
+    assert find_recalls("TestRecall", "Interval", 2016) == []
+    assert find_recalls("TestRecall", "Inconnu", 2009) == []
+
+
+def test_lookup_does_not_query_database(app, recall_vehicle):
+    with patch.object(db.engine, "connect", side_effect=AssertionError("DB")):
+        result = L11RecallFilter().run({"make": "TestRecall", "model": "Interval", "year": 2005})
+    assert result.status == "fail"
+    assert result.details["recall_count"] == 1
+
+
+def test_commit_refreshes_index(app, recall_vehicle):
+    assert find_recalls("TestRecall", "Interval", 2020) == []
+
+    db.session.add(_recall(recall_vehicle.id, "moteur", 2018, 2022))
+    db.session.commit()
+    assert _types(find_recalls("TestRecall", "Interval", 2020)) == ["moteur"]
+
+    recall = ManufacturerRecall.query.filter_by(recall_type="moteur").one()
+    db.session.delete(recall)
+    db.session.commit()
+    assert find_recalls("TestRecall", "Interval", 2020) == []
+
+
+def test_vehicle_rename_moves_recalls(app, recall_vehicle):
+    recall_vehicle.model = "Renamed"
+    db.session.commit()
+
+    assert find_recalls("TestRecall", "Interval", 2009) == []
+    assert _types(find_recalls("TestRecall", "Renamed", 2005)) == ["airbag"]
+
+
+def test_expired_index_reloads_in_background(app, recall_vehicle):
+    # Ecriture hors session (seed lance dans un autre process)
+    with db.engine.begin() as conn:
+        conn.execute(
+            ManufacturerRecall.__table__.insert().values(
+                vehicle_id=recall_vehicle.id,
+                recall_type="externe",
+                year_start=2030,
+                year_end=2031,
+                description="Rappel externe",
+                severity="critical",
+            )
+        )
+    assert find_recalls("TestRecall", "Interval", 2030) == []
+
+    app.config["RECALL_INDEX_REFRESH_SECONDS"] = 1
+    recall_index._loaded_at -= 10
+    started = []
+    try:
+        with patch.object(recall_index.threading, "Thread") as thread:
+            thread.return_value.start.side_effect = lambda: started.append(
+                thread.call_args.kwargs["target"]
+            )
+            # Le scan lit l'index courant, le rechargement part en fond
+            assert find_recalls("TestRecall", "Interval", 2030) == []
+            assert find_recalls("TestRecall", "Interval", 2030) == []
+        assert len(started) == 1
+        started[0]()
+    finally:
+        app.config["RECALL_INDEX_REFRESH_SECONDS"] = 0
+    assert _types(find_recalls("TestRecall", "Interval", 2030)) == ["externe"]
@@ -0,0 +1,98 @@
+"""Tests du pool de processus de rendu PDF (report_render_pool)."""
+
+import pytest
+
+from app.extensions import db as _db
+from app.models.filter_result import FilterResultDB
+from app.models.scan import ScanLog
+from app.services.report_render_pool import (
+    RenderError,
+    RenderMemoryExceeded,
+    RenderPool,
+    RenderTimeout,
+    render_in_pool,
+)
+from app.services.report_service import load_fpdf_report_inputs, render_fpdf_report
+
+
+@pytest.fixture()
+def fpdf_inputs(app, db):
+    """Entrees d'un rapport fpdf2 (picklables) pour un scan de test."""
+    with app.app_context():
+        scan = ScanLog(
+            url="https://www.leboncoin.fr/voitures/pool.htm",
+            score=58,
+            vehicle_make="Renault",
+            vehicle_model="Clio",
+            price_eur=9800,
+            raw_data={"year": 2017, "km": 98000, "fuel": "Essence"},
+        )
+        _db.session.add(scan)
+        _db.session.flush()
+        _db.session.add(
+            FilterResultDB(
+                scan_id=scan.id, filter_id="L4", status="warning", score=0.5, message="Prix"
+            )
+        )
+        _db.session.commit()
+        return load_fpdf_report_inputs(scan.id)
+
+
+@pytest.fixture()
+def pool():
+    pool = RenderPool(size=1, timeout=60)
+    yield pool
+    pool.close()
+
+
+class TestFpdfInputs:
+    def test_render_without_app_or_session(self, app, fpdf_inputs):
+        # Copies detachees : rendu possible hors contexte Flask (pool de rendu)
+        assert fpdf_inputs.load_logo is False
+        assert fpdf_inputs.filter_results[0].filter_id == "L4"
+        assert render_fpdf_report(fpdf_inputs).startswith(b"%PDF-")
+
+    def test_unknown_scan_raises(self, app):
+        with app.app_context(), pytest.raises(ValueError):
+            load_fpdf_report_inputs(999999)
+
+
+class TestRenderPool:
+    def test_renders_in_a_reused_process(self, pool, fpdf_inputs):
+        first = pool.render("fpdf", fpdf_inputs)
+        worker = pool._idle.queue[0]
+        second = pool.render("fpdf", fpdf_inputs)
+        assert first.startswith(b"%PDF-") and second.startswith(b"%PDF-")
+        assert pool._idle.queue[0] is worker
+        assert worker.process.pid != 0
+
+    def test_renderer_error_keeps_the_process(self, pool):
+        with pytest.raises(RenderError, match="AttributeError"):
+            pool.render("fpdf", None)
+        assert pool._workers == 1
+        assert pool._idle.queue[0].alive()
+
+    def test_timeout_kills_and_replaces_the_process(self, pool, fpdf_inputs):
+        pool.timeout = 0.001  # le processus n'a meme pas fini de demarrer
+        with pytest.raises(RenderTimeout):
+            pool.render("fpdf", fpdf_inputs)
+        assert pool._workers == 0
+
+        pool.timeout = 60
+        assert pool.render("fpdf", fpdf_inputs).startswith(b"%PDF-")
+
+    def test_memory_limit(self, fpdf_inputs):
+        pool = RenderPool(size=1, timeout=60, max_rss_mb=1)
+        try:
+            with pytest.raises(RenderMemoryExceeded):
+                pool.render("fpdf", fpdf_inputs)
+            assert pool._workers == 0
+        finally:
+            pool.close()
+
+
+class TestRenderInPool:
+    def test_local_render_when_pool_is_disabled(self, app, fpdf_inputs):
+        with app.app_context():
+            assert app.config["REPORT_RENDER_POOL_SIZE"] == 0
+            assert render_in_pool("fpdf", fpdf_inputs).startswith(b"%PDF-")
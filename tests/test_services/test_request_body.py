@@ -0,0 +1,79 @@
+"""Tests de la lecture des corps compresses (app/services/request_body.py)."""
+
+import gzip
+import io
+import json
+from datetime import date
+
+import brotli
+import pytest
+
+from app.errors import RequestBodyError
+from app.extensions import db
+from app.models.api_traffic_stat import ApiTrafficStat
+from app.services.api_traffic_service import record_request_bytes, traffic_summary
+from app.services.request_body import decode_body, parse_content_encoding
+
+PAYLOAD = json.dumps({"next_data": {"props": {"pageProps": {"x": list(range(5000))}}}}).encode()
+
+
+class TestDecodeBody:
+    @pytest.mark.parametrize(
+        "encoding, compress",
+        [("identity", bytes), ("gzip", gzip.compress), ("br", brotli.compress)],
+    )
+    def test_roundtrip(self, encoding, compress):
+        wire = compress(PAYLOAD)
+        body, received = decode_body(io.BytesIO(wire), encoding, max_bytes=len(PAYLOAD))
+        assert body == PAYLOAD
+        assert received == len(wire)
+
+    @pytest.mark.parametrize(
+        "encoding, compress", [("gzip", gzip.compress), ("br", brotli.compress)]
+    )
+    def test_bomb_is_cut_at_the_limit(self, encoding, compress):
+        bomb = compress(b"0" * (50 * 1024 * 1024))
+        with pytest.raises(RequestBodyError) as exc:
+            decode_body(io.BytesIO(bomb), encoding, max_bytes=1024 * 1024)
+        assert exc.value.status == 413
+        assert exc.value.code == "PAYLOAD_TOO_LARGE"
+
+    def test_wire_size_is_capped(self):
+        with pytest.raises(RequestBodyError) as exc:
+            decode_body(io.BytesIO(b"x" * 5000), "identity", max_bytes=4096)
+        assert exc.value.status == 413
+
+    @pytest.mark.parametrize(
+        "encoding, compress", [("gzip", gzip.compress), ("br", brotli.compress)]
+    )
+    def test_truncated_or_garbage_stream(self, encoding, compress):
+        for wire in (compress(PAYLOAD)[:-8], b"not compressed at all"):
+            with pytest.raises(RequestBodyError) as exc:
+                decode_body(io.BytesIO(wire), encoding)
+            assert exc.value.status == 400
+
+    def test_content_encoding_header(self):
+        assert parse_content_encoding(None) == "identity"
+        assert parse_content_encoding(" GZIP ") == "gzip"
+        with pytest.raises(RequestBodyError) as exc:
+            parse_content_encoding("gzip, br")
+        assert exc.value.status == 415
+
+
+class TestTrafficStats:
+    def test_counters_accumulate_per_day_and_encoding(self, app):
+        day = date(2001, 1, 2)
+        record_request_bytes("bench-ep", "gzip", 100, 1000, day=day)
+        record_request_bytes("bench-ep", "gzip", 300, 3000, day=day)
+        record_request_bytes("bench-ep", "identity", 500, 500, day=day)
+        db.session.commit()
+
+        row = ApiTrafficStat.query.filter_by(day=day, content_encoding="gzip").one()
+        assert (row.request_count, row.bytes_in, row.bytes_decoded) == (2, 400, 4000)
+
+        summary = traffic_summary(days=1, today=day)
+        assert summary["requests"] == 3
+        assert summary["compressed_requests"] == 2
+        assert summary["bytes_in"] == 900
+        assert summary["saved_pct"] == round((1 - 900 / 4500) * 100, 1)
+        assert summary["by_endpoint"][0]["avg_bytes_in"] == 500
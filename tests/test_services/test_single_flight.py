@@ -0,0 +1,98 @@
+"""Tests du single-flight en memoire (app/services/single_flight.py)."""
+
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    results = [None] * n
+    threads = [
+        threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(n)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_the_leader_result(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(2)
+            return "verdict"
+
+        def call():
+            return flight.do("ad-1", slow, timeout=5)
+
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        results = _run_concurrently(5, call)
+        assert len(calls) == 1
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert {value for value, _ in results} == {"verdict"}
+        assert flight.in_flight() == 0
+
+    def test_sequential_calls_are_not_deduplicated(self):
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == (1, False)
+        assert flight.do("k", lambda: 2) == (2, False)
+
+    def test_leader_error_is_raised_and_followers_recompute(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        calls = []
+
+        def failing():
+            calls.append(threading.get_ident())
+            if len(calls) == 1:
+                started.set()
+                time.sleep(0.2)
+                raise RuntimeError("boom")
+            return "retry"
+
+        leader_error = []
+
+        def leader():
+            try:
+                flight.do("k", failing)
+            except RuntimeError as exc:
+                leader_error.append(exc)
+
+        t = threading.Thread(target=leader)
+        t.start()
+        started.wait(1)
+        assert flight.do("k", failing, timeout=5) == ("retry", False)
+        t.join()
+        assert len(leader_error) == 1
+        assert len(calls) == 2
+
+    def test_follower_timeout_falls_back(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.5)
+            return "slow"
+
+        t = threading.Thread(target=lambda: flight.do("k", slow))
+        t.start()
+        started.wait(1)
+        assert flight.do("k", lambda: "own", timeout=0.05) == ("own", False)
+        t.join()
+
+    def test_other_keys_are_independent(self):
+        flight = SingleFlight()
+        with pytest.raises(ValueError):
+            flight.do("a", lambda: (_ for _ in ()).throw(ValueError("x")))
+        assert flight.do("b", lambda: "ok") == ("ok", False)
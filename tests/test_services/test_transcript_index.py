@@ -0,0 +1,153 @@
+"""Tests de l'index BM25 des passages de transcripts (transcript_index)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.extensions import db as _db
+from app.models.youtube import TranscriptChunk, YouTubeTranscript, YouTubeVideo
+from app.services import transcript_index
+from app.services.transcript_index import (
+    ensure_transcript_index,
+    fts_query,
+    index_transcript,
+    retrieve_passages,
+)
+from app.services.youtube_service import extract_and_store_transcript
+
+FILLER = "Le presentateur parle du design et de la couleur de la carrosserie. " * 12
+
+
+def _video(video_id, full_text=None, status="extracted"):
+    video = YouTubeVideo(video_id=video_id, title=f"Essai {video_id}", channel_name="Ch")
+    _db.session.add(video)
+    _db.session.flush()
+    if full_text is not None:
+        _db.session.add(
+            YouTubeTranscript(
+                video_db_id=video.id,
+                language="fr",
+                full_text=full_text,
+                status=status,
+                char_count=len(full_text),
+            )
+        )
+    _db.session.commit()
+    return video
+
+
+@pytest.fixture()
+def videos(app):
+    created = []
+
+    def make(video_id, full_text=None, status="extracted"):
+        video = _video(video_id, full_text, status)
+        created.append(video.id)
+        return video
+
+    yield make
+    # delete() unitaire : la cascade ORM supprime transcripts et passages
+    for video_db_id in created:
+        video = _db.session.get(YouTubeVideo, video_db_id)
+        if video is not None:
+            _db.session.delete(video)
+    _db.session.commit()
+
+
+def _fts_match(term):
+    """rowids de l'index FTS (et non de la table de contenu) pour un terme."""
+    rows = _db.session.execute(
+        _db.text(f"SELECT rowid FROM {transcript_index.FTS_TABLE} WHERE text MATCH :q"),
+        {"q": term},
+    )
+    return {row[0] for row in rows}
+
+
+def test_fts5_available_on_sqlite(app):
+    assert ensure_transcript_index() is True
+
+
+def test_fts_query_builds_prefix_or_terms():
+    assert fts_query("Fiab panne, (turbo)") == '"fiab"* OR "panne"* OR "turbo"*'
+    assert fts_query("  ") == ""
+
+
+def test_store_indexes_transcript(app, videos):
+    video = videos("IDXSTORE01")
+    text = FILLER + "La consommation reste autour de 6 litres aux cent."
+    result = {
+        "language": "fr",
+        "is_generated": True,
+        "full_text": text,
+        "snippets": [],
+        "snippet_count": 0,
+        "char_count": len(text),
+    }
+    with patch("app.services.youtube_service.fetch_transcript", return_value=result):
+        transcript = extract_and_store_transcript(video)
+
+    chunks = transcript.chunks
+    assert len(chunks) > 1
+    assert [c.position for c in chunks] == list(range(len(chunks)))
+    assert all(c.video_db_id == video.id for c in chunks)
+    assert {c.id for c in chunks} & _fts_match("litres") == {chunks[-1].id}
+
+
+def test_retrieval_returns_relevant_passages_only(app, videos):
+    faults = "Attention aux pannes de turbo et a l'embrayage qui patine vers 80 000 km. "
+    conso = "Sur autoroute la consommation monte a 7 litres. "
+    a = videos("IDXTOPK01", FILLER + faults + FILLER)
+    b = videos("IDXTOPK02", FILLER + conso + FILLER)
+    other = videos("IDXTOPK03", "Une autre voiture avec une panne de turbo. " + FILLER)
+
+    passages = retrieve_passages([a.id, b.id], top_k=2)
+
+    assert set(passages) == {a.id, b.id}
+    assert any("turbo" in p for p in passages[a.id])
+    assert any("consommation" in p for p in passages[b.id])
+    # Pas de passage "decor" seul, ni de video hors candidates
+    kept = sum(len(p) for group in passages.values() for p in group)
+    assert kept < len(a.transcript.full_text) + len(b.transcript.full_text)
+    assert other.id not in passages
+
+
+def test_retrieval_ignores_diacritics(app, videos):
+    video = videos("IDXACCENT1", FILLER + "Une fiabilité exemplaire, aucun problème signalé.")
+    passages = retrieve_passages([video.id], questions={"q": "fiabilite probleme"}, top_k=1)
+    assert "fiabilité" in passages[video.id][0]
+
+
+def test_retrieval_indexes_legacy_transcripts(app, videos):
+    video = videos("IDXLEGACY1", "Boite de vitesses fragile, revision couteuse.")
+    assert video.transcript.chunks == []
+
+    passages = retrieve_passages([video.id], top_k=3)
+
+    assert passages == {video.id: ["Boite de vitesses fragile, revision couteuse."]}
+    assert TranscriptChunk.query.filter_by(video_db_id=video.id).count() == 1
+
+
+def test_failed_transcripts_not_indexed(app, videos):
+    video = videos("IDXNOSUB01", "", status="no_subtitles")
+    assert index_transcript(video.transcript) == 0
+    assert retrieve_passages([video.id]) == {}
+
+
+def test_reindex_and_delete_keep_fts_in_sync(app, videos):
+    video = videos("IDXSYNC001", "Moteur bruyant a froid.")
+    index_transcript(video.transcript)
+    old_ids = [c.id for c in video.transcript.chunks]
+
+    video.transcript.full_text = "Chaine de distribution a surveiller."
+    index_transcript(video.transcript)
+    assert retrieve_passages([video.id], questions={"q": "bruyant"}, top_k=3) == {}
+    assert retrieve_passages([video.id], questions={"q": "distribution"}, top_k=3) == {
+        video.id: ["Chaine de distribution a surveiller."]
+    }
+
+    new_ids = [c.id for c in video.transcript.chunks]
+    _db.session.delete(video)
+    _db.session.commit()
+    assert TranscriptChunk.query.filter(TranscriptChunk.id.in_(new_ids)).count() == 0
+    assert not _fts_match("bruyant") & set(old_ids)
+    assert not _fts_match("distribution") & set(new_ids)
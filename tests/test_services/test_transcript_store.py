@@ -0,0 +1,138 @@
+"""Tests du stockage compresse et dedoublonne des transcripts (transcript_store)."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import inspect
+
+from app.extensions import db as _db
+from app.models.transcript_blob import TranscriptBlob, TranscriptContent
+from app.models.youtube import YouTubeTranscript, YouTubeVideo
+from app.services.transcript_store import (
+    compress_existing,
+    purge_unreferenced_blobs,
+    store_transcript,
+)
+from app.services.youtube_service import extract_and_store_transcript
+
+TEXT = "Essai longue duree : embrayage a surveiller, consommation de 6 litres. " * 200
+SNIPPETS = [{"text": "Essai longue duree", "start": 0.0, "duration": 2.5}]
+
+
+@pytest.fixture()
+def videos(app):
+    created = []
+
+    def make(video_id, full_text=None):
+        video = YouTubeVideo(video_id=video_id, title=f"Essai {video_id}", channel_name="Ch")
+        _db.session.add(video)
+        _db.session.flush()
+        if full_text is not None:
+            _db.session.add(
+                YouTubeTranscript(
+                    video_db_id=video.id,
+                    language="fr",
+                    full_text=full_text,
+                    snippets_json=SNIPPETS,
+                    status="extracted",
+                    char_count=len(full_text),
+                )
+            )
+        _db.session.commit()
+        created.append(video.id)
+        return video
+
+    yield make
+    for video_db_id in created:
+        video = _db.session.get(YouTubeVideo, video_db_id)
+        if video is not None:
+            _db.session.delete(video)
+    _db.session.commit()
+    purge_unreferenced_blobs()
+
+
+def _extract(video, text):
+    result = {
+        "language": "fr",
+        "is_generated": True,
+        "full_text": text,
+        "snippets": SNIPPETS,
+        "snippet_count": len(SNIPPETS),
+        "char_count": len(text),
+    }
+    with patch("app.services.youtube_service.fetch_transcript", return_value=result):
+        return extract_and_store_transcript(video)
+
+
+def test_extracted_transcript_stored_compressed(app, videos):
+    transcript = _extract(videos("STORE00001"), TEXT)
+
+    assert transcript.text == TEXT
+    assert transcript.snippets == SNIPPETS
+    assert transcript.full_text == ""
+    assert transcript.snippets_json is None
+    blob = transcript.content.text_blob
+    assert blob.raw_size == len(TEXT.encode("utf-8"))
+    assert blob.stored_size < blob.raw_size / 10
+
+
+def test_duplicate_content_shares_blob(app, videos):
+    first = _extract(videos("STOREDUP01"), TEXT)
+    mirror = _extract(videos("STOREDUP02"), TEXT)
+
+    assert mirror.content.text_blob_id == first.content.text_blob_id
+    assert mirror.content.snippets_blob_id == first.content.snippets_blob_id
+    blob_hash = first.content.text_blob.content_hash
+    assert TranscriptBlob.query.filter_by(content_hash=blob_hash).count() == 1
+
+
+def test_list_query_defers_text_columns(app, videos):
+    video = videos("STOREDEF01", "texte historique non migre")
+    _db.session.expire_all()
+
+    transcript = YouTubeTranscript.query.filter_by(video_db_id=video.id).one()
+    unloaded = inspect(transcript).unloaded
+    assert {"full_text", "snippets_json", "content"} <= unloaded
+    assert transcript.text == "texte historique non migre"
+
+
+def test_compress_existing_migrates_and_dedups(app, videos):
+    a = videos("STOREMIG01", TEXT)
+    b = videos("STOREMIG02", TEXT)
+
+    stats = compress_existing(batch_size=1)
+
+    assert stats["transcripts"] >= 2
+    assert stats["blobs_reused"] >= 2
+    assert stats["bytes_after"] < stats["bytes_before"]
+    for video in (a, b):
+        transcript = _db.session.get(YouTubeVideo, video.id).transcript
+        assert transcript.full_text == ""
+        assert transcript.text == TEXT
+        assert transcript.snippets == SNIPPETS
+    assert compress_existing()["transcripts"] == 0
+
+
+def test_delete_transcript_drops_link_and_purge_drops_blob(app, videos):
+    video = videos("STOREDEL01")
+    transcript = _extract(video, TEXT + " unique")
+    transcript_id, blob_id = transcript.id, transcript.content.text_blob_id
+
+    _db.session.delete(video)
+    _db.session.commit()
+
+    assert _db.session.get(TranscriptContent, transcript_id) is None
+    assert purge_unreferenced_blobs() >= 1
+    assert _db.session.get(TranscriptBlob, blob_id) is None
+
+
+def test_reextraction_replaces_content(app, videos):
+    video = videos("STOREREX01")
+    transcript = _extract(video, TEXT)
+    store_transcript(transcript, "Nouveau texte", None)
+    _db.session.commit()
+
+    _db.session.expire_all()
+    transcript = _db.session.get(YouTubeVideo, video.id).transcript
+    assert transcript.text == "Nouveau texte"
+    assert transcript.snippets is None
@@ -12,6 +12,8 @@ from app.services.vehicle_lookup import (
     is_generic_model,
     normalize_brand,
     normalize_model,
+    resolve_vehicles,
+    use_resolved_vehicles,
 )
 
 
@@ -328,3 +330,32 @@ class TestFindVehicle:
             assert find_vehicle("Land-Rover", "Defender") is not None
             assert find_vehicle("LAND-ROVER", "defender") is not None
             assert find_vehicle("Land Rover", "Defender") is not None
+
+
+class TestResolvedVehicles:
+    """Lot d'annonces : chaque modele n'est resolu qu'une fois."""
+
+    def test_resolve_once_per_model(self, app):
+        with app.app_context():
+            TestFindVehicle()._seed_vehicles()
+            resolved = resolve_vehicles(
+                [("VW", "Golf"), ("Volkswagen", "Golf"), ("Batchless", "Ghostcar"), (None, "X")]
+            )
+            golf = find_vehicle("Volkswagen", "Golf")
+            assert resolved == {
+                ("volkswagen", "golf"): golf.id,
+                ("batchless", "ghostcar"): None,
+            }
+
+    def test_find_vehicle_reads_resolution(self, app):
+        with app.app_context():
+            TestFindVehicle()._seed_vehicles()
+            golf = find_vehicle("VW", "Golf")
+            peugeot = find_vehicle("Peugeot", "3008")
+            # Resolution imposee : find_vehicle ne consulte plus la table
+            with use_resolved_vehicles(
+                {("volkswagen", "golf"): None, ("peugeot", "3008"): golf.id}
+            ):
+                assert find_vehicle("VW", "Golf") is None
+                assert find_vehicle("Peugeot", "3008").id == golf.id
+            assert find_vehicle("Peugeot", "3008").id == peugeot.id
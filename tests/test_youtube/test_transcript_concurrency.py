@@ -0,0 +1,177 @@
+"""Extraction concurrente des transcripts contre un faux serveur YouTube local.
+
+Le serveur de test repond aux extractions avec une latence fixe et note
+l'heure d'arrivee de chaque requete : on mesure le gain de temps reel du
+pool par rapport a l'extraction une par une, et l'espacement impose par le
+limiteur par hote.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+import orjson
+import pytest
+
+from app.extensions import db as _db
+from app.models.youtube import YouTubeVideo
+from app.services.youtube_service import HostRateLimiter, search_and_extract_custom
+
+LATENCY = 0.15
+VIDEO_COUNT = 12
+
+
+class _TranscriptServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _TranscriptHandler)
+        self.lock = threading.Lock()
+        self.arrivals: list[float] = []
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _TranscriptHandler(BaseHTTPRequestHandler):
+    """GET /transcript/<video_id> ; "NOSUB" dans l'id = pas de sous-titres."""
+
+    def do_GET(self):  # noqa: N802 -- API http.server
+        server = self.server
+        with server.lock:
+            server.arrivals.append(time.monotonic())
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(LATENCY)
+        with server.lock:
+            server.active -= 1
+
+        video_id = self.path.rsplit("/", 1)[-1]
+        if "NOSUB" in video_id:
+            self.send_response(404)
+            self.end_headers()
+            return
+        text = f"Essai de la video {video_id}, fiabilite et consommation."
+        body = orjson.dumps(
+            {
+                "language": "fr",
+                "is_generated": True,
+                "full_text": text,
+                "snippets": [],
+                "snippet_count": 0,
+                "char_count": len(text),
+            }
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def transcript_server():
+    server = _TranscriptServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def youtube_stub(app, transcript_server):
+    """search_videos et fetch_transcript rediriges vers le serveur local."""
+
+    def fetch(video_id):
+        resp = httpx.get(f"{transcript_server.base_url}/transcript/{video_id}", timeout=5)
+        return resp.json() if resp.status_code == 200 else None
+
+    def search(query, max_results=5, extract_metadata=True):
+        prefix = query.split()[0]
+        return [
+            {"id": f"{prefix}{i:02d}", "title": f"Essai {i}", "channel": "Ch", "duration": 600}
+            for i in range(VIDEO_COUNT)
+        ]
+
+    with (
+        patch("app.services.youtube_service.fetch_transcript", side_effect=fetch),
+        patch("app.services.youtube_service.search_videos", side_effect=search),
+        patch("app.services.youtube_service._host_limiter", HostRateLimiter()),
+    ):
+        yield transcript_server
+    # delete() unitaire : la cascade ORM supprime aussi les transcripts
+    for video in YouTubeVideo.query.filter(YouTubeVideo.video_id.like("CONC%")).all():
+        _db.session.delete(video)
+    _db.session.commit()
+
+
+def _run(app, prefix, workers, interval=0.0, **kwargs):
+    app.config["YOUTUBE_EXTRACT_WORKERS"] = workers
+    app.config["YOUTUBE_REQUEST_INTERVAL"] = interval
+    try:
+        t0 = time.monotonic()
+        stats = search_and_extract_custom(prefix, None, max_results=VIDEO_COUNT, **kwargs)
+        return stats, time.monotonic() - t0
+    finally:
+        app.config.pop("YOUTUBE_EXTRACT_WORKERS")
+        app.config["YOUTUBE_REQUEST_INTERVAL"] = 0.0
+
+
+class TestConcurrentExtraction:
+    def test_pool_cuts_wall_time(self, app, youtube_stub):
+        sequential, seq_time = _run(app, "CONCSEQ", workers=1)
+        concurrent, conc_time = _run(app, "CONCPAR", workers=4)
+
+        assert sequential["transcripts_ok"] == concurrent["transcripts_ok"] == VIDEO_COUNT
+        assert seq_time >= VIDEO_COUNT * LATENCY
+        assert youtube_stub.peak == 4
+        # 12 videos a 4 threads : ~3 latences au lieu de 12 (+ ecritures en base)
+        assert conc_time < seq_time / 2
+
+    def test_progress_streamed_and_failures_counted(self, app, youtube_stub):
+        progress = []
+        stats, _ = _run(
+            app, "CONCNOSUB", workers=4, on_progress=lambda done, total: progress.append(done)
+        )
+        assert stats["transcripts_failed"] == VIDEO_COUNT
+        assert progress == list(range(VIDEO_COUNT + 1))
+        video = YouTubeVideo.query.filter_by(video_id="CONCNOSUB00").one()
+        assert video.transcript.status == "no_subtitles"
+        assert len(stats["video_ids"]) == VIDEO_COUNT
+
+    def test_rate_limit_spaces_requests_per_host(self, app, youtube_stub):
+        _run(app, "CONCRATE", workers=4, interval=0.05)
+        arrivals = youtube_stub.arrivals
+        assert len(arrivals) == VIDEO_COUNT
+        # Sans limiteur, 12 requetes a 4 threads arrivent en ~3 latences ;
+        # tolerance pour l'ordonnancement des threads
+        assert arrivals[-1] - arrivals[0] >= (VIDEO_COUNT - 1) * 0.05 * 0.9
+
+    def test_already_extracted_videos_are_skipped(self, app, youtube_stub):
+        _run(app, "CONCSKIP", workers=4)
+        stats, _ = _run(app, "CONCSKIP", workers=4)
+        assert stats["transcripts_skipped"] == VIDEO_COUNT
+        assert len(youtube_stub.arrivals) == VIDEO_COUNT
+
+    def test_cancel_abandons_pending_extractions(self, app, youtube_stub):
+        stats, _ = _run(app, "CONCSTOP", workers=2, should_stop=lambda: True)
+        assert stats["transcripts_ok"] < VIDEO_COUNT
+        assert len(youtube_stub.arrivals) < VIDEO_COUNT
+
+
+def test_host_rate_limiter_is_per_host():
+    limiter = HostRateLimiter()
+    assert limiter.wait("a", 10) == 0
+    assert limiter.wait("b", 10) == 0
+    with patch("app.services.youtube_service.time.sleep") as sleep:
+        assert limiter.wait("a", 10) > 9
+    sleep.assert_called_once()
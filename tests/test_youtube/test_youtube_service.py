@@ -362,10 +362,9 @@ class TestExtractAndStoreTranscript:
 class TestSearchAndExtractForVehicle:
     """Tests du pipeline complet pour un vehicule."""
 
-    @patch("app.services.youtube_service.extract_and_store_transcript")
+    @patch("app.services.youtube_service.fetch_transcript")
     @patch("app.services.youtube_service.search_videos")
-    @patch("app.services.youtube_service.time")
-    def test_full_pipeline(self, mock_time, mock_search, mock_extract, app):
+    def test_full_pipeline(self, mock_search, mock_fetch, app):
         with app.app_context():
             vehicle = Vehicle(brand="PipelineBrand", model="PipelineModel")
             _db.session.add(vehicle)
@@ -376,15 +375,21 @@ class TestSearchAndExtractForVehicle:
                 {"id": "PIPE_V2", "title": "Video 2", "channel": "Ch2", "duration": 400},
             ]
 
-            mock_transcript = MagicMock()
-            mock_transcript.status = "extracted"
-            mock_extract.return_value = mock_transcript
+            mock_fetch.return_value = {
+                "language": "fr",
+                "is_generated": True,
+                "full_text": "Essai complet du vehicule",
+                "snippets": [],
+                "snippet_count": 0,
+                "char_count": 25,
+            }
 
             stats = search_and_extract_for_vehicle(vehicle, max_videos=2)
 
             assert stats["videos_found"] == 2
             assert stats["transcripts_ok"] == 2
             assert stats["transcripts_failed"] == 0
+            assert mock_fetch.call_count == 2
 
             # Cleanup
             for v in YouTubeVideo.query.filter(